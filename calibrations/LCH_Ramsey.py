@@ -7,7 +7,9 @@ from qualibration_libs.parameters import get_qubits, get_idle_times_in_clock_cyc
 from qualibration_libs.runtime import simulate_and_plot
 
 from customized.probes import qubit_ramsey as probe
+from customized.node import _repeat
 from customized.node.LCH_Ramsey import Parameters, analysis, update
+from customized.run_index import record_node
 
 
 # %% {Description}
@@ -23,6 +25,10 @@ description = """
         This node is a thin qualibrate shell: the acquisition probe lives in
         `customized.probes.ramsey` (shared with scqo); the scqat analysis adapter
         and update policy live in `customized.node.LCH_Ramsey`.
+
+        With `repeats` > 1 the program is compiled once and run `repeats` times
+        from the QM job queue; each run is stored as `ds_raw_<i>` and fitted, and
+        the state update uses the last run (see `customized.node._repeat`).
 """
 
 node = QualibrationNode[Parameters, Quam](name="LCH_Ramsey", description=description, parameters=Parameters())
@@ -84,7 +90,21 @@ def simulate_qua_program(node: QualibrationNode[Parameters, Quam]):
 # %% {Execute}
 @node.run_action(skip_if=node.parameters.load_data_id is not None or node.parameters.simulate)
 def execute_qua_program(node: QualibrationNode[Parameters, Quam]):
-    """probe (run half): execute on the QOP and store the raw dataset as "ds_raw"."""
+    """probe (run half): execute on the QOP and store the raw dataset as "ds_raw"
+    (one "ds_raw_<i>" per run in repeat mode)."""
+    if node.parameters.repeats > 1:
+        _repeat.store_repeats(
+            node.results,
+            probe.acquire_repeated(
+                node.machine,
+                node.namespace["qua_program"],
+                node.namespace["sweep_axes"],
+                repeats=node.parameters.repeats,
+                timeout=node.parameters.timeout,
+                log=node.log,
+            ),
+        )
+        return
     node.results["ds_raw"] = probe.acquire(
         node.machine,
         node.namespace["qua_program"],
@@ -110,11 +130,22 @@ def load_data(node: QualibrationNode[Parameters, Quam]):
 # %% {Analyse_data}
 @node.run_action(skip_if=node.parameters.simulate)
 def analyse_data(node: QualibrationNode[Parameters, Quam]):
-    """estimate: fit each qubit's probed Ramsey with scqat's RamseyEstimator (via the core)."""
-    node.results["fit_results"], node.results["figures"] = analysis.fit(
-        node.results["ds_raw"],
-        use_state_discrimination=node.parameters.use_state_discrimination,
-    )
+    """estimate: fit each qubit's probed Ramsey with scqat's RamseyEstimator (via the core).
+    In repeat mode every run is fitted ("repeat_fit_results"); "fit_results" and
+    "figures" are the last run's."""
+    repeats = _repeat.repeated_datasets(node.results)
+    if not repeats:
+        repeats = [("ds_raw", node.results["ds_raw"])]
+    per_run, figures = {}, None
+    for key, ds_raw in repeats:
+        _repeat.close_figures(figures)
+        per_run[key], figures = analysis.fit(
+            ds_raw,
+            use_state_discrimination=node.parameters.use_state_discrimination,
+        )
+    node.results["fit_results"], node.results["figures"] = per_run[key], figures
+    if len(per_run) > 1:
+        node.results["repeat_fit_results"] = per_run
 
 
 # %% {Update_state}
@@ -131,3 +162,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
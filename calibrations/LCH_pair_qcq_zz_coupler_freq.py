@@ -19,6 +19,7 @@ from customized.node.LCH_pair_qcq_zz_coupler_freq import (
     plot_zz_vs_coupler,
     process_raw_dataset,
 )
+from customized.run_index import record_node
 
 # %% {Initialisation}
 description = """
@@ -243,6 +244,7 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 def save_results(node: QualibrationNode[Parameters, Quam]):
     """Save the calibration results to the node storage."""
     node.save()
+    record_node(node)
 
 
 # %%
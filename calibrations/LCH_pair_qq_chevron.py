@@ -8,6 +8,7 @@ from qualibration_libs.parameters import get_qubit_pairs
 from qualibration_libs.runtime import simulate_and_plot
 
 from customized.probes import pair_qq_chevron as probe
+from customized.run_index import record_node
 
 
 # %% {Description}
@@ -144,3 +145,4 @@ def plot_data(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
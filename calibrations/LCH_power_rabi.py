@@ -8,6 +8,7 @@ from qualibration_libs.parameters import get_qubits
 from qualibration_libs.runtime import simulate_and_plot
 
 from customized.probes import qubit_power_rabi as probe
+from customized.run_index import record_node
 
 
 # %% {Description}
@@ -173,3 +174,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
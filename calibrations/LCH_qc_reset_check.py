@@ -8,6 +8,7 @@ from qualibration_libs.parameters import get_qubits
 from qualibration_libs.runtime import simulate_and_plot
 
 from customized.probes import qc_reset_check as probe
+from customized.run_index import record_node
 
 
 # %% {Description}
@@ -157,3 +158,4 @@ def plot_data(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
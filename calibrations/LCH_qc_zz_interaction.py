@@ -15,6 +15,7 @@ from customized.node.LCH_qc_zz_interaction import (
     log_fitted_results,
     plot_raw_data_with_fit,
 )
+from customized.run_index import record_node
 
 
 # %% {Description}
@@ -141,3 +142,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
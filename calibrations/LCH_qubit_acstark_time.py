@@ -10,6 +10,7 @@ from qualibration_libs.parameters import get_qubits
 from qualibration_libs.runtime import simulate_and_plot
 
 from customized.probes import qubit_acstark_time as probe
+from customized.run_index import record_node
 
 # %% {Description}
 description = """
@@ -152,3 +153,4 @@ def plot_data(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
@@ -10,6 +10,7 @@ from qualibration_libs.runtime import simulate_and_plot
 
 from customized.probes import qubit_parametric_drive_fixed_time as probe
 from customized.node.LCH_qubit_parametric_drive_fixed_time import Parameters
+from customized.run_index import record_node
 
 
 # %% {Node initialisation}
@@ -170,3 +171,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
@@ -14,6 +14,7 @@ from customized.node.LCH_qubit_spectroscopy import (
     Parameters,
     log_fitted_results,
 )
+from customized.run_index import record_node
 
 
 # %% {Node initialisation}
@@ -289,3 +290,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
@@ -17,6 +17,7 @@ from customized.node.LCH_qubit_spectroscopy_flux import (
     log_fitted_results,
     plot_combined,
 )
+from customized.run_index import record_node
 
 
 # %% {Description}
@@ -191,3 +192,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
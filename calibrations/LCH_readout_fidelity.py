@@ -11,6 +11,7 @@ from customized.probes import readout_fidelity as probe
 from customized.node.LCH_readout_fidelity import (
     Parameters,
 )
+from customized.run_index import record_node
 
 
 # %% {Description}
@@ -179,3 +180,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
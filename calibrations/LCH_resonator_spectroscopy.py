@@ -11,6 +11,7 @@ from qualibration_libs.runtime import simulate_and_plot
 
 from customized.probes import resonator_spectroscopy as probe
 from customized.node.LCH_resonator_spectroscopy import Parameters, analysis, update
+from customized.run_index import record_node
 
 # %% {Node initialisation}
 description = """
@@ -155,3 +156,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
@@ -20,6 +20,7 @@ from customized.node.LCH_resonator_spectroscopy_flux import (
     log_dispersion_results,
     plot_combined,
 )
+from customized.run_index import record_node
 
 
 # %% {Node initialisation}
@@ -309,3 +310,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
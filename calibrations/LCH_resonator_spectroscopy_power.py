@@ -13,6 +13,7 @@ from qualibration_libs.core import tracked_updates
 
 from customized.probes import resonator_spectroscopy_power as probe
 from customized.node.LCH_resonator_spectroscopy_power import Parameters, analysis, update
+from customized.run_index import record_node
 
 # %% {Node initialisation}
 description = """
@@ -206,3 +207,4 @@ def update_state(node: QualibrationNode[Parameters, Quam]):
 @node.run_action()
 def save_results(node: QualibrationNode[Parameters, Quam]):
     node.save()
+    record_node(node)
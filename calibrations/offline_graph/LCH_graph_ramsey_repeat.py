@@ -6,6 +6,8 @@ from qualibrate.qualibration_graph import QualibrationGraph
 from qualibrate.qualibration_library import QualibrationLibrary
 from typing import List, Optional, Literal
 
+from customized.node._repeat import repeat_chain
+
 library = QualibrationLibrary.get_active_library()
 
 
@@ -14,25 +16,26 @@ class Parameters(GraphParameters):
     multiplexed: bool = True
     use_state_discrimination: bool = True
 
-nodes = {}
 repeat_times = 200
-for i in range(repeat_times): 
-    nodes[f"LCH_Ramsey_{i}"] = library.nodes["LCH_Ramsey"].copy(
-            name=f"LCH_Ramsey_{i}",
-            multiplexed = True, 
-            reset_type = "active",
-            frequency_detuning_in_mhz=0.25,
-            min_wait_time_in_ns=16,
-            max_wait_time_in_ns = 80000,
-            wait_time_num_points = 100,
-            use_state_discrimination = True,
-            log_or_linear_sweep = "linear",
-            num_shots = 200,
-        )
-
-connectivity = []
-for i in range(repeat_times-1):
-    connectivity.append((f"LCH_Ramsey_{i}", f"LCH_Ramsey_{i+1}"))
+# True: ONE LCH_Ramsey node compiles the program once and queues all repeats on the QM
+# (each run saved as ds_raw_<i>; the frequency update applies once, from the last run).
+# False: the chain of `repeat_times` LCH_Ramsey copies, each updating f_01 before the next.
+compile_once = True
+nodes, connectivity = repeat_chain(
+    library,
+    "LCH_Ramsey",
+    repeats=repeat_times,
+    compile_once=compile_once,
+    multiplexed = True,
+    reset_type = "active",
+    frequency_detuning_in_mhz=0.25,
+    min_wait_time_in_ns=16,
+    max_wait_time_in_ns = 80000,
+    wait_time_num_points = 100,
+    use_state_discrimination = True,
+    log_or_linear_sweep = "linear",
+    num_shots = 200,
+)
 
 g = QualibrationGraph(
     name="LCH_graph_ramsey_repeat",
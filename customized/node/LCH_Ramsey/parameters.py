@@ -7,6 +7,8 @@ from qualibration_libs.parameters import (
     IdleTimeNodeParameters,
 )
 
+from customized.node._repeat import RepeatNodeParameters
+
 
 class NodeSpecificParameters(RunnableParameters):
     num_shots: int = 100
@@ -20,6 +22,7 @@ class Parameters(
     CommonNodeParameters,
     IdleTimeNodeParameters,
     NodeSpecificParameters,
+    RepeatNodeParameters,
     QubitsExperimentNodeParameters,
 ):
     """Parameter set for LCH_Ramsey (lab-owned; not the vendored calibration_utils copy)."""
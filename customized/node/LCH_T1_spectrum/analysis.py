@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from typing import Tuple
 from qualibrate import QualibrationNode
 from qualibration_libs.data import convert_IQ_to_V
-from qualibration_libs.analysis import fit_decay_exp
+from customized.node._batched_fit import fit_decay_exp
 
 
 @dataclass
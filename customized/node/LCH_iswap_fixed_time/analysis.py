@@ -5,49 +5,11 @@ from typing import Dict, Tuple
 import numpy as np
 import xarray as xr
 from qualibrate import QualibrationNode
-from qualibration_libs.analysis.fitting import fit_oscillation_decay_exp, oscillation_decay_exp
 from qualibration_libs.data import convert_IQ_to_V
-from scipy.optimize import curve_fit
 
 from quam.components.quantum_components import qubit
 
-
-def rabi_chevron_model(ft, J, f0, a, offset):
-    """Model the Rabi chevron response for a driven two-level (or effective two-qubit CZ) system."""
-    f, t = ft
-    J = J
-    det = (f - f0) / 2
-    # g = offset+a * np.sin(2*np.pi*np.sqrt(J**2 + (w-w0)**2) * t)**2*np.exp(-tau*np.abs((w-w0)))
-    g = offset + a * (J**2) / (J**2 + det**2) * np.sin(2 * np.pi * np.sqrt(J**2 + det**2) * t) ** 2
-
-    return g.ravel()
-
-
-def fit_rabi_chevron(ds_qp, init_length, init_detuning):
-    """Fit a Rabi chevron dataset to extract coupling (J), resonance frequency (f0), amplitude, and offset."""
-    if hasattr(ds_qp, "state_target"):
-        data = ds_qp.state_target
-    else:
-        data = ds_qp.I_target
-
-    try:
-        da_target = data
-        exp_data = da_target.values
-        detuning = da_target.detuning[0]
-        time = da_target.time * 1e-9
-        t, f = np.meshgrid(time, detuning)
-        initial_guess = (1e9 / init_length, init_detuning[0], -1, 1.0)
-        fdata = np.vstack((f.ravel(), t.ravel()))
-        tdata = exp_data.ravel()
-        popt, pcov = curve_fit(rabi_chevron_model, fdata, tdata, p0=initial_guess)
-        J = popt[0]
-        f0 = popt[1]
-        a = popt[2]
-        offset = popt[3]
-        return J, f0, a, offset
-    except Exception as e:
-        # Return NaN values if fitting fails
-        return float("nan"), float("nan"), float("nan"), float("nan")
+from customized.node._chevron_fit import fit_chevron_cz
 
 
 @dataclass
@@ -104,57 +66,6 @@ def log_fitted_results(fit_results: Dict, log_callable=None):
         log_callable(s_qubit + cz_len_str + "\n" + cz_amp_str)
 
 
-def fit_chevron_cz(ds, dim):
-    def fit_routine(ds_qp):
-        if hasattr(ds_qp, "state_target"):
-            data = ds_qp.state_target
-        else:
-            data = ds_qp.I_target
-        try:
-            # ds_qp is a Dataset for a single qubit_pair
-            amp_guess = data.max("time") - data.min("time")
-            flux_amp_idx = int(amp_guess.argmax())
-            flux_amp = float(ds_qp.amp_full[0][flux_amp_idx])
-
-            # Try the preliminary oscillation fit
-            try:
-                fit_data = fit_oscillation_decay_exp(data.isel(amplitude=flux_amp_idx), "time")
-                flux_time = int(1 / fit_data.sel(fit_vals="f"))
-            except Exception:
-                # If preliminary fit fails, use a default time
-                flux_time = 50  # default 50 ns
-
-            amplitudes = flux_amp
-            detunings = -(flux_amp**2) * ds_qp.quad_term_control
-            lengths = flux_time - flux_time % 4 + 4
-
-            t = ds_qp.time * 1e-9
-            f = ds_qp.detuning
-            t, f = np.meshgrid(t, f)
-            J, f0, a, offset = fit_rabi_chevron(ds_qp, lengths * 2, detunings.values)
-
-            # Check if fitting produced valid results
-            if np.isnan(J) or np.isnan(f0):
-                # Return default/invalid values
-                return xr.DataArray([float("nan"), float("nan"), float("nan"), float("nan")], dims=["fit_vals"])
-
-            detunings = f0
-            amplitudes = np.sqrt(-detunings / ds_qp.quad_term_control)
-            flux_time = int(1 / (2 * J) * 1e9)
-            lengths = flux_time - flux_time % 4 + 4
-
-            # Return as DataArray for stacking
-            return xr.DataArray([J, f0, a, offset], dims=["fit_vals"])
-        except Exception as e:
-            # Return NaN values if any step fails
-            return xr.DataArray([float("nan"), float("nan"), float("nan"), float("nan")], dims=["fit_vals"])
-
-    # Use groupby-apply pattern
-    fit_res = ds.groupby("qubit_pair").apply(fit_routine)
-    fit_res = fit_res.assign_coords(fit_vals=("fit_vals", ["J", "f0", "a", "offset"]))
-    return fit_res
-
-
 def process_raw_dataset(ds: xr.Dataset, node: QualibrationNode):
     if not node.parameters.use_state_discrimination:
         ds = convert_IQ_to_V(ds, qubit_pairs=node.namespace["qubit_pairs"], IQ_list=["I_control", "Q_control"])
@@ -5,8 +5,9 @@ import numpy as np
 import xarray as xr
 
 from qualibrate import QualibrationNode
-from qualibration_libs.data import convert_IQ_to_V
-from scipy.optimize import minimize
+
+from customized.node._discriminator import histogram_peak_edges, optimal_thresholds
+from customized.node._single_shot import normalize_single_shot
 
 
 @dataclass
@@ -49,21 +50,8 @@ def log_fitted_results(fit_results: Dict, log_callable=None):
 
 
 def process_raw_dataset(ds: xr.Dataset, node: QualibrationNode):
-    # Fix the structure of ds to avoid tuples
-    def extract_value(element):
-        if isinstance(element, tuple):
-            return element[0]
-        return element
-
-    ds = xr.apply_ufunc(
-        extract_value,
-        ds,
-        vectorize=True,  # This ensures the function is applied element-wise
-        dask="parallelized",  # This allows for parallel processing
-        output_dtypes=[float],  # Specify the output data type
-    )
-    ds = convert_IQ_to_V(ds, node.namespace["qubits"], IQ_list=["Ig", "Qg", "Ie", "Qe"])
-    return ds
+    # Unwrap tuple values and convert to volts, whole arrays at a time (customized.node._single_shot)
+    return normalize_single_shot(ds, node.namespace["qubits"], IQ_list=["Ig", "Qg", "Ie", "Qe"])
 
 
 def fit_raw_data(ds: xr.Dataset, node: QualibrationNode) -> Tuple[xr.Dataset, dict[str, FitParameters]]:
@@ -103,34 +91,20 @@ def fit_raw_data(ds: xr.Dataset, node: QualibrationNode) -> Tuple[xr.Dataset, di
     ds_fit = ds_fit.assign({"Ie_rot": ds_fit.Ie * C - ds_fit.Qe * S})
     ds_fit = ds_fit.assign({"Qe_rot": ds_fit.Ie * S + ds_fit.Qe * C})
 
-    # Get the blobs histogram along the rotated axis
-    hist = [np.histogram(ds_fit.Ig_rot.sel(qubit=q.name), bins=100) for q in node.namespace["qubits"]]
-    # Get the discriminating threshold along the rotated axis
-    rus_threshold = [
-        hist[ii][1][1:][np.argmax(np.histogram(ds_fit.Ig_rot.sel(qubit=q.name), bins=100)[0])]
-        for ii, q in enumerate(node.namespace["qubits"])
-    ]
-    ds_fit = ds_fit.assign({"rus_threshold": xr.DataArray(rus_threshold, coords=dict(qubit=ds_fit.qubit.data))})
-
-    threshold = []
-    gg, ge, eg, ee = [], [], [], []
-    for q in node.namespace["qubits"]:
-        fit = minimize(
-            _false_detections,
-            0.5 * (np.mean(ds_fit.Ig_rot.sel(qubit=q.name)) + np.mean(ds_fit.Ie_rot.sel(qubit=q.name))),
-            (ds_fit.Ig_rot.sel(qubit=q.name), ds_fit.Ie_rot.sel(qubit=q.name)),
-            method="Nelder-Mead",
-        )
-        threshold.append(fit.x[0])
-        gg.append(np.sum(ds_fit.Ig_rot.sel(qubit=q.name) < fit.x[0]) / len(ds_fit.Ig_rot.sel(qubit=q.name)))
-        ge.append(np.sum(ds_fit.Ig_rot.sel(qubit=q.name) > fit.x[0]) / len(ds_fit.Ig_rot.sel(qubit=q.name)))
-        eg.append(np.sum(ds_fit.Ie_rot.sel(qubit=q.name) < fit.x[0]) / len(ds_fit.Ie_rot.sel(qubit=q.name)))
-        ee.append(np.sum(ds_fit.Ie_rot.sel(qubit=q.name) > fit.x[0]) / len(ds_fit.Ie_rot.sel(qubit=q.name)))
-    ds_fit = ds_fit.assign({"ge_threshold": xr.DataArray(threshold, coords=dict(qubit=ds_fit.qubit.data))})
-    ds_fit = ds_fit.assign({"gg": xr.DataArray(gg, coords=dict(qubit=ds_fit.qubit.data))})
-    ds_fit = ds_fit.assign({"ge": xr.DataArray(ge, coords=dict(qubit=ds_fit.qubit.data))})
-    ds_fit = ds_fit.assign({"eg": xr.DataArray(eg, coords=dict(qubit=ds_fit.qubit.data))})
-    ds_fit = ds_fit.assign({"ee": xr.DataArray(ee, coords=dict(qubit=ds_fit.qubit.data))})
+    # Discriminate every qubit at once along the rotated axis (customized.node._discriminator)
+    Ig_rot = ds_fit.Ig_rot.transpose(..., "n_runs")
+    Ie_rot = ds_fit.Ie_rot.transpose(*Ig_rot.dims)
+    dims = Ig_rot.dims[:-1]
+    coords = {dim: ds_fit[dim].data for dim in dims}
+    rus_threshold = histogram_peak_edges(Ig_rot.values)
+    ds_fit = ds_fit.assign({"rus_threshold": xr.DataArray(rus_threshold, dims=dims, coords=coords)})
+
+    fit = optimal_thresholds(Ig_rot.values, Ie_rot.values)
+    ds_fit = ds_fit.assign({"ge_threshold": xr.DataArray(fit.threshold, dims=dims, coords=coords)})
+    ds_fit = ds_fit.assign({"gg": xr.DataArray(fit.gg, dims=dims, coords=coords)})
+    ds_fit = ds_fit.assign({"ge": xr.DataArray(fit.ge, dims=dims, coords=coords)})
+    ds_fit = ds_fit.assign({"eg": xr.DataArray(fit.eg, dims=dims, coords=coords)})
+    ds_fit = ds_fit.assign({"ee": xr.DataArray(fit.ee, dims=dims, coords=coords)})
     ds_fit = ds_fit.assign(
         {"readout_fidelity": xr.DataArray(100 * (ds_fit.gg + ds_fit.ee) / 2, coords=dict(qubit=ds_fit.qubit.data))}
     )
@@ -140,14 +114,6 @@ def fit_raw_data(ds: xr.Dataset, node: QualibrationNode) -> Tuple[xr.Dataset, di
     return fit_data, fit_results
 
 
-def _false_detections(threshold, Ig, Ie):
-    if np.mean(Ig) < np.mean(Ie):
-        false_detections_var = np.sum(Ig > threshold) + np.sum(Ie < threshold)
-    else:
-        false_detections_var = np.sum(Ig < threshold) + np.sum(Ie > threshold)
-    return false_detections_var
-
-
 def _extract_relevant_fit_parameters(fit: xr.Dataset, node: QualibrationNode):
     """Add metadata to the dataset and fit results."""
 
@@ -6,9 +6,9 @@ import xarray as xr
 from sklearn.mixture import GaussianMixture
 
 from qualibrate import QualibrationNode
-from qualibration_libs.data import convert_IQ_to_V
-from calibration_utils.iq_blobs import fit_raw_data as fit_iq_blobs
-from calibration_utils.iq_blobs.analysis import FitParameters as FitParametersIQblobs
+from customized.node.LCH_readout_fidelity.analysis import fit_raw_data as fit_iq_blobs
+from customized.node.LCH_readout_fidelity.analysis import FitParameters as FitParametersIQblobs
+from customized.node._single_shot import normalize_single_shot
 
 
 @dataclass
@@ -47,7 +47,7 @@ def process_raw_dataset(ds: xr.Dataset, node: QualibrationNode):
     # Skip if the data has already been processed
     if ~np.all([var in ds.data_vars for var in ["Ig", "Qg", "Ie", "Qe"]]):
         return ds
-    ds = convert_IQ_to_V(ds, node.namespace["qubits"], IQ_list=["Ig", "Qg", "Ie", "Qe"])
+    ds = normalize_single_shot(ds, node.namespace["qubits"], IQ_list=["Ig", "Qg", "Ie", "Qe"])
     # Add the absolute readout power to the dataset
     readout_amplitudes = np.array(
         [ds.amp_prefactor * q.resonator.operations["readout"].amplitude for q in node.namespace["qubits"]]
@@ -0,0 +1,333 @@
+"""Batched nonlinear least squares for the per-qubit decay and oscillation fits
+— a lab-side drop-in for ``qualibration_libs.analysis.fit_decay_exp`` /
+``fit_oscillation_decay_exp``.
+
+Those run one `curve_fit` per trace (``xr.apply_ufunc(..., vectorize=True)``):
+a Python-level Levenberg–Marquardt loop with a finite-difference Jacobian, once
+per qubit (and per flux point, per amplitude, ...). The traces are short and
+the models tiny, so almost all the time is call overhead.
+
+Here every trace of a stack is fitted at once:
+
+- the residuals and the ANALYTIC Jacobian of a :class:`Model` are evaluated
+  for all traces in one broadcast, shaped (traces, params, points), so the
+  normal equations of every trace are one batched matmul;
+- each Levenberg–Marquardt step solves all the small normal equations in one
+  batched `np.linalg.solve`. Every trace keeps its own damping and stops on
+  its own; finished traces drop out of the working set;
+- the start comes from the data, batched as well. The oscillation frequency
+  is the peak of a zero-padded DFT (parabolic interpolation between bins).
+  The decay rate is the best of a log-spaced grid, where the amplitudes and
+  the offset are solved linearly for every candidate (variable projection).
+  Nothing needs a hand-tuned guess.
+
+The covariance is `curve_fit`'s: ``inv(J^T J)`` times the residual variance.
+:func:`fit_traces` returns the parameters, covariances and a success flag as
+an ``xr.Dataset`` over a ``fit_vals`` axis. :func:`fit_decay_exp` /
+:func:`fit_oscillation_decay_exp` flatten that to the vendored layout (the
+parameters, then ``<p>_<q>`` for every covariance entry, NaN where the fit
+failed), so a `fit_raw_data` switches by changing its import.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import xarray as xr
+
+__all__ = [
+    "DECAY_EXP",
+    "OSCILLATION_DECAY_EXP",
+    "BatchedFit",
+    "Model",
+    "decay_exp",
+    "fit_decay_exp",
+    "fit_oscillation_decay_exp",
+    "fit_traces",
+    "flat_fit_vals",
+    "levenberg_marquardt",
+    "oscillation_decay_exp",
+]
+
+#: decay-rate candidates of the start grid, log-spaced over 1e-2 .. 1e2 / span.
+_RATE_GRID = np.logspace(-2, 2, 33)
+
+#: DFT bins per trace point for the frequency start (zero padding).
+_DFT_PADDING = 4
+
+_LAMBDA_START, _LAMBDA_MAX = 1e-3, 1e12
+
+
+def decay_exp(t, a, offset, decay):
+    """``a * exp(t * decay) + offset``: `decay` < 0 for a decay."""
+    return a * np.exp(t * decay) + offset
+
+
+def oscillation_decay_exp(t, a, f, phi, offset, decay):
+    """``a * exp(-t * decay) * cos(2 pi f t + phi) + offset``."""
+    return a * np.exp(-t * decay) * np.cos(2 * np.pi * f * t + phi) + offset
+
+
+@dataclass(frozen=True)
+class Model:
+    """A fit model for :func:`levenberg_marquardt`.
+
+    `function(x, *params)` is the model with every parameter shaped (traces,
+    1). `jacobian(x, params)` gives d model / d params, (traces, params,
+    points), for `params` (traces, params). `guess(x, y)` gives starting
+    parameters for traces `y` (traces, points).
+    """
+
+    name: str
+    params: Tuple[str, ...]
+    function: Callable
+    jacobian: Callable
+    guess: Callable
+
+    def __call__(self, x, params: np.ndarray) -> np.ndarray:
+        return self.function(x, *np.moveaxis(params, -1, 0)[..., None])
+
+
+def _decay_exp_jacobian(t, params):
+    a, _, decay = np.moveaxis(params, -1, 0)[..., None]
+    e = np.exp(t * decay)
+    return np.stack([e, np.ones_like(e), a * t * e], axis=-2)
+
+
+def _oscillation_decay_exp_jacobian(t, params):
+    a, f, phi, _, decay = np.moveaxis(params, -1, 0)[..., None]
+    e = np.exp(-t * decay)
+    theta = 2 * np.pi * f * t + phi
+    cos, sin = e * np.cos(theta), e * np.sin(theta)
+    return np.stack([cos, -2 * np.pi * t * a * sin, -a * sin, np.ones_like(cos), -t * a * cos], axis=-2)
+
+
+def _best_candidate(gram, rhs):
+    """The linear least-squares coefficients of every start candidate, from
+    the normal equations `gram` (..., candidates, k, k) and `rhs` (traces,
+    candidates, k): those of the best candidate per trace, and its index."""
+    gram = gram + 1e-12 * np.trace(gram, axis1=-2, axis2=-1)[..., None, None] * np.eye(gram.shape[-1])
+    coefficients = np.linalg.solve(gram, rhs[..., None])[..., 0]
+    # the residual is |y|^2 - c . rhs at the least-squares c
+    best = np.argmax(np.einsum("bgk,bgk->bg", coefficients, rhs), axis=-1)
+    return coefficients[np.arange(len(rhs)), best], best
+
+
+def _rates(t):
+    span = np.ptp(t)
+    return _RATE_GRID / (span if span > 0 else 1.0)
+
+
+def _decay_exp_guess(t, y):
+    rates = _rates(t)
+    e = np.exp(-(t - t[0]) * rates[:, None])  # (candidates, points), referred to the first point: no overflow
+    gram = np.empty((len(rates), 2, 2))
+    gram[:, 0, 0] = np.einsum("gn,gn->g", e, e)
+    gram[:, 0, 1] = gram[:, 1, 0] = e.sum(axis=-1)
+    gram[:, 1, 1] = len(t)
+    rhs = np.stack(np.broadcast_arrays(y @ e.T, y.sum(axis=-1, keepdims=True)), axis=-1)
+    coefficients, best = _best_candidate(gram, rhs)
+    a, offset = coefficients.T
+    decay = -rates[best]
+    return np.stack([a * np.exp(decay * t[0]), offset, decay], axis=-1)
+
+
+def _dominant_frequency(t, y):
+    """Peak of a zero-padded DFT of every mean-subtracted trace, between the
+    first bin and the Nyquist frequency of the median step (an FFT when the
+    steps are uniform)."""
+    step = np.median(np.diff(t)) if len(t) > 1 else 1.0
+    n_bins = _DFT_PADDING * len(t) // 2
+    freqs = np.arange(1, n_bins + 1) / (step * _DFT_PADDING * len(t))
+    y = y - y.mean(axis=-1, keepdims=True)
+    if np.allclose(np.diff(t), step, rtol=1e-6):  # the usual uniform sweep: an FFT
+        power = np.abs(np.fft.rfft(y, n=_DFT_PADDING * len(t))[:, 1 : n_bins + 1]) ** 2
+    else:
+        power = np.abs(y @ np.exp(-2j * np.pi * np.outer(t - t[0], freqs))) ** 2
+    peak = np.clip(np.argmax(power, axis=-1), 1, n_bins - 2)
+    rows = np.arange(len(y))
+    left, mid, right = power[rows, peak - 1], power[rows, peak], power[rows, peak + 1]
+    curvature = left - 2 * mid + right
+    shift = np.where(curvature < 0, 0.5 * (left - right) / np.where(curvature < 0, curvature, -1.0), 0.0)
+    return np.interp(peak + np.clip(shift, -0.5, 0.5), np.arange(n_bins), freqs)
+
+
+def _oscillation_decay_exp_guess(t, y):
+    f = _dominant_frequency(t, y)
+    rates = _rates(t)
+    theta = 2 * np.pi * f[:, None] * t  # (traces, points)
+    cos, sin = np.cos(theta), np.sin(theta)
+    e = np.exp(-(t - t[0]) * rates[:, None])  # (candidates, points)
+    e2 = e * e
+    # normal equations of the basis (e cos, e sin, 1) for every trace and candidate:
+    # each entry a sum over the points, i.e. one (traces, points) @ (points, candidates)
+    gram = np.empty((len(y), len(rates), 3, 3))
+    gram[..., 0, 0] = (cos * cos) @ e2.T
+    gram[..., 0, 1] = gram[..., 1, 0] = (cos * sin) @ e2.T
+    gram[..., 1, 1] = (sin * sin) @ e2.T
+    gram[..., 0, 2] = gram[..., 2, 0] = cos @ e.T
+    gram[..., 1, 2] = gram[..., 2, 1] = sin @ e.T
+    gram[..., 2, 2] = len(t)
+    rhs = np.stack(np.broadcast_arrays((y * cos) @ e.T, (y * sin) @ e.T, y.sum(axis=-1, keepdims=True)), axis=-1)
+    coefficients, best = _best_candidate(gram, rhs)
+    c, s, offset = coefficients.T
+    decay = rates[best]
+    # a cos(theta + phi) = a cos(phi) cos(theta) - a sin(phi) sin(theta)
+    a = np.hypot(c, s) * np.exp(decay * t[0])
+    return np.stack([a, f, np.arctan2(-s, c), offset, decay], axis=-1)
+
+
+DECAY_EXP = Model("decay_exp", ("a", "offset", "decay"), decay_exp, _decay_exp_jacobian, _decay_exp_guess)
+OSCILLATION_DECAY_EXP = Model(
+    "oscillation_decay_exp",
+    ("a", "f", "phi", "offset", "decay"),
+    oscillation_decay_exp,
+    _oscillation_decay_exp_jacobian,
+    _oscillation_decay_exp_guess,
+)
+
+
+@dataclass(frozen=True)
+class BatchedFit:
+    """:func:`levenberg_marquardt` result per trace: `params` (traces, P),
+    `covariance` (traces, P, P), `cost` (the residual sum of squares),
+    `success` and the iterations each trace took."""
+
+    params: np.ndarray
+    covariance: np.ndarray
+    cost: np.ndarray
+    success: np.ndarray
+    n_iter: np.ndarray
+
+
+def levenberg_marquardt(model: Model, x, y, p0: Optional[np.ndarray] = None, *, max_iter: int = 200,
+                        ftol: float = 1e-10, xtol: float = 1e-10, per_trace_x: bool = False) -> BatchedFit:
+    """Fit `model` to every trace of `y` (traces, points) over the shared `x`
+    (points). `p0` (traces, P) defaults to ``model.guess``. With `per_trace_x`,
+    `x` is (..., traces, points): every trace has its own abscissae.
+
+    A trace stops when a step lowers its cost by less than `ftol` relative, or
+    moves the parameters by less than `xtol` relative, or when no damping
+    finds a lower cost. It fails when the cost is not finite or after
+    `max_iter` iterations — where `curve_fit` would have raised.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    n_traces, n_points = y.shape
+    n_params = len(model.params)
+    finite = np.isfinite(y).all(axis=-1)
+    if per_trace_x:
+        finite &= np.isfinite(x).all(axis=-1).reshape(-1, n_traces).all(axis=0)
+    else:
+        finite &= np.isfinite(x).all()
+
+    def at(rows):
+        return x[..., rows, :] if per_trace_x else x
+
+    params = np.full((n_traces, n_params), np.nan)
+    with np.errstate(all="ignore"):
+        if p0 is None:
+            if finite.any():
+                params[finite] = model.guess(at(finite), y[finite])
+        else:
+            params[:] = p0
+        cost = np.sum((y - model(x, params)) ** 2, axis=-1)
+
+        lam = np.full(n_traces, _LAMBDA_START)
+        active = finite & np.isfinite(cost)
+        done = np.zeros(n_traces, dtype=bool)
+        n_iter = np.zeros(n_traces, dtype=int)
+        eye = np.eye(n_params, dtype=bool)
+        for _ in range(max_iter):
+            rows = np.flatnonzero(active)
+            if rows.size == 0:
+                break
+            p, ya, xa = params[rows], y[rows], at(rows)
+            jac = model.jacobian(xa, p)
+            gram = jac @ np.swapaxes(jac, -1, -2)
+            gradient = (jac @ (ya - model(xa, p))[..., None])[..., 0]
+            damping = np.maximum(np.diagonal(gram, axis1=-2, axis2=-1), 1e-300)  # Marquardt's scaling
+            damped = gram + np.where(eye, lam[rows, None, None] * damping[:, None, :], 0.0)
+            try:
+                step = np.linalg.solve(damped, gradient[..., None])[..., 0]
+            except np.linalg.LinAlgError:
+                step = np.einsum("bij,bj->bi", np.linalg.pinv(damped), gradient)
+            trial = p + step
+            trial_cost = np.sum((ya - model(xa, trial)) ** 2, axis=-1)
+            better = np.isfinite(trial_cost) & (trial_cost <= cost[rows])
+            n_iter[rows] += 1
+
+            small_f = better & (cost[rows] - trial_cost <= ftol * cost[rows])
+            small_x = better & (np.linalg.norm(step, axis=-1) <= xtol * (np.linalg.norm(p, axis=-1) + xtol))
+            params[rows[better]] = trial[better]
+            cost[rows[better]] = trial_cost[better]
+            lam[rows] = np.where(better, np.maximum(lam[rows] / 10, 1e-15), lam[rows] * 10)
+            stuck = lam[rows] > _LAMBDA_MAX  # no step lowers the cost: at the minimum
+            finished = small_f | small_x | stuck
+            done[rows[finished]] = True
+            active[rows[finished]] = False
+
+        # curve_fit's covariance: pinv(J^T J) scaled by the residual variance
+        covariance = np.full((n_traces, n_params, n_params), np.nan)
+        rows = np.flatnonzero(done)
+        if rows.size:
+            jac = model.jacobian(at(rows), params[rows])
+            dof = max(n_points - n_params, 1)
+            covariance[rows] = np.linalg.pinv(jac @ np.swapaxes(jac, -1, -2)) * (cost[rows] / dof)[:, None, None]
+    success = done & np.isfinite(params).all(axis=-1)
+    return BatchedFit(params=params, covariance=covariance, cost=cost, success=success, n_iter=n_iter)
+
+
+def fit_traces(da: xr.DataArray, dim: str, model: Model, p0: Optional[xr.DataArray] = None,
+               **kwargs) -> xr.Dataset:
+    """Fit `model` along `dim` for every other index of `da` at once.
+
+    Returns ``params`` (..., fit_vals), ``covariance`` (..., fit_vals,
+    fit_vals_) and ``success`` (...), the leading dims and coords those of
+    `da` without `dim`. `p0` optionally gives starting parameters over
+    ``fit_vals``; `kwargs` go to :func:`levenberg_marquardt`.
+    """
+    batch = [d for d in da.dims if d != dim]
+    values = da.transpose(*batch, dim).values
+    shape, n = values.shape[:-1], len(model.params)
+    start = None
+    if p0 is not None:
+        start = p0.broadcast_like(da.isel({dim: 0}, drop=True)).transpose(*batch, "fit_vals").values.reshape(-1, n)
+    fit = levenberg_marquardt(model, da[dim].values, values.reshape(-1, values.shape[-1]), start, **kwargs)
+
+    coords = {k: c for k, c in da.coords.items() if dim not in c.dims}
+    return xr.Dataset(
+        {
+            "params": ((*batch, "fit_vals"), fit.params.reshape(*shape, n)),
+            "covariance": ((*batch, "fit_vals", "fit_vals_"), fit.covariance.reshape(*shape, n, n)),
+            "success": (batch, fit.success.reshape(shape)),
+        },
+        coords={**coords, "fit_vals": list(model.params), "fit_vals_": list(model.params)},
+    )
+
+
+def flat_fit_vals(fit: xr.Dataset) -> xr.DataArray:
+    """:func:`fit_traces` in the ``qualibration_libs`` layout: one ``fit_vals``
+    axis with the parameters, then ``<p>_<q>`` for every covariance entry
+    (row-major); NaN where the fit failed."""
+    names = [str(p) for p in fit.fit_vals.values]
+    batch = fit.success.dims
+    params = fit.params.transpose(*batch, "fit_vals").values
+    covariance = fit.covariance.transpose(*batch, "fit_vals", "fit_vals_").values
+    flat = np.concatenate([params, covariance.reshape(*covariance.shape[:-2], -1)], axis=-1)
+    flat[~fit.success.values] = np.nan
+    labels = names + [f"{p}_{q}" for p in names for q in names]
+    coords = {k: c for k, c in fit.coords.items() if not {"fit_vals", "fit_vals_"} & set(c.dims)}
+    return xr.DataArray(flat, dims=(*batch, "fit_vals"), coords={**coords, "fit_vals": labels})
+
+
+def fit_decay_exp(da: xr.DataArray, dim: str) -> xr.DataArray:
+    """Drop-in for ``qualibration_libs.analysis.fit_decay_exp``: `da` fitted
+    along `dim` to :func:`decay_exp`."""
+    return flat_fit_vals(fit_traces(da, dim, DECAY_EXP))
+
+
+def fit_oscillation_decay_exp(da: xr.DataArray, dim: str) -> xr.DataArray:
+    """Drop-in for ``qualibration_libs.analysis.fit_oscillation_decay_exp``:
+    `da` fitted along `dim` to :func:`oscillation_decay_exp`."""
+    return flat_fit_vals(fit_traces(da, dim, OSCILLATION_DECAY_EXP))
@@ -0,0 +1,168 @@
+"""Batched 2D Rabi-chevron fit (CZ / iSWAP: target population vs detuning x
+time) — a lab-side drop-in for ``fit_chevron_cz`` of the vendored
+`calibration_utils.chevron_cz` analysis (copied into `LCH_iswap_fixed_time`).
+
+The vendored fit goes pair by pair through ``groupby().apply``. It first
+runs a damped-oscillation fit on the highest-contrast amplitude only to
+guess J. It then runs `curve_fit` over the whole flattened (detuning x time)
+map with a finite-difference Jacobian: four extra model evaluations of the
+full map per step, and a start that is often far off.
+
+Here:
+
+- J and f0 are seeded from the map itself. Along time, the row at detuning
+  f oscillates at nu = 2 sqrt(J^2 + ((f - f0) / 2)^2), so nu^2 - f^2 is
+  LINEAR in f. One zero-padded FFT along time gives nu per row, and a
+  weighted line through the high-contrast rows gives f0 and J. The
+  amplitude and the offset are then solved linearly;
+- the refinement is the batched Levenberg–Marquardt of
+  `customized.node._batched_fit` with the analytic Jacobian of
+  :func:`rabi_chevron_model`, all pairs at once (each pair keeps its own
+  detuning axis);
+- `decimate` > 1 fits every `decimate`-th detuning row first and refines on
+  the full map from there. Time is never decimated, so the oscillation
+  cannot alias.
+
+:func:`fit_chevron_cz` keeps the vendored output: ``fit`` over (qubit_pair,
+fit_vals = J, f0, a, offset), NaN where the fit failed. J is reported
+positive: the model only depends on J^2.
+"""
+
+from typing import Optional
+
+import numpy as np
+import xarray as xr
+
+from customized.node._batched_fit import Model, levenberg_marquardt
+
+__all__ = ["CHEVRON", "chevron_guess", "fit_chevron", "fit_chevron_cz", "rabi_chevron_model"]
+
+#: FFT length per time point for the per-row oscillation frequency (zero padding).
+_FFT_PADDING = 4
+
+#: rows with at least this fraction of a pair's strongest oscillation seed the f0 / J line.
+_ROW_CONTRAST = 0.25
+
+
+def rabi_chevron_model(ft, J, f0, a, offset):
+    """The vendored chevron: ``offset + a J^2 / W sin^2(2 pi sqrt(W) t)`` with
+    ``W = J^2 + ((f - f0) / 2)^2``; `ft` = (f [Hz], t [s]), flattened."""
+    f, t = ft
+    det = (f - f0) / 2
+    g = offset + a * (J**2) / (J**2 + det**2) * np.sin(2 * np.pi * np.sqrt(J**2 + det**2) * t) ** 2
+    return g.ravel()
+
+
+def _chevron(ft, J, f0, a, offset):
+    f, t = ft
+    w = J**2 + ((f - f0) / 2) ** 2
+    return offset + a * J**2 / w * np.sin(2 * np.pi * np.sqrt(w) * t) ** 2
+
+
+def _chevron_jacobian(ft, params):
+    f, t = ft
+    J, f0, a, _ = np.moveaxis(params, -1, 0)[..., None]
+    det = (f - f0) / 2
+    w = J**2 + det**2
+    root = np.sqrt(w)
+    phase = 2 * np.pi * root * t
+    sin2 = np.sin(phase) ** 2
+    lorentz = J**2 / w
+    # d sin^2(2 pi sqrt(w) t) / dw, times a lorentz; dw / dJ = 2 J, dw / df0 = -det
+    dsin2 = a * lorentz * np.pi * t * np.sin(2 * phase) / root
+    jac = np.empty(sin2.shape[:-1] + (4,) + sin2.shape[-1:])
+    jac[..., 2, :] = lorentz * sin2
+    jac[..., 0, :] = 2 * J * (a * jac[..., 2, :] * det**2 / (J**2 * w) + dsin2)
+    jac[..., 1, :] = det * (a * jac[..., 2, :] / w - dsin2)
+    jac[..., 3, :] = 1.0
+    return jac
+
+
+def chevron_guess(detuning, time, data):
+    """Start (J, f0, a, offset) per pair from the map itself, see the module
+    docstring. `detuning` (pairs, rows) [Hz], `time` (columns,) [s], `data`
+    (pairs, rows, columns)."""
+    detuning = np.asarray(detuning, dtype=float)
+    step = np.median(np.diff(time))
+    n_fft = _FFT_PADDING * len(time)
+    spectrum = np.abs(np.fft.rfft(data - data.mean(axis=-1, keepdims=True), n=n_fft, axis=-1)) ** 2
+    spectrum[..., 0] = 0.0
+    peak = np.clip(np.argmax(spectrum, axis=-1), 1, spectrum.shape[-1] - 2)
+    left, mid, right = (np.take_along_axis(spectrum, (peak + k)[..., None], axis=-1)[..., 0] for k in (-1, 0, 1))
+    curvature = left - 2 * mid + right
+    shift = np.where(curvature < 0, 0.5 * (left - right) / np.where(curvature < 0, curvature, -1.0), 0.0)
+    nu = (peak + np.clip(shift, -0.5, 0.5)) / (n_fft * step)  # (pairs, rows)
+
+    # weighted line nu^2 - f^2 = -2 f0 f + (f0^2 + 4 J^2) through the high-contrast rows
+    weight = np.where(mid >= _ROW_CONTRAST * mid.max(axis=-1, keepdims=True), mid, 0.0)
+    sw = weight.sum(axis=-1)
+    f_mean = (weight * detuning).sum(axis=-1) / sw
+    z = nu**2 - detuning**2
+    z_mean = (weight * z).sum(axis=-1) / sw
+    df = detuning - f_mean[:, None]
+    slope = (weight * df * (z - z_mean[:, None])).sum(axis=-1) / (weight * df * df).sum(axis=-1)
+    f0 = -slope / 2
+    j2 = (z_mean + 2 * f0 * f_mean - f0**2) / 4
+
+    # too few rows for a line, or a line that puts the resonance off the map:
+    # the row oscillating slowest is the resonance, at nu = 2 J
+    best = np.argmin(np.where(weight > 0, nu, np.inf), axis=-1)
+    rows = np.arange(len(detuning))
+    fallback = ~np.isfinite(slope) | ~(j2 > 0) | (f0 < detuning.min(axis=-1)) | (f0 > detuning.max(axis=-1))
+    f0 = np.where(fallback, detuning[rows, best], f0)
+    J = np.where(fallback, nu[rows, best] / 2, np.sqrt(np.abs(j2)))
+
+    # a and offset: linear least squares on the seeded shape
+    shape = _chevron((detuning[..., None], time), J[:, None, None], f0[:, None, None], 1.0, 0.0)
+    shape = shape.reshape(len(shape), -1)
+    values = data.reshape(len(data), -1)
+    s_mean, y_mean = shape.mean(axis=-1), values.mean(axis=-1)
+    var = ((shape - s_mean[:, None]) ** 2).sum(axis=-1)
+    a = ((shape - s_mean[:, None]) * (values - y_mean[:, None])).sum(axis=-1) / np.where(var > 0, var, 1.0)
+    return np.stack([J, f0, a, y_mean - a * s_mean], axis=-1)
+
+
+CHEVRON = Model("rabi_chevron", ("J", "f0", "a", "offset"), _chevron, _chevron_jacobian, None)
+
+
+def fit_chevron(detuning, time, data, *, decimate: Optional[int] = None, **kwargs):
+    """Fit every pair's chevron at once: `detuning` (pairs, rows) [Hz], `time`
+    (columns,) [s], `data` (pairs, rows, columns). Returns the
+    `levenberg_marquardt` result with J made positive; `kwargs` go to it."""
+    detuning = np.asarray(detuning, dtype=float)
+    time = np.asarray(time, dtype=float)
+    data = np.asarray(data, dtype=float)
+    n_pairs, n_rows, n_cols = data.shape
+
+    def grid(rows):
+        f = np.broadcast_to(detuning[:, rows, None], (n_pairs, len(range(n_rows)[rows]), n_cols))
+        t = np.broadcast_to(time, f.shape)
+        return np.stack([f.reshape(n_pairs, -1), t.reshape(n_pairs, -1)])
+
+    finite = np.isfinite(data).all(axis=(-2, -1)) & np.isfinite(detuning).all(axis=-1)
+    start = np.full((n_pairs, 4), np.nan)
+    with np.errstate(all="ignore"):
+        if finite.any():
+            start[finite] = chevron_guess(detuning[finite], time, data[finite])
+    if decimate and decimate > 1:
+        coarse = slice(None, None, decimate)
+        fit = levenberg_marquardt(CHEVRON, grid(coarse), data[:, coarse].reshape(n_pairs, -1), start,
+                                  per_trace_x=True, **kwargs)
+        start = np.where(fit.success[:, None], fit.params, start)
+    fit = levenberg_marquardt(CHEVRON, grid(slice(None)), data.reshape(n_pairs, -1), start, per_trace_x=True,
+                              **kwargs)
+    fit.params[:, 0] = np.abs(fit.params[:, 0])
+    return fit
+
+
+def fit_chevron_cz(ds: xr.Dataset, dim: str = "qubit_pair", *, decimate: Optional[int] = None) -> xr.DataArray:
+    """Drop-in for the vendored `fit_chevron_cz`: ``state_target`` (or
+    ``I_target``) over (`dim`, amplitude, time [ns]) with the ``detuning``
+    (`dim`, amplitude) [Hz] coordinate; J, f0, a, offset per pair."""
+    data = ds.state_target if "state_target" in ds else ds.I_target
+    data = data.transpose(dim, "amplitude", "time")
+    detuning = ds.detuning.transpose(dim, "amplitude").values
+    fit = fit_chevron(detuning, ds.time.values * 1e-9, data.values, decimate=decimate)
+    params = np.where(fit.success[:, None], fit.params, np.nan)
+    return xr.DataArray(params, dims=(dim, "fit_vals"),
+                        coords={dim: ds[dim].values, "fit_vals": list(CHEVRON.params)})
@@ -0,0 +1,311 @@
+"""Sum-of-exponentials flux-distortion fit for the cryoscope and pi_flux
+analyses — a drop-in for the vendored `sequential_exp_fit` /
+`optimize_start_fractions`, of which `calibration_utils/cryoscope/analysis.py`
+and `calibration_utils/pi_flux/analysis.py` each keep a copy.
+
+The vendored search runs Nelder-Mead over the start fractions. Every objective
+evaluation runs a `curve_fit` per component and a Python-loop rolling variance.
+But the objective only depends on the integer start INDEX of each component
+(`int(len(t) * fraction)`), so the simplex mostly re-evaluates identical
+points and stops wherever the plateau it landed on ends.
+
+Here:
+
+- the flat-tail DC term comes from a vectorized rolling variance, with the same
+  windows and threshold as before;
+- each component is a variable-projection fit. For a fixed tau the best
+  amplitude is linear, so the residual left after a component starting at
+  index s is a function of tau alone. Tail cumulative sums over a log-spaced
+  tau grid give that residual for EVERY start index in one array op; a
+  parabolic step refines tau between grid points, and a bounded scalar search
+  polishes the final fit;
+- the start indices are searched coarse-to-fine over the bounds box: every
+  start of the last component is scored in one batch per prefix, the earlier
+  components on a stride that halves around the best tuple until it is 1.
+  The initial fractions are always scored too, so the result is never worse
+  than where Nelder-Mead would start.
+
+`optimize_start_fractions_many` fits several qubits, optionally in a process
+pool. Results keep the vendored shapes: `(success, fractions, [(amp, tau_ns),
+...], a_dc, rms)`, with amplitudes referred to t = 0 as before.
+:func:`distortion_taps` turns them into the relative amplitudes and seconds
+that `customized.scqo._distortion.to_exponential_filter` takes.
+
+No node uses it yet: the cryoscope and pi_flux nodes are the vendored ones and
+call their own copies, which stay untouched. A lab-side cryoscope / pi_flux
+analysis imports these functions from here instead.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.optimize import minimize_scalar
+
+__all__ = [
+    "distortion_taps",
+    "flat_tail_dc",
+    "optimize_start_fractions",
+    "optimize_start_fractions_many",
+    "rolling_variance",
+    "sequential_exp_fit",
+]
+
+#: shortest time constant a free component may take (the old curve_fit bound).
+TAU_MIN_NS = 0.1
+
+#: log-spaced tau grid points the projected residual is scored on.
+_TAU_GRID = 128
+
+#: earlier-component start tuples scored per coarse-to-fine pass.
+_MAX_PREFIXES = 256
+
+#: RMS of a fit with a failed component (as the vendored objective returns).
+_FAILED_RMS = 1e6
+
+
+def rolling_variance(y: np.ndarray, window: int) -> np.ndarray:
+    """`np.var(y[i:i + window])` for every i < len(y) - window: the windows the
+    tail detector has always used, without the Python loop."""
+    y = np.asarray(y, dtype=float)
+    if len(y) <= window:
+        return np.empty(0)
+    return sliding_window_view(y, window)[: len(y) - window].var(axis=1)
+
+
+def flat_tail_dc(y: np.ndarray) -> float:
+    """The constant term: the mean of y from the last point where the rolling
+    variance (window: a twentieth of the trace, at least 5) drops below 10 % of
+    its mean; the last point of y when there is no such flat region."""
+    y = np.asarray(y, dtype=float)
+    rolling_var = rolling_variance(y, max(5, len(y) // 20))
+    flat = np.flatnonzero(rolling_var < 0.1 * rolling_var.mean()) if rolling_var.size else rolling_var
+    return float(np.mean(y[flat[-1]:])) if flat.size else float(y[-1])
+
+
+def _tail_sums(x: np.ndarray) -> np.ndarray:
+    """`out[..., s] = x[..., s:].sum(-1)`."""
+    return np.cumsum(x[..., ::-1], axis=-1)[..., ::-1]
+
+
+class _Components:
+    """Single-exponential component fits `amp * exp(-t / tau)` on the tail
+    `t[s:]` of a residual, for many start indices s at once."""
+
+    def __init__(self, t_offset: np.ndarray, fixed_taus: Optional[Sequence[float]]) -> None:
+        self.t = t_offset
+        self.fixed_taus = fixed_taus
+        if fixed_taus is None:
+            self.taus = np.geomspace(TAU_MIN_NS, 1e3 * max(t_offset[-1], 1.0), _TAU_GRID)
+            self.basis = np.exp(-t_offset[None, :] / self.taus[:, None])
+            self.basis_sq = _tail_sums(self.basis**2)
+
+    def fit(self, level: int, r: np.ndarray, starts: np.ndarray, polish: bool = False):
+        """`(amp, tau, ok)` per start; `ok` is False where the tail is too
+        short to fit (or the exponential has vanished on it)."""
+        n = len(self.t)
+        if self.fixed_taus is not None:
+            tau = np.full(len(starts), float(self.fixed_taus[level]))
+            ok = starts < n
+        else:
+            tau, ok = self._best_taus(r, starts, polish)
+            ok &= starts < n - 1
+        amp = np.zeros(len(starts))
+        if ok.any():
+            s, t = starts[ok], tau[ok]
+            e = np.exp(-self.t[None, :] / t[:, None])
+            e[np.arange(n)[None, :] < s[:, None]] = 0.0
+            with np.errstate(invalid="ignore", divide="ignore"):
+                amp[ok] = (e @ r) / np.einsum("ij,ij->i", e, e)
+        ok &= np.isfinite(amp)
+        return np.where(ok, amp, 0.0), tau, ok
+
+    def _best_taus(self, r: np.ndarray, starts: np.ndarray, polish: bool):
+        safe = np.minimum(starts, len(self.t) - 1)
+        cross = _tail_sums(self.basis * r)[:, safe]
+        norm = self.basis_sq[:, safe]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gain = np.where(norm > 0, cross**2 / norm, 0.0)  # residual drop, (grid, starts)
+        best = np.argmax(gain, axis=0)
+        ok = gain[best, np.arange(len(starts))] > 0
+        log_taus = np.log(self.taus)
+        step = log_taus[1] - log_taus[0]
+        # one parabolic step between the grid neighbours
+        inner = np.clip(best, 1, len(self.taus) - 2)
+        cols = np.arange(len(starts))
+        f_lo, f_mid, f_hi = (gain[inner + d, cols] for d in (-1, 0, 1))
+        curve = f_lo - 2 * f_mid + f_hi
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shift = np.where(curve < 0, 0.5 * (f_lo - f_hi) / curve, 0.0)
+        shift = np.where(best == inner, np.clip(shift, -1, 1), 0.0)
+        log_tau = log_taus[best] + shift * step
+        if polish:
+            for i in np.flatnonzero(ok):
+                log_tau[i] = self._polish(r, safe[i], log_taus[max(best[i] - 1, 0)],
+                                          log_taus[min(best[i] + 1, len(log_taus) - 1)])
+        return np.exp(log_tau), ok
+
+    def _polish(self, r: np.ndarray, start: int, lo: float, hi: float) -> float:
+        t, tail = self.t[start:], r[start:]
+
+        def loss(log_tau):
+            e = np.exp(-t / np.exp(log_tau))
+            norm = e @ e
+            return -((e @ tail) ** 2) / norm if norm > 0 else 0.0
+
+        return minimize_scalar(loss, bounds=(lo, hi), method="bounded").x
+
+
+def sequential_exp_fit(
+    t: np.ndarray,
+    y: np.ndarray,
+    start_fractions: Sequence[float],
+    fixed_taus: Optional[Sequence[float]] = None,
+    a_dc: Optional[float] = None,
+    verbose: int = 1,
+) -> Tuple[List[Tuple[float, float]], float, np.ndarray]:
+    """Fit the exponentials one after another, each from its start fraction to
+    the end of the trace, subtracting every fitted component from the whole
+    signal. Same arguments and `(components, a_dc, residual)` as the vendored
+    function; components are `(amp, tau_ns)` referred to `t[0]`. A component
+    that cannot be fitted ends the fit early (fewer components returned)."""
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    t_offset = t - t[0]
+    if a_dc is None:
+        a_dc = flat_tail_dc(y)
+    if verbose:
+        print(f"\nFitted constant term: {a_dc:.3e}")
+    fitter = _Components(t_offset, fixed_taus)
+    residual = y - a_dc
+    components = []
+    for level, fraction in enumerate(start_fractions):
+        start = np.array([int(len(t) * fraction)])
+        amp, tau, ok = fitter.fit(level, residual, start, polish=True)
+        if not ok[0]:
+            if verbose:
+                print(f"Warning: Fitting failed for component {level + 1}")
+            break
+        components.append((float(amp[0]), float(tau[0])))
+        if verbose:
+            print(f"Found component: amplitude = {amp[0]:.3e}, tau = {tau[0]:.3f} ns")
+        residual = residual - amp[0] * np.exp(-t_offset / tau[0])
+    return components, a_dc, residual
+
+
+def _search(fitter: _Components, t_offset, r, ranges, strides, level=0, below=None, prefix=()):
+    """Best `(rms, starts)` over strictly decreasing start tuples, the last
+    component scored for all its starts at once."""
+    lo, hi = ranges[level]
+    if below is not None:
+        hi = min(hi, below - 1)
+    if hi < lo:
+        return _FAILED_RMS, None
+    starts = np.arange(lo, hi + 1, strides[level])
+    amp, tau, ok = fitter.fit(level, r, starts)
+    if level == len(ranges) - 1:
+        if not ok.any():
+            return _FAILED_RMS, None
+        residual = r[None, :] - amp[ok, None] * np.exp(-t_offset[None, :] / tau[ok, None])
+        rms = np.sqrt(np.mean(residual**2, axis=1))
+        best = int(np.argmin(rms))
+        return float(rms[best]), prefix + (int(starts[ok][best]),)
+    result = (_FAILED_RMS, None)
+    for start, a, tau_i in zip(starts[ok], amp[ok], tau[ok]):
+        found = _search(fitter, t_offset, r - a * np.exp(-t_offset / tau_i), ranges, strides,
+                        level + 1, int(start), prefix + (int(start),))
+        if found[1] is not None and found[0] < result[0]:
+            result = found
+    return result
+
+
+def _strides(ranges) -> List[int]:
+    """Strides keeping the earlier-component tuples per pass near
+    :data:`_MAX_PREFIXES`; the last component is always scored at every start."""
+    if len(ranges) == 1:
+        return [1]
+    per_level = max(2, int(_MAX_PREFIXES ** (1 / (len(ranges) - 1))))
+    return [max(1, math.ceil((hi - lo + 1) / per_level)) for lo, hi in ranges[:-1]] + [1]
+
+
+def optimize_start_fractions(
+    t, y, start_fractions, bounds_scale=0.5, fixed_taus=None, a_dc=None, verbose=1
+):
+    """Start fractions minimizing the RMS residual of the sequential sum-of-
+    exponentials fit, searched within ±`bounds_scale` of `start_fractions`
+    (which must be descending). Same arguments and `(success, best_fractions,
+    components, a_dc, best_rms)` as the vendored function; components are
+    `(amp, tau_ns)` referred to t = 0."""
+    if fixed_taus is not None:
+        if len(fixed_taus) != len(start_fractions):
+            raise ValueError("fixed_taus must have the same length as start_fractions")
+        if any(tau <= 0 for tau in fixed_taus):
+            raise ValueError("All fixed_taus values must be positive")
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(t)
+    t_offset = t - t[0]
+    if a_dc is None:
+        a_dc = flat_tail_dc(y)
+    fitter = _Components(t_offset, fixed_taus)
+    r = y - a_dc
+
+    box = [(f * (1 - bounds_scale), f * (1 + bounds_scale)) for f in start_fractions]
+    full = [(max(0, int(n * lo)), min(n - 1, int(n * hi))) for lo, hi in box]
+    ranges, strides = full, _strides(full)
+    best_rms, best = _FAILED_RMS, None
+    while True:
+        rms, starts = _search(fitter, t_offset, r, ranges, strides)
+        if starts is not None and rms < best_rms:
+            best_rms, best = rms, starts
+        if best is None or all(stride == 1 for stride in strides):
+            break
+        # zoom in around the best tuple
+        ranges = [(max(lo, s - stride), min(hi, s + stride)) if stride > 1 else (lo, hi)
+                  for (lo, hi), s, stride in zip(full, best, strides)]
+        ranges[-1] = full[-1]
+        strides = _strides(ranges)
+
+    initial = sequential_exp_fit(t, y, start_fractions, fixed_taus=fixed_taus, a_dc=a_dc, verbose=0)
+    success = best is not None
+    if success:
+        best_fractions = np.array([min(max((s + 0.5) / n, lo), hi) for s, (lo, hi) in zip(best, box)])
+        components, a_dc, residual = sequential_exp_fit(t, y, best_fractions, fixed_taus=fixed_taus, a_dc=a_dc,
+                                                         verbose=0)
+        # the initial guess, when it is a valid point and fits better
+        if (len(initial[0]) == len(start_fractions) and np.all(np.diff(start_fractions) < 0)
+                and np.sqrt(np.mean(initial[2] ** 2)) < np.sqrt(np.mean(residual**2))):
+            best_fractions = np.asarray(start_fractions, dtype=float)
+            components, a_dc, residual = initial
+        success = len(components) == len(start_fractions)
+    if not success:
+        best_fractions = start_fractions
+        components, a_dc, residual = initial
+    best_rms = float(np.sqrt(np.mean(residual**2)))
+    components = [(amp * np.exp(t[0] / tau), tau) for amp, tau in components]
+    if verbose:
+        print(f"Optimized fractions: {[f'{f:.5f}' for f in best_fractions]}, RMS {best_rms:.3e}")
+        print(f"Optimized components [(a1, tau1), (a2, tau2)...]: {components}")
+    return success, best_fractions, components, a_dc, best_rms
+
+
+def optimize_start_fractions_many(
+    t, ys: Mapping[str, np.ndarray], start_fractions, *, max_workers: Optional[int] = None, **kwargs
+) -> Dict[str, tuple]:
+    """:func:`optimize_start_fractions` for every qubit's flux response in
+    `ys`; with `max_workers` > 1 the qubits are fitted in a process pool."""
+    if max_workers and max_workers > 1 and len(ys) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {name: pool.submit(optimize_start_fractions, t, y, start_fractions, **kwargs)
+                       for name, y in ys.items()}
+            return {name: future.result() for name, future in futures.items()}
+    return {name: optimize_start_fractions(t, y, start_fractions, **kwargs) for name, y in ys.items()}
+
+
+def distortion_taps(components: Sequence[Tuple[float, float]], a_dc: float) -> Tuple[List[float], List[float]]:
+    """`(amps, taus_s)` for `customized.scqo._distortion.to_exponential_filter`:
+    amplitudes relative to the DC term (`amp / a_dc`, as 18_cryoscope writes
+    them) and time constants in seconds."""
+    return [float(amp) / a_dc for amp, _ in components], [float(tau) * 1e-9 for _, tau in components]
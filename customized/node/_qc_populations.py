@@ -17,14 +17,16 @@ population-vs-round view (`plot_populations`, one line per state) and the 2D
 population-vs-(round x amplitude) view (`plot_population_maps`, one color map per state).
 
 The joint computation generalizes the two-qubit precedent in
-`customized.probes.pair_qq_chevron` (P00/P01/P10/P11) to N qubits, but in Python.
+`customized.probes.pair_qq_chevron` (P00/P01/P10/P11) to N qubits, in one `np.bincount`
+over the packed per-shot bitstrings. `mitigate_readout` optionally undoes the per-qubit
+readout errors (the tensor-product inverse of the ``resonator.confusion_matrix``es).
 
 Bitstring convention: the **first measured qubit is the leftmost / most-significant
 digit** (the `qubit` coordinate order is the order the probe reads them out).
 """
 
 import itertools
-from typing import Dict, List
+from typing import Dict, List, Mapping, Optional, Sequence
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -35,7 +37,7 @@ def _qubit_names(state: xr.DataArray) -> List[str]:
     return [str(q) for q in state.qubit.values]
 
 
-def joint_state_populations(state: xr.DataArray) -> xr.DataArray:
+def joint_state_populations(state: xr.DataArray, confusion: Optional[Mapping[str, Sequence]] = None) -> xr.DataArray:
     """Joint multi-qubit populations from per-shot discriminated states.
 
     `state` must have dims including `qubit` and `shot`; every remaining dim (`round`, or
@@ -43,23 +45,59 @@ def joint_state_populations(state: xr.DataArray) -> xr.DataArray:
     DataArray with a leading `joint_state` dim -- the bitstring label per measured qubit
     (first measured qubit = leftmost / most-significant digit) -- followed by the remaining
     dims unchanged. The populations sum to 1 over `joint_state` at every remaining-dim point.
+
+    Every shot's bitstring is packed into one integer code, offset by its remaining-dim
+    point, and ONE `np.bincount` counts all (code, point) pairs: a single pass over the
+    shots however many qubits are measured, instead of one mask per bitstring.
+
+    `confusion` (qubit name -> 2x2 ``resonator.confusion_matrix``) corrects the result
+    for readout errors, see `mitigate_readout`.
     """
     names = _qubit_names(state)
     n = len(names)
-    # Binarize to {0, 1} (>=1 -> excited), keeping every dim (qubit, shot + remaining).
-    binary = (state >= 1).astype(np.int64)
-    # Per-shot integer code with the first measured qubit as the most-significant bit; the
-    # per-`qubit` weights align on the `qubit` coord so the sum preserves readout order.
-    weights = xr.DataArray(
-        (2 ** np.arange(n)[::-1]).astype(np.int64), coords={"qubit": state["qubit"]}, dims="qubit"
-    )
-    codes = (binary * weights).sum("qubit")  # dims: shot + remaining
+    rest = [d for d in state.dims if d not in ("qubit", "shot")]
+    values = state.transpose("qubit", "shot", *rest).values
+    n_shots = values.shape[1]
+    n_points = int(np.prod(values.shape[2:], dtype=np.int64))
+    # Per-shot integer code with the first measured qubit as the most-significant bit
+    # (>=1 -> excited), then offset so that code c at point r counts into bin c * n_points + r.
+    codes = np.zeros((n_shots, n_points), dtype=np.intp)
+    for bits in values.reshape(n, n_shots, n_points):
+        codes <<= 1
+        codes |= bits >= 1
+    codes *= n_points
+    codes += np.arange(n_points)
+    counts = np.bincount(codes.ravel(), minlength=2**n * n_points)
+    with np.errstate(invalid="ignore", divide="ignore"):  # no shots -> NaN, as a mean would
+        populations = counts.reshape(2**n, *values.shape[2:]) / n_shots
     labels = ["".join(bits) for bits in itertools.product("01", repeat=n)]
-    # Fraction of shots landing in each bitstring, one entry per label -> leading joint_state.
-    return xr.concat(
-        [(codes == v).mean("shot") for v in range(2 ** n)],
-        dim="joint_state",
-    ).assign_coords(joint_state=labels)
+    coords = {k: c for k, c in state.coords.items() if not {"qubit", "shot"} & set(c.dims)}
+    pops = xr.DataArray(populations, dims=("joint_state", *rest), coords=coords).assign_coords(joint_state=labels)
+    if confusion is not None:
+        pops = mitigate_readout(pops, [confusion[q] for q in names])
+    return pops
+
+
+def mitigate_readout(pops: xr.DataArray, confusion: Sequence) -> xr.DataArray:
+    """Readout-error mitigated joint populations.
+
+    `confusion` holds one 2x2 matrix per digit of the `joint_state` label, in digit
+    order, laid out like QUAM's ``resonator.confusion_matrix``: ``[i][j]`` = P(read j |
+    prepared i). With independent readout errors the joint confusion matrix is their
+    Kronecker product, so its inverse is applied one qubit at a time along that qubit's
+    axis of the populations reshaped to ``(2,) * n`` -- never the 2^n x 2^n matrix.
+
+    The result still sums to 1 but, as any inversion, can go slightly negative where
+    shot noise exceeds the correction.
+    """
+    n = len(confusion)
+    pops = pops.transpose("joint_state", ...)
+    tensor = pops.values.reshape((2,) * n + pops.shape[1:])
+    for axis, matrix in enumerate(confusion):
+        # read = C^T @ prepared, per qubit
+        inverse = np.linalg.inv(np.asarray(matrix, dtype=float).T)
+        tensor = np.moveaxis(np.tensordot(inverse, tensor, axes=(1, axis)), 0, axis)
+    return pops.copy(data=tensor.reshape(pops.shape))
 
 
 def marginal_populations(state: xr.DataArray) -> xr.DataArray:
@@ -80,6 +118,7 @@ def plot_populations(
     use_state_discrimination: bool,
     title: str,
     xlabel: str,
+    confusion: Optional[Mapping[str, Sequence]] = None,
 ) -> Dict[str, plt.Figure]:
     """Build a single combined population-vs-round figure; return ``{key: Figure}``.
 
@@ -88,13 +127,16 @@ def plot_populations(
     - state discrimination otherwise -> per-qubit marginal P(excited), one line per
       measured qubit; key ``"populations"``.
     - no state discrimination -> raw ``I`` quadrature, one line per qubit; key ``"raw_I"``.
+
+    `confusion` (qubit name -> ``resonator.confusion_matrix``) readout-corrects the joint
+    populations, see `joint_state_populations`.
     """
     fig, ax = plt.subplots(figsize=(7, 4.5))
 
     if use_state_discrimination and "state" in ds_raw:
         state = ds_raw["state"]
         if multiplexed and "shot" in state.dims:
-            pops = joint_state_populations(state)
+            pops = joint_state_populations(state, confusion)
             for label in [str(v) for v in pops.joint_state.values]:
                 pops.sel(joint_state=label).plot(x="round", ax=ax, marker="o", label=f"|{label}⟩")
             ax.set_ylabel("Population")
@@ -129,6 +171,7 @@ def plot_population_maps(
     xlabel: str,
     ylabel: str,
     y_dim: str,
+    confusion: Optional[Mapping[str, Sequence]] = None,
 ) -> Dict[str, plt.Figure]:
     """Build a grid of 2D color maps -- one panel per state (or per qubit); return ``{key: Figure}``.
 
@@ -140,11 +183,13 @@ def plot_population_maps(
     - state discrimination otherwise -> one map per measured qubit's marginal P(excited);
       key ``"population_maps"``.
     - no state discrimination -> one map per qubit's raw ``I`` quadrature; key ``"raw_I_maps"``.
+
+    `confusion` readout-corrects the joint maps, as in `plot_populations`.
     """
     if use_state_discrimination and "state" in ds_raw:
         state = ds_raw["state"]
         if multiplexed and "shot" in state.dims:
-            pops = joint_state_populations(state)  # (joint_state, y_dim, round)
+            pops = joint_state_populations(state, confusion)  # (joint_state, y_dim, round)
             panels = [(f"|{label}⟩", pops.sel(joint_state=label)) for label in [str(v) for v in pops.joint_state.values]]
             cbar_label, key = "population", "joint_state_maps"
         else:
@@ -0,0 +1,78 @@
+"""Batched readout-fidelity map for the 3D readout optimization (frequency x
+amplitude x duration) — a lab-side drop-in for the vendored
+`calibration_utils.readout_optimization_3d.analysis.calculate_readout_fidelity`.
+
+The vendored version wraps `qualang_tools.analysis.two_state_discriminator` in
+`xr.apply_ufunc(..., vectorize=True)`. That is one Python call, one plot-free
+Nelder-Mead and a full recount of the shots per iteration, for every (qubit,
+freq, amp, duration) point. Here the grid is flattened to `(point, run)`.
+Rotation and threshold search (`customized.node._discriminator`) run over a
+whole block of points at once.
+
+`chunk_points` bounds how many points are loaded and discriminated at a time,
+so a dask-backed dataset larger than memory is computed block by block.
+`max_workers` spreads the blocks over a thread pool (the array passes release
+the GIL). Points with a missing shot (NaN, e.g. from `combine_batches`) get a
+NaN fidelity.
+
+The vendored module is official code and stays untouched. No node uses this
+module yet: the 3D readout-optimization node is not part of this tree, and
+08a / 08b optimize one axis at a time without these functions. A lab-side 3D
+node imports the two functions from here instead of the vendored ones.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+import xarray as xr
+
+from customized.node._discriminator import two_state_discriminator
+
+__all__ = ["calculate_readout_fidelity", "get_maximum_fidelity_per_qubit"]
+
+#: points discriminated per block when `chunk_points` is not given.
+DEFAULT_CHUNK_POINTS = 1024
+
+
+def _block_fidelity(I_g, Q_g, I_e, Q_e) -> np.ndarray:
+    fidelity = np.full(len(I_g), np.nan)
+    complete = ~(np.isnan(I_g) | np.isnan(Q_g) | np.isnan(I_e) | np.isnan(Q_e)).any(axis=-1)
+    if complete.any():
+        _, fit = two_state_discriminator(I_g[complete], Q_g[complete], I_e[complete], Q_e[complete])
+        fidelity[complete] = fit.fidelity
+    return fidelity
+
+
+def calculate_readout_fidelity(
+    ds: xr.Dataset, *, chunk_points: Optional[int] = None, max_workers: Optional[int] = None
+) -> xr.DataArray:
+    """Two-state discrimination fidelity (percent) for every coordinate across
+    all runs, shaped like `ds.I_g` without `run`."""
+    template = ds.I_g.isel(run=0, drop=True)
+    dims = template.dims
+    # (point, run) views; a dask-backed array stays lazy until a block is sliced
+    flat = [
+        ds[name].transpose(*dims, "run").data.reshape(-1, ds.sizes["run"]) for name in ("I_g", "Q_g", "I_e", "Q_e")
+    ]
+    step = chunk_points or DEFAULT_CHUNK_POINTS
+
+    def block(first: int) -> np.ndarray:
+        return _block_fidelity(*(np.asarray(x[first : first + step], dtype=float) for x in flat))
+
+    starts = range(0, template.size, step)
+    if max_workers and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            blocks = list(pool.map(block, starts))
+    else:
+        blocks = [block(first) for first in starts]
+    fidelity = np.concatenate(blocks) if blocks else np.empty(0)
+    return xr.DataArray(fidelity.reshape(template.shape), coords=template.coords, dims=dims)
+
+
+def get_maximum_fidelity_per_qubit(ds: xr.Dataset) -> xr.Dataset:
+    """Returns a dataset where each qubit retains its max fidelity point: one
+    argmax over every non-qubit dimension at once."""
+    da = ds.fidelity
+    best = da.argmax(dim=[dim for dim in da.dims if dim != "qubit"])
+    return da.isel(best).to_dataset(name="optimal_readout_point")
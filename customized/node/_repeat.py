@@ -0,0 +1,103 @@
+"""Compile-once / execute-many support for repeated qualibrate nodes and graphs.
+
+`calibrations/offline_graph/LCH_graph_ramsey_repeat.py` used to chain 200
+copies of `LCH_Ramsey`. Every copy reloaded `Quam`, rebuilt and recompiled the
+identical QUA program and reopened a QM, so a 200-repeat campaign spent most
+of its wall time on overhead instead of shots.
+
+In repeat mode a node builds its program once and hands it to the probe's
+`acquire_repeated`, which compiles it once and queues `repeats` runs of the
+compiled program (`customized.probes._lib.acquire_repeated`). Each run's raw
+dataset is streamed into its own results entry (`ds_raw_000`, `ds_raw_001`,
+...), so it is saved alongside the others exactly as a chained node's
+`ds_raw` would have been.
+
+All runs share the config the program was compiled against, so nothing the
+node learns between runs reaches the hardware. The node fits every run and
+applies the state update once, from the last run.
+
+`repeat_chain` builds either shape for a graph: one node with `repeats=N`
+(compile once), or the old chain of N copies when the state must be updated
+between runs.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+import xarray as xr
+from qualibrate.core.parameters import RunnableParameters
+
+__all__ = [
+    "RepeatNodeParameters",
+    "close_figures",
+    "repeat_chain",
+    "repeat_key",
+    "repeated_datasets",
+    "store_repeats",
+]
+
+_PREFIX = "ds_raw_"
+
+
+class RepeatNodeParameters(RunnableParameters):
+    repeats: int = 1
+    """Executions of the same compiled program. Above 1 the program is compiled once, the
+    runs are queued back to back, and each run's dataset is stored as `ds_raw_<i>`.
+    Default is 1 (a plain single execution stored as `ds_raw`)."""
+
+
+def repeat_key(index: int) -> str:
+    """Results key of run `index`, zero-padded to three digits. Past 999 runs
+    the keys no longer sort as strings; `repeated_datasets` orders by number."""
+    return f"{_PREFIX}{index:03d}"
+
+
+def store_repeats(results: Dict, datasets: Iterable[xr.Dataset]) -> int:
+    """Stream the runs from `acquire_repeated` into `results`, one entry each, as
+    they arrive. Returns how many runs were stored."""
+    count = 0
+    for dataset in datasets:
+        results[repeat_key(dataset.attrs["repeat_index"])] = dataset
+        count += 1
+    return count
+
+
+def repeated_datasets(results: Dict) -> List[Tuple[str, xr.Dataset]]:
+    """`(key, dataset)` of every stored run in run order (empty for a
+    single-execution node), for analysis and for reloaded historical data."""
+    runs = [
+        (key, value) for key, value in results.items()
+        if key.startswith(_PREFIX) and key[len(_PREFIX):].isdigit() and isinstance(value, xr.Dataset)
+    ]
+    return sorted(runs, key=lambda run: int(run[0][len(_PREFIX):]))
+
+
+def close_figures(figures) -> None:
+    """Close every matplotlib figure in a (nested) figures dict/list — the
+    figures of runs that are fitted but not kept, so a long campaign does not
+    pile up hundreds of open figures."""
+    import matplotlib.pyplot as plt
+
+    if isinstance(figures, dict):
+        figures = list(figures.values())
+    if isinstance(figures, (list, tuple)):
+        for figure in figures:
+            close_figures(figure)
+    elif isinstance(figures, plt.Figure):
+        plt.close(figures)
+
+
+def repeat_chain(library, node_name: str, *, repeats: int, compile_once: bool = True,
+                 **overrides) -> Tuple[Dict, List[Tuple[str, str]]]:
+    """`(nodes, connectivity)` running library node `node_name` `repeats` times.
+
+    With `compile_once` this is ONE node copy with `repeats=repeats`. Without
+    it, it is the chain of `repeats` copies (`<node_name>_<i>`), for campaigns
+    whose state updates must reach the hardware between runs.
+    """
+    template = library.nodes[node_name]
+    if compile_once:
+        name = f"{node_name}_x{repeats}"
+        return {name: template.copy(name=name, repeats=repeats, **overrides)}, []
+    names = [f"{node_name}_{i}" for i in range(repeats)]
+    nodes = {name: template.copy(name=name, **overrides) for name in names}
+    return nodes, list(zip(names[:-1], names[1:]))
@@ -0,0 +1,90 @@
+"""Raw single-shot dataset normalization: unwrap the fetched values and
+convert demodulated I/Q to volts with whole-array operations — a lab-side
+drop-in for the ``process_raw_dataset`` preamble of the vendored
+`calibration_utils.iq_blobs` / `iq_blobs_ef` analyses.
+
+That preamble runs ``xr.apply_ufunc(extract_value, ds, vectorize=True)``,
+one Python call per shot per variable, just to turn the odd ``(value, ...)``
+tuple into its value. Most datasets hold no tuple at all, and the call
+converts them anyway. Here each variable's layout is looked at ONCE:
+
+* a float array is kept as it is (a compact float32 stays float32);
+* an integer / bool array is cast to float, as before;
+* a structured array gives its first field, a view;
+* an object array of tuples is read in one C-level pass
+  (``map(itemgetter(0), ...)`` into `np.fromiter`); only tuples mixed with
+  plain scalars take a Python-level pass.
+
+A dask-backed variable stays lazy: the same conversion runs per block.
+
+:func:`iq_to_volts` is ``convert_IQ_to_V``'s formula (``2**12 / readout
+length``, twice that for single demodulation), one broadcast per I/Q
+variable against the per-qubit scale.
+
+The vendored modules are official code and stay untouched; nodes import
+:func:`normalize_single_shot` from here instead.
+"""
+
+from operator import itemgetter
+from typing import Sequence
+
+import numpy as np
+import xarray as xr
+
+__all__ = ["iq_to_volts", "normalize_single_shot", "unwrap_values"]
+
+
+def _unwrap_objects(data: np.ndarray) -> np.ndarray:
+    flat = data.reshape(-1)
+    if flat.size == 0:
+        return np.empty(data.shape, dtype=float)
+    try:
+        if isinstance(flat[0], tuple):
+            values = np.fromiter(map(itemgetter(0), flat), dtype=float, count=flat.size)
+        else:
+            values = flat.astype(float)
+    except (TypeError, ValueError):  # tuples mixed with scalars
+        values = np.fromiter((e[0] if isinstance(e, tuple) else e for e in flat), dtype=float, count=flat.size)
+    return values.reshape(data.shape)
+
+
+def _first_values(data):
+    """`data` with every element replaced by its value, as float."""
+    if data.dtype.names:
+        data = data[data.dtype.names[0]]
+    if data.dtype.kind == "O":
+        return _unwrap_objects(np.asarray(data))
+    if data.dtype.kind == "f":
+        return data
+    return data.astype(float)
+
+
+def unwrap_values(ds: xr.Dataset) -> xr.Dataset:
+    """`ds` with tuple / structured values unwrapped and every data variable
+    a float (see the module docstring). Coordinates and attrs are kept."""
+    data = {}
+    for name, var in ds.data_vars.items():
+        values = var.data
+        if hasattr(values, "map_blocks") and (values.dtype.names or values.dtype.kind == "O"):
+            data[name] = values.map_blocks(_first_values, dtype=float)
+        else:
+            data[name] = _first_values(values)
+    return ds.copy(data=data)
+
+
+def iq_to_volts(ds: xr.Dataset, qubits, IQ_list: Sequence[str] = ("I", "Q"),
+                single_demod: bool = False) -> xr.Dataset:
+    """Demodulated `IQ_list` variables of `ds` in volts; `qubits` are the
+    measured qubits, in the order of the ``qubit`` coordinate."""
+    scale = xr.DataArray(
+        [(2 if single_demod else 1) * 2**12 / q.resonator.operations["readout"].length for q in qubits],
+        coords=[("qubit", [q.name for q in qubits])],
+    )
+    return ds.assign({key: ds[key] * scale for key in IQ_list})
+
+
+def normalize_single_shot(ds: xr.Dataset, qubits, IQ_list: Sequence[str] = ("I", "Q"),
+                          single_demod: bool = False) -> xr.Dataset:
+    """:func:`unwrap_values` then :func:`iq_to_volts` — the raw-dataset
+    preprocessing of every single-shot node."""
+    return iq_to_volts(unwrap_values(ds), qubits, IQ_list, single_demod)
@@ -0,0 +1,81 @@
+"""Opt-in compact dtypes for per-shot datasets: demodulated I/Q as float32,
+discriminated states as int8.
+
+The fetchers hand back float64 I/Q and int64 states, so a 1e6-shot
+multi-qubit run is gigabytes before analysis even starts. Neither precision is
+real: the OPX demodulates to fixed point (well inside float32's 24-bit
+mantissa), and a discriminated state is 0/1 (2 for three-state readout, -1 for
+"not run yet"). :func:`compact_dtypes` narrows a dataset to what the
+instrument actually delivers — 2x less for I/Q, 8x less for states.
+
+Which variables narrow is decided by NAME and KIND, never by value:
+
+* I/Q — ``I``, ``Q`` and ``I_*`` / ``Q_*`` (``I_tomo``, ``Q_target``, ...)
+  of a float kind -> float32;
+* states — ``state`` and ``state_*`` of an INTEGER kind -> int8 (bool stays
+  bool). An averaged ``state`` stream is a float population and is left alone,
+  as is anything else (timestamps, shot counters, estimates).
+
+It is off by default. ``_lib.acquire(compact=True)`` (and the repeated /
+batch paths, tomography and the parity-switch monitors) apply it at fetch
+time; ``QMBackend(compact_dtypes=True)`` or a shell's ``compact_dtypes = True``
+turns it on per backend or per experiment. A compacted dataset carries
+``attrs["compact_dtypes"] = True``. The chunked record-time sink
+(``_stream.ChunkSink``) allocates its memmaps in the compact dtypes directly.
+"""
+
+import numpy as np
+import xarray as xr
+
+__all__ = ["IQ_DTYPE", "STATE_DTYPE", "check_fits", "compact_dtype", "compact_dtypes", "is_iq", "is_state"]
+
+IQ_DTYPE = np.float32
+STATE_DTYPE = np.int8
+
+
+def is_iq(name: str) -> bool:
+    """A demodulated-quadrature variable by name (``I``, ``Q``, ``I_*``, ``Q_*``)."""
+    return name in ("I", "Q") or name.startswith(("I_", "Q_"))
+
+
+def is_state(name: str) -> bool:
+    """A discriminated-state variable by name (``state``, ``state_*``)."""
+    return name == "state" or name.startswith("state_")
+
+
+def compact_dtype(name: str, dtype) -> np.dtype:
+    """The dtype variable `name` of `dtype` narrows to (`dtype` itself when
+    it does not narrow)."""
+    dtype = np.dtype(dtype)
+    if is_iq(name) and dtype.kind == "f":
+        return np.dtype(IQ_DTYPE)
+    if is_state(name) and dtype.kind in "iu":
+        return np.dtype(STATE_DTYPE)
+    return dtype
+
+
+def check_fits(name: str, values: np.ndarray, dtype) -> None:
+    """Raise ValueError when integer `values` would wrap in `dtype`."""
+    dtype = np.dtype(dtype)
+    if dtype.kind not in "iu" or not np.size(values):
+        return
+    info = np.iinfo(dtype)
+    low, high = int(np.min(values)), int(np.max(values))
+    if low < info.min or high > info.max:
+        raise ValueError(f"state variable {name!r} spans {low}..{high}, outside {dtype.name}")
+
+
+def compact_dtypes(dataset: xr.Dataset) -> xr.Dataset:
+    """`dataset` with its I/Q and integer state variables narrowed (see the
+    module docstring); already-compact variables are not copied.
+
+    Raises ValueError for an integer state outside int8's range rather than
+    wrapping it silently.
+    """
+    narrowed = {}
+    for name, var in dataset.data_vars.items():
+        target = compact_dtype(name, var.dtype)
+        if target != var.dtype:
+            check_fits(name, var.values, target)
+            narrowed[name] = var.astype(target)
+    return dataset.assign(narrowed).assign_attrs(compact_dtypes=True)
@@ -0,0 +1,447 @@
+"""Incremental ``machine.generate_config()``: regenerate only the parts of the
+QUA config whose QUAM subtree actually changed, and fingerprint the result.
+
+The full ``generate_config()`` walks the whole QUAM tree, rebuilds every
+waveform and integration weight, and deep-copies the ~100 KB result — on every
+acquire, even when a chain-stepped experiment (``resonator_spectroscopy_power_chain``)
+moved one port's ``full_scale_power_dbm`` and one readout amplitude between runs.
+
+How the cache splits the tree
+-----------------------------
+A **unit** is a QUAM component that actually writes config (overrides
+``apply_to_config``) together with its whole subtree: one port, one channel
+with all its pulses (``q1.xy``, ``q1.resonator``, a pair's coupler). Pure
+containers — a transmon, a qubit pair, ``machine.ports``, every ``QuamDict`` —
+write nothing themselves and are descended through. Each unit's fragment of
+the config (its element, its pulses/waveforms/integration weights, its port's
+controller entry) is recorded as the set of paths it wrote, so it can be taken
+out and re-applied on its own.
+
+Each unit is hashed from its raw attributes, with REFERENCES resolved: a
+scalar reference (``#../f_01``, a port's ``upconverter_frequency``) hashes its
+current value; a reference to a COMPONENT (``opx_output``, a pair's
+``qubit_control``) records a dependency, so a dirty port re-applies the
+channels wired to it. Regeneration re-applies the dirty units in the unit order
+of the last full build (``sort_quam_components`` over the whole tree, which only
+changes with the set of units), each unit's components read from the live
+unit, then runs the same ``generate_config_final_actions``.
+
+The fingerprint is derived from the unit digests, not from the serialized
+config: equal digests mean an equal config, which is what the cache relies on
+anyway. A config handed on with it must stay unedited: :func:`snapshot_config`
+is the private copy that keeps it.
+
+When the SHAPE of the tree changes (a unit added or removed) the cache falls
+back to a full build. :meth:`ConfigCache.verify` compares against a fresh
+``generate_config()`` — run it after touching a component class whose config
+output reads state outside its own attributes.
+
+The returned config is the cache's live copy: treat it as read-only and
+``deepcopy`` before editing (the baking paths already build their own).
+"""
+
+import copy
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from quam.core.qua_config_template import qua_config_template
+from quam.core.quam_classes import (
+    QuamBase,
+    QuamComponent,
+    QuamDict,
+    QuamList,
+    QuamRoot,
+    sort_quam_components,
+)
+from quam.utils import string_reference
+from quam.utils.config import generate_config_final_actions
+
+from customized.probes._session import config_fingerprint
+from customized.probes._trace import span
+
+__all__ = ["ConfigCache", "cached_config", "resolve_config", "snapshot_config"]
+
+UnitKey = Tuple[Any, ...]
+
+#: marks a config path that did not exist before a unit wrote it.
+_MISSING = object()
+
+
+# ---------------------------------------------------------------- tree split
+
+def _writes_config(node: Any) -> bool:
+    return (isinstance(node, QuamComponent)
+            and type(node).apply_to_config is not QuamComponent.apply_to_config)
+
+
+def _raw_children(node: QuamBase) -> Iterable[Tuple[Any, Any]]:
+    """``(key, raw value)`` of a QUAM node, references left as strings."""
+    if isinstance(node, QuamDict):
+        return list(node.data.items())
+    if isinstance(node, QuamList):
+        return list(enumerate(node.data))
+    return list(node.get_attrs(follow_references=False, include_defaults=True).items())
+
+
+def _resolve(node: QuamBase, key: Any) -> Any:
+    """The referenced value behind ``node[key]`` / ``node.key``."""
+    try:
+        if isinstance(node, (QuamDict, QuamList)):
+            return node[key]
+        return getattr(node, key)
+    except Exception:  # a broken reference hashes as its string
+        return None
+
+
+def _partition(root: QuamRoot) -> Tuple[Dict[UnitKey, QuamComponent], Dict[int, Set[UnitKey]]]:
+    """Split the tree into config-writing units.
+
+    Returns ``(units, covers)``: units in tree order, and for EVERY QUAM node
+    visited (``id`` -> unit keys) the units at or below it — what a reference
+    to that node depends on.
+    """
+    units: Dict[UnitKey, QuamComponent] = {}
+    covers: Dict[int, Set[UnitKey]] = {}
+
+    def mark(node: Any, key: UnitKey) -> None:
+        covers.setdefault(id(node), set()).add(key)
+        if isinstance(node, QuamBase):
+            for _, child in _raw_children(node):
+                if isinstance(child, QuamBase):
+                    mark(child, key)
+
+    def visit(node: QuamBase, path: UnitKey) -> Set[UnitKey]:
+        if _writes_config(node):
+            units[path] = node
+            mark(node, path)
+            return {path}
+        below: Set[UnitKey] = set()
+        for key, child in _raw_children(node):
+            if isinstance(child, QuamBase):
+                below |= visit(child, path + (key,))
+        covers.setdefault(id(node), set()).update(below)
+        return below
+
+    visit(root, ())
+    return units, covers
+
+
+def _digest(unit: QuamBase, covers: Dict[int, Set[UnitKey]]) -> Tuple[str, Set[UnitKey]]:
+    """Content hash of one unit, plus the units its component references point at."""
+    h = hashlib.sha1()
+    deps: Set[UnitKey] = set()
+
+    def feed(value: Any) -> None:
+        if isinstance(value, QuamBase):
+            h.update(f"<{type(value).__module__}.{type(value).__qualname__}>".encode())
+            for key, raw in _raw_children(value):
+                h.update(f"{key!r}=".encode())
+                if isinstance(raw, str) and string_reference.is_reference(raw):
+                    target = _resolve(value, key)
+                    if isinstance(target, QuamBase):
+                        h.update(raw.encode())
+                        deps.update(covers.get(id(target), ()))
+                        continue
+                    raw = target
+                feed(raw)
+        elif isinstance(value, dict):
+            h.update(b"{")
+            for key in value:
+                h.update(f"{key!r}:".encode())
+                feed(value[key])
+            h.update(b"}")
+        elif isinstance(value, (list, tuple)):
+            h.update(b"[")
+            for item in value:
+                feed(item)
+            h.update(b"]")
+        elif isinstance(value, np.ndarray):
+            h.update(f"{value.dtype}{value.shape}".encode())
+            h.update(np.ascontiguousarray(value).tobytes())
+        else:
+            h.update(repr(value).encode())
+        h.update(b";")
+
+    feed(unit)
+    return h.hexdigest(), deps
+
+
+def _fingerprint(order: List[UnitKey], digests: Dict[UnitKey, str]) -> str:
+    """The config's fingerprint from its units' digests, in build order."""
+    h = hashlib.sha1()
+    for key in order:
+        h.update(f"{key!r}={digests[key]};".encode())
+    return h.hexdigest()
+
+
+def _unit_components(unit: QuamComponent) -> List[QuamComponent]:
+    """A unit's components in ``generate_config()``'s order, read from the
+    LIVE unit: its pulses may have been added or removed without the unit set
+    changing. Raises ValueError when one of them orders itself against a
+    component outside the unit."""
+    return sort_quam_components(list(unit.iterate_components()))
+
+
+# --------------------------------------------------------------- config diff
+
+def _skeleton(config: Any) -> Any:
+    """Copy the dict STRUCTURE, sharing every leaf: enough to diff what a
+    unit's ``apply_to_config`` wrote, at a fraction of a deepcopy."""
+    if isinstance(config, dict):
+        return {k: _skeleton(v) for k, v in config.items()}
+    return config
+
+
+def _created(value: Any, path: Tuple) -> List[Tuple[Tuple, Any]]:
+    """A new subtree as ``_MISSING`` entries: its root, then every path below
+    it, so that reverting leaves what later units wrote into it."""
+    out: List[Tuple[Tuple, Any]] = [(path, _MISSING)]
+    if isinstance(value, dict):
+        for key, child in value.items():
+            out.extend(_created(child, path + (key,)))
+    return out
+
+
+def _diff(before: Any, after: Any, path: Tuple = ()) -> List[Tuple[Tuple, Any]]:
+    """``[(path, value_before)]`` for every path that differs (``_MISSING``
+    when the unit created it, see :func:`_created`)."""
+    if not (isinstance(before, dict) and isinstance(after, dict)):
+        if before is after:
+            return []
+        try:
+            if type(before) is type(after) and before == after:
+                return []
+        except Exception:  # ambiguous array comparison: treat as changed
+            pass
+        return [(path, before)]
+    out: List[Tuple[Tuple, Any]] = []
+    for key, value in after.items():
+        if key not in before:
+            out.extend(_created(value, path + (key,)))
+        else:
+            out.extend(_diff(before[key], value, path + (key,)))
+    for key in before:
+        if key not in after:
+            out.append((path + (key,), before[key]))
+    return out
+
+
+def _revert(config: dict, fragment: List[Tuple[Tuple, Any]]) -> None:
+    for path, before in reversed(fragment):
+        parent = config
+        for key in path[:-1]:
+            parent = parent.get(key)
+            if not isinstance(parent, dict):
+                break
+        else:
+            if before is _MISSING:
+                value = parent.get(path[-1])
+                if not (isinstance(value, dict) and value):  # others wrote into it: keep
+                    parent.pop(path[-1], None)
+            else:
+                parent[path[-1]] = before
+
+
+# ----------------------------------------------------------------- the cache
+
+@dataclass
+class _Built:
+    config: dict
+    fingerprint: str
+    order: List[UnitKey]
+    digests: Dict[UnitKey, str]
+    deps: Dict[UnitKey, Set[UnitKey]]
+    fragments: Dict[UnitKey, List[Tuple[Tuple, Any]]] = field(default_factory=dict)
+
+
+class ConfigCache:
+    """The QUA config of ONE QUAM machine, regenerated incrementally.
+
+    :meth:`get` returns ``(config, fingerprint)``. After each call,
+    ``last_regenerated`` lists the units that were re-applied (``None`` after a
+    full build), and ``full_builds`` / ``incremental_builds`` / ``hits`` count
+    what the cache did — the benchmark and the tests read these.
+    """
+
+    def __init__(self) -> None:
+        self._built: Optional[_Built] = None
+        self._lock = threading.Lock()
+        self.last_regenerated: Optional[List[UnitKey]] = None
+        self.full_builds = 0
+        self.incremental_builds = 0
+        self.hits = 0
+
+    def get(self, machine: QuamRoot) -> Tuple[dict, str]:
+        with self._lock:
+            units, covers = _partition(machine)
+            digests, deps = {}, {}
+            for key, unit in units.items():
+                digests[key], deps[key] = _digest(unit, covers)
+            built = self._built
+            if built is None or set(built.digests) != set(units):
+                self._built = self._full_build(machine, units, digests, deps)
+            else:
+                dirty = {k for k in units if digests[k] != built.digests[k]}
+                dirty = self._close_over_dependents(dirty, deps)
+                if dirty:
+                    try:
+                        components = {key: _unit_components(units[key]) for key in dirty}
+                    except ValueError:  # ordered across units: only the full sort knows
+                        self._built = self._full_build(machine, units, digests, deps)
+                    else:
+                        self._regenerate(built, dirty, components, digests, deps)
+                else:
+                    self.hits += 1
+                    self.last_regenerated = []
+            return self._built.config, self._built.fingerprint
+
+    def invalidate(self) -> None:
+        """Drop everything: the next :meth:`get` is a full build."""
+        with self._lock:
+            self._built = None
+
+    def verify(self, machine: QuamRoot) -> bool:
+        """Whether the cached config equals a fresh full ``generate_config()``."""
+        config, _ = self.get(machine)
+        return config_fingerprint(config) == config_fingerprint(machine.generate_config())
+
+    # ------------------------------------------------------------ building
+    @staticmethod
+    def _owners(units: Dict[UnitKey, QuamComponent]) -> Dict[int, UnitKey]:
+        owners: Dict[int, UnitKey] = {}
+        for key, unit in units.items():
+            for component in unit.iterate_components():
+                owners.setdefault(id(component), key)
+        return owners
+
+    def _sorted_components(self, machine: QuamRoot, units) -> List[Tuple[UnitKey, QuamComponent]]:
+        """``(owner, component)`` in ``generate_config()``'s own order, over
+        the whole tree. Pure containers are skipped: their ``apply_to_config``
+        is a no-op."""
+        owners = self._owners(units)
+        ordered = []
+        for component in sort_quam_components(list(machine.iterate_components())):
+            owner = owners.get(id(component))
+            if owner is not None:
+                ordered.append((owner, component))
+        return ordered
+
+    def _full_build(self, machine, units, digests, deps) -> _Built:
+        """The full build, recording which paths each unit wrote."""
+        config = copy.deepcopy(qua_config_template)
+        built = _Built(config=config, fingerprint="", order=[], digests=digests, deps=deps)
+        run: List[QuamComponent] = []
+        run_owner: Optional[UnitKey] = None
+
+        def flush() -> None:
+            if run_owner is None or not run:
+                return
+            before = _skeleton(config)
+            for component in run:
+                component.apply_to_config(config)
+            built.fragments.setdefault(run_owner, []).extend(_diff(before, config))
+            run.clear()
+
+        for owner, component in self._sorted_components(machine, units):
+            if owner != run_owner:
+                flush()
+                run_owner = owner
+            run.append(component)
+            if owner not in built.order:
+                built.order.append(owner)
+        flush()
+        generate_config_final_actions(config)
+        built.fingerprint = _fingerprint(built.order, digests)
+        self.full_builds += 1
+        self.last_regenerated = None
+        return built
+
+    def _regenerate(self, built: _Built, dirty: Set[UnitKey], components: Dict[UnitKey, List[QuamComponent]],
+                    digests, deps) -> None:
+        ordered = [k for k in built.order if k in dirty]
+        for key in reversed(ordered):
+            _revert(built.config, built.fragments.pop(key, []))
+        for key in ordered:
+            before = _skeleton(built.config)
+            for component in components[key]:
+                component.apply_to_config(built.config)
+            built.fragments[key] = _diff(before, built.config)
+        generate_config_final_actions(built.config)
+        built.digests = digests
+        built.deps = deps
+        built.fingerprint = _fingerprint(built.order, digests)
+        self.incremental_builds += 1
+        self.last_regenerated = ordered
+
+    @staticmethod
+    def _close_over_dependents(dirty: Set[UnitKey], deps: Dict[UnitKey, Set[UnitKey]]) -> Set[UnitKey]:
+        """Add every unit that references a dirty one, transitively."""
+        closed = set(dirty)
+        changed = bool(closed)
+        while changed:
+            changed = False
+            for key, targets in deps.items():
+                if key not in closed and targets & closed:
+                    closed.add(key)
+                    changed = True
+        return closed
+
+
+_CACHES_LOCK = threading.Lock()
+
+
+def cached_config(machine) -> Tuple[dict, str]:
+    """``(config, fingerprint)`` for ``machine`` through its per-machine cache.
+
+    Anything that is not a QUAM root (a test stand-in) gets a plain
+    ``generate_config()`` and a content fingerprint.
+    """
+    if not isinstance(machine, QuamRoot):
+        config = machine.generate_config()
+        return config, config_fingerprint(config)
+    with _CACHES_LOCK:
+        cache = _cache_for(machine)
+    return cache.get(machine)
+
+
+def _cache_for(machine) -> ConfigCache:
+    cache = getattr(machine, "__dict__", {}).get("_lchqm_config_cache")
+    if cache is None:
+        cache = ConfigCache()
+        # object.__setattr__: QUAM's own __setattr__ would try to convert and
+        # validate the attribute as part of the tree
+        object.__setattr__(machine, "_lchqm_config_cache", cache)
+    return cache
+
+
+class _Snapshot(dict):
+    """A private copy of a cached config that keeps the cache's fingerprint;
+    a ``deepcopy`` of it is a plain dict again, fingerprinted by content."""
+
+    fingerprint: str
+
+    def __deepcopy__(self, memo) -> dict:
+        return copy.deepcopy(dict(self), memo)
+
+
+def snapshot_config(machine) -> dict:
+    """A private, read-only copy of ``machine``'s cached config, for a run
+    that must not see later edits; :func:`resolve_config` hands it on with the
+    cache's fingerprint, so the pooled QM is reused."""
+    config, fingerprint = cached_config(machine)
+    snapshot = _Snapshot(copy.deepcopy(config))
+    snapshot.fingerprint = fingerprint
+    return snapshot
+
+
+def resolve_config(machine, config: Optional[dict] = None) -> Tuple[dict, Optional[str]]:
+    """What an acquire opens its QM with: an explicit ``config`` as given (the
+    pool fingerprints it, unless it is a :func:`snapshot_config`), otherwise the
+    machine's cached config and its already-known fingerprint."""
+    if config is not None:
+        return config, getattr(config, "fingerprint", None)
+    with span("generate_config"):
+        return cached_config(machine)
@@ -2,17 +2,25 @@
 No qualibrate imports.
 
 Flux amplitude/rail validation lives in ``_flux_limits.py`` — a probe asking
-"may this port emit these volts?" imports from there, not here.
+"may this port emit these volts?" imports from there, not here. The QOP
+connection and open QM are pooled across acquisitions in ``_session.py``.
 """
 
-from typing import Callable, List, Optional
+from collections import deque
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import xarray as xr
-from qualang_tools.multi_user import qm_session
 from qualang_tools.results import progress_counter
 from qualibration_libs.core import BatchableList
 from qualibration_libs.data import XarrayDataFetcher
 
+from customized.probes._compact import compact_dtypes
+from customized.probes._config_cache import resolve_config
+from customized.probes._session import log_execution_report, session_pool
+from customized.probes._trace import record_bytes
+from customized.result_storage import raw_storage_encoding
+
 
 def select_qubits(machine, names: Optional[List[str]] = None, *, multiplexed: bool = False) -> BatchableList:
     """Node-free replacement for `qualibration_libs.parameters.get_qubits(node)`.
@@ -58,32 +66,256 @@ def acquire(
     timeout: float,
     log: Optional[Callable] = None,
     config: Optional[dict] = None,
+    stop_when: Optional[Callable[[xr.Dataset, int], bool]] = None,
+    compact: bool = False,
 ) -> xr.Dataset:
     """Connect to the QOP, execute the program and fetch the raw xr.Dataset.
 
     The execute-and-fetch half is identical for every swept experiment, so all
-    probes share this one implementation. `config` defaults to
-    `machine.generate_config()`; pass an explicit config when the program needs a
-    pre-built one (e.g. a baked config carrying baking ops the fresh config lacks).
+    probes share this one implementation. `config` defaults to the machine's
+    cached config (regenerated incrementally, see `_config_cache`); pass an
+    explicit config when the program needs a pre-built one (e.g. a baked config
+    carrying baking ops the fresh config lacks).
+
+    The manager and the open QM come from the process-wide session pool, so a
+    run with an unchanged config skips both connect and open, and a program
+    that QM already compiled is queued again without recompiling; the
+    per-stage timings are logged (when `log` is given) and kept on the pool.
+
+    `stop_when(partial_dataset, shots_so_far)` is asked on every partial fetch
+    of an averaged sweep (see `stop_at_snr`); once it returns True the job is
+    halted and the partial averages are returned, with attrs `shots_done` and
+    `stopped_early`. The shot count is the `n` stream's, i.e. that of the
+    batch running when it stopped (earlier batches ran in full).
+
+    `compact` narrows per-shot I/Q to float32 and discriminated states to int8
+    as soon as they are fetched (`_compact.compact_dtypes`).
     """
-    qmm = machine.connect()
-    config = config if config is not None else machine.generate_config()
+    config, fingerprint = resolve_config(machine, config)
+    pool = session_pool()
     # Execute the QUA program only if the quantum machine is available (this is to avoid interrupting running jobs).
-    with qm_session(qmm, config, timeout=timeout) as qm:
-        job = qm.execute(prog)
-        data_fetcher = XarrayDataFetcher(job, sweep_axes)
-        for dataset in data_fetcher:
-            progress_counter(
-                data_fetcher.get("n", 0),
-                num_shots,
-                start_time=data_fetcher.t_start,
-            )
-        # Expose possible runtime errors. execution_report is a method on some QM
-        # API versions and a property on others — tolerate both.
-        if log:
-            rep = getattr(job, "execution_report", None)
-            if callable(rep):
-                log(rep())
-            elif rep is not None:
-                log(rep)
+    with pool.session(machine, config, timeout=timeout, fingerprint=fingerprint) as (qm, timings):
+        program_id = pool.compile(qm, prog, timings)
+        with timings.stage("execute"):
+            job = _wait_for_execution(_add_to_queue(qm, program_id))
+        with timings.stage("fetch"):
+            data_fetcher = XarrayDataFetcher(job, sweep_axes)
+            stopped = False
+            for dataset in data_fetcher:
+                shots = data_fetcher.get("n", 0)
+                progress_counter(shots, num_shots, start_time=data_fetcher.t_start)
+                if stop_when is not None and stop_when(dataset, shots):
+                    job.halt()
+                    stopped = True
+                    break
+            dataset = _handed_on(dataset, compact)
+        log_execution_report(job, log)
+    if log:
+        log(timings.summary())
+        if stopped:
+            log(f"stopped early at {shots}/{num_shots} shots")
+    if stop_when is not None:
+        dataset = dataset.assign_attrs(shots_done=int(shots if stopped else num_shots), stopped_early=stopped)
     return dataset
+
+
+def sweep_snr(dataset: xr.Dataset, variables: Sequence[str] = ("I", "Q"), dim: str = "qubit") -> xr.DataArray:
+    """Per-`dim` signal-to-noise of an averaged sweep: the peak-to-peak of each
+    variable over its sweep divided by the noise. The noise comes from the
+    second differences along the last sweep axis (a smooth response is locally
+    linear; averaging noise is not), as their median absolute value over
+    ``0.6745 * sqrt(6)``, so the few points on a sharp feature do not count
+    as noise. The best
+    of `variables` counts, since the signal may sit in either quadrature. A
+    qubit whose batch has not started yet (all zeros) reads 0.
+
+    Pure noise still shows a peak-to-peak of ~4-5 sigma over ~100 points, so
+    a useful target sits well above that.
+    """
+    best = None
+    for name in variables:
+        if name not in dataset:
+            continue
+        da = dataset[name].transpose(dim, ...)
+        if da.ndim < 2:
+            continue
+        # (qubit, other sweeps flattened, last sweep)
+        flat = np.asarray(da.values, dtype=float).reshape(da.shape[0], -1, da.shape[-1])
+        ptp = np.ptp(flat, axis=-1).max(axis=-1)
+        second = np.diff(flat, n=2, axis=-1)
+        noise = np.nanmedian(np.abs(second), axis=-1).mean(axis=-1) / (0.6745 * np.sqrt(6))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            snr = np.where(noise > 0, ptp / noise, 0.0)
+        best = snr if best is None else np.maximum(best, snr)
+    if best is None:
+        raise KeyError(f"none of {list(variables)} in the dataset")
+    return xr.DataArray(best, coords={dim: dataset[dim]}, dims=(dim,))
+
+
+def stop_at_snr(
+    target: float,
+    *,
+    variables: Sequence[str] = ("I", "Q"),
+    min_shots: int = 16,
+) -> Callable[[xr.Dataset, int], bool]:
+    """An `acquire(stop_when=...)` rule: stop once every qubit's `sweep_snr`
+    reaches `target`, but never before `min_shots` averages."""
+
+    def reached(dataset: xr.Dataset, shots: int) -> bool:
+        return shots >= min_shots and bool((sweep_snr(dataset, variables) >= target).all())
+
+    return reached
+
+
+def acquire_repeated(
+    machine,
+    prog,
+    sweep_axes,
+    *,
+    repeats: int,
+    timeout: float,
+    log: Optional[Callable] = None,
+    config: Optional[dict] = None,
+    queue_depth: int = 2,
+    compact: bool = False,
+) -> Iterator[xr.Dataset]:
+    """Compile `prog` once and run it `repeats` times, yielding each run's raw
+    xr.Dataset (attr `repeat_index`) as soon as it is fetched.
+
+    The compiled program is queued (`_add_to_queue`), keeping up to
+    `queue_depth` runs on the QOP so the next one starts while the current one
+    is fetched and handed on. Every run uses the config the program was
+    compiled against: state updates made by the consumer in between take
+    effect on the next `acquire`, not here. Closing the generator early
+    cancels the runs still queued and closes the QM (one may already be
+    running); closing it after the last dataset releases the QM to the pool
+    as usual. `compact` is as for `acquire`.
+    """
+    if repeats < 1:
+        raise ValueError(f"{repeats=} must be at least 1")
+    if queue_depth < 1:
+        raise ValueError(f"{queue_depth=} must be at least 1")
+    config, fingerprint = resolve_config(machine, config)
+    pool = session_pool()
+    with pool.session(machine, config, timeout=timeout, fingerprint=fingerprint) as (qm, timings):
+        program_id = pool.compile(qm, prog, timings)
+        pending = deque()
+        queued = 0
+        try:
+            for index in range(repeats):
+                with timings.stage("execute"):
+                    while queued < repeats and len(pending) < queue_depth:
+                        pending.append(_add_to_queue(qm, program_id))
+                        queued += 1
+                    job = _wait_for_execution(pending.popleft())
+                with timings.stage("fetch"):
+                    data_fetcher = XarrayDataFetcher(job, sweep_axes)
+                    for dataset in data_fetcher:
+                        pass
+                    dataset = _handed_on(dataset, compact)
+                log_execution_report(job, log)
+                progress_counter(index + 1, repeats, start_time=data_fetcher.t_start)
+                try:
+                    yield dataset.assign_attrs(repeat_index=index)
+                except GeneratorExit:
+                    # closed after its last fetch: nothing runs on the QM, so
+                    # it goes back to the pool open, compiled program and all
+                    if pending:
+                        raise
+                    break
+        finally:
+            for job in pending:
+                _cancel(job)
+    if log:
+        log(timings.summary())
+
+
+def acquire_batch(
+    machine,
+    programs: Sequence[Tuple[Any, Any]],
+    *,
+    timeout: float,
+    log: Optional[Callable] = None,
+    config: Optional[dict] = None,
+    queue_depth: int = 2,
+    compact: bool = False,
+) -> Iterator[xr.Dataset]:
+    """Run several `(prog, sweep_axes)` that share ONE config back to back
+    through a single open QM's job queue, yielding each raw xr.Dataset (attr
+    `batch_index`) in order as soon as it is fetched.
+
+    Each program is compiled and queued (`_add_to_queue`), keeping
+    up to `queue_depth` jobs on the QOP: the next program is compiled and
+    waiting while the current one runs and is fetched, so the OPX never idles
+    between experiments. Closing the generator early cancels the jobs still
+    queued and closes the QM (one may already be running); closing it after
+    the last dataset releases the QM to the pool as usual. `compact` is as
+    for `acquire`.
+    """
+    if queue_depth < 1:
+        raise ValueError(f"{queue_depth=} must be at least 1")
+    config, fingerprint = resolve_config(machine, config)
+    pool = session_pool()
+    with pool.session(machine, config, timeout=timeout, fingerprint=fingerprint) as (qm, timings):
+        pending = deque()
+        queued = 0
+        try:
+            for index, (_, sweep_axes) in enumerate(programs):
+                while queued < len(programs) and len(pending) < queue_depth:
+                    program_id = pool.compile(qm, programs[queued][0], timings)
+                    with timings.stage("execute"):
+                        pending.append(_add_to_queue(qm, program_id))
+                    queued += 1
+                with timings.stage("execute"):
+                    job = _wait_for_execution(pending.popleft())
+                with timings.stage("fetch"):
+                    data_fetcher = XarrayDataFetcher(job, sweep_axes)
+                    for dataset in data_fetcher:
+                        pass
+                    dataset = _handed_on(dataset, compact)
+                log_execution_report(job, log)
+                progress_counter(index + 1, len(programs), start_time=data_fetcher.t_start)
+                try:
+                    yield dataset.assign_attrs(batch_index=index)
+                except GeneratorExit:
+                    # closed after its last fetch: nothing runs on the QM, so
+                    # it goes back to the pool open, compiled programs and all
+                    if pending:
+                        raise
+                    break
+        finally:
+            for job in pending:
+                _cancel(job)
+    if log:
+        log(timings.summary())
+
+
+def _handed_on(dataset: xr.Dataset, compact: bool) -> xr.Dataset:
+    """A fetched dataset as the probes return it: its bytes traced, narrowed
+    when `compact`, and carrying the chunked, compressed storage encoding
+    when ``LCHQM_RAW_STORAGE`` asks for it (`customized.result_storage`)."""
+    record_bytes(dataset.nbytes)
+    if compact:
+        dataset = compact_dtypes(dataset)
+    return raw_storage_encoding(dataset)
+
+
+def _add_to_queue(qm, program_id):
+    """Queue a compiled program: `qm.add_to_queue` where the QM API has it,
+    else `qm.queue.add_compiled` (deprecated since qm-qua 1.2, warns there)."""
+    add = getattr(qm, "add_to_queue", None)
+    return add(program_id) if callable(add) else qm.queue.add_compiled(program_id)
+
+
+def _wait_for_execution(pending_job):
+    """The running job behind a queued one. The OPX1000 job API has no
+    separate pending object — its queued job is already the job."""
+    wait = getattr(pending_job, "wait_for_execution", None)
+    return wait() if callable(wait) else pending_job
+
+
+def _cancel(pending_job) -> None:
+    try:
+        pending_job.cancel()
+    except Exception:  # already started or gone: nothing left to cancel
+        pass
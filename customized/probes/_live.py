@@ -0,0 +1,204 @@
+"""Live per-block fetch for the tracking probes (Bayesian / ADE T1): every block's
+estimates are read WHILE the program runs instead of after
+``wait_for_all_values()``.
+
+A tracking probe saves one entry per block on each per-block stream
+(``save_all`` of a scalar, or of a ``buffer(per_block)`` row). The host polls
+``count_so_far()`` and fetches only the blocks that are new. It writes them
+into :class:`BlockStreams`: one preallocated ``(qubit, block_idx, *inner)``
+array per variable. Blocks that have not arrived yet read NaN, or -1 for the
+integer state arrays. ``attrs["blocks_done"]`` gives, per qubit, how many
+blocks every stream has delivered. Qubits run batch after batch, so they fill
+at different times.
+
+:func:`iter_blocks` yields a dataset each time a poll brings new blocks, then
+the final one, built once the program has ended. A consumer that stops early
+(a converged estimate, a dashboard closed) just closes the generator; the
+running job is halted.
+
+:func:`fetch_stacked` is the after-the-run counterpart for probes that fetch
+whole handles: one per qubit, written straight into a preallocated
+``(qubit, ...)`` array.
+"""
+
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import xarray as xr
+
+from customized.probes._config_cache import resolve_config
+from customized.probes._session import log_execution_report, session_pool
+from customized.probes._trace import record_bytes
+
+__all__ = ["BlockStreams", "fetch_stacked", "fetch_values", "iter_blocks"]
+
+#: seconds between ``count_so_far()`` polls while the program runs.
+_POLL_S = 0.5
+
+
+def _handle(results, name: str, label: str):
+    handle = results.get(name)
+    if handle is None:
+        try:
+            avail = list(results.iter_all())
+        except Exception:
+            avail = "unknown"
+        raise RuntimeError(f"{label} result handle '{name}' missing. Available: {avail}")
+    return handle
+
+
+def _plain(values) -> np.ndarray:
+    """Unwrap the structured dtype ``save_all`` / timestamp streams carry."""
+    values = np.asarray(values)
+    if values.dtype.names:
+        field = "value" if "value" in values.dtype.names else values.dtype.names[0]
+        values = values[field]
+    return values
+
+
+def fetch_values(results, name: str, label: str) -> np.ndarray:
+    """Fetch one whole handle (after the run)."""
+    return np.squeeze(_plain(_handle(results, name, label).fetch_all()))
+
+
+def fetch_stacked(
+    results,
+    names: Sequence[str],
+    shape: Tuple[int, ...],
+    label: str,
+    *,
+    axes: Optional[Tuple[int, ...]] = None,
+    dtype=float,
+) -> np.ndarray:
+    """Fetch one whole handle per qubit into a ``(len(names), *shape)`` array.
+
+    The result is allocated once, in `dtype`; each fetched buffer is written
+    into its qubit's slice through a ``transpose(axes)`` VIEW (the stream's
+    buffer order to the dataset's axis order), so no per-qubit transposed or
+    stacked copy is ever made and at most one fetched buffer is alive beside
+    the result. All missing handles are reported together.
+    """
+    handles = [results.get(name) for name in names]
+    missing = [name for name, handle in zip(names, handles) if handle is None]
+    if missing:
+        try:
+            avail = list(results.iter_all())
+        except Exception:
+            avail = "unknown"
+        raise RuntimeError(f"{label} result handles missing {missing}. Available handles: {avail}")
+
+    out = np.empty((len(names),) + tuple(shape), dtype=dtype)
+    for i, (name, handle) in enumerate(zip(names, handles)):
+        values = _plain(handle.fetch_all())
+        record_bytes(values.nbytes)
+        if axes is not None:
+            values = values.transpose(axes)
+        if values.shape != out.shape[1:]:
+            raise RuntimeError(f"{label} handle '{name}' has shape {values.shape} (after transpose), "
+                               f"expected {out.shape[1:]}")
+        out[i] = values
+    return out
+
+
+class BlockStreams:
+    """Per-block streams of one run, filled as blocks arrive.
+
+    ``add(var, stream, ...)`` registers the per-qubit handles
+    ``<stream>1``, ``<stream>2``, ...; each delivers one entry (a scalar or an
+    ``inner``-shaped row) per block.
+    """
+
+    def __init__(self, qubit_names: List[str], num_blocks: int, label: str) -> None:
+        self.qubit_names = list(qubit_names)
+        self.num_blocks = num_blocks
+        self.label = label
+        self.arrays: Dict[str, np.ndarray] = {}
+        self.streams: Dict[str, str] = {}
+        self.done: Dict[Tuple[str, int], int] = {}
+
+    def add(self, var: str, stream: str, inner: Tuple[int, ...] = (), dtype=float) -> np.ndarray:
+        fill = -1 if np.issubdtype(np.dtype(dtype), np.integer) else np.nan
+        self.arrays[var] = np.full((len(self.qubit_names), self.num_blocks) + tuple(inner), fill, dtype=dtype)
+        self.streams[var] = stream
+        for i in range(len(self.qubit_names)):
+            self.done[(var, i)] = 0
+        return self.arrays[var]
+
+    def drain(self, results) -> bool:
+        """Fetch every block saved since the last call. Returns whether
+        anything new arrived."""
+        arrived = False
+        for var, stream in self.streams.items():
+            array = self.arrays[var]
+            for i in range(len(self.qubit_names)):
+                handle = _handle(results, f"{stream}{i + 1}", self.label)
+                done = self.done[(var, i)]
+                count = min(handle.count_so_far(), self.num_blocks)
+                if count <= done:
+                    continue
+                block = _plain(handle.fetch(slice(done, count), flat_struct=True))
+                record_bytes(block.nbytes)
+                array[i, done:count] = block.reshape((count - done,) + array.shape[2:])
+                self.done[(var, i)] = count
+                arrived = True
+        return arrived
+
+    @property
+    def blocks_done(self) -> List[int]:
+        """Blocks every stream has delivered, per qubit."""
+        return [min(self.done[(var, i)] for var in self.streams) for i in range(len(self.qubit_names))]
+
+    def elapsed_s(self, var: str) -> np.ndarray:
+        """A timestamp variable (4 ns clock ticks) as seconds since each
+        qubit's first block; NaN where no block has arrived."""
+        stamps = self.arrays[var].astype(float)
+        return (stamps - stamps[:, :1]) * 4e-9
+
+
+def iter_blocks(
+    machine,
+    prog,
+    blocks: BlockStreams,
+    build: Callable[[object, bool], xr.Dataset],
+    *,
+    timeout: float,
+    log: Optional[Callable] = None,
+    config: Optional[dict] = None,
+    poll_s: float = _POLL_S,
+) -> Iterator[xr.Dataset]:
+    """Execute `prog`, drain `blocks` on every poll and yield
+    ``build(result_handles, final)`` whenever new blocks arrived; the last
+    dataset yielded is the final one (``final=True``, built after the run)."""
+    config, fingerprint = resolve_config(machine, config)
+    with session_pool().session(machine, config, timeout=timeout, fingerprint=fingerprint) as (qm, timings):
+        with timings.stage("execute"):
+            job = qm.execute(prog)
+        results = job.result_handles
+        finished = False
+        try:
+            while True:
+                running = results.is_processing()
+                if not running:
+                    results.wait_for_all_values()
+                with timings.stage("fetch"):
+                    arrived = blocks.drain(results)
+                if not running:
+                    break
+                if arrived:
+                    yield _with_progress(build(results, False), blocks)
+                time.sleep(poll_s)
+            with timings.stage("fetch"):
+                final = _with_progress(build(results, True), blocks)
+            finished = True
+        finally:
+            if not finished and hasattr(job, "halt"):
+                job.halt()
+        log_execution_report(job, log)
+    if log:
+        log(timings.summary())
+    yield final
+
+
+def _with_progress(dataset: xr.Dataset, blocks: BlockStreams) -> xr.Dataset:
+    return dataset.assign_attrs(blocks_done=blocks.blocks_done)
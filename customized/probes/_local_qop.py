@@ -0,0 +1,466 @@
+"""A local stand-in QOP: manager, QM, job queue and result handles that run the
+whole acquisition path (``QMBackend.acquire`` -> probe -> ``_lib.acquire`` ->
+``XarrayDataFetcher`` -> ``_to_canonical``) with no instrument.
+
+The stand-in does not execute QUA. It reads the program's stream layout, meaning
+every named result, its ``save`` / ``save_all`` kind, its buffer shape and whether
+it is averaged, from the ``resultAnalysis`` the SDK compiles alongside the program
+(:func:`stream_layout`). It then synthesizes plausible data for each stream:
+
+* an AVERAGED stream follows a curve of the chosen ``model`` (Lorentzian dip,
+  exponential decay, Rabi or Ramsey fringes) along its last buffer axis, as
+  the excited population mapped onto the IQ plane (``I``/``Q``), or as the
+  population itself (``state``);
+* a stream that is NOT averaged is single shots: IQ blobs around the g/e
+  points of the qubit's readout (``I``/``Q``), or 0/1 outcomes (``state``);
+* ``n`` counts iterations, and a ``*stamp*`` stream carries increasing clock ticks.
+
+A stream ``<base><i>`` belongs to the i-th active qubit; its blobs are centered
+on that qubit's QUAM readout ``threshold``, and ``amplitude`` sets their
+separation. A ``save_all`` stream delivers ``entries`` entries over
+the job's ``run_s``. Every handle reveals its data progressively (``count_so_far``,
+``is_processing``) with the configured latency, so polling fetchers
+(``_stream``, ``_live``) see partial results as they would on the OPX.
+
+Plug it in with :func:`local_qop`, which routes ``machine.connect()`` to the
+stand-in and flushes the session pool on the way in and out::
+
+    with local_qop(machine, model="rabi", run_s=0.2) as qop:
+        ds = backend.acquire(experiment)
+    qop.jobs  # every job the stand-in ran
+
+``scripts/bench_local_qop.py`` times the acquisition path on top of it.
+"""
+
+import itertools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from customized.probes._session import session_pool
+
+__all__ = ["LocalQOP", "MODELS", "StreamSpec", "local_qop", "stream_layout"]
+
+#: excited-state population along a normalized sweep x in [0, 1].
+MODELS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "lorentzian": lambda x: 0.9 / (1 + ((x - 0.5) / 0.05) ** 2),
+    "decay": lambda x: 0.95 * np.exp(-3 * x),
+    "rabi": lambda x: 0.5 * (1 - np.cos(4 * np.pi * x)),
+    "ramsey": lambda x: 0.5 * (1 + np.exp(-2 * x) * np.cos(10 * np.pi * x)),
+}
+
+_NAME = re.compile(r"^(?P<base>.*?)(?P<index>\d+)?$")
+
+
+@dataclass(frozen=True)
+class StreamSpec:
+    """One named result of a program, as its stream processing defines it."""
+
+    name: str
+    save_all: bool
+    shape: Tuple[int, ...] = ()
+    averaged: bool = False
+    boolean: bool = False
+    timestamped: bool = False
+
+    @property
+    def base(self) -> str:
+        return _NAME.match(self.name).group("base")
+
+    @property
+    def qubit_index(self) -> int:
+        """0-based qubit of a ``<base><i>`` stream (0 without a suffix)."""
+        index = _NAME.match(self.name).group("index")
+        return int(index) - 1 if index else 0
+
+
+def stream_layout(prog) -> Dict[str, StreamSpec]:
+    """``{name: StreamSpec}`` from a QUA program's compiled ``resultAnalysis``."""
+    qua_program = getattr(prog, "qua_program", None)
+    if qua_program is None:
+        raise TypeError(f"not a QUA program: {type(prog).__name__}")
+    layout = {}
+    for model in qua_program.resultAnalysis.model:
+        kind, name, pipeline = (_plain(value) for value in model.values)
+        spec = _walk(pipeline, {"shape": (), "averaged": False, "boolean": False, "timestamped": False})
+        layout[name] = StreamSpec(name=name, save_all=kind == "saveAll", **spec)
+    return layout
+
+
+def _plain(value) -> Any:
+    if value.HasField("list_value"):
+        return [_plain(v) for v in value.list_value.values]
+    return value.string_value
+
+
+def _walk(node, spec: dict) -> dict:
+    """The operator chain, outermost first: buffers prepend their dims."""
+    if not isinstance(node, list) or not node:
+        return spec
+    op, args = node[0], node[1:]
+    if op == "@re":
+        spec["timestamped"] = args[0] == "2"
+        return spec
+    inner = _walk(args[-1], dict(spec)) if isinstance(args[-1], list) else spec
+    if op == "buffer":
+        inner["shape"] = tuple(int(a) for a in args[:-1]) + inner["shape"]
+    elif op == "average":
+        inner["averaged"] = True
+    elif op == "map":
+        function = args[0]
+        if function and function[0] == "booleancast":
+            inner["boolean"] = True
+        elif function and function[0] == "average" and inner["shape"]:
+            axis = int(function[1]) if len(function) > 1 else 0
+            inner["shape"] = inner["shape"][:axis] + inner["shape"][axis + 1:]
+    elif op == "zip":
+        inner = _walk(args[0], dict(spec))
+    return inner
+
+
+# ---------------------------------------------------------------- physics
+
+def _readout_points(machine, index: int) -> Tuple[complex, complex, float]:
+    """``(g, e, sigma)`` in the IQ plane for the index-th active qubit, from
+    its QUAM readout (threshold between the blobs, separation from the
+    amplitude); defaults when the tree cannot say."""
+    threshold, amplitude = 0.0, 0.1
+    try:
+        pulse = list(machine.active_qubits)[index].resonator.operations["readout"]
+        if getattr(pulse, "threshold", None) is not None:
+            threshold = float(pulse.threshold)
+        amplitude = float(pulse.amplitude)
+    except Exception:  # a stand-in machine, or no readout op: keep the defaults
+        pass
+    separation = max(abs(amplitude), 1e-3) * 1e-3
+    return (complex(threshold - separation / 2, 1e-5), complex(threshold + separation / 2, -1e-5),
+            separation / 5)
+
+
+class _Physics:
+    def __init__(self, machine, model: Union[str, Callable], noise: float, rng: np.random.Generator):
+        self.machine = machine
+        self.curve = MODELS[model] if isinstance(model, str) else model
+        self.noise = noise
+        self.rng = rng
+
+    def data(self, spec: StreamSpec, entries: int, iterations: int) -> np.ndarray:
+        """The stream's complete data: ``shape`` for a ``save``, ``(entries,
+        *shape)`` for a ``save_all``."""
+        shape = ((entries,) if spec.save_all else ()) + spec.shape
+        base = spec.base.rstrip("_").lower()
+        if "stamp" in base:
+            return (np.arange(int(np.prod(shape))) * 1000).reshape(shape).astype(np.int64)
+        if base == "n":
+            return np.full(shape, iterations - 1, dtype=np.int64)
+        if spec.averaged:
+            x = np.linspace(0, 1, spec.shape[-1]) if spec.shape else np.full(1, 0.5)
+            population = np.broadcast_to(np.clip(self.curve(x), 0, 1), shape)
+        else:
+            population = np.full(shape, 0.5)
+        g, e, sigma = _readout_points(self.machine, spec.qubit_index)
+        if base.startswith("state") or spec.boolean:
+            if spec.averaged:
+                return np.clip(population + self.noise * self.rng.standard_normal(shape) / 10, 0, 1)
+            return (self.rng.random(shape) < population).astype(np.int64)
+        if spec.averaged:
+            points = g + population * (e - g)
+        else:
+            points = np.where(self.rng.random(shape) < population, e, g)
+        scatter = sigma * (self.noise if spec.averaged else 1.0)
+        points = points + scatter * (self.rng.standard_normal(shape) + 1j * self.rng.standard_normal(shape))
+        values = points.imag if base.startswith("q") else points.real
+        if spec.timestamped:
+            out = np.zeros(shape, dtype=[("value", float), ("timestamp", np.int64)])
+            out["value"] = values
+            out["timestamp"] = np.arange(out.size).reshape(shape) * 1000
+            return out
+        return values
+
+
+# ------------------------------------------------------------- handles
+
+class _Handle:
+    """One named result; reveals its data as the job progresses."""
+
+    def __init__(self, job: "LocalJob", spec: StreamSpec, data: np.ndarray) -> None:
+        self.job, self.spec, self._data = job, spec, data
+        self.name = spec.name
+
+    def count_so_far(self) -> int:
+        progress = self.job.progress()
+        if not self.spec.save_all:
+            return int(progress > 0)
+        return int(np.floor(progress * len(self._data) + 1e-9))
+
+    def is_processing(self) -> bool:
+        return self.job.is_processing()
+
+    def has_dataloss(self) -> bool:
+        return False
+
+    def wait_for_values(self, count: int = 1, timeout: float = float("inf")) -> None:
+        self.job.wait_until(lambda: self.count_so_far() >= count or not self.job.is_processing(), timeout)
+
+    def wait_for_all_values(self, timeout: float = float("inf")) -> bool:
+        return self.job.wait_until(lambda: not self.job.is_processing(), timeout) and not self.job.halted
+
+    def fetch_all(self, *, check_for_errors: bool = True, flat_struct: bool = False):
+        if not self.spec.save_all:
+            return self._data.copy() if self.count_so_far() else None
+        return self._data[: self.count_so_far()].copy()
+
+    def fetch(self, item, *, check_for_errors: bool = True, flat_struct: bool = False, timeout=None):
+        if not self.spec.save_all:
+            return self.fetch_all()
+        return self._data[: self.count_so_far()][item].copy()
+
+
+class _ResultHandles:
+    def __init__(self, job: "LocalJob", handles: Dict[str, _Handle]) -> None:
+        self._job, self._handles = job, handles
+
+    def keys(self):
+        return self._handles.keys()
+
+    def items(self):
+        return self._handles.items()
+
+    def values(self):
+        return self._handles.values()
+
+    def get(self, name: str, default=None):
+        return self._handles.get(name, default)
+
+    def __getitem__(self, name: str):
+        return self._handles.get(name)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._handles.get(name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._handles
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def iter_all(self):
+        return iter(self._handles.items())
+
+    iterate_results = iter_all
+
+    def is_processing(self) -> bool:
+        return self._job.is_processing()
+
+    def wait_for_all_values(self, timeout: Optional[float] = None) -> bool:
+        return self._job.wait_until(lambda: not self._job.is_processing(), timeout or float("inf")) \
+            and not self._job.halted
+
+    def fetch_results(self, wait_until_done: bool = True, timeout: float = float("inf"),
+                      stream_names=None, item=None) -> Dict[str, Any]:
+        if wait_until_done:
+            self.wait_for_all_values(timeout)
+        names = list(stream_names) if stream_names is not None else list(self._handles)
+        return {name: self._handles[name].fetch_all() for name in names}
+
+
+# ------------------------------------------------------------ QOP objects
+
+class LocalJob:
+    """A running (or queued) stand-in job. Its data is fixed when it is
+    created; time decides how much of it the handles show."""
+
+    def __init__(self, qm: "LocalQM", prog, start: float, run_s: float) -> None:
+        self.qm, self.program = qm, prog
+        self.id = f"{qm.id}-job-{next(qm.qop._ids)}"
+        self.start, self.run_s = start, run_s
+        self.halted = False
+        self.cancelled = False
+        self._stopped_at: Optional[float] = None
+        qop = qm.qop
+        physics = _Physics(qop.machine, qop.model, qop.noise, qop.rng)
+        self.result_handles = _ResultHandles(self, {
+            name: _Handle(self, spec, physics.data(spec, qop.entries_for(spec), qop.iterations))
+            for name, spec in stream_layout(prog).items()
+        })
+
+    # progress
+    def progress(self) -> float:
+        now = self._stopped_at if self._stopped_at is not None else self.qm.qop.clock()
+        if now < self.start:
+            return 0.0
+        if self.run_s <= 0:
+            return 1.0
+        return min(1.0, (now - self.start) / self.run_s)
+
+    def is_processing(self) -> bool:
+        return self._stopped_at is None and self.progress() < 1.0
+
+    def wait_until(self, predicate: Callable[[], bool], timeout: float) -> bool:
+        deadline = self.qm.qop.clock() + timeout
+        while not predicate():
+            if self.qm.qop.clock() >= deadline:
+                return False
+            self.qm.qop.sleep(self.qm.qop.poll_s)
+        return True
+
+    # the job surface the probes use
+    def wait_for_execution(self, timeout: float = float("inf")) -> "LocalJob":
+        self.wait_until(lambda: self.qm.qop.clock() >= self.start, timeout)
+        return self
+
+    def halt(self) -> bool:
+        if self._stopped_at is None:
+            self._stopped_at = self.qm.qop.clock()
+            self.halted = True
+        return True
+
+    def cancel(self) -> bool:
+        if self.qm.qop.clock() >= self.start:
+            return False  # already started: nothing left to cancel
+        self.cancelled = True
+        self._stopped_at = self.start
+        return True
+
+    def execution_report(self) -> str:
+        return f"{self.id}: no errors (local stand-in QOP)"
+
+
+class _Queue:
+    def __init__(self, qm: "LocalQM") -> None:
+        self.qm = qm
+
+    def add_compiled(self, program_id: str) -> LocalJob:
+        return self.qm._submit(self.qm.compiled[program_id])
+
+    def add(self, prog) -> LocalJob:
+        return self.qm._submit(prog)
+
+
+class LocalQM:
+    """The stand-in ``QuantumMachine``: jobs run one after another."""
+
+    def __init__(self, qop: "LocalQOP", config: dict) -> None:
+        self.qop, self.config = qop, config
+        self.id = f"local-qm-{next(qop._ids)}"
+        self.compiled: Dict[str, Any] = {}
+        self.queue = _Queue(self)
+        self.closed = False
+        self._busy_until = 0.0
+
+    def compile(self, prog) -> str:
+        stream_layout(prog)  # an unreadable program fails here, as it would on the QOP
+        program_id = f"{self.id}-prog-{len(self.compiled)}"
+        self.compiled[program_id] = prog
+        return program_id
+
+    def add_to_queue(self, program) -> LocalJob:
+        """The current queueing call: a compiled program id or a program."""
+        return self.queue.add_compiled(program) if isinstance(program, str) else self.queue.add(program)
+
+    def execute(self, prog) -> LocalJob:
+        job = self._submit(prog)
+        job.wait_for_execution()
+        return job
+
+    def close(self) -> None:
+        self.closed = True
+        self.qop.open_ids.discard(self.id)
+
+    def _submit(self, prog) -> LocalJob:
+        with self.qop._lock:
+            now = self.qop.clock()
+            live = [job for job in self.qop.jobs if job.qm is self and not job.cancelled]
+            start = max([now + self.qop.startup_s] + [job.start + job.run_s for job in live
+                                                      if job._stopped_at is None])
+            job = LocalJob(self, prog, start, self.qop.run_s)
+            self.qop.jobs.append(job)
+        return job
+
+
+class LocalQOP:
+    """The stand-in ``QuantumMachinesManager`` (see the module docstring).
+
+    ``model`` is a :data:`MODELS` name or any ``x -> population`` callable;
+    ``run_s`` is each job's duration and ``startup_s`` its delay before the
+    first result; ``entries`` is how many entries a ``save_all`` stream ends
+    with (an int, or per stream name / base name); ``iterations`` is the
+    final value of ``n``. ``clock`` / ``sleep`` are injectable.
+    """
+
+    def __init__(
+        self,
+        machine=None,
+        *,
+        model: Union[str, Callable[[np.ndarray], np.ndarray]] = "rabi",
+        run_s: float = 0.0,
+        startup_s: float = 0.0,
+        entries: Union[int, Mapping[str, int]] = 1,
+        iterations: int = 1,
+        noise: float = 0.05,
+        seed: Optional[int] = 0,
+        poll_s: float = 0.001,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if isinstance(model, str) and model not in MODELS:
+            raise ValueError(f"unknown model {model!r}; one of {sorted(MODELS)} or a callable")
+        self.machine = machine
+        self.model = model
+        self.run_s = float(run_s)
+        self.startup_s = float(startup_s)
+        self.entries = entries
+        self.iterations = int(iterations)
+        self.noise = float(noise)
+        self.rng = np.random.default_rng(seed)
+        self.poll_s = poll_s
+        self.clock = clock
+        self.sleep = sleep
+        self.jobs: List[LocalJob] = []
+        self.opened: List[LocalQM] = []
+        self.open_ids: set = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def entries_for(self, spec: StreamSpec) -> int:
+        if isinstance(self.entries, Mapping):
+            return int(self.entries.get(spec.name, self.entries.get(spec.base, 1)))
+        return int(self.entries)
+
+    # the manager surface the session pool uses
+    def open_qm(self, config: dict, close_other_machines: bool = False) -> LocalQM:
+        qm = LocalQM(self, config)
+        self.opened.append(qm)
+        self.open_ids.add(qm.id)
+        return qm
+
+    def list_open_qms(self) -> List[str]:
+        return list(self.open_ids)
+
+
+@contextmanager
+def local_qop(machine, **kwargs) -> Iterator[LocalQOP]:
+    """Route ``machine.connect()`` to a fresh :class:`LocalQOP` for the
+    duration of the block. The session pool is flushed on entry and exit, so
+    no lease crosses between the stand-in and a real QOP."""
+    qop = LocalQOP(machine, **kwargs)
+    had_own = "connect" in vars(machine)
+    previous = vars(machine).get("connect")
+    session_pool().close_all()
+    # object.__setattr__: QUAM's own __setattr__ would try to make it part of the tree
+    object.__setattr__(machine, "connect", lambda: qop)
+    try:
+        yield qop
+    finally:
+        session_pool().close_all()
+        if had_own:
+            object.__setattr__(machine, "connect", previous)
+        else:
+            object.__delattr__(machine, "connect")
@@ -0,0 +1,438 @@
+"""A process-wide pool of open QOP sessions, so back-to-back acquisitions stop
+paying manager connection + QM open latency every time.
+
+``qm_session`` (qualang_tools.multi_user) opens a fresh ``QuantumMachine`` per
+experiment and closes it on exit, and every probe also called
+``machine.connect()`` first — a new ``QuantumMachinesManager`` per run. In a
+``QMBackend.acquire`` loop both are pure overhead: the manager is the same
+host/cluster every time, and the QM is the same config unless the QUAM tree
+actually changed.
+
+:class:`SessionPool` keeps both alive:
+
+* one MANAGER per ``(host, cluster_name)`` of ``machine.network``, connected once;
+* at most one open QM per manager, keyed by the CONFIG FINGERPRINT it was opened
+  with. A lease with the same fingerprint reuses it; a different fingerprint
+  closes it first (the old QM holds the very ports the new one needs, so opening
+  alongside it would just poll "busy" until timeout);
+* an IDLE TIMEOUT after which the QM is closed, so a Python session left open
+  in a notebook does not lock the QOP against the rest of the lab — the
+  multi-user courtesy ``qm_session`` gave by closing immediately.
+
+A QM whose body raised is closed and dropped rather than returned to the pool:
+its job may still be running, and the next experiment must not inherit that.
+
+One lease per QOP at a time: a second thread asking for the same QOP (a
+pipelined ``QMBackend.acquire_async`` whose probe acquires inside its own
+build) waits for the first lease to end, up to its ``timeout``.
+
+While a QM stays open, the programs compiled on it are remembered
+(:meth:`SessionPool.compile`): a byte-identical program under the same config
+fingerprint reuses its program id when it is queued again instead of being
+compiled again — a long list of small experiments rebuilding the same probe
+pays the compile once. Closing the QM drops its programs with it.
+
+Every lease records an :class:`AcquireTimings` (connect / open / [compile] /
+execute / fetch), logged by the callers and kept as :attr:`SessionPool.last_timings`;
+each stage is also a span of the current acquisition trace (``_trace``).
+
+The pool only touches the manager surface ``qm_session`` itself uses
+(``open_qm``, ``list_open_qms``, ``qm.close``), so a local stand-in manager is
+enough to test it — see ``tests/test_session_pool.py``.
+"""
+
+import atexit
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from customized.probes._trace import span
+
+__all__ = [
+    "AcquireTimings",
+    "SessionPool",
+    "config_fingerprint",
+    "log_execution_report",
+    "program_fingerprint",
+    "session_pool",
+]
+
+#: seconds a pooled QM may sit unused before it is closed.
+DEFAULT_IDLE_TIMEOUT_S = 120.0
+
+#: the QOP's "ports are held by another QM" wording (OPX1000 / OPX+), the same
+#: two strings ``qm_session`` polls on.
+_BUSY_MESSAGES = ("Resources already locked", "isn't shareable in other QM")
+
+#: seconds between open attempts while the QOP is busy (``qm_session``'s cadence).
+_BUSY_POLL_S = 0.2
+
+#: compiled programs remembered per open QM; the least recently used goes first.
+COMPILE_CACHE_SIZE = 64
+
+#: the header line ``generate_qua_script`` stamps with the current time.
+_SCRIPT_STAMP = re.compile(r"^# Single QUA script generated at .*$", re.MULTILINE)
+
+
+def config_fingerprint(config: dict) -> str:
+    """A stable content hash of a QUA config dict.
+
+    Key order and tuple-vs-list spelling do not change it (``sort_keys`` plus
+    JSON's own list normalization); anything JSON cannot express is hashed by
+    its ``str``, which is what the QOP would see after serialization anyway.
+    """
+    payload = json.dumps(config, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def program_fingerprint(prog, config_fingerprint: str) -> Optional[str]:
+    """A content hash of a QUA program under one config, or None when the
+    program cannot be serialized (it is then simply not cached).
+
+    The program is hashed as its deterministic protobuf serialization — the
+    same content ``generate_qua_script`` renders, at microseconds instead of
+    milliseconds; an object without one falls back to the script text, minus
+    its generation-time header.
+    """
+    try:
+        payload = prog.qua_program.SerializeToString(deterministic=True)
+    except AttributeError:
+        try:
+            from qm import generate_qua_script
+
+            payload = _SCRIPT_STAMP.sub("", generate_qua_script(prog)).encode("utf-8")
+        except Exception:
+            return None
+    digest = hashlib.sha1(payload)
+    digest.update(config_fingerprint.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def log_execution_report(job, log: Optional[Callable]) -> None:
+    """Expose possible runtime errors. ``execution_report`` is a method on some
+    QM API versions and a property on others — tolerate both."""
+    if not log:
+        return
+    rep = getattr(job, "execution_report", None)
+    if callable(rep):
+        log(rep())
+    elif rep is not None:
+        log(rep)
+
+
+@dataclass
+class AcquireTimings:
+    """Wall time of one acquisition, per stage, in seconds.
+
+    ``connect_s`` / ``open_s`` are zero on a pooled reuse — which is the point;
+    ``reused_manager`` / ``reused_qm`` say so explicitly, so a slow run can be
+    told apart from a cold one.
+    """
+
+    connect_s: float = 0.0
+    open_s: float = 0.0
+    compile_s: float = 0.0
+    execute_s: float = 0.0
+    fetch_s: float = 0.0
+    reused_manager: bool = False
+    reused_qm: bool = False
+    fingerprint: str = ""
+    compile_hits: int = 0
+    compile_misses: int = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Accumulate the wall time of the enclosed block into ``<name>_s``
+        (and record it as a span of the current acquisition trace, if any)."""
+        t0 = time.perf_counter()
+        try:
+            with span(name):
+                yield
+        finally:
+            attr = f"{name}_s"
+            setattr(self, attr, getattr(self, attr) + time.perf_counter() - t0)
+
+    @property
+    def total_s(self) -> float:
+        return self.connect_s + self.open_s + self.compile_s + self.execute_s + self.fetch_s
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "connect_s": self.connect_s,
+            "open_s": self.open_s,
+            "compile_s": self.compile_s,
+            "execute_s": self.execute_s,
+            "fetch_s": self.fetch_s,
+            "reused_manager": self.reused_manager,
+            "reused_qm": self.reused_qm,
+            "fingerprint": self.fingerprint,
+            "compile_hits": self.compile_hits,
+            "compile_misses": self.compile_misses,
+        }
+
+    def summary(self) -> str:
+        return (
+            f"acquire timing: connect {self.connect_s:.3f} s"
+            f"{' (reused)' if self.reused_manager else ''}, "
+            f"open {self.open_s:.3f} s{' (reused)' if self.reused_qm else ''}, "
+            f"{f'compile {self.compile_s:.3f} s, ' if self.compile_s else ''}"
+            f"{f'{self.compile_hits} compile(s) reused, ' if self.compile_hits else ''}"
+            f"execute {self.execute_s:.3f} s, fetch {self.fetch_s:.3f} s"
+        )
+
+
+def _network_key(machine) -> Tuple[Any, Any]:
+    """``(host, cluster_name)`` of the machine's QOP — the manager identity.
+
+    QUAM stores ``network`` as a dict; a stand-in may use an object. A machine
+    with no network block still gets ONE manager (keyed ``(None, None)``)."""
+    network = getattr(machine, "network", None) or {}
+    if isinstance(network, dict):
+        return network.get("host"), network.get("cluster_name")
+    return getattr(network, "host", None), getattr(network, "cluster_name", None)
+
+
+@dataclass
+class _Entry:
+    """One manager and (at most) the one QM it currently holds open."""
+
+    qmm: Any
+    qm: Any = None
+    fingerprint: Optional[str] = None
+    last_used: float = 0.0
+    busy: bool = False
+    holder: Optional[int] = None
+    timer: Optional[threading.Timer] = field(default=None, repr=False)
+    #: program fingerprint -> program id, for the QM held open now
+    compiled: "OrderedDict[str, Any]" = field(default_factory=OrderedDict, repr=False)
+
+
+class SessionPool:
+    """Keeps ``QuantumMachinesManager`` + open ``QuantumMachine`` pairs alive
+    across acquisitions (see the module docstring).
+
+    ``clock`` is injectable so idle expiry is testable without sleeping; with
+    ``reap_in_background`` (the default) a daemon timer closes an idle QM even
+    if no further lease ever comes.
+    """
+
+    def __init__(
+        self,
+        idle_timeout_s: float = DEFAULT_IDLE_TIMEOUT_S,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        reap_in_background: bool = True,
+    ) -> None:
+        self.idle_timeout_s = float(idle_timeout_s)
+        self._clock = clock
+        self._reap_in_background = reap_in_background
+        self._entries: Dict[Tuple[Any, Any], _Entry] = {}
+        self._lock = threading.RLock()
+        self._released = threading.Condition(self._lock)
+        self.last_timings: Optional[AcquireTimings] = None
+        self.compile_hits = 0
+        self.compile_misses = 0
+
+    # ------------------------------------------------------------- leasing
+    @contextmanager
+    def session(
+        self,
+        machine,
+        config: dict,
+        *,
+        timeout: float,
+        fingerprint: Optional[str] = None,
+    ) -> Iterator[Tuple[Any, AcquireTimings]]:
+        """Lease the open QM for ``config`` on the machine's QOP.
+
+        Yields ``(qm, timings)``; the caller times its own execute/fetch through
+        ``timings.stage(...)``. ``fingerprint`` skips re-hashing ``config`` when
+        the caller already knows it (the config cache does). A lease held by
+        another thread is waited out (up to ``timeout``); one held by the
+        calling thread is an error.
+        """
+        if not timeout > 0:
+            raise ValueError(f"{timeout=} must be positive")
+        timings = AcquireTimings()
+        timings.fingerprint = fingerprint or config_fingerprint(config)
+        key = _network_key(machine)
+        with self._lock:
+            self.close_idle()
+            deadline = time.monotonic() + timeout
+            while True:
+                entry = self._entries.get(key)
+                if entry is None or not entry.busy:
+                    break
+                if entry.holder == threading.get_ident():
+                    raise RuntimeError(
+                        f"QOP session {key} is already leased by this thread — the "
+                        f"pool serves one acquisition per QOP at a time")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"While waiting for the QOP session {key} to free, reached timeout: {timeout}s")
+                self._released.wait(remaining)
+            if entry is None:
+                with timings.stage("connect"):
+                    entry = _Entry(qmm=machine.connect())
+                self._entries[key] = entry
+            else:
+                timings.reused_manager = True
+            entry.busy = True
+            entry.holder = threading.get_ident()
+            self._cancel_timer(entry)
+        try:
+            if entry.qm is not None and (entry.fingerprint != timings.fingerprint
+                                         or not self._is_open(entry)):
+                self._close_qm(entry)
+            if entry.qm is None:
+                with timings.stage("open"):
+                    entry.qm = self._open_qm(entry.qmm, config, timeout)
+                entry.fingerprint = timings.fingerprint
+            else:
+                timings.reused_qm = True
+            yield entry.qm, timings
+        except BaseException:
+            # the job may still be running on this QM: never hand it on
+            self._close_qm(entry)
+            raise
+        finally:
+            with self._lock:
+                entry.busy = False
+                entry.holder = None
+                entry.last_used = self._clock()
+                self.last_timings = timings
+                self._schedule_reap(entry)
+                self._released.notify_all()
+
+    def compile(self, qm, prog, timings: AcquireTimings):
+        """``qm.compile(prog)`` for a leased ``qm``, or the program id it
+        already holds for the same program under the same config (see the
+        module docstring). Hits and misses count on ``timings`` and the pool."""
+        with self._lock:
+            entry = next((e for e in self._entries.values() if e.qm is qm), None)
+        key = program_fingerprint(prog, timings.fingerprint) if entry is not None else None
+        if key is not None and key in entry.compiled:
+            entry.compiled.move_to_end(key)
+            timings.compile_hits += 1
+            with self._lock:
+                self.compile_hits += 1
+            return entry.compiled[key]
+        with timings.stage("compile"):
+            program_id = qm.compile(prog)
+        timings.compile_misses += 1
+        with self._lock:
+            self.compile_misses += 1
+        if key is not None and entry.qm is qm:
+            entry.compiled[key] = program_id
+            while len(entry.compiled) > COMPILE_CACHE_SIZE:
+                entry.compiled.popitem(last=False)
+        return program_id
+
+    def compile_stats(self) -> Dict[str, int]:
+        """Pool-wide compile-cache counters, and how many programs the open QMs hold."""
+        with self._lock:
+            return {
+                "hits": self.compile_hits,
+                "misses": self.compile_misses,
+                "cached": sum(len(e.compiled) for e in self._entries.values()),
+            }
+
+    # ------------------------------------------------------------- closing
+    def close_idle(self) -> int:
+        """Close every pooled QM idle for longer than the timeout. Returns how
+        many were closed. The managers stay: they hold no QOP resources."""
+        closed = 0
+        now = self._clock()
+        with self._lock:
+            for entry in self._entries.values():
+                if (entry.qm is not None and not entry.busy
+                        and now - entry.last_used >= self.idle_timeout_s):
+                    self._close_qm(entry)
+                    closed += 1
+        return closed
+
+    def close_all(self) -> None:
+        """Close every pooled QM and forget every manager."""
+        with self._lock:
+            for entry in self._entries.values():
+                self._cancel_timer(entry)
+                self._close_qm(entry)
+            self._entries.clear()
+
+    def open_sessions(self) -> Dict[Tuple[Any, Any], Optional[str]]:
+        """``{(host, cluster): fingerprint}`` of the QMs currently held open."""
+        with self._lock:
+            return {k: e.fingerprint for k, e in self._entries.items() if e.qm is not None}
+
+    # ------------------------------------------------------------ plumbing
+    @staticmethod
+    def _open_qm(qmm, config: dict, timeout: float):
+        """``qmm.open_qm`` with ``qm_session``'s busy-poll: another user's QM
+        holding the ports is waited out (up to ``timeout``), anything else raises."""
+        t0 = time.monotonic()
+        while True:
+            try:
+                return qmm.open_qm(config, close_other_machines=False)
+            except Exception as err:
+                if not any(msg in str(err) for msg in _BUSY_MESSAGES):
+                    raise
+                if time.monotonic() - t0 >= timeout:
+                    raise TimeoutError(
+                        f"While waiting for QOP to free, reached timeout: {timeout}s"
+                    ) from err
+                time.sleep(_BUSY_POLL_S)
+
+    @staticmethod
+    def _is_open(entry: _Entry) -> bool:
+        """Whether the pooled QM still exists on the QOP — someone may have run
+        ``00_close_other_qms`` since. A manager that cannot answer is trusted."""
+        try:
+            return entry.qm.id in entry.qmm.list_open_qms()
+        except Exception:
+            return True
+
+    @staticmethod
+    def _close_qm(entry: _Entry) -> None:
+        qm, entry.qm, entry.fingerprint = entry.qm, None, None
+        entry.compiled.clear()  # program ids die with their QM
+        if qm is None:
+            return
+        try:
+            qm.close()
+        except Exception:  # already closed on the QOP side: nothing left to free
+            pass
+
+    def _schedule_reap(self, entry: _Entry) -> None:
+        if not self._reap_in_background or entry.qm is None:
+            return
+        entry.timer = threading.Timer(self.idle_timeout_s, self.close_idle)
+        entry.timer.daemon = True
+        entry.timer.start()
+
+    @staticmethod
+    def _cancel_timer(entry: _Entry) -> None:
+        if entry.timer is not None:
+            entry.timer.cancel()
+            entry.timer = None
+
+
+_POOL: Optional[SessionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def session_pool() -> SessionPool:
+    """The process-wide pool every probe acquires through (created on first use,
+    closed at interpreter exit)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = SessionPool()
+            atexit.register(_POOL.close_all)
+        return _POOL
@@ -0,0 +1,277 @@
+"""Chunked streaming fetch for record-time probes: fixed-size blocks are fetched
+WHILE the program runs and appended to an on-disk sink, instead of one
+``buffer(num_shots)`` fetched at the end.
+
+The parity-switch monitors record millions of single shots per qubit (an
+hour-long telegraph is ~3e6 shots or more). With a single ``buffer(num_shots)``
+stream, both host memory and the wait after the last shot grow with record
+time. With ``chunk_shots`` set, the probe saves ``buffer(chunk_shots).save_all``
+instead. The program pads its shot loop up to a whole number of chunks, so no
+tail is lost in a partial buffer. The host polls ``count_so_far()``, fetches only
+the new blocks, and writes them into one ``.npy`` memmap per variable
+(:class:`ChunkSink`). The extra tail shots (fewer than one chunk) are dropped
+on write, so the final dataset has exactly ``num_shots`` shots.
+
+The dataset :func:`iter_acquire_chunked` yields has the same variables, dims and
+coords as the one ``XarrayDataFetcher`` builds for the unchunked program
+(``state`` / ``I`` / ``Q`` over ``(qubit, shot_idx[, meas_idx])``). Its arrays
+are memmap views of the sink, so nothing is held in RAM that the OS does not
+choose to page in. The probes run their qubits one batch after another, so a
+partial dataset spans the furthest any qubit has got: ``attrs["shots_done"]``
+gives, per qubit, its own complete prefix, and the shots past it read NaN
+(states -1). A qubit whose batch has finished can have its rate fit started
+while the later ones still record. :func:`acquire_chunked` runs to completion
+and returns the last one.
+
+The sink files ARE the dataset. Pass ``sink_dir`` (e.g. under the node's data
+folder) to keep them; without one they go in a fresh temporary directory that
+is removed once the sink and every dataset viewing it have been dropped, so an
+hour-long telegraph does not leave gigabytes of memmaps behind in /tmp.
+"""
+
+import re
+import shutil
+import tempfile
+import time
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import xarray as xr
+from qualang_tools.results import progress_counter
+
+from customized.probes._compact import check_fits, compact_dtype
+from customized.probes._config_cache import resolve_config
+from customized.probes._session import log_execution_report, session_pool
+from customized.probes._trace import record_bytes
+from customized.result_storage import raw_storage_encoding
+
+__all__ = [
+    "CHUNK_SHOTS_AXIS",
+    "ChunkSink",
+    "acquire_chunked",
+    "chunk_shots_for",
+    "iter_acquire_chunked",
+    "padded_shots",
+]
+
+#: the sweep_axes side-channel entry a chunked program carries (the chunk size);
+#: it is not a dimension of the dataset.
+CHUNK_SHOTS_AXIS = "chunk_shots"
+
+#: records at least this long are streamed in chunks by default (see
+#: :func:`chunk_shots_for`); shorter ones fit comfortably in one buffer.
+STREAM_ABOVE_SHOTS = 500_000
+
+#: default chunk: ~0.5 s of a few-microsecond shot cadence per block.
+DEFAULT_CHUNK_SHOTS = 100_000
+
+#: seconds between ``count_so_far()`` polls while the program runs.
+_POLL_S = 0.5
+
+#: a per-qubit handle: base name + 1-based qubit index (``state1``, ``I12``).
+_HANDLE = re.compile(r"^(?P<base>[A-Za-z_]+?)(?P<index>\d+)$")
+
+
+class _Scratch:
+    """A temporary sink directory, removed when the last memmap holding this
+    handle is garbage-collected."""
+
+    def __init__(self) -> None:
+        self.path = Path(tempfile.mkdtemp(prefix="lchqm_stream_"))
+        weakref.finalize(self, shutil.rmtree, self.path, ignore_errors=True)
+
+
+def chunk_shots_for(num_shots: int) -> Optional[int]:
+    """The chunk size a record of `num_shots` should stream with: None (one
+    buffer, fetched at the end) below :data:`STREAM_ABOVE_SHOTS`."""
+    return DEFAULT_CHUNK_SHOTS if num_shots >= STREAM_ABOVE_SHOTS else None
+
+
+def padded_shots(num_shots: int, chunk_shots: int) -> int:
+    """The shot-loop length of a chunked program: `num_shots` rounded UP to a
+    whole number of chunks (a partial final buffer would never be saved)."""
+    if chunk_shots < 1:
+        raise ValueError(f"{chunk_shots=} must be at least 1")
+    return -(-num_shots // chunk_shots) * chunk_shots
+
+
+class ChunkSink:
+    """One ``.npy`` memmap per variable, shaped ``(qubit, shot_idx, *inner)``
+    and filled chunk by chunk.
+
+    A file is created when its variable's first block arrives, because the
+    stream's dtype and inner shape are only known then; it starts out NaN
+    (states -1). ``filled`` tracks how many shots of each (variable, qubit)
+    have been written. With `compact`, the files take the narrowed dtypes of
+    ``_compact.compact_dtype`` (float32 I/Q, int8 states). Without a
+    `directory` the files go in a temporary one, deleted with the last array
+    (or dataset view) of the sink.
+    """
+
+    def __init__(self, directory: Optional[Path], sweep_axes: Dict, compact: bool = False) -> None:
+        # every memmap holds the scratch handle, so the directory outlives
+        # the sink for as long as any dataset still views its files
+        self._scratch = None if directory else _Scratch()
+        self.directory = Path(directory) if directory else self._scratch.path
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.qubits = list(np.atleast_1d(sweep_axes["qubit"].values))
+        self.shot_idx = np.asarray(sweep_axes["shot_idx"].values)
+        self.num_shots = self.shot_idx.size
+        # every sweep axis after shot_idx is an inner dim of each shot (meas_idx)
+        self.inner = [(name, axis) for name, axis in sweep_axes.items()
+                      if name not in ("qubit", "shot_idx", CHUNK_SHOTS_AXIS)]
+        self.compact = compact
+        self.arrays: Dict[str, np.memmap] = {}
+        self.filled: Dict[Tuple[str, int], int] = {}
+
+    def write(self, var: str, qubit_index: int, start: int, block: np.ndarray) -> None:
+        """Write fetched chunks (``(n_chunks, chunk_shots, *inner)``) for one
+        qubit, starting at shot `start`; rows past `num_shots` are dropped."""
+        inner_shape = tuple(axis.size for _, axis in self.inner)
+        rows = np.asarray(block).reshape((-1,) + inner_shape)
+        stop = min(start + len(rows), self.num_shots)
+        if stop <= start:
+            return
+        array = self.arrays.get(var)
+        if array is None:
+            dtype = compact_dtype(var, rows.dtype) if self.compact else rows.dtype
+            array = np.lib.format.open_memmap(
+                self.directory / f"{var}.npy", mode="w+", dtype=dtype,
+                shape=(len(self.qubits), self.num_shots) + inner_shape)
+            array[...] = -1 if np.issubdtype(dtype, np.integer) else np.nan
+            array._scratch = self._scratch
+            self.arrays[var] = array
+        if array.dtype != rows.dtype:
+            check_fits(var, rows[: stop - start], array.dtype)
+        array[qubit_index, start:stop] = rows[: stop - start]
+        self.filled[(var, qubit_index)] = stop
+
+    def expect(self, var: str, qubit_index: int) -> None:
+        """Declare a stream that will arrive, so a partial dataset never runs
+        ahead of it."""
+        self.filled.setdefault((var, qubit_index), 0)
+
+    @property
+    def shots_done(self) -> List[int]:
+        """Shots written for every expected variable, per qubit."""
+        done = [None] * len(self.qubits)
+        for (_, index), stop in self.filled.items():
+            done[index] = stop if done[index] is None else min(done[index], stop)
+        return [stop or 0 for stop in done]
+
+    @property
+    def shots_complete(self) -> int:
+        """Shots written for EVERY expected (variable, qubit)."""
+        return min(self.shots_done, default=0)
+
+    def flush(self) -> None:
+        for array in self.arrays.values():
+            array.flush()
+
+    def dataset(self, shots: Optional[int] = None) -> xr.Dataset:
+        """The sink as an xr.Dataset over the first `shots` shots (default: the
+        furthest any qubit has got), backed by memmap views rather than copies.
+        ``attrs["shots_done"]`` gives each qubit's complete prefix."""
+        done = self.shots_done
+        shots = max(done, default=0) if shots is None else shots
+        dims = ("qubit", "shot_idx") + tuple(name for name, _ in self.inner)
+        coords = {"qubit": self.qubits, "shot_idx": self.shot_idx[:shots]}
+        for name, axis in self.inner:
+            coords[name] = axis
+        data_vars = {var: (dims, array[:, :shots]) for var, array in self.arrays.items()}
+        attrs = {"shots_done": [min(stop, shots) for stop in done]}
+        if self.compact:
+            attrs["compact_dtypes"] = True
+        return xr.Dataset(data_vars=data_vars, coords=coords, attrs=attrs)
+
+
+def _per_qubit_handles(result_handles, num_qubits: int) -> List[Tuple[str, int, str]]:
+    """``(var, qubit_index, handle_name)`` of every per-qubit stream — the same
+    digit-suffix grouping the ``XarrayDataFetcher`` applies."""
+    out = []
+    for name in result_handles.keys():
+        match = _HANDLE.match(name)
+        if match is None:
+            continue
+        index = int(match["index"]) - 1
+        if 0 <= index < num_qubits:
+            out.append((match["base"], index, name))
+    return out
+
+
+def _drain(result_handles, handles, sink: ChunkSink, done: Dict[str, int], chunk_shots: int) -> bool:
+    """Fetch every block saved since the last call into the sink. Returns
+    whether anything new arrived."""
+    arrived = False
+    for var, index, name in handles:
+        handle = result_handles.get(name)
+        count = handle.count_so_far()
+        if count <= done[name]:
+            continue
+        block = handle.fetch(slice(done[name], count), flat_struct=True)
+        record_bytes(np.asarray(block).nbytes)
+        sink.write(var, index, done[name] * chunk_shots, block)
+        done[name] = count
+        arrived = True
+    return arrived
+
+
+def iter_acquire_chunked(
+    machine,
+    prog,
+    sweep_axes,
+    *,
+    timeout: float,
+    sink_dir: Optional[Path] = None,
+    log: Optional[Callable] = None,
+    config: Optional[dict] = None,
+    poll_s: float = _POLL_S,
+    compact: bool = False,
+) -> Iterator[xr.Dataset]:
+    """Execute a chunked program and yield the growing dataset each time new
+    blocks arrive. The last dataset yielded covers all `num_shots` shots.
+    `compact` writes the sink in float32 I/Q / int8 states; without `sink_dir`
+    the sink is temporary (see :class:`ChunkSink`)."""
+    chunk_shots = int(sweep_axes[CHUNK_SHOTS_AXIS])
+    sink = ChunkSink(sink_dir, sweep_axes, compact=compact)
+    if log:
+        log(f"streaming {sink.num_shots} shots in chunks of {chunk_shots} to {sink.directory}")
+    config, fingerprint = resolve_config(machine, config)
+    with session_pool().session(machine, config, timeout=timeout, fingerprint=fingerprint) as (qm, timings):
+        with timings.stage("execute"):
+            job = qm.execute(prog)
+        t_start = time.time()
+        result_handles = job.result_handles
+        handles = _per_qubit_handles(result_handles, len(sink.qubits))
+        done = {name: 0 for _, _, name in handles}
+        for var, index, _ in handles:
+            sink.expect(var, index)
+        while True:
+            running = result_handles.is_processing()
+            with timings.stage("fetch"):
+                arrived = _drain(result_handles, handles, sink, done, chunk_shots)
+            if arrived:
+                sink.flush()
+                progress_counter(sum(sink.shots_done), sink.num_shots * len(sink.qubits), start_time=t_start)
+                yield sink.dataset()
+            if not running:
+                break
+            time.sleep(poll_s)
+        log_execution_report(job, log)
+    if log:
+        log(timings.summary())
+    if sink.shots_complete < sink.num_shots:
+        raise RuntimeError(
+            f"stream ended after {sink.shots_complete} of {sink.num_shots} shots "
+            f"(see the execution report)")
+
+
+def acquire_chunked(machine, prog, sweep_axes, **kwargs) -> xr.Dataset:
+    """:func:`iter_acquire_chunked` run to completion: the full, memmap-backed
+    dataset, with the opt-in storage encoding of `customized.result_storage`."""
+    dataset = None
+    for dataset in iter_acquire_chunked(machine, prog, sweep_axes, **kwargs):
+        pass
+    return raw_storage_encoding(dataset)
@@ -0,0 +1,173 @@
+"""Per-stage acquisition tracing: which part of a run took the time.
+
+An :class:`AcquisitionTrace` collects :class:`Span` records (wall time, thread
+CPU time, bytes fetched, peak RSS after the stage) for everything between
+``experiment.probe()`` and ``_to_canonical``. The trace is CONTEXT-LOCAL
+(``contextvars``): :func:`tracing` makes one current, and :func:`span` records
+into it, or does nothing at all when no trace is current. The shared plumbing
+therefore traces every probe without any signature changes:
+
+* ``AcquireTimings.stage`` (connect / open / compile / execute / fetch) opens a
+  span for each stage, so every probe-local ``acquire()`` is covered;
+* ``resolve_config`` spans ``generate_config``;
+* the fetch paths report the bytes they pulled (:func:`record_bytes`);
+* ``QMBackend`` adds ``probe``, ``reduce_raw`` and ``to_canonical``.
+
+``as_dict()`` is the run-record form; :meth:`AcquisitionTrace.write_chrome_trace`
+writes the Chrome trace-event JSON (``chrome://tracing`` / Perfetto) so two runs
+can be laid side by side.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+__all__ = ["AcquisitionTrace", "Span", "current_trace", "record_bytes", "span", "tracing"]
+
+
+@dataclass
+class Span:
+    """One timed stage; ``start_s`` is relative to the trace's start."""
+
+    name: str
+    start_s: float
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    bytes: int = 0
+    peak_rss_mb: Optional[float] = None
+    thread: str = ""
+    thread_id: int = 0
+
+
+class AcquisitionTrace:
+    """The spans of one acquisition (see the module docstring)."""
+
+    def __init__(self, label: str = "") -> None:
+        self.label = label
+        self.spans: List[Span] = []
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _add(self, entry: Span) -> None:
+        with self._lock:
+            self.spans.append(entry)
+
+    @property
+    def total_s(self) -> float:
+        if not self.spans:
+            return 0.0
+        return max(s.start_s + s.wall_s for s in self.spans) - min(s.start_s for s in self.spans)
+
+    def by_stage(self) -> Dict[str, float]:
+        """Wall time per stage name, summed over repeats."""
+        totals: Dict[str, float] = {}
+        for s in self.spans:
+            totals[s.name] = totals.get(s.name, 0.0) + s.wall_s
+        return totals
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "label": self.label,
+            "started_at": self.started_at,
+            "total_s": self.total_s,
+            "by_stage": self.by_stage(),
+            "spans": [asdict(s) for s in sorted(self.spans, key=lambda s: s.start_s)],
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace-event format: one complete (``"X"``) event per span."""
+        pid = os.getpid()
+        events = []
+        threads: Dict[int, str] = {}
+        for s in sorted(self.spans, key=lambda s: s.start_s):
+            threads.setdefault(s.thread_id, s.thread)
+            events.append({
+                "name": s.name, "cat": "acquire", "ph": "X", "pid": pid, "tid": s.thread_id,
+                "ts": s.start_s * 1e6, "dur": s.wall_s * 1e6,
+                "args": {"cpu_s": s.cpu_s, "bytes": s.bytes, "peak_rss_mb": s.peak_rss_mb},
+            })
+        for tid, name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"label": self.label, "started_at": self.started_at}}
+
+    def write_chrome_trace(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace()))
+        return path
+
+
+_CURRENT: ContextVar[Optional[AcquisitionTrace]] = ContextVar("lchqm_acquisition_trace", default=None)
+_OPEN: ContextVar[Tuple[Span, ...]] = ContextVar("lchqm_open_spans", default=())
+
+
+def current_trace() -> Optional[AcquisitionTrace]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def tracing(trace: Optional[AcquisitionTrace] = None, label: str = "") -> Iterator[AcquisitionTrace]:
+    """Make `trace` (or a new one) current for the block. Passing the same
+    trace on another thread continues it there."""
+    trace = trace if trace is not None else AcquisitionTrace(label)
+    token = _CURRENT.set(trace)
+    try:
+        yield trace
+    finally:
+        _CURRENT.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[Optional[Span]]:
+    """Time the block as stage `name` of the current trace (no-op without one)."""
+    trace = _CURRENT.get()
+    if trace is None:
+        yield None
+        return
+    thread = threading.current_thread()
+    entry = Span(name=name, start_s=time.perf_counter() - trace._t0, thread=thread.name, thread_id=thread.ident or 0)
+    token = _OPEN.set(_OPEN.get() + (entry,))
+    cpu0 = time.thread_time()
+    try:
+        yield entry
+    finally:
+        entry.wall_s = time.perf_counter() - trace._t0 - entry.start_s
+        entry.cpu_s = time.thread_time() - cpu0
+        entry.peak_rss_mb = _peak_rss_mb()
+        _OPEN.reset(token)
+        trace._add(entry)
+
+
+def record_bytes(count: int) -> None:
+    """Add `count` fetched bytes to the innermost open span (no-op without one)."""
+    open_spans = _OPEN.get()
+    if open_spans:
+        open_spans[-1].bytes += int(count)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the process so far, in MB, where the
+    platform can tell (``resource`` on POSIX, ``psutil`` elsewhere)."""
+    try:
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KB on Linux
+    except ImportError:
+        pass
+    try:
+        import psutil
+
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2**20
+    except Exception:
+        return None
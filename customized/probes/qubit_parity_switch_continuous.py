@@ -36,6 +36,12 @@ the per-run `readout_depletion_ns` override apply to only one of them. The
 threshold assign is three lines of the same vendor API, so the wait keeps
 exactly one owner. (The threshold itself still comes from the QUAM readout
 operation, i.e. scqo's accepted `readout_threshold` knob.)
+
+CHUNKED MODE (`chunk_shots`): for long records the streams are saved as
+`buffer(chunk_shots).save_all` instead of one `buffer(num_shots)`, and
+`acquire` fetches them block by block into an on-disk sink while the program
+runs (`customized/probes/_stream.py`). The shot loop is padded to whole
+chunks; the cadence is unchanged, and the dataset is the same, memmap-backed.
 """
 
 from typing import Callable, Dict, Optional
@@ -44,6 +50,7 @@ import numpy as np
 import xarray as xr
 from qm.qua import *
 
+from customized.probes import _stream
 from customized.probes._lib import acquire as _acquire
 
 
@@ -56,6 +63,7 @@ def build_program(
     num_shots: int,
     use_state_discrimination: bool = False,
     simulate: bool = False,
+    chunk_shots: Optional[int] = None,
 ):
     """Build the parity-monitor QUA program. Returns (program, sweep_axes).
 
@@ -66,6 +74,8 @@ def build_program(
     quantity the rate is divided by.
     """
     num_qubits = len(qubits)
+    # chunked: the loop runs whole chunks; the sink keeps the first num_shots
+    loop_shots = _stream.padded_shots(num_shots, chunk_shots) if chunk_shots else num_shots
 
     sweep_axes = {
         "qubit": xr.DataArray(qubits.get_names()),
@@ -85,7 +95,7 @@ def build_program(
                 machine.initialize_qpu(target=qubit)
             align()
 
-            with for_(n, 0, n < num_shots, n + 1):
+            with for_(n, 0, n < loop_shots, n + 1):
                 save(n, n_st)
 
                 # Resonator-only reset: wait out the readout photons of the
@@ -116,17 +126,26 @@ def build_program(
                         save(Q[i], Q_st[i])
                 align()
 
+        def _save_shots(stream, name):
+            # chunked: fixed blocks fetched while the program runs (_stream)
+            if chunk_shots:
+                stream.buffer(chunk_shots).save_all(name)
+            else:
+                stream.buffer(num_shots).save(name)
+
         with stream_processing():
             n_st.save("n")
             for i in range(num_qubits):
-                # buffer(num_shots) and NO .average(): every shot is a sample of
+                # buffer(num_shots) (or chunks of it) and NO .average(): every shot is a sample of
                 # the telegraph (see the module docstring).
                 if use_state_discrimination:
-                    state_st[i].buffer(num_shots).save(f"state{i + 1}")
+                    _save_shots(state_st[i], f"state{i + 1}")
                 else:
-                    I_st[i].buffer(num_shots).save(f"I{i + 1}")
-                    Q_st[i].buffer(num_shots).save(f"Q{i + 1}")
+                    _save_shots(I_st[i], f"I{i + 1}")
+                    _save_shots(Q_st[i], f"Q{i + 1}")
 
+    if chunk_shots:
+        sweep_axes[_stream.CHUNK_SHOTS_AXIS] = chunk_shots
     return prog, sweep_axes
 
 
@@ -138,6 +157,17 @@ def acquire(
     num_shots: int,
     timeout: float,
     log: Optional[Callable] = None,
+    config: Optional[dict] = None,
+    compact: bool = False,
 ) -> xr.Dataset:
-    """Connect to the QOP, execute the program and fetch the raw xr.Dataset."""
-    return _acquire(machine, prog, sweep_axes, num_shots=num_shots, timeout=timeout, log=log)
+    """Connect to the QOP, execute the program and fetch the raw xr.Dataset.
+
+    A program built with `chunk_shots` is fetched block by block while it runs
+    into an on-disk sink (`_stream.acquire_chunked`); the dataset is the same,
+    memmap-backed. `config` is a pinned QUA config (a pipelined run's
+    snapshot); `compact` stores I/Q as float32 and states as int8."""
+    if _stream.CHUNK_SHOTS_AXIS in sweep_axes:
+        return _stream.acquire_chunked(machine, prog, sweep_axes, timeout=timeout, log=log, config=config,
+                                       compact=compact)
+    return _acquire(machine, prog, sweep_axes, num_shots=num_shots, timeout=timeout, log=log, config=config,
+                    compact=compact)
@@ -24,6 +24,12 @@ readout operation, i.e. scqo's accepted `readout_threshold` knob).
 `idle_cycles`, `depletion_cycles` and `tau_wait_cycles` are per-qubit-name
 dicts of 4 ns clock cycles; the caller (the scqo shell) owns the ns->cycles
 conversion, the cycle-period padding math and its too-short refusal.
+
+CHUNKED MODE (`chunk_shots`): for long records the streams are saved as
+`buffer(chunk_shots).save_all` instead of one `buffer(num_shots)`, and
+`acquire` fetches them block by block into an on-disk sink while the program
+runs (`customized/probes/_stream.py`). The shot loop is padded to whole
+chunks; the cadence is unchanged, and the dataset is the same, memmap-backed.
 """
 
 from typing import Callable, Dict, Optional
@@ -32,6 +38,7 @@ import numpy as np
 import xarray as xr
 from qm.qua import *
 
+from customized.probes import _stream
 from customized.probes._lib import acquire as _acquire
 
 
@@ -45,6 +52,7 @@ def build_program(
     num_shots: int,
     use_state_discrimination: bool = False,
     simulate: bool = False,
+    chunk_shots: Optional[int] = None,
 ):
     """Build the discrete parity-monitor QUA program. Returns (program, sweep_axes).
 
@@ -54,6 +62,8 @@ def build_program(
     divided by.
     """
     num_qubits = len(qubits)
+    # chunked: the loop runs whole chunks; the sink keeps the first num_shots
+    loop_shots = _stream.padded_shots(num_shots, chunk_shots) if chunk_shots else num_shots
 
     sweep_axes = {
         "qubit": xr.DataArray(qubits.get_names()),
@@ -88,7 +98,7 @@ def build_program(
                 machine.initialize_qpu(target=qubit)
             align()
 
-            with for_(n, 0, n < num_shots, n + 1):
+            with for_(n, 0, n < loop_shots, n + 1):
                 save(n, n_st)
 
                 # M1: the projective initialization — deliberately no
@@ -122,18 +132,27 @@ def build_program(
                         qubit.resonator.wait(cycles)
                 align()
 
+        def _save_shots(stream, name):
+            # chunked: fixed blocks fetched while the program runs (_stream)
+            if chunk_shots:
+                stream.buffer(chunk_shots).save_all(name)
+            else:
+                stream.buffer(num_shots).save(name)
+
         with stream_processing():
             n_st.save("n")
             for i in range(num_qubits):
                 # two saves per cycle -> meas_idx (len 2) is the innermost
-                # buffered axis, then shot_idx; NO .average() — every
+                # buffered axis, then shot_idx (or a chunk of it); NO .average() — every
                 # measurement is its own sample.
                 if use_state_discrimination:
-                    state_st[i].buffer(2).buffer(num_shots).save(f"state{i + 1}")
+                    _save_shots(state_st[i].buffer(2), f"state{i + 1}")
                 else:
-                    I_st[i].buffer(2).buffer(num_shots).save(f"I{i + 1}")
-                    Q_st[i].buffer(2).buffer(num_shots).save(f"Q{i + 1}")
+                    _save_shots(I_st[i].buffer(2), f"I{i + 1}")
+                    _save_shots(Q_st[i].buffer(2), f"Q{i + 1}")
 
+    if chunk_shots:
+        sweep_axes[_stream.CHUNK_SHOTS_AXIS] = chunk_shots
     return prog, sweep_axes
 
 
@@ -145,6 +164,17 @@ def acquire(
     num_shots: int,
     timeout: float,
     log: Optional[Callable] = None,
+    config: Optional[dict] = None,
+    compact: bool = False,
 ) -> xr.Dataset:
-    """Connect to the QOP, execute the program and fetch the raw xr.Dataset."""
-    return _acquire(machine, prog, sweep_axes, num_shots=num_shots, timeout=timeout, log=log)
+    """Connect to the QOP, execute the program and fetch the raw xr.Dataset.
+
+    A program built with `chunk_shots` is fetched block by block while it runs
+    into an on-disk sink (`_stream.acquire_chunked`); the dataset is the same,
+    memmap-backed. `config` is a pinned QUA config (a pipelined run's
+    snapshot); `compact` stores I/Q as float32 and states as int8."""
+    if _stream.CHUNK_SHOTS_AXIS in sweep_axes:
+        return _stream.acquire_chunked(machine, prog, sweep_axes, timeout=timeout, log=log, config=config,
+                                       compact=compact)
+    return _acquire(machine, prog, sweep_axes, num_shots=num_shots, timeout=timeout, log=log, config=config,
+                    compact=compact)
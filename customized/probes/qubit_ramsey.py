@@ -4,13 +4,14 @@ Virtual-detuning Ramsey: y90 -> idle -> x90 with the drive virtually detuned by
 `detuning_hz` via a frame rotation proportional to the idle time.
 """
 
-from typing import Callable, Optional
+from typing import Callable, Iterator, Optional
 
 import numpy as np
 import xarray as xr
 from qm.qua import *
 
 from customized.probes._lib import acquire as _acquire
+from customized.probes._lib import acquire_repeated as _acquire_repeated
 
 
 def build_program(
@@ -130,3 +131,16 @@ def acquire(
 ) -> xr.Dataset:
     """Connect to the QOP, execute the program and fetch the raw xr.Dataset."""
     return _acquire(machine, prog, sweep_axes, num_shots=num_shots, timeout=timeout, log=log)
+
+
+def acquire_repeated(
+    machine,
+    prog,
+    sweep_axes,
+    *,
+    repeats: int,
+    timeout: float,
+    log: Optional[Callable] = None,
+) -> Iterator[xr.Dataset]:
+    """Compile the program once and yield the raw xr.Dataset of each of `repeats` queued runs."""
+    return _acquire_repeated(machine, prog, sweep_axes, repeats=repeats, timeout=timeout, log=log)
@@ -26,10 +26,12 @@ This probe cannot use ``_lib.acquire``: its streams are heterogeneous —
 per-block scalars, (block, shot) state arrays and a timestamp stream — which
 the shared ``XarrayDataFetcher`` refuses (one uniform shape per dataset), so
 it ships its own ``acquire()`` (the ``qubit_tomography`` pattern).
+The per-block streams are ``save_all`` so :func:`iter_acquire` can hand out
+the estimates block by block while the program runs (``_live``).
 """
 
 import math
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, Iterator, Optional
 
 import numpy as np
 import xarray as xr
@@ -75,6 +77,7 @@ def build_program(
     sweep_axes = {
         "qubit": xr.DataArray(qubits.get_names()),
         "block_idx": xr.DataArray(np.arange(num_blocks)),
+        "shot_idx": xr.DataArray(np.arange(n_avg)),
     }
 
     with program() as prog:
@@ -215,32 +218,17 @@ def build_program(
         with stream_processing():
             n_st.save("n")
             for i in range(num_qubits):
-                gamma_st[i].buffer(num_blocks).save(f"estimated_gamma{i + 1}")
-                sigma_st[i].buffer(num_blocks).save(f"sigma_gamma{i + 1}")
-                dt_st[i].buffer(num_blocks).save(f"dt_used{i + 1}")
+                # one entry per block (save_all), so acquire() can read blocks live
+                gamma_st[i].save_all(f"estimated_gamma{i + 1}")
+                sigma_st[i].save_all(f"sigma_gamma{i + 1}")
+                dt_st[i].save_all(f"dt_used{i + 1}")
                 for d, name in enumerate(_STATE_STREAMS):
-                    shots_st[d][i].buffer(num_blocks, n_avg).save(f"{name}{i + 1}")
+                    shots_st[d][i].buffer(n_avg).save_all(f"{name}{i + 1}")
 
     return prog, sweep_axes
 
 
-def _fetch_values(results, name: str) -> np.ndarray:
-    """Fetch one handle; unwrap the structured dtype timestamp streams carry."""
-    handle = results.get(name)
-    if handle is None:
-        try:
-            avail = list(results.iter_all())
-        except Exception:
-            avail = "unknown"
-        raise RuntimeError(f"ADE result handle '{name}' missing. Available: {avail}")
-    values = np.asarray(handle.fetch_all())
-    if values.dtype.names:
-        field = "value" if "value" in values.dtype.names else values.dtype.names[0]
-        values = values[field]
-    return np.squeeze(values)
-
-
-def acquire(
+def iter_acquire(
     machine,
     prog,
     sweep_axes,
@@ -249,61 +237,68 @@ def acquire(
     timeout: float,
     log: Optional[Callable] = None,
     config: Optional[dict] = None,
-) -> xr.Dataset:
-    """Execute and hand-fetch the heterogeneous ADE streams into the canonical
-    dataset (gamma/sigma converted 1/us -> 1/s, dt in ns, per-shot states over
-    (block_idx, delay_idx, shot_idx), timestamps -> elapsed block_time_s)."""
-    from qualang_tools.multi_user import qm_session
-
-    qmm = machine.connect()
-    config = config if config is not None else machine.generate_config()
+    poll_s: Optional[float] = None,
+) -> Iterator[xr.Dataset]:
+    """Execute and yield the canonical dataset as blocks arrive (gamma/sigma
+    converted 1/us -> 1/s, dt in ns, per-shot states over (block_idx,
+    delay_idx, shot_idx), timestamps -> elapsed block_time_s). Blocks not yet
+    run read NaN (states -1) and ``attrs["blocks_done"]`` counts the arrived
+    ones per qubit; the last dataset yielded is the complete run. Closing the
+    iterator early halts the job."""
+    from customized.probes import _live
 
     qubit_names = list(np.atleast_1d(sweep_axes["qubit"].values))
-    num_qubits = len(qubit_names)
     n_blocks = sweep_axes["block_idx"].values.size
+    n_avg = sweep_axes["shot_idx"].values.size
 
-    with qm_session(qmm, config, timeout=timeout) as qm:
-        job = qm.execute(prog)
-        results = job.result_handles
-        results.wait_for_all_values()
-
-        gamma, sigma, dt_cycles, shots, stamps = [], [], [], [], []
-        for i in range(num_qubits):
-            gamma.append(_fetch_values(results, f"estimated_gamma{i + 1}"))
-            sigma.append(_fetch_values(results, f"sigma_gamma{i + 1}"))
-            dt_cycles.append(_fetch_values(results, f"dt_used{i + 1}"))
-            shots.append(np.stack(
-                [_fetch_values(results, f"{name}{i + 1}") for name in _STATE_STREAMS],
-                axis=1,
-            ))  # (block, delay, shot)
-            stamps.append(_fetch_values(results, f"time_stamp{i + 1}")[:n_blocks])
-
-        if log:
-            rep = getattr(job, "execution_report", None)
-            if callable(rep):
-                log(rep())
-            elif rep is not None:
-                log(rep)
-
-    stamps_arr = np.asarray(stamps, dtype=float)
-    block_time_s = (stamps_arr - stamps_arr[:, :1]) * 4e-9
+    blocks = _live.BlockStreams(qubit_names, n_blocks, "ADE")
+    blocks.add("gamma", "estimated_gamma")
+    blocks.add("sigma", "sigma_gamma")
+    blocks.add("dt_cycles", "dt_used")
+    for name in _STATE_STREAMS:
+        blocks.add(name, name, (n_avg,), np.int8)
+    blocks.add("time_stamp", "time_stamp")
 
+    def build(results, final: bool) -> xr.Dataset:
+        return _dataset(blocks, qubit_names)
+
+    yield from _live.iter_blocks(machine, prog, blocks, build, timeout=timeout, log=log, config=config,
+                                 **({} if poll_s is None else {"poll_s": poll_s}))
+
+
+def _dataset(blocks, qubit_names) -> xr.Dataset:
+    arrays = blocks.arrays
     return xr.Dataset(
         data_vars={
-            "estimated_gamma": (("qubit", "block_idx"),
-                                np.asarray(gamma, dtype=float) * 1e6),
-            "sigma_gamma": (("qubit", "block_idx"),
-                            np.asarray(sigma, dtype=float) * 1e6),
-            "dt_ns": (("qubit", "block_idx"),
-                      np.asarray(dt_cycles, dtype=float) * 4.0),
+            "estimated_gamma": (("qubit", "block_idx"), arrays["gamma"] * 1e6),
+            "sigma_gamma": (("qubit", "block_idx"), arrays["sigma"] * 1e6),
+            "dt_ns": (("qubit", "block_idx"), arrays["dt_cycles"] * 4.0),
             "state": (("qubit", "block_idx", "delay_idx", "shot_idx"),
-                      np.asarray(shots, dtype=np.int8)),
-            "block_time_s": (("qubit", "block_idx"), block_time_s),
+                      np.stack([arrays[name] for name in _STATE_STREAMS], axis=2)),
+            "block_time_s": (("qubit", "block_idx"), blocks.elapsed_s("time_stamp")),
         },
         coords={
             "qubit": qubit_names,
-            "block_idx": np.arange(n_blocks),
+            "block_idx": np.arange(blocks.num_blocks),
             "delay_idx": np.array(DELAY_MULTS),
-            "shot_idx": np.arange(np.asarray(shots).shape[-1]),
+            "shot_idx": np.arange(arrays[_STATE_STREAMS[0]].shape[-1]),
         },
     )
+
+
+def acquire(
+    machine,
+    prog,
+    sweep_axes,
+    *,
+    num_shots: int,
+    timeout: float,
+    log: Optional[Callable] = None,
+    config: Optional[dict] = None,
+) -> xr.Dataset:
+    """:func:`iter_acquire` run to completion: the canonical dataset."""
+    dataset = None
+    for dataset in iter_acquire(machine, prog, sweep_axes, num_shots=num_shots, timeout=timeout,
+                                log=log, config=config):
+        pass
+    return dataset
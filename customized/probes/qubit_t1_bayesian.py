@@ -27,9 +27,11 @@ Numeric-range rationale (QUA ``fixed`` is signed 4.28, range [-8, 8)):
 Heterogeneous streams (per-block scalars, (block, probe) arrays, evolution
 vectors, a timestamp stream) rule out ``_lib.acquire`` / XarrayDataFetcher,
 so the probe ships its own ``acquire()`` (the ``qubit_tomography`` pattern).
+The per-block streams are ``save_all`` so :func:`iter_acquire` can hand out
+the estimates block by block while the program runs (``_live``).
 """
 
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, Iterator, Optional
 
 import numpy as np
 import xarray as xr
@@ -89,6 +91,7 @@ def build_program(
     sweep_axes = {
         "qubit": xr.DataArray(names),
         "block_idx": xr.DataArray(np.arange(num_blocks)),
+        "probe_idx": xr.DataArray(np.arange(num_probes)),
     }
 
     with program() as prog:
@@ -274,37 +277,20 @@ def build_program(
         with stream_processing():
             n_st.save("n")
             for i in range(num_qubits):
-                t_est_st[i].buffer(num_blocks).save(f"t_est{i + 1}")
-                u_final_st[i].buffer(num_blocks).save(f"u_final{i + 1}")
+                # one entry per block (save_all), so acquire() can read blocks live
+                t_est_st[i].save_all(f"t_est{i + 1}")
+                u_final_st[i].save_all(f"u_final{i + 1}")
                 u_evol_st[i].buffer(num_probes).save(f"u_evol{i + 1}")
                 t_evol_st[i].buffer(num_probes).save(f"t_evol{i + 1}")
-                state_st[i].buffer(num_blocks, num_probes).save(f"state{i + 1}")
-                tau_st[i].buffer(num_blocks, num_probes).save(f"tau_ms{i + 1}")
+                state_st[i].buffer(num_probes).save_all(f"state{i + 1}")
+                tau_st[i].buffer(num_probes).save_all(f"tau_ms{i + 1}")
                 if interleaved:
-                    state_lin_st[i].buffer(num_blocks, num_probes).save(f"state_lin{i + 1}")
+                    state_lin_st[i].buffer(num_probes).save_all(f"state_lin{i + 1}")
 
     return prog, sweep_axes
 
 
-def _fetch_values(results, name: str) -> np.ndarray:
-    """Fetch one handle; unwrap the structured dtype timestamp streams carry."""
-    handle = results.get(name)
-    if handle is None:
-        try:
-            avail = list(results.iter_all())
-        except Exception:
-            avail = "unknown"
-        raise RuntimeError(
-            f"Bayesian T1 result handle '{name}' missing. Available: {avail}"
-        )
-    values = np.asarray(handle.fetch_all())
-    if values.dtype.names:
-        field = "value" if "value" in values.dtype.names else values.dtype.names[0]
-        values = values[field]
-    return np.squeeze(values)
-
-
-def acquire(
+def iter_acquire(
     machine,
     prog,
     sweep_axes,
@@ -313,66 +299,62 @@ def acquire(
     timeout: float,
     log: Optional[Callable] = None,
     config: Optional[dict] = None,
-) -> xr.Dataset:
-    """Execute and hand-fetch the heterogeneous Bayesian streams into the
-    canonical dataset (T1 converted ms -> s; per-probe states/waits over
-    (block_idx, probe_idx); last-block posterior evolution; timestamps ->
-    elapsed block_time_s). ``lin_wait_cycles``/``interleaved`` are read back
-    from the sweep_axes side-channel entries the shell attached."""
-    from qualang_tools.multi_user import qm_session
-
-    qmm = machine.connect()
-    config = config if config is not None else machine.generate_config()
+    poll_s: Optional[float] = None,
+) -> Iterator[xr.Dataset]:
+    """Execute and yield the canonical dataset as blocks arrive (T1 converted
+    ms -> s; per-probe states/waits over (block_idx, probe_idx); timestamps ->
+    elapsed block_time_s). Blocks not yet run read NaN (states -1) and
+    ``attrs["blocks_done"]`` counts the arrived ones per qubit. The last-block
+    posterior evolution is only known at the end, so it is filled in the
+    last dataset yielded, which is the complete run. ``lin_wait_cycles`` /
+    ``interleaved`` are read back from the sweep_axes side-channel entries the
+    shell attached. Closing the iterator early halts the job."""
+    from customized.probes import _live
 
     qubit_names = list(np.atleast_1d(sweep_axes["qubit"].values))
-    num_qubits = len(qubit_names)
     n_blocks = sweep_axes["block_idx"].values.size
     lin_wait_cycles = sweep_axes.get("lin_wait_cycles")
     interleaved = lin_wait_cycles is not None
+    n_probes = sweep_axes["probe_idx"].values.size
 
-    with qm_session(qmm, config, timeout=timeout) as qm:
-        job = qm.execute(prog)
-        results = job.result_handles
-        results.wait_for_all_values()
-
-        t1_s, u_final, u_evol, t1_evol = [], [], [], []
-        states, taus, states_lin, stamps = [], [], [], []
-        for i in range(num_qubits):
-            t1_s.append(_fetch_values(results, f"t_est{i + 1}") * 1e-3)
-            u_final.append(_fetch_values(results, f"u_final{i + 1}"))
-            u_evol.append(_fetch_values(results, f"u_evol{i + 1}"))
-            t1_evol.append(_fetch_values(results, f"t_evol{i + 1}") * 1e-3)
-            states.append(_fetch_values(results, f"state{i + 1}"))
-            taus.append(_fetch_values(results, f"tau_ms{i + 1}") * 1e-3)
-            if interleaved:
-                states_lin.append(_fetch_values(results, f"state_lin{i + 1}"))
-            stamps.append(_fetch_values(results, f"time_stamp{i + 1}")[:n_blocks])
-
-        if log:
-            rep = getattr(job, "execution_report", None)
-            if callable(rep):
-                log(rep())
-            elif rep is not None:
-                log(rep)
-
-    stamps_arr = np.asarray(stamps, dtype=float)
-    block_time_s = (stamps_arr - stamps_arr[:, :1]) * 4e-9
-    n_probes = np.asarray(states).shape[-1]
-
+    blocks = _live.BlockStreams(qubit_names, n_blocks, "Bayesian T1")
+    blocks.add("t_est_ms", "t_est")
+    blocks.add("u_final", "u_final")
+    blocks.add("state", "state", (n_probes,), np.int8)
+    blocks.add("tau_ms", "tau_ms", (n_probes,))
+    if interleaved:
+        blocks.add("state_lin", "state_lin", (n_probes,), np.int8)
+    blocks.add("time_stamp", "time_stamp")
+    # the posterior evolution of the LAST block, only known at the end
+    evolution = {name: np.full((len(qubit_names), n_probes), np.nan) for name in ("u_evol", "t_evol")}
+
+    def build(results, final: bool) -> xr.Dataset:
+        if final:
+            for name in evolution:
+                evolution[name] = _live.fetch_stacked(
+                    results, [f"{name}{i + 1}" for i in range(len(qubit_names))], (n_probes,), "Bayesian T1")
+        return _dataset(blocks, evolution, qubit_names, lin_wait_cycles, final)
+
+    yield from _live.iter_blocks(machine, prog, blocks, build, timeout=timeout, log=log, config=config,
+                                 **({} if poll_s is None else {"poll_s": poll_s}))
+
+
+def _dataset(blocks, evolution, qubit_names, lin_wait_cycles, final: bool = False) -> xr.Dataset:
+    # a live dataset copies the block arrays the next drain writes into; the
+    # final one (nothing is drained after it) takes them as they are
+    own = np.asarray if final else np.copy
+    arrays = blocks.arrays
     data_vars = {
-        "estimated_t1_s": (("qubit", "block_idx"), np.asarray(t1_s, dtype=float)),
-        "u_final": (("qubit", "block_idx"), np.asarray(u_final, dtype=float)),
-        "state": (("qubit", "block_idx", "probe_idx"),
-                  np.asarray(states, dtype=np.int8)),
-        "tau_s": (("qubit", "block_idx", "probe_idx"),
-                  np.asarray(taus, dtype=float)),
-        "u_evol": (("qubit", "probe_idx"), np.asarray(u_evol, dtype=float)),
-        "t1_evol_s": (("qubit", "probe_idx"), np.asarray(t1_evol, dtype=float)),
-        "block_time_s": (("qubit", "block_idx"), block_time_s),
+        "estimated_t1_s": (("qubit", "block_idx"), arrays["t_est_ms"] * 1e-3),
+        "u_final": (("qubit", "block_idx"), own(arrays["u_final"])),
+        "state": (("qubit", "block_idx", "probe_idx"), own(arrays["state"])),
+        "tau_s": (("qubit", "block_idx", "probe_idx"), arrays["tau_ms"] * 1e-3),
+        "u_evol": (("qubit", "probe_idx"), evolution["u_evol"]),
+        "t1_evol_s": (("qubit", "probe_idx"), evolution["t_evol"] * 1e-3),
+        "block_time_s": (("qubit", "block_idx"), blocks.elapsed_s("time_stamp")),
     }
-    if interleaved:
-        data_vars["state_lin"] = (("qubit", "block_idx", "probe_idx"),
-                                  np.asarray(states_lin, dtype=np.int8))
+    if lin_wait_cycles is not None:
+        data_vars["state_lin"] = (("qubit", "block_idx", "probe_idx"), own(arrays["state_lin"]))
         data_vars["lin_wait_s"] = (
             ("probe_idx",),
             np.asarray(lin_wait_cycles.values, dtype=float) * 4e-9,
@@ -381,7 +363,25 @@ def acquire(
         data_vars=data_vars,
         coords={
             "qubit": qubit_names,
-            "block_idx": np.arange(n_blocks),
-            "probe_idx": np.arange(n_probes),
+            "block_idx": np.arange(blocks.num_blocks),
+            "probe_idx": np.arange(arrays["state"].shape[-1]),
         },
     )
+
+
+def acquire(
+    machine,
+    prog,
+    sweep_axes,
+    *,
+    num_shots: int,
+    timeout: float,
+    log: Optional[Callable] = None,
+    config: Optional[dict] = None,
+) -> xr.Dataset:
+    """:func:`iter_acquire` run to completion: the canonical dataset."""
+    dataset = None
+    for dataset in iter_acquire(machine, prog, sweep_axes, num_shots=num_shots, timeout=timeout,
+                                log=log, config=config):
+        pass
+    return dataset
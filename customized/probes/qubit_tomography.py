@@ -233,11 +233,17 @@ def acquire(
     timeout: float,
     log: Optional[Callable] = None,
     config: Optional[dict] = None,
+    compact: bool = False,
 ) -> xr.Dataset:
-    from qualang_tools.multi_user import qm_session
+    """Execute and fetch the per-shot tomography and training I/Q; `compact`
+    allocates them as float32 (`_compact.IQ_DTYPE`) instead of float64."""
+    from customized.probes._compact import IQ_DTYPE
+    from customized.probes._config_cache import resolve_config
+    from customized.probes._live import fetch_stacked
+    from customized.probes._session import log_execution_report, session_pool
+    from customized.result_storage import raw_storage_encoding
 
-    qmm = machine.connect()
-    config = config if config is not None else machine.generate_config()
+    config, fingerprint = resolve_config(machine, config)
 
     qubit_names = list(sweep_axes["qubit"].values)
     num_qubits = len(qubit_names)
@@ -248,64 +254,36 @@ def acquire(
     prepared_states = list(sweep_axes["prepared_state"].values)
     train_shot_idx = list(sweep_axes["train_shot_idx"].values)
 
-    with qm_session(qmm, config, timeout=timeout) as qm:
-        job = qm.execute(prog)
-        results = job.result_handles
-        results.wait_for_all_values()
-
-        I_train_list = []
-        Q_train_list = []
-        I_tomo_list = []
-        Q_tomo_list = []
-
-        for i_q in range(num_qubits):
-            h_i_tr = results.get(f"I_train{i_q + 1}")
-            h_q_tr = results.get(f"Q_train{i_q + 1}")
-            h_i_to = results.get(f"I_tomo{i_q + 1}")
-            h_q_to = results.get(f"Q_tomo{i_q + 1}")
-
-            missing = []
-            if h_i_tr is None: missing.append(f"I_train{i_q + 1}")
-            if h_q_tr is None: missing.append(f"Q_train{i_q + 1}")
-            if h_i_to is None: missing.append(f"I_tomo{i_q + 1}")
-            if h_q_to is None: missing.append(f"Q_tomo{i_q + 1}")
-
-            if missing:
-                try:
-                    avail = list(results.iter_all())
-                except Exception:
-                    avail = "unknown"
-                raise RuntimeError(f"Tomography result handles missing {missing}. Available handles: {avail}")
-
-            i_tr = h_i_tr.fetch_all()
-            q_tr = h_q_tr.fetch_all()
-            i_to = h_i_to.fetch_all()
-            q_to = h_q_to.fetch_all()
-
-            I_train_list.append(np.transpose(i_tr, (1, 0)))
-            Q_train_list.append(np.transpose(q_tr, (1, 0)))
-
-            I_tomo_list.append(np.transpose(i_to, (1, 2, 3, 0)))
-            Q_tomo_list.append(np.transpose(q_to, (1, 2, 3, 0)))
-
-        I_train_arr = np.stack(I_train_list, axis=0)
-        Q_train_arr = np.stack(Q_train_list, axis=0)
-        I_tomo_arr = np.stack(I_tomo_list, axis=0)
-        Q_tomo_arr = np.stack(Q_tomo_list, axis=0)
-
-        if log:
-            rep = getattr(job, "execution_report", None)
-            if callable(rep):
-                log(rep())
-            elif rep is not None:
-                log(rep)
+    with session_pool().session(machine, config, timeout=timeout, fingerprint=fingerprint) as (qm, timings):
+        with timings.stage("execute"):
+            job = qm.execute(prog)
+        with timings.stage("fetch"):
+            results = job.result_handles
+            results.wait_for_all_values()
+            # streams buffer (shot, basis, sym, gate_count) / (shot, state); the
+            # dataset wants the shot axis last
+            tomo_shape = (len(bases), len(sym_indices), len(gate_counts), len(shot_idx))
+            train_shape = (len(prepared_states), len(train_shot_idx))
+            fetched = {
+                var: fetch_stacked(results, [f"{var}{i_q + 1}" for i_q in range(num_qubits)], shape,
+                                   "Tomography", axes=axes, dtype=IQ_DTYPE if compact else float)
+                for var, shape, axes in (
+                    ("I_train", train_shape, (1, 0)),
+                    ("Q_train", train_shape, (1, 0)),
+                    ("I_tomo", tomo_shape, (1, 2, 3, 0)),
+                    ("Q_tomo", tomo_shape, (1, 2, 3, 0)),
+                )
+            }
+        log_execution_report(job, log)
+    if log:
+        log(timings.summary())
 
     ds = xr.Dataset(
         data_vars={
-            "I_tomo": (("qubit", "basis", "sym", "gate_count", "shot_idx"), I_tomo_arr),
-            "Q_tomo": (("qubit", "basis", "sym", "gate_count", "shot_idx"), Q_tomo_arr),
-            "I_train": (("qubit", "prepared_state", "train_shot_idx"), I_train_arr),
-            "Q_train": (("qubit", "prepared_state", "train_shot_idx"), Q_train_arr),
+            "I_tomo": (("qubit", "basis", "sym", "gate_count", "shot_idx"), fetched["I_tomo"]),
+            "Q_tomo": (("qubit", "basis", "sym", "gate_count", "shot_idx"), fetched["Q_tomo"]),
+            "I_train": (("qubit", "prepared_state", "train_shot_idx"), fetched["I_train"]),
+            "Q_train": (("qubit", "prepared_state", "train_shot_idx"), fetched["Q_train"]),
         },
         coords={
             "qubit": qubit_names,
@@ -316,5 +294,6 @@ def acquire(
             "prepared_state": prepared_states,
             "train_shot_idx": train_shot_idx,
         },
+        attrs={"compact_dtypes": True} if compact else {},
     )
-    return ds
+    return raw_storage_encoding(ds)
@@ -0,0 +1,283 @@
+"""Snapshot cache for ``Quam.load()``: a large device state loads from a binary
+snapshot of the INSTANTIATED tree instead of being re-instantiated from JSON.
+
+Parsing ``state.json`` / ``wiring.json`` is cheap; building the QUAM tree from
+it is not — every component is type-resolved and validated, which on a
+multi-qubit chip is most of a node's start-up (x200 in a repeat graph). The
+first :func:`load_quam` of a state does the full load and writes a pickle of
+the result; every later one with the SAME state unpickles it.
+
+A snapshot is keyed and validated, never trusted:
+
+* the KEY hashes the content of every ``.json`` file of the state (not their
+  mtimes: a copied or re-saved identical state still hits), the root class,
+  the ``load`` flags, :data:`SNAPSHOT_VERSION` and the quam / Python versions;
+* the snapshot records the source files of every class in the tree, with
+  size and mtime; an edited class definition (a new field default, a renamed
+  attribute) invalidates it;
+* anything unreadable — truncated file, unpicklable component, an import that
+  moved — falls back to the full load, and a fresh snapshot replaces it;
+* unpickling runs code, so only a private folder is used: created 0o700,
+  owned by the current user and writable by no one else, holding snapshots
+  that user wrote. Anything else (another user's planted folder or file on a
+  shared lab PC) is a full load, and nothing is written there.
+
+QUAM objects do not survive plain pickling (``QuamDict.__getattr__`` recurses
+before ``data`` exists), so the snapshot pickler restores their ``__dict__``
+directly, bypassing ``__init__`` / ``__setattr__`` just as ``copy`` would.
+
+``quam_config.Quam.load`` goes through here, so every node and
+``QMBackend.load`` benefit without edits. ``LCHQM_QUAM_SNAPSHOT=0`` turns it
+off; any other value is the snapshot folder (default: the per-user cache,
+``~/.cache/lchqm/quam_snapshots`` or ``%LOCALAPPDATA%\\lchqm\\quam_snapshots``).
+:data:`last_load` says how the last load went.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import pickle
+import stat
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+__all__ = ["KEEP_SNAPSHOTS", "SNAPSHOT_VERSION", "last_load", "load_quam", "snapshot_dir"]
+
+#: bump when the snapshot layout (or what it must capture) changes.
+SNAPSHOT_VERSION = 1
+
+#: snapshots kept per folder; the least recently written go first.
+KEEP_SNAPSHOTS = 16
+
+#: how the last :func:`load_quam` went: ``source`` ("snapshot" / "json"),
+#: ``seconds``, ``path``, and ``reason`` for a full load.
+last_load: Dict[str, Any] = {}
+
+_ENV = "LCHQM_QUAM_SNAPSHOT"
+_log = logging.getLogger(__name__)
+
+
+def snapshot_dir() -> Optional[Path]:
+    """Where snapshots live, or None when they are turned off."""
+    setting = os.environ.get(_ENV, "")
+    if setting.strip().lower() in ("0", "false", "off", "no"):
+        return None
+    if setting.strip() in ("", "1"):
+        return _user_cache() / "lchqm" / "quam_snapshots"
+    return Path(setting)
+
+
+def _user_cache() -> Path:
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"])
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+
+
+def load_quam(cls, path=None, *, validate_type: bool = True, fix_attrs: bool = True, full_load=None):
+    """``cls.load(path)`` through the snapshot cache (see the module docstring).
+
+    `full_load(path)` is the uncached load; the default is the plain QUAM
+    ``QuamRoot.load`` of `cls`.
+    """
+    if full_load is None:
+        from quam.core.quam_classes import QuamRoot
+
+        def full_load(source):
+            return QuamRoot.load.__func__(cls, source, validate_type=validate_type, fix_attrs=fix_attrs)
+
+    t0 = time.perf_counter()
+    folder = snapshot_dir()
+    if folder is None:
+        return _report(full_load(path), "json", t0, path, "snapshots turned off")
+    try:
+        source = _state_path(cls, path)
+        key = _key(cls, source, validate_type, fix_attrs)
+    except Exception as err:  # let the full load raise the real error
+        return _report(full_load(path), "json", t0, path, f"state not resolvable: {err}")
+
+    target = folder / f"{key}.pkl"
+    reason = _not_private(folder)
+    if reason is not None:
+        return _report(full_load(source), "json", t0, source, reason)
+    root, reason = _read(target)
+    if root is not None:
+        _make_current(root)
+        return _report(root, "snapshot", t0, source)
+
+    root = full_load(source)
+    seconds = time.perf_counter() - t0
+    try:
+        _write(target, root)
+    except Exception as err:  # a state that cannot be snapshotted still loads
+        reason = f"{reason}; not snapshotted: {err}"
+    return _report(root, "json", t0, source, reason, seconds=seconds)
+
+
+# ------------------------------------------------------------------ keying
+
+def _state_path(cls, path) -> Path:
+    if path is not None:
+        return Path(path).resolve()
+    return Path(cls.get_serialiser()._get_state_path()).resolve()
+
+
+def _state_files(source: Path):
+    if source.is_file():
+        return [source]
+    return sorted(p for p in source.rglob("*.json") if p.is_file())
+
+
+def _key(cls, source: Path, validate_type: bool, fix_attrs: bool) -> str:
+    import quam
+
+    digest = hashlib.sha256()
+    header = (SNAPSHOT_VERSION, sys.version_info[:2], getattr(quam, "__version__", "?"),
+              f"{cls.__module__}.{cls.__qualname__}", validate_type, fix_attrs, str(source))
+    digest.update(repr(header).encode("utf-8"))
+    files = _state_files(source)
+    if not files:
+        raise FileNotFoundError(f"no QUAM state files under {source}")
+    for path in files:
+        digest.update(str(path.relative_to(source) if path != source else path.name).encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:32]
+
+
+def _code_stamps(root) -> Dict[str, Tuple[int, int]]:
+    """Size and mtime of the source file of every class in the tree."""
+    modules = {type(obj).__module__ for obj in _walk(root)}
+    stamps = {}
+    for name in sorted(modules):
+        path = getattr(sys.modules.get(name), "__file__", None)
+        if path:
+            stat = os.stat(path)
+            stamps[path] = (stat.st_size, stat.st_mtime_ns)
+    return stamps
+
+
+def _code_unchanged(stamps: Dict[str, Tuple[int, int]]) -> bool:
+    for path, (size, mtime_ns) in stamps.items():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+            return False
+    return True
+
+
+def _walk(root):
+    from quam.core.quam_classes import QuamBase
+
+    seen, stack = set(), [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        yield obj
+        for value in vars(obj).values():
+            if isinstance(value, QuamBase):
+                stack.append(value)
+            elif isinstance(value, (dict, list, tuple)):
+                items = value.values() if isinstance(value, dict) else value
+                stack.extend(v for v in items if isinstance(v, QuamBase))
+
+
+# ----------------------------------------------------------- reading/writing
+
+def _owned(st) -> bool:
+    """`st` belongs to the current user (always true where there are no uids:
+    the per-user cache folder is the protection there)."""
+    return not hasattr(os, "getuid") or st.st_uid == os.getuid()
+
+
+def _not_private(folder: Path) -> Optional[str]:
+    """None when `folder` is safe to unpickle from (created 0o700 if missing),
+    else why not."""
+    try:
+        folder.mkdir(mode=0o700, parents=True, exist_ok=True)
+        st = folder.stat()
+    except OSError as err:
+        return f"snapshot folder unusable: {err}"
+    if not _owned(st):
+        return f"snapshot folder {folder} belongs to another user"
+    if hasattr(os, "getuid") and st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return f"snapshot folder {folder} is writable by other users"
+    return None
+
+
+class _Pickler(pickle.Pickler):
+    def reducer_override(self, obj):
+        from quam.core.quam_classes import QuamBase
+
+        if isinstance(obj, QuamBase) and not isinstance(obj, type):
+            return _new, (type(obj),), dict(vars(obj)), None, None, _restore
+        return NotImplemented
+
+
+def _new(cls):
+    return cls.__new__(cls)
+
+
+def _restore(obj, state) -> None:
+    obj.__dict__.update(state)
+
+
+def _write(target: Path, root) -> None:
+    payload = io.BytesIO()
+    _Pickler(payload, protocol=pickle.HIGHEST_PROTOCOL).dump(root)
+    header = pickle.dumps({"version": SNAPSHOT_VERSION, "code": _code_stamps(root)})
+    tmp = target.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        f.write(payload.getbuffer())
+    os.replace(tmp, target)  # atomic: a concurrent reader sees old or new, never half
+    _prune(target.parent)
+
+
+def _prune(folder: Path) -> None:
+    """Every save of the state is a new key; drop all but the newest snapshots."""
+    try:
+        snapshots = sorted(folder.glob("*.pkl"), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+        for stale in snapshots[KEEP_SNAPSHOTS:]:
+            stale.unlink()
+    except OSError:  # another process pruning the same folder
+        pass
+
+
+def _read(target: Path):
+    """``(root, None)`` from a valid snapshot, else ``(None, why not)``."""
+    try:
+        with open(target, "rb") as f:
+            if not _owned(os.fstat(f.fileno())):
+                return None, "snapshot written by another user"
+            header = pickle.loads(f.read(int.from_bytes(f.read(8), "little")))
+            if header.get("version") != SNAPSHOT_VERSION:
+                return None, "snapshot version changed"
+            if not _code_unchanged(header["code"]):
+                return None, "QUAM class code changed"
+            return pickle.load(f), None
+    except FileNotFoundError:
+        return None, "no snapshot of this state"
+    except Exception as err:
+        return None, f"snapshot unreadable: {err!r}"
+
+
+def _make_current(root) -> None:
+    """What ``QuamRoot.__post_init__`` does on a fresh load."""
+    from quam.core.quam_classes import QuamBase
+
+    QuamBase._last_instantiated_root = root
+
+
+def _report(root, source: str, t0: float, path, reason: Optional[str] = None, *, seconds=None):
+    elapsed = time.perf_counter() - t0 if seconds is None else seconds
+    last_load.clear()
+    last_load.update(source=source, seconds=elapsed, path=str(path) if path is not None else None, reason=reason)
+    _log.info("QUAM state loaded from %s in %.1f ms%s", source, elapsed * 1e3, f" ({reason})" if reason else "")
+    return root
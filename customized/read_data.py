@@ -1,8 +1,15 @@
+import importlib.util
 import os
+
 import xarray as xr
 
 
-def load_xarray_h5(file_path: str, engine_order: list[str] | None = None, load_into_memory: bool = True) -> "xr.Dataset":
+def load_xarray_h5(
+    file_path: str,
+    engine_order: list[str] | None = None,
+    load_into_memory: bool = True,
+    chunks: dict | str | None = "disk",
+) -> "xr.Dataset":
     """
     Load an xarray.Dataset stored in an HDF5 (.h5) file.
 
@@ -10,12 +17,19 @@ def load_xarray_h5(file_path: str, engine_order: list[str] | None = None, load_i
     ----------
     file_path : str
         Path to the .h5 file.
-    group : str | None
-        HDF5 group name where the dataset is stored (if any).
     engine_order : list[str] | None
         List of xarray engines to try (default: ["h5netcdf", "netcdf4"]).
     load_into_memory : bool
-        If True, call .load() on the returned dataset to read it into memory.
+        If True, read the whole dataset into memory and close the file.
+        If False, return it LAZILY: nothing is read until a value is needed, so
+        ``ds["I"].sel(qubit="q3").values`` reads only that qubit's chunks of a
+        file written by ``customized.result_storage``.
+    chunks : dict | str | None
+        Dask chunking of a lazy dataset. "disk" (default) follows the file's own
+        chunks when dask is installed, else lazy indexing without dask; anything
+        else is passed to ``xr.open_dataset(chunks=...)`` (e.g. "auto", or None).
+        Dask lets reductions (``.mean("shot_idx")``) run chunk by chunk without
+        the whole variable in memory; for plain slicing, None is faster.
 
     Returns
     -------
@@ -33,23 +47,29 @@ def load_xarray_h5(file_path: str, engine_order: list[str] | None = None, load_i
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"No such file: {file_path}")
 
+    if load_into_memory:
+        chunks = None
+    elif chunks == "disk":
+        chunks = {} if importlib.util.find_spec("dask") is not None else None
+
+    def open_with(engine):
+        ds = xr.open_dataset(file_path, engine=engine, chunks=chunks)
+        if load_into_memory:
+            with ds:
+                return ds.load()
+        return ds
+
     engines = engine_order or ["h5netcdf", "netcdf4"]
     last_exc = None
     for eng in engines:
         try:
-            ds = xr.open_dataset(file_path, engine=eng)
-            if load_into_memory:
-                ds = ds.load()
-            return ds
+            return open_with(eng)
         except Exception as exc:
             last_exc = exc
 
     # Final fallback: let xarray choose the engine
     try:
-        ds = xr.open_dataset(file_path)
-        if load_into_memory:
-            ds = ds.load()
-        return ds
+        return open_with(None)
     except Exception as exc:
         raise RuntimeError(f"Failed to open '{file_path}' as an xarray Dataset. Tried engines {engines}. Last error: {last_exc}") from exc
 
@@ -0,0 +1,144 @@
+"""Chunked, compressed storage for raw node results (``ds_raw.h5``).
+
+A node's raw dataset used to be written contiguous and uncompressed, so reading
+one qubit of a multi-GB per-shot run meant reading all of it. Here every large
+variable is stored in HDF5 chunks of about :data:`CHUNK_BYTES`:
+
+* one target (``qubit`` / ``qubit_pair`` / ``target``) per chunk — a
+  single-qubit slice touches only that qubit's chunks;
+* the remaining axes filled from the innermost outwards (``shot_idx`` first),
+  so a chunk is one contiguous run of shots;
+* compressed with a fast codec: zlib level 1 with byte shuffle by default
+  (readable by every netCDF/HDF5 reader), or ``"lzf"`` (faster still, but
+  h5py / h5netcdf only).
+
+:func:`with_storage_encoding` only sets each variable's ``encoding``, which
+every later ``to_netcdf`` honours — qualibrate's ``node.save()`` included.
+:func:`save_xarray_h5` writes a dataset directly. Variables under
+:data:`MIN_CHUNKED_BYTES`, scalars and strings stay contiguous.
+
+Compression costs write time (and eager-load time) on every save, so the
+probes attach the encoding only when asked: ``LCHQM_RAW_STORAGE=zlib`` (or
+``1``) / ``lzf`` makes every fetched raw dataset carry it
+(:func:`raw_storage_encoding`); unset, ``ds_raw.h5`` is written as before.
+Worth it for the large per-shot runs that are later read one qubit at a time.
+
+Read back lazily with ``read_data.load_xarray_h5(path, load_into_memory=False)``.
+"""
+
+import os
+import warnings
+from typing import Dict, Optional, Tuple
+
+import xarray as xr
+
+__all__ = [
+    "CHUNK_BYTES",
+    "MIN_CHUNKED_BYTES",
+    "chunk_shape",
+    "raw_storage_encoding",
+    "save_xarray_h5",
+    "storage_encoding",
+    "with_storage_encoding",
+]
+
+#: target size of one stored chunk (uncompressed).
+CHUNK_BYTES = 4 * 2**20
+
+#: variables smaller than this are written contiguous and uncompressed.
+MIN_CHUNKED_BYTES = 256 * 2**10
+
+#: dims that hold one chunk per entry.
+_TARGET_DIMS = ("qubit", "qubit_pair", "target")
+
+_ENV = "LCHQM_RAW_STORAGE"
+
+
+def chunk_shape(dims: Tuple[str, ...], shape: Tuple[int, ...], itemsize: int,
+                chunk_bytes: int = CHUNK_BYTES) -> Tuple[int, ...]:
+    """The chunk of a variable with `dims` / `shape`: 1 along a target dim,
+    then the innermost axes whole for as long as they fit in `chunk_bytes`,
+    the first one that does not fit cut to the remaining budget."""
+    budget = max(1, chunk_bytes // itemsize)
+    chunks = [1] * len(shape)
+    for axis in reversed(range(len(shape))):
+        if dims[axis] in _TARGET_DIMS:
+            continue
+        chunks[axis] = max(1, min(shape[axis], budget))
+        budget //= chunks[axis]
+        if budget <= 1:
+            break
+    return tuple(chunks)
+
+
+def storage_encoding(dataset: xr.Dataset, *, compression: str = "zlib", level: int = 1,
+                     chunk_bytes: int = CHUNK_BYTES) -> Dict[str, dict]:
+    """The per-variable ``to_netcdf`` encoding (see the module docstring)."""
+    if compression not in ("zlib", "lzf"):
+        raise ValueError(f"compression must be 'zlib' or 'lzf', not {compression!r}")
+    encoding = {}
+    for name, var in dataset.data_vars.items():
+        if var.ndim == 0 or var.dtype.kind not in "biuf" or var.nbytes < MIN_CHUNKED_BYTES:
+            continue
+        enc = {
+            "chunksizes": chunk_shape(var.dims, var.shape, var.dtype.itemsize, chunk_bytes),
+            "shuffle": True,
+            # chunksizes are dropped on write if the variable is reshaped later
+            "original_shape": var.shape,
+        }
+        if compression == "zlib":
+            enc.update(zlib=True, complevel=level)
+        else:
+            enc["compression"] = "lzf"
+        encoding[name] = enc
+    return encoding
+
+
+def with_storage_encoding(dataset: xr.Dataset, **kwargs) -> xr.Dataset:
+    """`dataset` (shallow copy, no data copied) with :func:`storage_encoding`
+    set on its variables."""
+    encoding = storage_encoding(dataset, **kwargs)
+    if not encoding:
+        return dataset
+    out = dataset.copy(deep=False)
+    for name, enc in encoding.items():
+        out[name].encoding.update(enc)
+    return out
+
+
+def raw_storage_encoding(dataset: xr.Dataset) -> xr.Dataset:
+    """A fetched raw dataset as the probes hand it on: unchanged, or with
+    :func:`with_storage_encoding` when ``LCHQM_RAW_STORAGE`` asks for it (see
+    the module docstring)."""
+    setting = os.environ.get(_ENV, "").strip().lower()
+    if setting in ("", "0", "false", "off", "no"):
+        return dataset
+    compression = "zlib" if setting in ("1", "true", "on", "yes") else setting
+    if compression not in ("zlib", "lzf"):
+        # never fail a finished acquisition over a typo
+        warnings.warn(f"{_ENV}={setting!r} is not zlib / lzf / 0: raw data is saved uncompressed")
+        return dataset
+    return with_storage_encoding(dataset, compression=compression)
+
+
+def save_xarray_h5(dataset: xr.Dataset, file_path: str, *, compression: str = "zlib", level: int = 1,
+                   chunk_bytes: int = CHUNK_BYTES, engine: Optional[str] = None) -> str:
+    """Write `dataset` to `file_path` chunked and compressed; returns the path.
+
+    The default engine is ``h5netcdf`` (required for ``compression="lzf"``),
+    else ``netcdf4``. The file is written next to its final name and renamed,
+    so a reader never sees half of it.
+    """
+    encoding = storage_encoding(dataset, compression=compression, level=level, chunk_bytes=chunk_bytes)
+    if engine is None:
+        engine = "h5netcdf" if compression == "lzf" or _has("h5netcdf") else "netcdf4"
+    partial = f"{file_path}.partial"
+    dataset.to_netcdf(partial, engine=engine, encoding=encoding)
+    os.replace(partial, file_path)
+    return file_path
+
+
+def _has(module: str) -> bool:
+    import importlib.util
+
+    return importlib.util.find_spec(module) is not None
@@ -0,0 +1,412 @@
+"""SQLite catalog of saved node runs, so finding a past run is a query, not a
+walk over ``<root>/<date>/#<id>_<name>_<HHMMSS>/`` folders.
+
+One row per run folder: id, node name, targets (qubits / pairs) with their
+outcome, time, status, the scalar fit results of ``data.json`` and the
+files in the folder. :class:`RunIndex` keeps it in ``run_index.sqlite3`` at
+the data root (or any ``db_path``):
+
+* :meth:`RunIndex.record` indexes ONE folder — the ``LCH_*`` shells call
+  :func:`record_node` right after ``node.save()``, so the index follows every
+  save without a scan;
+* :meth:`RunIndex.refresh` is the incremental scanner: it relists only the
+  date folders whose mtime changed since the last scan (runs saved by nodes
+  that do not call :func:`record_node`, copied-in data);
+* :meth:`RunIndex.rebuild` drops everything and rescans the whole root.
+
+Queries answer from the index alone::
+
+    index = RunIndex(r"D:\\qpu_data\\QPU_project")
+    t1 = index.latest("*T1*", target="q3", outcome="successful", since=timedelta(days=7))
+    ds = t1.load_ds_raw()
+    index.fit_history("LCH_Ramsey", "q3", "frequency_offset")
+
+Indexing never touches the run data itself, and a folder that cannot be
+parsed is skipped (and logged), never fatal: the index is a cache of the
+folders, which stay the record.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+__all__ = ["INDEX_FILENAME", "Run", "RunIndex", "record_node"]
+
+#: the index file at the data root.
+INDEX_FILENAME = "run_index.sqlite3"
+
+#: bump when the schema (or what a row captures) changes; a stale index is rebuilt.
+_SCHEMA_VERSION = 1
+
+_DATE_FOLDER = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_RUN_FOLDER = re.compile(r"^#(\d+)_(.+?)(?:_(\d{6}))?$")
+
+_SCHEMA = """
+CREATE TABLE runs (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL, created_at REAL NOT NULL,
+    path TEXT NOT NULL UNIQUE, status TEXT, files TEXT NOT NULL, mtime REAL NOT NULL
+);
+CREATE TABLE targets (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    target TEXT NOT NULL, outcome TEXT, PRIMARY KEY (run_id, target)
+);
+CREATE TABLE fits (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    target TEXT NOT NULL, key TEXT NOT NULL, value REAL NOT NULL,
+    PRIMARY KEY (run_id, target, key)
+);
+CREATE TABLE folders (path TEXT PRIMARY KEY, mtime REAL NOT NULL);
+CREATE INDEX runs_by_name ON runs (name, created_at);
+CREATE INDEX runs_by_time ON runs (created_at);
+CREATE INDEX targets_by_target ON targets (target, outcome, run_id);
+CREATE INDEX fits_by_key ON fits (target, key, run_id);
+"""
+
+_log = logging.getLogger(__name__)
+
+When = Union[datetime, timedelta, float, None]
+
+
+@dataclass(frozen=True)
+class Run:
+    """One indexed run. `outcomes` maps target -> outcome ("successful" /
+    "failed", or None when the node set none); `fits` maps target ->
+    {fit key: value} for the numeric scalars of ``fit_results``."""
+
+    id: int
+    name: str
+    created_at: datetime
+    path: Path
+    status: Optional[str]
+    files: Tuple[str, ...]
+    outcomes: Dict[str, Optional[str]] = field(default_factory=dict)
+    fits: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    @property
+    def targets(self) -> Tuple[str, ...]:
+        return tuple(self.outcomes)
+
+    def file(self, name: str) -> Path:
+        """The path of file `name` of this run (``"ds_raw.h5"``, ...)."""
+        if name not in self.files:
+            raise FileNotFoundError(f"run #{self.id} ({self.name}) has no {name!r}; it has {list(self.files)}")
+        return self.path / name
+
+    def load_ds_raw(self, **kwargs):
+        """``read_data.load_xarray_h5`` of this run's ``ds_raw.h5``."""
+        from customized.read_data import load_xarray_h5
+
+        return load_xarray_h5(str(self.file("ds_raw.h5")), **kwargs)
+
+
+class RunIndex:
+    """The run catalog of data root `root` (see the module docstring)."""
+
+    def __init__(self, root: Union[str, Path], db_path: Union[str, Path, None] = None):
+        self.root = Path(root)
+        self.db_path = Path(db_path) if db_path is not None else self.root / INDEX_FILENAME
+        self._db = sqlite3.connect(str(self.db_path), timeout=30)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            self._create()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    # ------------------------------------------------------------- maintenance
+
+    def record(self, run_folder: Union[str, Path]) -> Optional[Run]:
+        """Index (or re-index) one run folder; None if it is not a saved run."""
+        folder = Path(run_folder)
+        parsed = _parse_run(folder, self._relative(folder))
+        if parsed is None:
+            return None
+        with self._db:
+            self._upsert(*parsed)
+        return self.get(parsed[0]["id"])
+
+    def refresh(self) -> int:
+        """Index the runs saved since the last scan; returns how many."""
+        if not self.root.is_dir():
+            raise FileNotFoundError(f"No such data root: {self.root}")
+        known = dict(self._db.execute("SELECT path, mtime FROM folders"))
+        added = 0
+        with os.scandir(self.root) as entries:
+            dates = sorted((e for e in entries if e.is_dir() and _DATE_FOLDER.match(e.name)), key=lambda e: e.name)
+        for date in dates:
+            mtime = date.stat().st_mtime
+            if known.get(date.name) == mtime:
+                continue
+            added += self._scan_date(Path(date.path), date.name, mtime)
+        return added
+
+    def rebuild(self) -> int:
+        """Drop the index and rescan the whole root; returns the run count."""
+        self._create()
+        self.refresh()
+        return len(self)
+
+    # ----------------------------------------------------------------- queries
+
+    def get(self, run_id: int) -> Optional[Run]:
+        """The run with id `run_id` — ``load_data_id`` without a folder walk."""
+        runs = self._runs("WHERE r.id = ?", [run_id])
+        return runs[0] if runs else None
+
+    def runs(self, name: Optional[str] = None, *, target: Optional[str] = None, outcome: Optional[str] = None,
+             status: Optional[str] = None, since: When = None, until: When = None,
+             limit: Optional[int] = None, newest_first: bool = True) -> List[Run]:
+        """The runs matching every given filter.
+
+        `name` is a node name or a glob (``"*T1*"``); `target` a qubit or pair
+        name, and `outcome` that target's outcome (without `target`: any
+        target's). `since` / `until` take a datetime, a timestamp, or a
+        timedelta back from now.
+        """
+        clauses, args = [], []
+        if name is not None:
+            clauses.append("r.name GLOB ?" if _is_glob(name) else "r.name = ?")
+            args.append(name)
+        if target is not None or outcome is not None:
+            sub = ["t.run_id = r.id"]
+            if target is not None:
+                sub.append("t.target = ?")
+                args.append(target)
+            if outcome is not None:
+                sub.append("t.outcome = ?")
+                args.append(outcome)
+            clauses.append(f"EXISTS (SELECT 1 FROM targets t WHERE {' AND '.join(sub)})")
+        if status is not None:
+            clauses.append("r.status = ?")
+            args.append(status)
+        if since is not None:
+            clauses.append("r.created_at >= ?")
+            args.append(_timestamp(since))
+        if until is not None:
+            clauses.append("r.created_at < ?")
+            args.append(_timestamp(until))
+        sql = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        sql += f" ORDER BY r.created_at {'DESC' if newest_first else 'ASC'}, r.id {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return self._runs(sql, args)
+
+    def latest(self, name: Optional[str] = None, **filters) -> Optional[Run]:
+        """The newest run matching :meth:`runs` filters, or None."""
+        runs = self.runs(name, limit=1, **filters)
+        return runs[0] if runs else None
+
+    def fit_history(self, name: str, target: str, key: str, *, outcome: Optional[str] = None,
+                    since: When = None, until: When = None) -> List[Tuple[datetime, float, int]]:
+        """(time, value, run id) of fit result `key` of `target`, oldest first —
+        the drift of one calibrated quantity."""
+        sql = ("SELECT r.created_at, f.value, r.id FROM fits f JOIN runs r ON r.id = f.run_id "
+               f"WHERE f.target = ? AND f.key = ? AND r.name {'GLOB' if _is_glob(name) else '='} ?")
+        args: list = [target, key, name]
+        if outcome is not None:
+            sql += (" AND EXISTS (SELECT 1 FROM targets t"
+                    " WHERE t.run_id = r.id AND t.target = f.target AND t.outcome = ?)")
+            args.append(outcome)
+        if since is not None:
+            sql += " AND r.created_at >= ?"
+            args.append(_timestamp(since))
+        if until is not None:
+            sql += " AND r.created_at < ?"
+            args.append(_timestamp(until))
+        sql += " ORDER BY r.created_at, r.id"
+        return [(datetime.fromtimestamp(t), value, run_id) for t, value, run_id in self._db.execute(sql, args)]
+
+    # --------------------------------------------------------------- internals
+
+    def _create(self) -> None:
+        with self._db:
+            for table in ("fits", "targets", "runs", "folders"):
+                self._db.execute(f"DROP TABLE IF EXISTS {table}")
+            self._db.executescript(_SCHEMA)
+            self._db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def _relative(self, folder: Path) -> str:
+        try:
+            return folder.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:  # a run outside the root is indexed by its full path
+            return folder.resolve().as_posix()
+
+    def _scan_date(self, folder: Path, date: str, mtime: float) -> int:
+        known = dict(self._db.execute("SELECT path, mtime FROM runs WHERE path LIKE ?", [f"{date}/%"]))
+        seen, added, complete = set(), 0, True
+        with os.scandir(folder) as entries:
+            runs = [e for e in entries if e.is_dir() and e.name.startswith("#")]
+        with self._db:
+            for entry in runs:
+                path = f"{date}/{entry.name}"
+                seen.add(path)
+                node_json = Path(entry.path) / "node.json"
+                try:
+                    node_mtime = node_json.stat().st_mtime
+                except OSError:  # still being saved: look again next scan
+                    complete = False
+                    continue
+                if known.get(path) == node_mtime:
+                    continue
+                parsed = _parse_run(Path(entry.path), path)
+                if parsed is not None:
+                    self._upsert(*parsed)
+                    added += path not in known
+            for gone in set(known) - seen:
+                self._db.execute("DELETE FROM runs WHERE path = ?", [gone])
+            self._db.execute("INSERT OR REPLACE INTO folders (path, mtime) VALUES (?, ?)",
+                             [date, mtime if complete else -1.0])
+        return added
+
+    def _upsert(self, run: dict, outcomes: Dict[str, Optional[str]], fits: Dict[str, Dict[str, float]]) -> None:
+        self._db.execute("DELETE FROM runs WHERE id = ? OR path = ?", [run["id"], run["path"]])
+        self._db.execute(
+            "INSERT INTO runs (id, name, created_at, path, status, files, mtime) "
+            "VALUES (:id, :name, :created_at, :path, :status, :files, :mtime)", run)
+        self._db.executemany("INSERT INTO targets (run_id, target, outcome) VALUES (?, ?, ?)",
+                             [(run["id"], target, outcome) for target, outcome in outcomes.items()])
+        self._db.executemany("INSERT INTO fits (run_id, target, key, value) VALUES (?, ?, ?, ?)",
+                             [(run["id"], target, key, value)
+                              for target, values in fits.items() for key, value in values.items()])
+
+    def _runs(self, where: str, args: list) -> List[Run]:
+        rows = self._db.execute(
+            f"SELECT r.id, r.name, r.created_at, r.path, r.status, r.files FROM runs r {where}", args).fetchall()
+        if not rows:
+            return []
+        ids = [row[0] for row in rows]
+        marks = ",".join("?" * len(ids))
+        outcomes: Dict[int, Dict[str, Optional[str]]] = {i: {} for i in ids}
+        for run_id, target, outcome in self._db.execute(
+                f"SELECT run_id, target, outcome FROM targets WHERE run_id IN ({marks}) ORDER BY rowid", ids):
+            outcomes[run_id][target] = outcome
+        fits: Dict[int, Dict[str, Dict[str, float]]] = {i: {} for i in ids}
+        for run_id, target, key, value in self._db.execute(
+                f"SELECT run_id, target, key, value FROM fits WHERE run_id IN ({marks}) ORDER BY rowid", ids):
+            fits[run_id].setdefault(target, {})[key] = value
+        return [
+            Run(id=run_id, name=name, created_at=datetime.fromtimestamp(created_at), path=self.root / path,
+                status=status, files=tuple(json.loads(files)), outcomes=outcomes[run_id], fits=fits[run_id])
+            for run_id, name, created_at, path, status, files in rows
+        ]
+
+
+def record_node(node) -> Optional[Run]:
+    """Index the run `node` just saved (call it after ``node.save()``).
+
+    Never raises: a run the index misses is picked up by the next
+    :meth:`RunIndex.refresh`, a calibration must not fail over it.
+    """
+    try:
+        manager = node.storage_manager
+        folder = manager.data_handler.path
+        if folder is None:
+            return None
+        with RunIndex(manager.root_data_folder) as index:
+            return index.record(folder)
+    except Exception as err:
+        _log.warning("run not added to the run index: %s", err)
+        return None
+
+
+# ------------------------------------------------------------------ parsing
+
+def _parse_run(folder: Path, path: str):
+    """(run row, outcomes, fits) of a saved run folder, or None."""
+    match = _RUN_FOLDER.match(folder.name)
+    node_json = folder / "node.json"
+    if match is None or not node_json.is_file():
+        return None
+    try:
+        node = json.loads(node_json.read_text(encoding="utf-8"))
+        mtime = node_json.stat().st_mtime
+        files = sorted(p.name for p in folder.iterdir())
+        results = {}
+        if (folder / "data.json").is_file():
+            results = json.loads((folder / "data.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError) as err:
+        _log.warning("run folder %s not indexed: %s", folder, err)
+        return None
+
+    metadata = node.get("metadata") or {}
+    data = node.get("data") or {}
+    run = {
+        "id": int(node.get("id", match.group(1))),
+        "name": metadata.get("name") or match.group(2),
+        "created_at": _created_at(node, folder, match.group(3)),
+        "path": path,
+        "status": metadata.get("status") or node.get("status"),
+        "files": json.dumps(files),
+        "mtime": mtime,
+    }
+
+    fits = {}
+    for target, values in (results.get("fit_results") or {}).items():
+        if isinstance(values, dict):
+            scalars = dict(_scalars(values))
+            if scalars:
+                fits[str(target)] = scalars
+
+    outcomes: Dict[str, Optional[str]] = {}
+    parameters = data.get("parameters") or {}
+    model = parameters.get("model", parameters) if isinstance(parameters, dict) else {}
+    for key in ("qubits", "qubit_pairs"):
+        if isinstance(model.get(key), list):
+            outcomes.update((str(t), None) for t in model[key])
+    for target, outcome in (data.get("outcomes") or {}).items():
+        outcomes[str(target)] = None if outcome is None else str(outcome)
+    for target in fits:
+        outcomes.setdefault(target, None)
+    return run, outcomes, fits
+
+
+def _created_at(node: dict, folder: Path, hhmmss: Optional[str]) -> float:
+    stamp = node.get("created_at") or (node.get("metadata") or {}).get("run_start")
+    if isinstance(stamp, str):
+        try:
+            return datetime.fromisoformat(stamp).timestamp()
+        except ValueError:
+            pass
+    if hhmmss and _DATE_FOLDER.match(folder.parent.name):
+        return datetime.strptime(f"{folder.parent.name} {hhmmss}", "%Y-%m-%d %H%M%S").timestamp()
+    return (folder / "node.json").stat().st_mtime
+
+
+def _scalars(values: dict, prefix: str = ""):
+    """The finite numeric leaves of a fit-results dict, nested keys dotted."""
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _scalars(value, f"{name}.")
+        elif isinstance(value, (bool, int, float)) and math.isfinite(value):
+            yield name, float(value)
+
+
+def _is_glob(pattern: str) -> bool:
+    return any(c in pattern for c in "*?[")
+
+
+def _timestamp(when: When) -> float:
+    if isinstance(when, timedelta):
+        return time.time() - when.total_seconds()
+    if isinstance(when, datetime):
+        return when.timestamp()
+    return float(when)
@@ -1,8 +1,11 @@
 """Optional scqo integration for the Quantum Machines backend.
 
-Importing this package wires the QM stack into scqo: it exposes :class:`QMBackend`
-and, as an import side effect, registers the QM experiments (`qubit_ramsey`,
-`qubit_power_rabi`) into the scqo catalog.
+This package exposes :class:`QMBackend` and the per-kind channel views, and
+``customized.scqo.experiments`` holds the QM experiment shells, registered into
+the scqo catalog when they are resolved or run (see that package's docstring).
+Both load on first use: the ``scqo.experiments`` entry point imports this
+package on every ``scqo`` invocation, and listing the catalog must not pay
+for the backend.
 
 This package requires `scqo` installed, and `qm`/`quam` for any real acquisition
 (the vendor imports are lazy, so `import customized.scqo` itself stays light and
@@ -10,18 +13,16 @@ offline-friendly). It is NEVER imported by the qualibrate calibration nodes, whi
 keeps the qualibrate path independent of scqo.
 """
 
-from customized.scqo.backend import (
-    QMBackend,
-    QMDeviceModel,
-    QMDriveChannel,
-    QMFluxChannel,
-    QMQubitPair,
-    QMReadoutChannel,
-)
-from customized.scqo import experiments  # noqa: F401  (import side effect: @register)
-
 __all__ = [
     "QMBackend", "QMDeviceModel",
     # one view class per CHANNEL KIND + the composite (qubit_pair) surface
     "QMDriveChannel", "QMReadoutChannel", "QMFluxChannel", "QMQubitPair",
 ]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from customized.scqo import backend
+
+        return getattr(backend, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
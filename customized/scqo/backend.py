@@ -24,10 +24,16 @@ customized.quam_fields, shared with the qualibrate writebacks).
 
 from __future__ import annotations
 
+import inspect
+import json
 import math
+import threading
+import time
 import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import TYPE_CHECKING, Any
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
 
 import xarray as xr
 from scqo.backend import Backend
@@ -43,6 +49,8 @@ from scqo.entities import Channel, Composite
 from scqo.fieldmap import Unrealized, VendorBinding, VendorOnly
 
 from customized import quam_fields
+from customized.probes._compact import compact_dtypes
+from customized.probes._trace import AcquisitionTrace, span, tracing
 from customized.scqo.fieldmap import (
     FIELD_BINDINGS,
     OP_KNOB_BINDINGS,
@@ -802,19 +810,56 @@ def _progress_shot_total(experiment: "Experiment") -> int:
     return int(total)
 
 
+def _compacted(run: "_PreparedRun", raw: xr.Dataset) -> xr.Dataset:
+    """`raw` in compact dtypes when the run asks for them (a dataset the
+    fetch already narrowed is returned without copying)."""
+    return compact_dtypes(raw) if run.compact else raw
+
+
+@dataclass
+class _PreparedRun:
+    """A built experiment waiting for the instrument: either the raw dataset
+    a self-acquiring probe already returned, or the program and the fetch
+    that runs it."""
+
+    raw: xr.Dataset | None = None
+    program: Any = None
+    sweep_axes: Any = None
+    acquire_fn: Callable | None = None
+    shots: int = 1
+    config: dict | None = None
+    trace: AcquisitionTrace | None = None
+    stop_when: Callable | None = None
+    compact: bool = False
+
+
 class QMBackend(Backend):
     """scqo Backend over a Quantum Machines OPX (via QUAM + the LCHQM probes)."""
 
     def __init__(self, machine: Any, *, roster: "Roster",
-                 timeout: float = 120) -> None:
+                 timeout: float = 120, pipeline_depth: int = 3,
+                 trace_dir: str | None = None, compact_dtypes: bool = False) -> None:
+        if pipeline_depth < 1:
+            raise ValueError(f"{pipeline_depth=} must be at least 1")
         self._machine = machine
         self._roster = roster
         self._device = QMDeviceModel(machine, roster)
         self._timeout = timeout
+        # acquire_async: in-flight slots and the lazily started stage threads
+        self._slots = threading.BoundedSemaphore(pipeline_depth)
+        self._pools: dict[str, ThreadPoolExecutor] = {}
+        self._pools_lock = threading.Lock()
+        # per-stage acquisition traces: the last one, and where to write them
+        self._trace_dir = trace_dir
+        self._last_trace: dict | None = None
+        # float32 I/Q + int8 states at fetch time (customized.probes._compact);
+        # a shell's own `compact_dtypes` attribute overrides it
+        self._compact_dtypes = compact_dtypes
 
     @classmethod
     def load(cls, *, roster: "Roster", state_path: str | None = None,
-             timeout: float = 120) -> "QMBackend":
+             timeout: float = 120, pipeline_depth: int = 3,
+             trace_dir: str | None = None, compact_dtypes: bool = False) -> "QMBackend":
         """Construct from a QUAM state. ``state_path`` overrides ``QUAM_STATE_PATH``;
         when omitted the env / default configuration is used."""
         import os
@@ -823,7 +868,9 @@ class QMBackend(Backend):
 
         if state_path is not None:
             os.environ["QUAM_STATE_PATH"] = state_path
-        return cls(Quam.load(), roster=roster, timeout=timeout)
+        return cls(Quam.load(), roster=roster, timeout=timeout,
+                   pipeline_depth=pipeline_depth, trace_dir=trace_dir,
+                   compact_dtypes=compact_dtypes)
 
     @property
     def device(self) -> QMDeviceModel:
@@ -982,7 +1029,142 @@ class QMBackend(Backend):
                 pass
         return out
 
+    def acquisition_trace(self) -> dict | None:
+        """Per-stage timing spans of the last completed acquisition (run-record
+        provenance only, next to :meth:`power_context`).
+
+        ``{"label", "started_at", "total_s", "by_stage", "spans"}``; each span
+        carries wall and CPU seconds, bytes fetched and the peak RSS after it
+        (see ``customized.probes._trace``). The same JSON is on the dataset as
+        ``attrs["acquisition_trace"]``; with ``trace_dir`` set, every run is
+        also written there as a Chrome trace (``chrome://tracing`` / Perfetto).
+        """
+        return self._last_trace
+
     def acquire(self, experiment: "Experiment") -> xr.Dataset:
+        run = self._prepare(experiment)
+        return self._finish(experiment, self._execute(run), run.trace)
+
+    def acquire_batch(self, experiments: list["Experiment"], *,
+                      queue_depth: int = 2) -> list[xr.Dataset]:
+        """:meth:`acquire` for several experiments, through ONE open QM.
+
+        Every probe is built first (so they all see the same QUAM state, hence
+        one config). The programs on the shared fetch path then go through
+        that QM's job queue back to back (``_lib.acquire_batch``): no
+        per-experiment open, and the next program is compiled and queued
+        while the current one runs. A probe with its own fetch (or one that
+        acquires inside its build, or an experiment with a ``stop_when``
+        rule) still runs on its own, after the queued ones. Returns the canonical datasets in the order given.
+
+        Each experiment keeps its own trace; the queue-ahead compile of the
+        next program lands in the trace of the one being fetched meanwhile.
+        """
+        from customized.probes._lib import acquire as run_acquire
+        from customized.probes._lib import acquire_batch
+
+        runs = [self._prepare(experiment) for experiment in experiments]
+        queued = [i for i, run in enumerate(runs)
+                  if run.raw is None and run.acquire_fn is run_acquire and run.stop_when is None]
+        raws: list[xr.Dataset | None] = [run.raw for run in runs]
+        if queued:
+            batch = acquire_batch(
+                self._machine, [(runs[i].program, runs[i].sweep_axes) for i in queued],
+                timeout=self._timeout, queue_depth=queue_depth,
+            )
+            for i in queued:
+                with tracing(runs[i].trace):
+                    raws[i] = _compacted(runs[i], next(batch))
+            next(batch, None)  # run it out: the QM goes back to the pool open
+        for i, run in enumerate(runs):
+            if raws[i] is None:
+                raws[i] = self._execute(run)
+        return [self._finish(experiment, raw, run.trace)
+                for experiment, raw, run in zip(experiments, raws, runs)]
+
+    def acquire_async(self, experiment: "Experiment", *,
+                      analyze: Callable[[xr.Dataset], Any] | None = None) -> Future:
+        """:meth:`acquire` as a pipeline stage: returns a ``Future`` of the
+        canonical dataset (or of ``analyze(dataset)`` when given).
+
+        The probe is built HERE, on the caller's thread, while the previous
+        experiment is still on the instrument; execute/fetch run on one
+        hardware thread in submission order; reduction, canonicalization and
+        ``analyze`` run on an analysis thread, so the instrument moves on to
+        the next program meanwhile. At most ``pipeline_depth`` experiments are
+        in flight: a further call blocks until the oldest one completes.
+
+        Each experiment runs with the QUA config as it was when it was built.
+        ``analyze`` runs while later experiments are being built, so it must
+        not write device state — apply writebacks from the caller, from the
+        future's result. A probe that acquires inside its own build
+        (drag_equator, the baked-config cryoscopes) queues behind the running
+        job on the session pool.
+        """
+        self._slots.acquire()
+        future: Future = Future()
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            run = self._prepare(experiment, snapshot_config=True)
+        except BaseException as err:
+            future.set_running_or_notify_cancel()
+            future.set_exception(err)  # also frees the slot
+            if not isinstance(err, Exception):
+                raise
+            return future
+        analysis = self._pool("analysis")
+        hardware = self._pool("hardware").submit(
+            lambda: None if future.cancelled() else self._execute(run))
+
+        def hand_on(done: Future) -> None:
+            try:
+                analysis.submit(self._complete, future, experiment, done, analyze, run.trace)
+            except RuntimeError as err:  # shut down meanwhile: nothing will complete it
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(err)
+
+        hardware.add_done_callback(hand_on)
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the :meth:`acquire_async` threads; with ``wait``, after every
+        submitted experiment has completed."""
+        with self._pools_lock:
+            pools, self._pools = self._pools, {}
+        for name in ("hardware", "analysis"):
+            if name in pools:
+                pools[name].shutdown(wait=wait)
+
+    def _pool(self, stage: str) -> ThreadPoolExecutor:
+        with self._pools_lock:
+            pool = self._pools.get(stage)
+            if pool is None:
+                pool = self._pools[stage] = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f"qm-{stage}")
+            return pool
+
+    def _complete(self, future: Future, experiment: "Experiment",
+                  hardware: Future, analyze: Callable[[xr.Dataset], Any] | None,
+                  trace: AcquisitionTrace | None = None) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            dataset = self._finish(experiment, hardware.result(), trace)
+            future.set_result(analyze(dataset) if analyze is not None else dataset)
+        except BaseException as err:
+            future.set_exception(err)  # also frees the slot
+            if not isinstance(err, Exception):
+                raise
+
+    def _prepare(self, experiment: "Experiment", *,
+                 snapshot_config: bool = False) -> _PreparedRun:
+        """Everything before the instrument: checks, the probe build (under
+        the thermalization override) and, for a pipelined run, a private copy
+        of the QUA config so the next build cannot change it underneath."""
+        # The catalog may have handed out scqo's base class (the QM shells
+        # register lazily): become the QM shell before anything reads the class.
+        from customized.scqo.experiments import resolve
+        resolve(experiment)
         # The reset-method backstop. Every shell resolves reset_method through
         # check_reset_method in its probe(), but only if it remembers to; this
         # fires for anything carrying the neutral field, before any vendor import
@@ -998,32 +1180,82 @@ class QMBackend(Backend):
         # record_time_s-derived experiment (the parity-switch monitors) leaves
         # `num_shots` None and exposes the real count via resolved_num_shots().
         shots = _progress_shot_total(experiment)
+        trace = AcquisitionTrace(type(experiment).__name__)
         # A probe returns ONE of three shapes:
         #  - a ready-made xr.Dataset (drag_equator acquires itself with a baked config);
         #  - (program, sweep_axes, probe_module): the module's own acquire() fetches
         #    (tomography builds a heterogeneous-dims dataset per-shot);
         #  - (program, sweep_axes): the shared _lib.acquire fetches (the common path).
-        with self._thermalization_override(experiment):
+        with tracing(trace), span("probe"), self._thermalization_override(experiment):
             res = experiment.probe()
+        compact = getattr(experiment, "compact_dtypes", None)
+        compact = self._compact_dtypes if compact is None else bool(compact)
         if isinstance(res, xr.Dataset):
-            raw = res
+            return _PreparedRun(raw=res, trace=trace, compact=compact)
+        if isinstance(res, tuple) and len(res) == 3:
+            program, sweep_axes, probe_module = res
+            acquire_fn = getattr(probe_module, "acquire", run_acquire)
         else:
-            if isinstance(res, tuple) and len(res) == 3:
-                program, sweep_axes, probe_module = res
-                acquire_fn = getattr(probe_module, "acquire", run_acquire)
-            else:
-                program, sweep_axes = res
-                acquire_fn = run_acquire
-            raw = acquire_fn(
-                self._machine, program, sweep_axes,
-                num_shots=shots, timeout=self._timeout,
-            )
+            program, sweep_axes = res
+            acquire_fn = run_acquire
+        # An optional per-experiment early-stop rule (e.g. _lib.stop_at_snr),
+        # honoured on the shared fetch path only.
+        stop_when = getattr(experiment, "stop_when", None) if acquire_fn is run_acquire else None
+        config = None
+        if snapshot_config:
+            from customized.probes import _config_cache
+            with tracing(trace), span("generate_config"):
+                config = _config_cache.snapshot_config(self._machine)
+        return _PreparedRun(program=program, sweep_axes=sweep_axes, acquire_fn=acquire_fn,
+                            shots=shots, config=config, trace=trace, stop_when=stop_when,
+                            compact=compact)
+
+    def _execute(self, run: _PreparedRun) -> xr.Dataset:
+        """The instrument half: execute and fetch the raw dataset."""
+        if run.raw is not None:
+            return _compacted(run, run.raw)
+        kwargs = {} if run.config is None else {"config": run.config}
+        if run.stop_when is not None:
+            kwargs["stop_when"] = run.stop_when
+        # a fetch that takes `compact` narrows as it fetches; any other one
+        # is narrowed right after
+        if run.compact and "compact" in inspect.signature(run.acquire_fn).parameters:
+            kwargs["compact"] = True
+        with tracing(run.trace):
+            return _compacted(run, run.acquire_fn(
+                self._machine, run.program, run.sweep_axes,
+                num_shots=run.shots, timeout=self._timeout, **kwargs,
+            ))
+
+    def _finish(self, experiment: "Experiment", raw: xr.Dataset,
+                trace: AcquisitionTrace | None = None) -> xr.Dataset:
+        """Everything after the instrument: raw reduction and canonicalization
+        (and the acquisition trace, once it is complete)."""
+        with tracing(trace) as trace:
+            dataset = self._reduce_and_canonicalize(experiment, raw)
+        return self._record_trace(trace, dataset)
+
+    def _record_trace(self, trace: AcquisitionTrace, dataset: xr.Dataset) -> xr.Dataset:
+        record = trace.as_dict()
+        self._last_trace = record
+        if self._trace_dir is not None:
+            from pathlib import Path
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(trace.started_at))
+            stamp += f"-{int(trace.started_at * 1e3) % 1000:03d}"
+            try:
+                trace.write_chrome_trace(Path(self._trace_dir) / f"{stamp}_{trace.label}.trace.json")
+            except OSError as err:  # provenance must never fail a run
+                warnings.warn(f"could not write the acquisition trace: {err}")
+        return dataset.assign_attrs(acquisition_trace=json.dumps(record))
+
+    def _reduce_and_canonicalize(self, experiment: "Experiment", raw: xr.Dataset) -> xr.Dataset:
         # Optional per-experiment raw reduction (e.g. joint two-qubit state
         # populations -> the pair experiment's joint_population variable),
         # applied BEFORE canonicalization so the contract sees final variables.
         reduce = getattr(experiment, "reduce_raw", None)
         if reduce is not None:
-            raw = reduce(raw)
+            with span("reduce_raw"):
+                raw = reduce(raw)
         # The readout schema's naming: the QUA probes' averaged discriminated
         # stream arrives as `state`, but `state` canonically means a PER-SHOT
         # outcome — when this experiment's contract accepts `population` (the
@@ -1036,7 +1268,8 @@ class QMBackend(Backend):
         if ("state" in raw.data_vars and "state" not in accepted
                 and "population" in accepted):
             raw = raw.rename({"state": "population"})
-        return self._to_canonical(raw, experiment)
+        with span("to_canonical"):
+            return self._to_canonical(raw, experiment)
 
     @staticmethod
     def _to_canonical(raw: xr.Dataset, experiment: "Experiment") -> xr.Dataset:
@@ -1,44 +1,70 @@
-"""Importing this package registers every QM experiment into the scqo catalog.
+"""The QM experiment shells, registered into the scqo catalog ON DEMAND.
 
-Add a line here for each new experiment module so its ``@register`` runs.
+Importing this package (the ``scqo.experiments`` entry point does, on every
+``scqo`` invocation) imports no shell: the names and modules come from
+``_manifest.SHELLS``. The catalog lists every experiment anyway — scqo's own
+base classes (``QubitRamsey``, ...) are registered under the same names, and
+stand in for the QM shells until one is needed:
+
+* :func:`load` imports one shell module, so its ``@register`` replaces the base
+  class in the catalog, and returns the shell class;
+* :func:`resolve` turns a base-class instance the catalog handed out into its
+  QM shell (``QMBackend`` does this before every build);
+* :func:`load_all` registers every shell, the old import-time behaviour (also
+  on import when ``LCHQM_EAGER_EXPERIMENTS`` is set).
+
+``customized.scqo.experiments.<name>`` still imports the module on attribute
+access. Add each new experiment module to ``_manifest.py``.
 """
 
-from . import pair_swap_chevron  # noqa: F401  (import side effect: @register)
-from . import pair_swap_flux_map  # noqa: F401  (import side effect: @register)
-from . import pair_zz_coupler  # noqa: F401  (import side effect: @register)
-from . import qc_n_swap_amp  # noqa: F401  (import side effect: @register)
-from . import qubit_ramsey_cryoscope  # noqa: F401  (import side effect: @register)
-from . import qubit_deterministic_benchmarking  # noqa: F401  (import side effect: @register)
-from . import qubit_drag_alternating  # noqa: F401  (import side effect: @register)
-
-from . import qubit_drag_equator  # noqa: F401  (import side effect: @register)
-from . import qubit_echo  # noqa: F401  (import side effect: @register)
-from . import qubit_echo_flux_pulse  # noqa: F401  (import side effect: @register)
-from . import qubit_parity_switch_continuous  # noqa: F401  (import side effect: @register)
-from . import qubit_parity_switch_discrete  # noqa: F401  (import side effect: @register)
-from . import qubit_pi_pulse_error  # noqa: F401  (import side effect: @register)
-from . import qubit_power_rabi  # noqa: F401  (import side effect: @register)
-from . import qubit_ramsey  # noqa: F401  (import side effect: @register)
-from . import qubit_relaxation  # noqa: F401  (import side effect: @register)
-from . import qubit_relaxation_flux_pulse  # noqa: F401  (import side effect: @register)
-from . import qubit_spectroscopy  # noqa: F401  (import side effect: @register)
-from . import qubit_spectroscopy_cryoscope  # noqa: F401  (import side effect: @register)
-from . import qubit_spectroscopy_overlap  # noqa: F401  (import side effect: @register)
-from . import qubit_sqrb  # noqa: F401  (import side effect: @register)
-from . import qubit_t1_ade  # noqa: F401  (import side effect: @register)
-from . import qubit_t1_bayesian  # noqa: F401  (import side effect: @register)
-from . import qubit_thermal_population  # noqa: F401  (import side effect: @register)
-from . import qubit_tomography  # noqa: F401  (import side effect: @register)
-from . import qubit_xyz_delay  # noqa: F401  (import side effect: @register)
-from . import qubit_spectroscopy_flux_pulse  # noqa: F401  (import side effect: @register)
-from . import readout_frequency  # noqa: F401  (import side effect: @register)
-from . import readout_power  # noqa: F401  (import side effect: @register)
-from . import resonator_spectroscopy  # noqa: F401  (import side effect: @register)
-from . import resonator_spectroscopy_flux  # noqa: F401  (import side effect: @register)
-from . import resonator_spectroscopy_power_chain  # noqa: F401  (import side effect: @register)
-from . import resonator_spectroscopy_power_amp  # noqa: F401  (import side effect: @register)
-from . import single_shot_readout  # noqa: F401  (import side effect: @register)
-from . import single_shot_readout_gef  # noqa: F401  (import side effect: @register)
-
-__all__ = ["qubit_ramsey", "qubit_spectroscopy", "qubit_spectroscopy_overlap",
-           "qubit_power_rabi", "resonator_spectroscopy"]
+import importlib
+import os
+from typing import Any, List
+
+from ._manifest import SHELLS
+
+__all__ = ["SHELLS", "load", "load_all", "resolve"]
+
+
+def load(name: str) -> type:
+    """Import the QM shell for experiment `name` (registering it) and return its class."""
+    try:
+        class_name = SHELLS[name]
+    except KeyError:
+        raise KeyError(f"no QM shell for experiment {name!r}; known: {sorted(SHELLS)}") from None
+    return getattr(importlib.import_module(f"{__name__}.{name}"), class_name)
+
+
+def load_all() -> List[type]:
+    """Register every QM shell; returns their classes in manifest order."""
+    return [load(name) for name in SHELLS]
+
+
+def resolve(experiment: Any) -> Any:
+    """Rebind an experiment built from scqo's base class to its QM shell, in
+    place; a shell, or an experiment QM has no shell for, is returned as is.
+
+    The shells add only ``probe()`` and class-level policy (no fields, no own
+    ``Parameters``), so the instance is already complete as a shell."""
+    cls = type(experiment)
+    name = getattr(cls, "name", None)
+    if cls.__module__.startswith(f"{__name__}.") or name not in SHELLS:
+        return experiment
+    shell = load(name)
+    if shell is not cls and issubclass(shell, cls):
+        experiment.__class__ = shell
+    return experiment
+
+
+def __getattr__(attr: str):
+    if attr in SHELLS:
+        return importlib.import_module(f"{__name__}.{attr}")
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(SHELLS))
+
+
+if os.environ.get("LCHQM_EAGER_EXPERIMENTS"):
+    load_all()
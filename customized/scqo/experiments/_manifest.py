@@ -0,0 +1,46 @@
+"""Which QM shell serves which scqo experiment — PURE DATA, no imports.
+
+Experiment name (the scqo catalog name, which is also the shell's module name
+under this package) -> the ``@register``-ed shell class in that module. Read by
+the package ``__init__`` so listing and resolving experiments never has to
+import a shell it does not run. Add a line here for each new experiment module;
+``tests/test_lazy_experiments.py`` checks it against the source.
+"""
+
+SHELLS = {
+    "pair_swap_chevron": "QMPairSwapChevron",
+    "pair_swap_flux_map": "QMPairSwapFluxMap",
+    "pair_zz_coupler": "QMPairZZCoupler",
+    "qc_n_swap_amp": "QMQcNSwapAmp",
+    "qubit_deterministic_benchmarking": "QMQubitDeterministicBenchmarking",
+    "qubit_drag_alternating": "QMQubitDragAlternating",
+    "qubit_drag_equator": "QMQubitDragEquator",
+    "qubit_echo": "QMQubitEcho",
+    "qubit_echo_flux_pulse": "QMQubitEchoFluxPulse",
+    "qubit_parity_switch_continuous": "QMQubitParitySwitchContinuous",
+    "qubit_parity_switch_discrete": "QMQubitParitySwitchDiscrete",
+    "qubit_pi_pulse_error": "QMQubitPiPulseError",
+    "qubit_power_rabi": "QMQubitPowerRabi",
+    "qubit_ramsey": "QMQubitRamsey",
+    "qubit_ramsey_cryoscope": "QMQubitRamseyCryoscope",
+    "qubit_relaxation": "QMQubitRelaxation",
+    "qubit_relaxation_flux_pulse": "QMQubitRelaxationFluxPulse",
+    "qubit_spectroscopy": "QMQubitSpectroscopy",
+    "qubit_spectroscopy_cryoscope": "QMQubitSpectroscopyCryoscope",
+    "qubit_spectroscopy_flux_pulse": "QMQubitSpectroscopyFluxPulse",
+    "qubit_spectroscopy_overlap": "QMQubitSpectroscopyOverlap",
+    "qubit_sqrb": "QMQubitSQRB",
+    "qubit_t1_ade": "QMQubitT1Ade",
+    "qubit_t1_bayesian": "QMQubitT1Bayesian",
+    "qubit_thermal_population": "QMQubitThermalPopulation",
+    "qubit_tomography": "QMQubitTomography",
+    "qubit_xyz_delay": "QMQubitXyzDelay",
+    "readout_frequency": "QMReadoutFrequency",
+    "readout_power": "QMReadoutPower",
+    "resonator_spectroscopy": "QMResonatorSpectroscopy",
+    "resonator_spectroscopy_flux": "QMResonatorSpectroscopyFlux",
+    "resonator_spectroscopy_power_amp": "QMResonatorSpectroscopyPowerAmp",
+    "resonator_spectroscopy_power_chain": "QMResonatorSpectroscopyPowerChain",
+    "single_shot_readout": "QMSingleShotReadout",
+    "single_shot_readout_gef": "QMSingleShotReadoutGEF",
+}
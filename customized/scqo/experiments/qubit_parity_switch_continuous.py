@@ -9,7 +9,10 @@ resolved ns values into QUA clock cycles and reports the scheduled shot period
 back to the neutral layer.
 
 PER-SHOT contract: every shot is recorded individually — the probe's streams
-are ``buffer(num_shots)`` with NO ``.average()``.
+are ``buffer(num_shots)`` with NO ``.average()``. Records of
+``STREAM_ABOVE_SHOTS`` or more stream in fixed chunks to an on-disk sink
+instead (``customized.probes._stream``), so ``probe()`` hands back the probe
+module for its own ``acquire``.
 
 NOT MULTIPLEXED, on purpose. Each qubit gets its own batch, so its shot cadence
 is its own; in a multiplexed batch the ``align()``s tie every qubit's period to
@@ -40,6 +43,7 @@ class QMQubitParitySwitchContinuous(QubitParitySwitchContinuous):
 
     def probe(self) -> Any:
         from customized.probes._lib import select_qubits
+        from customized.probes._stream import chunk_shots_for
         from customized.probes import qubit_parity_switch_continuous as parity_probe
 
         machine = self.backend.machine  # type: ignore[attr-defined]
@@ -60,16 +64,21 @@ class QMQubitParitySwitchContinuous(QubitParitySwitchContinuous):
             self.probe_shot_period_s[target] = self._shot_period_s(
                 machine, target, idle_cycles[target], depletion_cycles[target])
 
-        return parity_probe.build_program(
+        # resolved by the neutral layer from record_time_s (or an explicit
+        # override); params.num_shots is None in the normal case
+        num_shots = self.resolved_num_shots()
+        prog, sweep_axes = parity_probe.build_program(
             machine,
             qubits,
             idle_cycles=idle_cycles,
             depletion_cycles=depletion_cycles,
-            # resolved by the neutral layer from record_time_s (or an explicit
-            # override); params.num_shots is None in the normal case
-            num_shots=self.resolved_num_shots(),
+            num_shots=num_shots,
             use_state_discrimination=bool(self.params.use_state_discrimination),
+            # long records stream in chunks to an on-disk sink
+            chunk_shots=chunk_shots_for(num_shots),
         )
+        # the probe's own acquire: it knows the chunked fetch
+        return prog, sweep_axes, parity_probe
 
     @staticmethod
     def _shot_period_s(machine: Any, target: str, idle_cycles: int,
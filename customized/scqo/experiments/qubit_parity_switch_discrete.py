@@ -10,7 +10,7 @@ the exact scheduled cycle period back to the neutral layer.
 
 PER-MEASUREMENT contract: both measurements of every cycle are recorded
 individually — the probe's streams are ``buffer(2).buffer(num_shots)`` with
-NO ``.average()``.
+NO ``.average()``. Long records stream in chunks, as in the continuous shell.
 
 NOT MULTIPLEXED, for the same reason as the continuous shell: each qubit's
 cycle period is its own telegraph timebase.
@@ -41,6 +41,7 @@ class QMQubitParitySwitchDiscrete(QubitParitySwitchDiscrete):
 
     def probe(self) -> Any:
         from customized.probes._lib import select_qubits
+        from customized.probes._stream import chunk_shots_for
         from customized.probes import qubit_parity_switch_discrete as parity_probe
 
         machine = self.backend.machine  # type: ignore[attr-defined]
@@ -66,15 +67,20 @@ class QMQubitParitySwitchDiscrete(QubitParitySwitchDiscrete):
             self.probe_shot_period_s[target] = (
                 sequence_ns + tau_wait_cycles[target] * 4.0) * 1e-9
 
-        return parity_probe.build_program(
+        num_shots = self.resolved_num_shots()
+        prog, sweep_axes = parity_probe.build_program(
             machine,
             qubits,
             idle_cycles=idle_cycles,
             depletion_cycles=depletion_cycles,
             tau_wait_cycles=tau_wait_cycles,
-            num_shots=self.resolved_num_shots(),
+            num_shots=num_shots,
             use_state_discrimination=bool(self.params.use_state_discrimination),
+            # long records stream in chunks to an on-disk sink
+            chunk_shots=chunk_shots_for(num_shots),
         )
+        # the probe's own acquire: it knows the chunked fetch
+        return prog, sweep_axes, parity_probe
 
     @staticmethod
     def _sequence_ns(machine: Any, target: str, idle_cycles: int,
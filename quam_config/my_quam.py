@@ -26,11 +26,16 @@ The per-QUBIT class is a separate, per-device decision, also stored in
 ``scripts/migrate_thermalizing_transmon.py``. It is NOT set here: a ``qubit_type``
 ClassVar is build-time and type-hint only, and on a mixed chip there is no single
 right answer to bind it to.
+
+``Quam.load`` of a state FILE or folder goes through the snapshot cache of
+:mod:`customized.quam_snapshot` (an unchanged state unpickles instead of being
+re-instantiated); a dict, or ``LCHQM_QUAM_SNAPSHOT=0``, is the plain load.
 """
 
 from customized.quam_builder.architecture.superconducting.qpu.mixed_quam import (
     MixedTransmonQuam,
 )
+from customized.quam_snapshot import load_quam
 
 
 class Quam(MixedTransmonQuam):
@@ -40,4 +45,12 @@ class Quam(MixedTransmonQuam):
     default for any chip.
     """
 
-    pass
+    @classmethod
+    def load(cls, filepath_or_dict=None, validate_type: bool = True, fix_attrs: bool = True) -> "Quam":
+        def full_load(source):
+            return super(Quam, cls).load(source, validate_type=validate_type, fix_attrs=fix_attrs)
+
+        if isinstance(filepath_or_dict, dict):
+            return full_load(filepath_or_dict)
+        return load_quam(cls, filepath_or_dict, validate_type=validate_type, fix_attrs=fix_attrs,
+                         full_load=full_load)
@@ -0,0 +1,100 @@
+"""Time the batched 2D chevron fit (``customized.node._chevron_fit``) against
+the vendored ``fit_chevron_cz`` path (per pair: a damped-oscillation fit at the
+highest-contrast amplitude to seed J, then finite-difference `curve_fit` over
+the flattened map) — synthetic CZ / iSWAP chevrons, no hardware needed.
+
+    python scripts/bench_chevron_fit.py
+    python scripts/bench_chevron_fit.py --pairs 4 --amplitudes 200 --times 400
+
+The vendored path is copied here with its seeds; the damped-oscillation
+pre-fit goes through `customized.node._batched_fit` (the vendored one needs
+qualibration_libs), which only makes the vendored timing look better. Reports
+time, the worst relative J error against the truth and the pairs each path
+failed.
+
+Needs numpy, scipy and xarray.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+from scipy.optimize import curve_fit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+from customized.node._batched_fit import fit_oscillation_decay_exp  # noqa: E402
+from customized.node._chevron_fit import fit_chevron, rabi_chevron_model  # noqa: E402
+
+
+def _chevrons(n_pairs, n_rows, n_cols, rng):
+    time_ns = np.arange(n_cols) * 160.0 / n_cols * 2
+    J, f0 = rng.uniform(4e6, 12e6, n_pairs), rng.uniform(180e6, 220e6, n_pairs)
+    detuning = np.linspace(140e6, 260e6, n_rows) + rng.uniform(-5e6, 5e6, (n_pairs, 1))
+    data = np.stack([
+        rabi_chevron_model(np.broadcast_arrays(detuning[p][:, None], time_ns * 1e-9), J[p], f0[p], 0.9, 0.05)
+        .reshape(n_rows, n_cols) for p in range(n_pairs)
+    ])
+    return detuning, time_ns, data + rng.normal(0, 0.05, data.shape), J
+
+
+def _vendored(detuning, time_ns, data):
+    out = []
+    for p in range(len(data)):
+        da = xr.DataArray(data[p], dims=("amplitude", "time"), coords={"time": time_ns})
+        best = int((da.max("time") - da.min("time")).argmax())
+        try:
+            flux_time = int(1 / fit_oscillation_decay_exp(da.isel(amplitude=best), "time").sel(fit_vals="f"))
+        except Exception:
+            flux_time = 50
+        length = flux_time - flux_time % 4 + 4
+        t, f = np.meshgrid(time_ns * 1e-9, detuning[p])
+        try:
+            popt, _ = curve_fit(rabi_chevron_model, np.vstack((f.ravel(), t.ravel())), data[p].ravel(),
+                                p0=(1e9 / (2 * length), detuning[p, best], -1, 1.0))
+            out.append(popt)
+        except Exception:
+            out.append(np.full(4, np.nan))
+    return np.array(out)
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=4, help="qubit pairs (default: 4)")
+    parser.add_argument("--amplitudes", type=int, default=200, help="amplitude (detuning) rows (default: 200)")
+    parser.add_argument("--times", type=int, default=400, help="time columns (default: 400)")
+    args = parser.parse_args()
+
+    detuning, time_ns, data, J = _chevrons(args.pairs, args.amplitudes, args.times, np.random.default_rng(0))
+    print(f"{args.pairs} pairs x {args.amplitudes} amplitudes x {args.times} times")
+    print(f"{'method':<26} {'fit s':>8} {'worst J error':>14} {'failed':>7}")
+
+    def report(name, params, seconds):
+        err = np.abs(np.abs(params[:, 0]) - J) / J
+        bad = int(np.sum(~(err < 0.01)))
+        print(f"{name:<26} {seconds:>8.3f} {np.nanmax(err) if np.isfinite(err).any() else np.nan:>14.2e} {bad:>7}")
+        return bad
+
+    params, seconds = _timed(lambda: _vendored(detuning, time_ns, data))
+    report("vendored per pair", params, seconds)
+    failed = 0
+    for decimate in (None, 4):
+        fit, seconds = _timed(lambda: fit_chevron(detuning, time_ns * 1e-9, data, decimate=decimate))
+        name = f"batched, decimate={decimate}" if decimate else "batched"
+        failed += report(name, np.where(fit.success[:, None], fit.params, np.nan), seconds)
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
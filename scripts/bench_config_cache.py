@@ -0,0 +1,137 @@
+"""Time the incremental config cache against a full ``generate_config()`` on a
+REAL QUAM state — no hardware needed.
+
+    python scripts/bench_config_cache.py D:\\qpu_data\\SQ_demo\\QM_OPX1000_config
+    python scripts/bench_config_cache.py <state_dir> --repeat 50
+    python scripts/bench_config_cache.py --channels 40
+
+Loads ``state.json`` + ``wiring.json`` read-only, then times: the full
+``generate_config()``; a cache hit (nothing changed); and an incremental
+update after the edit a power-chain step makes (one readout amplitude and its
+port's ``full_scale_power_dbm``). Each incremental result is checked against a
+fresh full build. The edited values are put back; nothing is saved.
+
+``--channels N`` times a synthetic tree instead (N single channels of seven
+pulses on LF-FEM ports; the edit is one amplitude and its port's delay), which
+needs only ``quam``. On that tree with N=40 (median of 20):
+
+    full generate_config :   ~180 ms
+    cache hit            :    ~25 ms
+    incremental update   :    ~32 ms   (was ~80 ms while every update re-sorted
+                                        the whole tree and re-serialized the
+                                        config for its fingerprint)
+
+Needs the QM environment (lab: ``conda activate LCHQM_test``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples)
+
+
+def _state(args):
+    """The lab state: ``(machine, readout pulse, its port, the port's power field)``."""
+    from quam_config import Quam
+
+    machine = Quam.load(args.state_dir)
+    qubit = machine.qubits[args.qubit] if args.qubit else next(iter(machine.qubits.values()))
+    print(f"loaded QUAM | {len(machine.qubits)} qubits | editing {qubit.name}.resonator")
+    return machine, qubit.resonator.operations["readout"], qubit.resonator.opx_output, "full_scale_power_dbm"
+
+
+def _synthetic(channels: int):
+    """A tree of `channels` single channels, seven pulses each (one a
+    reference), on LF-FEM ports: ``(machine, pulse, its port, "delay")``."""
+    from dataclasses import field
+    from typing import Dict
+
+    from quam.components import SingleChannel, pulses
+    from quam.components.ports import FEMPortsContainer
+    from quam.core import QuamRoot, quam_dataclass
+
+    @quam_dataclass
+    class SyntheticRoot(QuamRoot):
+        ports: FEMPortsContainer = field(default_factory=FEMPortsContainer)
+        channels: Dict[str, SingleChannel] = field(default_factory=dict)
+
+    machine = SyntheticRoot()
+    for i in range(channels):
+        port = machine.ports.get_analog_output("con1", 1 + i // 8, i % 8 + 1, create=True)
+        channel = SingleChannel(id=f"ch{i}", opx_output=port.get_reference())
+        machine.channels[f"ch{i}"] = channel
+        for k in range(6):
+            channel.operations[f"sq{k}"] = pulses.SquarePulse(amplitude=0.1, length=100)
+        channel.operations["ref"] = pulses.SquarePulse(amplitude="#../sq0/amplitude", length=100)
+    channel = machine.channels["ch0"]
+    print(f"synthetic QUAM | {channels} channels | editing ch0")
+    return machine, channel.operations["sq0"], channel.opx_output, "delay"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("state_dir", nargs="?", help="folder holding state.json + wiring.json")
+    parser.add_argument("--qubit", help="qubit whose readout is edited (default: the first)")
+    parser.add_argument("--channels", type=int, help="time a synthetic tree of this many channels instead")
+    parser.add_argument("--repeat", type=int, default=20, help="timed repetitions per case (default: 20)")
+    args = parser.parse_args()
+    if (args.state_dir is None) == (args.channels is None):
+        parser.error("give either a state_dir or --channels")
+
+    try:
+        from customized.probes._config_cache import ConfigCache
+
+        machine, pulse, port, power = _synthetic(args.channels) if args.channels else _state(args)
+    except ModuleNotFoundError as err:
+        raise SystemExit(
+            f"missing package: {err.name}\n"
+            "This benchmark needs the QM stack (quam/qm + this repo installed). "
+            "Run it in the lab's QM environment:  conda activate LCHQM_test"
+        )
+    original = (pulse.amplitude, getattr(port, power))
+
+    cache = ConfigCache()
+    full_ms = _median_ms(machine.generate_config, args.repeat)
+    cache.get(machine)
+    hit_ms = _median_ms(lambda: cache.get(machine), args.repeat)
+
+    step = [0]
+
+    def edit_and_get():
+        step[0] += 1
+        pulse.amplitude = original[0] * (1 - 0.01 * (step[0] % 2))
+        setattr(port, power, original[1] + 3 * (step[0] % 2))
+        cache.get(machine)
+
+    try:
+        incr_ms = _median_ms(edit_and_get, args.repeat)
+        regenerated = cache.last_regenerated
+        consistent = cache.verify(machine)
+    finally:
+        pulse.amplitude = original[0]
+        setattr(port, power, original[1])
+
+    print(f"full generate_config : {full_ms:8.2f} ms")
+    print(f"cache hit            : {hit_ms:8.2f} ms  ({full_ms / hit_ms:.0f}x)")
+    print(f"incremental update   : {incr_ms:8.2f} ms  ({full_ms / incr_ms:.1f}x)")
+    print(f"  regenerated units  : {regenerated}")
+    print(f"  matches full build : {consistent}")
+    return 0 if consistent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Time the sort-free exact discriminator against the per-qubit Nelder-Mead it
+replaced in the readout-fidelity fit — synthetic blobs, no hardware needed.
+
+    python scripts/bench_discriminator.py
+    python scripts/bench_discriminator.py --shots 1000000 --qubits 8
+
+Draws Gaussian g/e blobs per qubit (separations from overlapping to clean),
+then times the old path (one `np.histogram` pair and one Nelder-Mead on the
+false-detection count per qubit, through `.sel(qubit=...)` as the fit did)
+and `customized.node._discriminator`. Reports both, the largest RUS-threshold
+difference and, per qubit, the false detections each threshold leaves: the new
+one must never leave more.
+
+Needs numpy, scipy and xarray only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+from scipy.optimize import minimize
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+from customized.node._discriminator import histogram_peak_edges, optimal_thresholds  # noqa: E402
+
+
+def _false_detections(threshold, Ig, Ie):
+    if np.mean(Ig) < np.mean(Ie):
+        return np.sum(Ig > threshold) + np.sum(Ie < threshold)
+    return np.sum(Ig < threshold) + np.sum(Ie > threshold)
+
+
+def _old(ds: xr.Dataset):
+    qubits = ds.qubit.values
+    rus = [np.histogram(ds.Ig_rot.sel(qubit=q), bins=100)[1][1:][
+        np.argmax(np.histogram(ds.Ig_rot.sel(qubit=q), bins=100)[0])] for q in qubits]
+    thresholds = []
+    for q in qubits:
+        Ig, Ie = ds.Ig_rot.sel(qubit=q), ds.Ie_rot.sel(qubit=q)
+        fit = minimize(_false_detections, 0.5 * (np.mean(Ig) + np.mean(Ie)), (Ig, Ie), method="Nelder-Mead")
+        thresholds.append(fit.x[0])
+    return np.array(rus), np.array(thresholds)
+
+
+def _new(ds: xr.Dataset):
+    Ig, Ie = ds.Ig_rot.values, ds.Ie_rot.values
+    return histogram_peak_edges(Ig), optimal_thresholds(Ig, Ie).threshold
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shots", type=int, default=1_000_000, help="shots per state per qubit (default: 1e6)")
+    parser.add_argument("--qubits", type=int, default=8, help="qubits (default: 8)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    separation = np.linspace(0.5, 6.0, args.qubits)[:, None] * 1e-3
+    sigma = 1e-3
+    ds = xr.Dataset(
+        {
+            "Ig_rot": (("qubit", "n_runs"), rng.normal(0.0, sigma, (args.qubits, args.shots))),
+            "Ie_rot": (("qubit", "n_runs"), rng.normal(separation, sigma, (args.qubits, args.shots))),
+        },
+        coords={"qubit": [f"q{i + 1}" for i in range(args.qubits)]},
+    )
+
+    t0 = time.perf_counter()
+    rus_old, t_old = _old(ds)
+    old_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    rus_new, t_new = _new(ds)
+    new_s = time.perf_counter() - t0
+
+    print(f"{args.qubits} qubits x {args.shots} shots per state")
+    print(f"Nelder-Mead per qubit : {old_s:8.3f} s")
+    print(f"batched exact         : {new_s:8.3f} s  ({old_s / new_s:.1f}x)")
+    print(f"max |RUS difference|  : {np.max(np.abs(rus_old - rus_new)):.3g} V")
+    worse = 0
+    for i, q in enumerate(ds.qubit.values):
+        Ig, Ie = ds.Ig_rot.values[i], ds.Ie_rot.values[i]
+        n_old, n_new = _false_detections(t_old[i], Ig, Ie), _false_detections(t_new[i], Ig, Ie)
+        worse += n_new > n_old
+        print(f"  {q}: false detections {n_old:8d} (Nelder-Mead)  {n_new:8d} (exact)")
+    return 1 if worse else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
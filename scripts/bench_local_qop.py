@@ -0,0 +1,152 @@
+"""Time the acquisition path end to end on the local stand-in QOP
+(``customized.probes._local_qop``) — no hardware needed.
+
+    python scripts/bench_local_qop.py
+    python scripts/bench_local_qop.py --experiments 50 --points 200 --run-ms 20
+    python scripts/bench_local_qop.py --state-dir D:\\qpu_data\\SQ_demo\\QM_OPX1000_config
+
+Builds ``--experiments`` averaged sweep programs (``--qubits`` I/Q streams of
+``--points`` points each) and runs them, each job taking ``--run-ms`` on the
+stand-in, through:
+
+* ``_lib.acquire`` once per experiment (the ``QMBackend.acquire`` path: pooled
+  session, execute, ``XarrayDataFetcher``);
+* ``_lib.acquire_batch`` (one QM, the job queue kept ahead);
+* the chunked single-shot stream (``_stream``, polling ``count_so_far``).
+
+Reports wall time per experiment and the host overhead on top of the
+instrument time the stand-in simulates; that overhead is the number to watch
+for regressions. With ``--state-dir`` the blobs follow a real QUAM state's
+readout thresholds and amplitudes; otherwise a bare stand-in machine is used.
+
+Needs qm (and qualibration_libs for the two ``_lib`` paths, skipped without it).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+
+class _Machine:
+    network = {"host": "local", "cluster_name": "bench"}
+
+    def generate_config(self):
+        return {"version": 1}
+
+
+def _sweep_program(qubits: int, points: int):
+    from qm.qua import declare, declare_stream, fixed, for_, program, save, stream_processing
+
+    with program() as prog:
+        n = declare(int)
+        x = declare(fixed)
+        n_st = declare_stream()
+        I_st = [declare_stream() for _ in range(qubits)]
+        Q_st = [declare_stream() for _ in range(qubits)]
+        with for_(n, 0, n < 100, n + 1):
+            save(n, n_st)
+            with for_(x, 0.0, x < 1.0, x + 0.01):
+                for i in range(qubits):
+                    save(x, I_st[i])
+                    save(x, Q_st[i])
+        with stream_processing():
+            n_st.save("n")
+            for i in range(qubits):
+                I_st[i].buffer(points).average().save(f"I{i + 1}")
+                Q_st[i].buffer(points).average().save(f"Q{i + 1}")
+    return prog
+
+
+def _shots_program(qubits: int, chunk: int):
+    from qm.qua import declare, declare_stream, for_, program, save, stream_processing
+
+    with program() as prog:
+        n = declare(int)
+        state = declare(bool)
+        state_st = [declare_stream() for _ in range(qubits)]
+        with for_(n, 0, n < 100, n + 1):
+            for i in range(qubits):
+                save(state, state_st[i])
+        with stream_processing():
+            for i in range(qubits):
+                state_st[i].boolean_to_int().buffer(chunk).save_all(f"state{i + 1}")
+    return prog
+
+
+def _report(label: str, wall_s: float, count: int, instrument_s: float) -> None:
+    overhead = (wall_s - instrument_s) / count * 1e3
+    print(f"{label:<28}: {wall_s / count * 1e3:8.2f} ms/experiment  (host overhead {overhead:7.2f} ms)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--experiments", type=int, default=20, help="programs per path (default: 20)")
+    parser.add_argument("--qubits", type=int, default=4, help="qubits per program (default: 4)")
+    parser.add_argument("--points", type=int, default=100, help="sweep points per stream (default: 100)")
+    parser.add_argument("--run-ms", type=float, default=10.0, help="simulated job duration (default: 10 ms)")
+    parser.add_argument("--shots", type=int, default=100_000, help="single shots per qubit, chunked path")
+    parser.add_argument("--state-dir", help="QUAM state folder for readout-driven blobs (optional)")
+    args = parser.parse_args()
+
+    try:
+        import qm  # noqa: F401
+    except ModuleNotFoundError as err:
+        raise SystemExit(f"missing package: {err.name}\nThis benchmark needs the qm SDK.")
+    from customized.probes import _stream
+    from customized.probes._local_qop import local_qop
+
+    if args.state_dir:
+        from quam_config import Quam
+
+        machine = Quam.load(args.state_dir)
+    else:
+        machine = _Machine()
+    run_s = args.run_ms / 1e3
+    programs = [_sweep_program(args.qubits, args.points) for _ in range(args.experiments)]
+    axes = {"qubit": xr.DataArray([f"q{i + 1}" for i in range(args.qubits)]),
+            "x": xr.DataArray(np.linspace(0, 1, args.points))}
+    print(f"{args.experiments} experiments | {args.qubits} qubits x {args.points} points | "
+          f"{args.run_ms:g} ms per job")
+
+    try:
+        from customized.probes import _lib
+    except ModuleNotFoundError as err:
+        print(f"_lib paths skipped (missing package: {err.name})")
+        _lib = None
+    if _lib is not None:
+        with local_qop(machine, model="lorentzian", run_s=run_s, iterations=100):
+            t0 = time.perf_counter()
+            for prog in programs:
+                _lib.acquire(machine, prog, axes, num_shots=100, timeout=30)
+            _report("_lib.acquire (sequential)", time.perf_counter() - t0, len(programs), run_s * len(programs))
+        with local_qop(machine, model="lorentzian", run_s=run_s, iterations=100):
+            t0 = time.perf_counter()
+            for _ in _lib.acquire_batch(machine, [(prog, axes) for prog in programs], timeout=30):
+                pass
+            _report("_lib.acquire_batch", time.perf_counter() - t0, len(programs), run_s * len(programs))
+
+    chunk = _stream.chunk_shots_for(args.shots) or args.shots
+    shots_axes = {"qubit": axes["qubit"], "shot_idx": xr.DataArray(np.arange(1, args.shots + 1)),
+                  _stream.CHUNK_SHOTS_AXIS: chunk}
+    entries = _stream.padded_shots(args.shots, chunk) // chunk
+    with local_qop(machine, run_s=run_s, entries=entries) as qop, tempfile.TemporaryDirectory() as sink:
+        prog = _shots_program(args.qubits, chunk)
+        t0 = time.perf_counter()
+        ds = _stream.acquire_chunked(machine, prog, shots_axes, timeout=30, sink_dir=sink, poll_s=run_s / 10)
+        wall = time.perf_counter() - t0
+    _report(f"_stream chunked ({args.shots} shots)", wall, 1, run_s)
+    print(f"  state shape {tuple(ds['state'].shape)}, {len(qop.jobs)} job(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
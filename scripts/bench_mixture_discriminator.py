@@ -0,0 +1,136 @@
+"""Time the batched g/e/f mixture discriminator
+(``customized.node._mixture_discriminator``) against the vendored iq_blobs_ef
+fit and a per-qubit scikit-learn GaussianMixture — synthetic shots with
+known labels, no hardware needed.
+
+    python scripts/bench_mixture_discriminator.py
+    python scripts/bench_mixture_discriminator.py --shots 100000 --qubits 8 --leak 0.08
+
+Draws g/e/f blobs per qubit (elliptical, unequal widths); a fraction
+``--leak`` of the e and f shots decayed one level before the readout. Then
+fits with:
+
+* the vendored path: one histogram Gaussian per I and Q of each prepared state
+  (``find_biggest_gaussian``, copied here: the vendored module needs the
+  qualibrate stack), shots assigned to the nearest center;
+* scikit-learn ``GaussianMixture`` per qubit (full covariance, same initial
+  means, same tolerance), if installed;
+* the batched EM over all qubits at once, on ``--fit-shots`` shots per state
+  (its fit time includes classifying every shot for the confusion matrix).
+
+Reports fit time, classification time, the largest center error against the
+true blob centers and the fraction of shots assigned to their TRUE state.
+
+Needs numpy, scipy and xarray (scikit-learn optional).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy.optimize import curve_fit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+from customized.node._mixture_discriminator import fit_mixture  # noqa: E402
+
+CENTERS = np.array([[0.0, 0.0], [6e-4, 1e-4], [9e-4, -4e-4]])
+SIGMAS = np.array([[2e-4, 1.6e-4], [2.2e-4, 1.8e-4], [2.6e-4, 2.1e-4]])
+
+
+def _shots(n_qubits: int, n_shots: int, leak: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    truth = np.broadcast_to(np.arange(3)[:, None], (n_qubits, 3, n_shots)).copy()
+    truth[(rng.random(truth.shape) < leak) & (truth > 0)] -= 1
+    offsets = rng.normal(0, 1e-4, (n_qubits, 1, 1, 2))  # every qubit's blobs somewhere else
+    I = offsets[..., 0] + CENTERS[truth, 0] + rng.standard_normal(truth.shape) * SIGMAS[truth, 0]
+    Q = offsets[..., 1] + CENTERS[truth, 1] + rng.standard_normal(truth.shape) * SIGMAS[truth, 1]
+    return I, Q, truth, CENTERS[None] + offsets[:, 0]
+
+
+def _find_biggest_gaussian(values):
+    def gaussian(x, amp, mu, sigma):
+        return amp * np.exp(-((x - mu) ** 2) / (2 * sigma**2))
+
+    hist, edges = np.histogram(values, bins=100)
+    centers = (edges[:-1] + edges[1:]) / 2
+    guess = [(hist.max(), centers[hist.argmax()], (centers[-1] - centers[0]) / 4)]
+    return curve_fit(gaussian, centers, hist, p0=guess)[0][1]
+
+
+def _vendored(I, Q):
+    return np.array([[[_find_biggest_gaussian(I[q, k]), _find_biggest_gaussian(Q[q, k])] for k in range(3)]
+                     for q in range(I.shape[0])])
+
+
+def _nearest(I, Q, centers):
+    d = (I[..., None] - centers[:, None, None, :, 0]) ** 2 + (Q[..., None] - centers[:, None, None, :, 1]) ** 2
+    return np.argmin(d, axis=-1)
+
+
+def _sklearn(I, Q, tol):
+    from sklearn.mixture import GaussianMixture
+
+    fits = []
+    for q in range(I.shape[0]):
+        # standardized: reg_covar is absolute and would swamp variances in volts
+        X = np.stack([I[q].ravel(), Q[q].ravel()], axis=-1)
+        origin, scale = X.mean(axis=0), X.std()
+        X = (X - origin) / scale
+        start = np.median(X.reshape(3, -1, 2), axis=1)
+        fit = GaussianMixture(3, covariance_type="full", means_init=start, tol=tol, max_iter=200).fit(X)
+        fits.append((fit, origin, scale))
+    return fits
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shots", type=int, default=100_000, help="shots per state per qubit (default: 1e5)")
+    parser.add_argument("--qubits", type=int, default=8, help="qubits (default: 8)")
+    parser.add_argument("--leak", type=float, default=0.08, help="fraction of e/f shots decayed (default: 0.08)")
+    parser.add_argument("--tol", type=float, default=1e-6, help="EM tolerance (default: 1e-6)")
+    parser.add_argument("--fit-shots", type=int, default=20_000,
+                        help="shots per state the EM fits, 0 for all (default: 2e4)")
+    args = parser.parse_args()
+
+    I, Q, truth, true_centers = _shots(args.qubits, args.shots, args.leak)
+    print(f"{args.qubits} qubits x 3 states x {args.shots} shots, {args.leak:.0%} of e/f shots decayed")
+    print(f"{'method':<30} {'fit s':>8} {'classify s':>11} {'center err uV':>14} {'true-state %':>13}")
+
+    def report(name, fit_s, centers, classify):
+        states, classify_s = _timed(classify)
+        err = np.abs(centers - true_centers).max() * 1e6
+        print(f"{name:<30} {fit_s:>8.2f} {classify_s:>11.3f} {err:>14.1f} {100 * np.mean(states == truth):>13.2f}")
+
+    centers, fit_s = _timed(lambda: _vendored(I, Q))
+    report("vendored 1D fits + nearest", fit_s, centers, lambda: _nearest(I, Q, centers))
+
+    try:
+        fits, fit_s = _timed(lambda: _sklearn(I, Q, args.tol))
+    except ImportError:
+        print(f"{'sklearn GaussianMixture loop':<30} (scikit-learn not installed)")
+    else:
+        def sk_classify():
+            return np.stack([f.predict((np.stack([I[q].ravel(), Q[q].ravel()], axis=-1) - o) / s).reshape(I.shape[1:])
+                             for q, (f, o, s) in enumerate(fits)])
+
+        centers = np.stack([f.means_ * s + o for f, o, s in fits])
+        report("sklearn GaussianMixture loop", fit_s, centers, sk_classify)
+
+    fit, fit_s = _timed(lambda: fit_mixture(I, Q, tol=args.tol, max_fit_shots=args.fit_shots or None))
+    report(f"batched EM ({fit.n_iter} iterations)", fit_s, fit.means, lambda: fit.classify(I, Q))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
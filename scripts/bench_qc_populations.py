@@ -0,0 +1,80 @@
+"""Time the joint multi-qubit populations
+(``customized.node._qc_populations.joint_state_populations``) against the
+one-mask-per-bitstring computation it replaced — synthetic per-shot states, no
+hardware needed.
+
+    python scripts/bench_qc_populations.py
+    python scripts/bench_qc_populations.py --qubits 6 --shots 20000 --rounds 200
+
+Draws random discriminated states over (qubit, shot, round), computes the
+``2**qubits`` joint populations both ways and checks they are identical, then
+times the readout-error mitigation (tensor-product inverse of per-qubit
+confusion matrices) next to the explicit ``2**n x 2**n`` inverse.
+
+Needs numpy and xarray only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import sys
+import time
+from functools import reduce
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+from customized.node._qc_populations import joint_state_populations, mitigate_readout  # noqa: E402
+
+
+def _masks(state: xr.DataArray) -> xr.DataArray:
+    n = state.sizes["qubit"]
+    weights = xr.DataArray(2 ** np.arange(n)[::-1], coords={"qubit": state["qubit"]}, dims="qubit")
+    codes = ((state >= 1).astype(np.int64) * weights).sum("qubit")
+    labels = ["".join(bits) for bits in itertools.product("01", repeat=n)]
+    return xr.concat([(codes == v).mean("shot") for v in range(2**n)], dim="joint_state").assign_coords(
+        joint_state=labels
+    )
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qubits", type=int, default=6, help="measured qubits (default: 6)")
+    parser.add_argument("--shots", type=int, default=20_000, help="shots per round (default: 2e4)")
+    parser.add_argument("--rounds", type=int, default=200, help="rounds (default: 200)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    state = xr.DataArray(
+        rng.integers(0, 2, (args.qubits, args.shots, args.rounds)).astype(np.int8),
+        dims=("qubit", "shot", "round"),
+        coords={"qubit": [f"q{i + 1}" for i in range(args.qubits)], "round": np.arange(args.rounds)},
+    )
+    print(f"{args.qubits} qubits x {args.shots} shots x {args.rounds} rounds -> {2**args.qubits} joint states")
+    old, old_s = _timed(lambda: _masks(state))
+    new, new_s = _timed(lambda: joint_state_populations(state))
+    identical = old.identical(new)
+    print(f"{'populations: mask per bitstring':<36} {old_s:>8.3f} s")
+    print(f"{'populations: one bincount':<36} {new_s:>8.3f} s  ({old_s / new_s:.0f}x, identical: {identical})")
+
+    confusion = [np.array([[0.95, 0.05], [0.08, 0.92]])] * args.qubits
+    full, full_s = _timed(lambda: np.linalg.solve(reduce(np.kron, confusion).T, new.values))
+    mitigated, tensor_s = _timed(lambda: mitigate_readout(new, confusion))
+    agree = np.allclose(full, mitigated.values)
+    print(f"{'mitigation: 2^n x 2^n solve':<36} {full_s:>8.4f} s")
+    print(f"{'mitigation: per-qubit inverses':<36} {tensor_s:>8.4f} s  (agree: {agree})")
+    return 0 if identical and agree else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
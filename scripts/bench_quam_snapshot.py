@@ -0,0 +1,75 @@
+"""Time ``Quam.load()`` from JSON against the snapshot cache on a REAL QUAM
+state — no hardware needed.
+
+    python scripts/bench_quam_snapshot.py D:\\qpu_data\\SQ_demo\\QM_OPX1000_config
+    python scripts/bench_quam_snapshot.py <state_dir> --repeat 10
+
+Times the cold load (``LCHQM_QUAM_SNAPSHOT=0``: parse + instantiate + validate)
+and the snapshot load of the same state, and checks the snapshot-loaded tree
+serialises identically. Snapshots go to a throwaway folder; the state is only
+read.
+
+Needs the QM environment (lab: ``conda activate LCHQM_test``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("state_dir", help="folder holding state.json + wiring.json")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per case (default: 5)")
+    args = parser.parse_args()
+
+    try:
+        from quam_config import Quam
+    except ModuleNotFoundError as err:
+        raise SystemExit(
+            f"missing package: {err.name}\n"
+            "This benchmark needs the QM stack (quam/qm + this repo installed). "
+            "Run it in the lab's QM environment:  conda activate LCHQM_test"
+        )
+    from customized import quam_snapshot
+
+    with tempfile.TemporaryDirectory(prefix="quam_snapshot_bench_") as folder:
+        os.environ["LCHQM_QUAM_SNAPSHOT"] = "0"
+        reference = Quam.load(args.state_dir)
+        cold_ms = _median_ms(lambda: Quam.load(args.state_dir), args.repeat)
+
+        os.environ["LCHQM_QUAM_SNAPSHOT"] = folder
+        Quam.load(args.state_dir)  # writes the snapshot
+        snapshot_ms = _median_ms(lambda: Quam.load(args.state_dir), args.repeat)
+        hit = quam_snapshot.last_load["source"] == "snapshot"
+        consistent = Quam.load(args.state_dir).to_dict() == reference.to_dict()
+        size_kb = sum(p.stat().st_size for p in Path(folder).glob("*.pkl")) / 1024
+
+    print(f"loaded QUAM | {len(reference.qubits)} qubits | {len(reference.qubit_pairs)} pairs")
+    print(f"cold JSON load       : {cold_ms:8.2f} ms")
+    print(f"snapshot load        : {snapshot_ms:8.2f} ms  ({cold_ms / snapshot_ms:.0f}x)")
+    print(f"  snapshot size      : {size_kb:8.1f} kB")
+    print(f"  served by snapshot : {hit}")
+    print(f"  matches JSON load  : {consistent}")
+    return 0 if hit and consistent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Time raw-result storage: the old contiguous, uncompressed ``ds_raw.h5``
+against the chunked, compressed layout of ``customized.result_storage`` — on a
+synthetic per-shot dataset, no hardware needed.
+
+    python scripts/bench_result_storage.py
+    python scripts/bench_result_storage.py --size-gb 0.5 --dir D:\\scratch
+
+Builds ``--size-gb`` of per-shot data — I/Q over (qubit, shot_idx, meas_idx)
+on a fixed-point grid like the OPX's demodulation, plus int8 states — writes
+it once per layout, and reports file size, write time, a full eager
+``load_xarray_h5`` and the read of ONE qubit's I through the lazy loader,
+dask-backed (the default) and plain lazy indexing (``chunks=None``).
+The files are written to a temporary folder (or ``--dir``) and deleted.
+The OS page cache is warm for every read: the files were just written.
+
+Needs h5netcdf (and dask for the lazy reads), as in the lab's QM environment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+N_QUBITS = 8
+N_MEAS = 2
+#: bytes per (qubit, shot): I and Q float64 plus one int8 state, per measurement
+SHOT_BYTES = N_MEAS * (8 + 8 + 1)
+
+
+def _dataset(size_gb: float, seed: int = 0) -> xr.Dataset:
+    n_shots = int(size_gb * 1e9 / (N_QUBITS * SHOT_BYTES))
+    rng = np.random.default_rng(seed)
+    shape = (N_QUBITS, n_shots, N_MEAS)
+    state = rng.integers(0, 2, shape, dtype=np.int8)
+    grid = 2.0 ** -18  # a fixed-point demodulation step
+
+    def quadrature(offset):
+        values = rng.standard_normal(shape)
+        values *= 2e-4
+        values += offset * state
+        return np.round(values / grid, out=values) * grid
+
+    dims = ("qubit", "shot_idx", "meas_idx")
+    return xr.Dataset(
+        {"I": (dims, quadrature(6e-4)), "Q": (dims, quadrature(-3e-4)), "state": (dims, state)},
+        coords={"qubit": [f"q{i + 1}" for i in range(N_QUBITS)], "shot_idx": np.arange(n_shots),
+                "meas_idx": np.arange(N_MEAS)},
+    )
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-gb", type=float, default=2.0, help="dataset size in GB (default: 2)")
+    parser.add_argument("--dir", help="where the files are written (default: a temporary folder)")
+    parser.add_argument("--qubit", default="q3", help="the qubit read back (default: q3)")
+    args = parser.parse_args()
+
+    try:
+        import h5netcdf  # noqa: F401
+    except ModuleNotFoundError:
+        raise SystemExit("This benchmark needs h5netcdf (lab: conda activate LCHQM_test)")
+    from customized.read_data import load_xarray_h5
+    from customized.result_storage import save_xarray_h5
+
+    dataset, build_s = _timed(lambda: _dataset(args.size_gb))
+    print(f"synthetic per-shot dataset | {dataset.nbytes / 1e9:.2f} GB | {dict(dataset.sizes)} | "
+          f"built in {build_s:.1f} s")
+    expected = dataset["I"].sel(qubit=args.qubit).values
+
+    layouts = {
+        "contiguous (old)": lambda path: dataset.to_netcdf(path, engine="h5netcdf"),
+        "chunked zlib-1": lambda path: save_xarray_h5(dataset, path),
+        "chunked lzf": lambda path: save_xarray_h5(dataset, path, compression="lzf"),
+    }
+    with tempfile.TemporaryDirectory(prefix="result_storage_bench_", dir=args.dir) as folder:
+        paths, write_s = {}, {}
+        for i, (name, write) in enumerate(layouts.items()):
+            paths[name] = str(Path(folder) / f"ds_raw_{i}.h5")
+            _, write_s[name] = _timed(lambda: write(paths[name]))
+        del dataset  # the reads below must not compete with it for memory
+
+        print(f"{'layout':<18} {'size MB':>8} {'write s':>8} {'eager load s':>13} "
+              f"{'1 qubit, dask s':>16} {'1 qubit, no dask s':>19}")
+        consistent = True
+        for name, path in paths.items():
+            size_mb = Path(path).stat().st_size / 1e6
+            _, eager_s = _timed(lambda: load_xarray_h5(path).close())
+            lazy_s = {}
+            for chunks in ("disk", None):
+                def one_qubit():
+                    with load_xarray_h5(path, load_into_memory=False, chunks=chunks) as lazy:
+                        return lazy["I"].sel(qubit=args.qubit).values
+
+                values, lazy_s[chunks] = _timed(one_qubit)
+                consistent &= bool(np.array_equal(values, expected))
+            print(f"{name:<18} {size_mb:>8.0f} {write_s[name]:>8.2f} {eager_s:>13.2f} "
+                  f"{lazy_s['disk']:>16.3f} {lazy_s[None]:>19.3f}")
+    print(f"single-qubit reads match the data: {consistent}")
+    return 0 if consistent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Time the run catalog (``customized.run_index``) on a synthetic data root
+laid out like qualibrate's — no hardware or real data needed.
+
+    python scripts/bench_run_index.py
+    python scripts/bench_run_index.py --runs 50000 --dir D:\\scratch
+
+Writes ``--runs`` run folders (``node.json`` / ``data.json`` / an empty
+``ds_raw.h5``) over ~400 date folders, then reports: the first full scan, a
+refresh with nothing new, a refresh after one more save, and the queries —
+against finding the same run by walking the folders as before.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+NODES = ["LCH_T1_spectrum", "LCH_Ramsey", "LCH_power_rabi", "LCH_readout_fidelity", "LCH_qubit_spectroscopy"]
+QUBITS = [f"q{i}" for i in range(1, 9)]
+
+
+def _save_run(root: Path, run_id: int, when: datetime) -> None:
+    name = NODES[run_id % len(NODES)]
+    folder = root / when.strftime("%Y-%m-%d") / f"#{run_id}_{name}_{when:%H%M%S}"
+    folder.mkdir(parents=True, exist_ok=True)
+    outcomes = {q: ("failed" if (run_id + i) % 7 == 0 else "successful") for i, q in enumerate(QUBITS)}
+    node = {"id": run_id, "created_at": when.astimezone().isoformat(),
+            "metadata": {"name": name, "status": "finished"},
+            "data": {"parameters": {"model": {"qubits": QUBITS}}, "outcomes": outcomes}}
+    fits = {q: {"T1": 20e-6 + 1e-9 * run_id, "success": True} for q in QUBITS}
+    (folder / "node.json").write_text(json.dumps(node))
+    (folder / "data.json").write_text(json.dumps({"fit_results": fits}))
+    (folder / "ds_raw.h5").touch()
+
+
+def _walk_for(root: Path, run_id: int):
+    """The old way: list every date folder until `#<id>_` turns up."""
+    for date in sorted(root.iterdir(), reverse=True):
+        if date.is_dir():
+            for run in os.scandir(date):
+                if run.name.startswith(f"#{run_id}_"):
+                    return Path(run.path)
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20_000, help="number of runs (default: 20000)")
+    parser.add_argument("--dir", help="where the data root is made (default: a temporary folder)")
+    args = parser.parse_args()
+
+    from customized.run_index import RunIndex
+
+    with tempfile.TemporaryDirectory(prefix="run_index_bench_", dir=args.dir) as folder:
+        root = Path(folder)
+        start = datetime.now().replace(microsecond=0) - timedelta(days=400)
+        step = timedelta(days=400) / args.runs
+        _, write_s = _timed(lambda: [_save_run(root, i, start + i * step) for i in range(1, args.runs + 1)])
+        print(f"{args.runs} synthetic runs over {len(list(root.iterdir()))} date folders, written in {write_s:.1f} s")
+
+        with RunIndex(root) as index:
+            report = [
+                ("first full scan", _timed(index.refresh)[1]),
+                ("refresh, nothing new", _timed(index.refresh)[1]),
+            ]
+            _save_run(root, args.runs + 1, datetime.now().replace(microsecond=0))
+            report.append(("refresh after one save", _timed(index.refresh)[1]))
+            report += [
+                ("latest successful T1, q3, last week",
+                 _timed(lambda: index.latest("*T1*", target="q3", outcome="successful",
+                                             since=timedelta(days=7)))[1]),
+                ("get(id)", _timed(lambda: index.get(args.runs // 3))[1]),
+                ("T1 history of q3 (all runs)", _timed(lambda: index.fit_history("LCH_T1_spectrum", "q3", "T1"))[1]),
+                ("walk the folders for one id (old)", _timed(lambda: _walk_for(root, args.runs // 3))[1]),
+            ]
+            found = index.get(args.runs // 3)
+            consistent = found is not None and found.path == _walk_for(root, args.runs // 3)
+
+    for what, seconds in report:
+        print(f"{what:<38} {seconds * 1e3:>10.2f} ms")
+    print(f"index and folder walk agree: {consistent}")
+    return 0 if consistent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Time the single-shot raw-dataset normalization
+(``customized.node._single_shot.unwrap_values``) against the
+``xr.apply_ufunc(extract_value, vectorize=True)`` preamble of the IQ-blob
+analyses — synthetic shots, no hardware needed.
+
+    python scripts/bench_single_shot.py
+    python scripts/bench_single_shot.py --shots 100000 --qubits 8
+
+Builds the six variables of an g/e/f IQ-blob run (``Ig`` ... ``Qf``) over
+(qubit, n_runs) in three layouts — plain floats (what the fetch usually
+returns), an object array of ``(value, timestamp)`` tuples and a structured
+array — and times both paths on each. Checks the values agree.
+
+Needs numpy and xarray only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root for `customized`
+
+from customized.node._single_shot import unwrap_values  # noqa: E402
+
+VARIABLES = ("Ig", "Qg", "Ie", "Qe", "If", "Qf")
+
+
+def _old(ds: xr.Dataset) -> xr.Dataset:
+    def extract_value(element):
+        if isinstance(element, tuple):
+            return element[0]
+        return element
+
+    return xr.apply_ufunc(extract_value, ds, vectorize=True, dask="parallelized", output_dtypes=[float])
+
+
+def _datasets(n_qubits: int, n_shots: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 1e-3, (len(VARIABLES), n_qubits, n_shots))
+    dims = ("qubit", "n_runs")
+    coords = {"qubit": [f"q{i + 1}" for i in range(n_qubits)], "n_runs": np.arange(n_shots)}
+
+    def tuples(v):
+        out = np.empty(v.shape, dtype=object)
+        out.reshape(-1)[:] = list(zip(v.reshape(-1).tolist(), range(v.size)))
+        return out
+
+    def structured(v):
+        out = np.zeros(v.shape, dtype=[("value", float), ("timestamp", np.int64)])
+        out["value"] = v
+        return out
+
+    layouts = {"float": lambda v: v, "tuple objects": tuples, "structured": structured}
+    return values, {
+        name: xr.Dataset({var: (dims, make(v)) for var, v in zip(VARIABLES, values)}, coords=coords)
+        for name, make in layouts.items()
+    }
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shots", type=int, default=100_000, help="shots per qubit (default: 1e5)")
+    parser.add_argument("--qubits", type=int, default=8, help="qubits (default: 8)")
+    args = parser.parse_args()
+
+    values, datasets = _datasets(args.qubits, args.shots)
+    print(f"{len(VARIABLES)} variables x {args.qubits} qubits x {args.shots} shots")
+    print(f"{'layout':<15} {'extract_value s':>16} {'unwrap_values s':>16} {'speed-up':>9}")
+    consistent = True
+    for name, ds in datasets.items():
+        old, old_s = (None, float("nan")) if name == "structured" else _timed(lambda: _old(ds))
+        new, new_s = _timed(lambda: unwrap_values(ds))
+        for i, var in enumerate(VARIABLES):
+            consistent &= bool(np.array_equal(new[var].values, values[i]))
+            if old is not None:
+                consistent &= bool(np.array_equal(old[var].values, values[i]))
+        note = "  (extract_value cannot unwrap a structured array)" if old is None else ""
+        print(f"{name:<15} {old_s:>16.3f} {new_s:>16.4f} {old_s / new_s:>8.0f}x{note}")
+    print(f"values agree: {consistent}")
+    return 0 if consistent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -52,11 +52,12 @@ def main() -> int:
     machine = Quam.load(str(work))
     print(f"[1/5] loaded QUAM | qubits: {list(machine.qubits)}")
 
-    import customized.scqo.experiments  # noqa: F401
+    from customized.scqo.experiments import load_all
     from customized.scqo.backend import QMDeviceModel
     from scqo import Session
     from scqo.testing import SimulatedBackend
 
+    load_all()  # the simulated backend never resolves the lazy QM shells itself
     dm = QMDeviceModel(machine)
     snap = dm.snapshot()
     for name, fields in snap.items():
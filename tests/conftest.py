@@ -22,12 +22,18 @@ The stub deliberately names its QUAM pair after the coupler (``coupler_q1_q2``,
 which is what quam_builder does) while the roster calls the composite ``q1_q2``
 and its coupler mode ``q1_q2_c``: the name join is therefore FALSE on all three
 counts, and every resolution has to go through the roster's membership/roles.
+
+The stand-in QOP at the bottom (:class:`FakeMachine` and what it opens) serves
+the pooled fetch-path tests: session pool, early stop, repeat and batch
+queueing, chunked and live fetches.
 """
 
 from __future__ import annotations
 
+import itertools
 from types import SimpleNamespace
 
+import numpy as np
 import pytest
 
 #: The fixture chip in the greenfield schema: ONE multiplexed feedline (the
@@ -248,3 +254,204 @@ def make_experiment(cls, backend, roster, params):
     exp = cls(backend, params)
     exp.device = recording_device(backend, roster)
     return exp
+
+
+# ----------------------------------------------------------- stand-in QOP
+# The manager / QM / job-queue / result-handle surface that the pooled fetch
+# paths (customized.probes._session, _lib, _stream, _live) touch, without qm.
+# Every call is recorded on the objects so the tests can assert on it.
+
+class FakeHandle:
+    """One result stream: `entries` indexed by ``fetch``, ``available`` of
+    them released so far."""
+
+    def __init__(self, entries):
+        self.entries = np.asarray(entries)
+        self.available = 0
+
+    def count_so_far(self):
+        return self.available
+
+    def fetch(self, item, flat_struct=False):
+        assert flat_struct
+        return self.entries[item]
+
+    def fetch_all(self):
+        return self.entries[: self.available]
+
+
+class FakeResultHandles:
+    """Streams in `live` grow by one entry per ``is_processing()`` poll; those
+    in `at_end` only exist (whole) once the program has ended."""
+
+    def __init__(self, live, at_end=()):
+        self.streams = {name: FakeHandle(entries) for name, entries in live.items()}
+        self.at_end = {name: FakeHandle(entries) for name, entries in dict(at_end).items()}
+        self.polls = 0
+
+    def keys(self):
+        return [*self.streams, *self.at_end]
+
+    def get(self, name):
+        return self.streams.get(name) or self.at_end.get(name)
+
+    def iter_all(self):
+        return iter(self.keys())
+
+    def is_processing(self):
+        self.polls += 1
+        running = False
+        for handle in self.streams.values():
+            if handle.available < len(handle.entries):
+                handle.available += 1
+                running = True
+        return running
+
+    def wait_for_all_values(self):
+        for handle in (*self.streams.values(), *self.at_end.values()):
+            handle.available = len(handle.entries)
+
+
+class FakeJob:
+    """A queued (or executed) job; it starts when the queue reaches it."""
+
+    def __init__(self, qm, program_id, index):
+        self.qm, self.program_id, self.index = qm, program_id, index
+        self.result_handles = qm.results
+        self.cancelled = self.halted = False
+
+    def wait_for_execution(self):
+        self.qm.started.append(self.program_id)
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def halt(self):
+        self.halted = True
+
+
+class FakeQueue:
+    def __init__(self, qm):
+        self.qm = qm
+
+    def add_compiled(self, program_id):
+        return self.qm.submit(program_id)
+
+
+class FakeQM:
+    """Programs compile to ``"<prog>-id"``; `compiled`, `queued` (the jobs) and
+    `started` (program ids, in start order) record the calls. Every job
+    carries the QM's `results`."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, manager, config, results=None):
+        self.id = f"qm-{next(FakeQM._ids)}"
+        self.config, self.results = config, results
+        self.compiled, self.queued, self.started = [], [], []
+        self.queue = FakeQueue(self)
+        self.closed = False
+        self._manager = manager
+
+    @property
+    def job(self):
+        """The job submitted last."""
+        return self.queued[-1]
+
+    def compile(self, prog):
+        self.compiled.append(prog)
+        return f"{prog}-id"
+
+    def submit(self, program_id):
+        job = FakeJob(self, program_id, len(self.queued))
+        self.queued.append(job)
+        return job
+
+    def execute(self, prog):
+        return self.submit(prog).wait_for_execution()
+
+    def close(self):
+        self.closed = True
+        self._manager.open_ids.discard(self.id)
+
+
+class FakeManager:
+    """Opens a new `qm_class` per ``open_qm`` (all in `opened`); reports the
+    QOP busy the first `busy_times` times."""
+
+    def __init__(self, busy_times: int = 0, qm_class=FakeQM, results=None):
+        self.opened: list = []
+        self.open_ids: set = set()
+        self._busy = busy_times
+        self._qm_class, self._results = qm_class, results
+
+    @property
+    def qm(self):
+        """The QM opened last."""
+        return self.opened[-1]
+
+    def open_qm(self, config, close_other_machines=False):
+        assert close_other_machines is False  # never kick another user off
+        if self._busy:
+            self._busy -= 1
+            raise RuntimeError("Resources already locked by another QM")
+        qm = self._qm_class(self, config, results=self._results)
+        self.opened.append(qm)
+        self.open_ids.add(qm.id)
+        return qm
+
+    def list_open_qms(self):
+        return list(self.open_ids)
+
+
+class FakeMachine:
+    """A QUAM machine as the fetch paths see it: its QOP address, ``connect()``
+    (counted) and the QUA config."""
+
+    def __init__(self, host="10.0.0.1", cluster="lab", manager=None, **manager_kwargs):
+        self.network = {"host": host, "cluster_name": cluster}
+        self.manager = manager or FakeManager(**manager_kwargs)
+        self.connects = 0
+
+    def connect(self):
+        self.connects += 1
+        return self.manager
+
+    def generate_config(self):
+        return {"version": 1}
+
+
+class FakeProgram(str):
+    """A program name that also serializes like a QUA ``Program`` (only its
+    protobuf is read), so the pool's compiled-program cache can key it."""
+
+    @property
+    def qua_program(self):
+        return self
+
+    def SerializeToString(self, deterministic=False):
+        assert deterministic
+        return self.encode()
+
+
+@pytest.fixture()
+def fake_pool():
+    """A private session pool with no background reaper."""
+    from customized.probes._session import SessionPool
+
+    pool = SessionPool(reap_in_background=False)
+    yield pool
+    pool.close_all()
+
+
+@pytest.fixture()
+def probe_lib(fake_pool, monkeypatch):
+    """`customized.probes._lib` on `fake_pool`, without progress output. The
+    fetcher (``XarrayDataFetcher``) is each test module's to stand in."""
+    pytest.importorskip("qualibration_libs")
+    from customized.probes import _lib
+
+    monkeypatch.setattr(_lib, "session_pool", lambda: fake_pool)
+    monkeypatch.setattr(_lib, "progress_counter", lambda *a, **k: None)
+    return _lib
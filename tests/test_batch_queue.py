@@ -0,0 +1,85 @@
+"""Multi-experiment queue batching: `customized.probes._lib.acquire_batch`
+against a stand-in QM — one open QM, every program compiled and queued in
+order, results demultiplexed per program, an early close cancels the rest."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from conftest import FakeMachine, FakeProgram, FakeQM, FakeQueue
+
+
+class FakeFetcher(dict):
+    t_start = 0.0
+
+    def __init__(self, job, sweep_axes):
+        super().__init__()
+        self.job, self.sweep_axes = job, sweep_axes
+
+    def __iter__(self):
+        yield xr.Dataset({"I": ("x", np.zeros(len(self.sweep_axes["x"])))},
+                         attrs={"program_id": self.job.program_id})
+
+
+@pytest.fixture()
+def lib(probe_lib, monkeypatch):
+    monkeypatch.setattr(probe_lib, "XarrayDataFetcher", FakeFetcher)
+    return probe_lib
+
+
+def _programs(n):
+    return [(FakeProgram(f"p{i}"), {"x": np.arange(i + 1)}) for i in range(n)]
+
+
+def test_every_program_runs_through_one_qm_in_order(lib):
+    machine = FakeMachine()
+    datasets = list(lib.acquire_batch(machine, _programs(4), timeout=5))
+    qm = machine.manager.qm
+    assert len(machine.manager.opened) == 1
+    assert qm.compiled == ["p0", "p1", "p2", "p3"]
+    assert qm.started == ["p0-id", "p1-id", "p2-id", "p3-id"]
+    assert [ds.attrs["batch_index"] for ds in datasets] == [0, 1, 2, 3]
+    # demultiplexed: each dataset carries its own program's sweep
+    assert [ds.sizes["x"] for ds in datasets] == [1, 2, 3, 4]
+    assert [ds.attrs["program_id"] for ds in datasets] == qm.started
+
+
+def test_queue_stays_ahead_and_early_close_cancels_the_rest(lib):
+    machine = FakeMachine()
+    datasets = lib.acquire_batch(machine, _programs(5), timeout=5, queue_depth=3)
+    next(datasets)
+    qm = machine.manager.qm
+    assert qm.compiled == ["p0", "p1", "p2"]  # the next two already compiled and queued
+    datasets.close()
+    assert [job.cancelled for job in qm.queued] == [False, True, True]
+    assert qm.closed  # p1 may already be running: the QM is not handed on
+
+
+def test_a_batch_closed_after_its_last_dataset_leaves_the_qm_to_the_next(lib):
+    machine = FakeMachine()
+    first = lib.acquire_batch(machine, _programs(2), timeout=5)
+    for _ in range(2):
+        next(first)
+    first.close()  # what a caller taking exactly len(programs) items does
+    qm = machine.manager.qm
+    assert not qm.closed
+    list(lib.acquire_batch(machine, _programs(2), timeout=5))
+    assert len(machine.manager.opened) == 1
+    assert qm.compiled == ["p0", "p1"]  # the second batch hit the compiled-program cache
+    assert lib.session_pool().compile_hits == 2
+
+
+def test_programs_go_through_add_to_queue_where_the_qm_has_it(lib):
+    class CurrentQM(FakeQM):  # qm-qua >= 1.2, where queue.add_compiled is deprecated
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.queue = None
+
+        def add_to_queue(self, program_id):
+            return FakeQueue(self).add_compiled(program_id)
+
+    machine = FakeMachine(qm_class=CurrentQM)
+    list(lib.acquire_batch(machine, _programs(2), timeout=5))
+    assert machine.manager.qm.started == ["p0-id", "p1-id"]
@@ -0,0 +1,103 @@
+"""Batched Levenberg–Marquardt fits (`customized.node._batched_fit`) against
+per-trace `scipy.optimize.curve_fit`."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+from scipy.optimize import curve_fit
+
+from customized.node._batched_fit import (
+    DECAY_EXP,
+    OSCILLATION_DECAY_EXP,
+    decay_exp,
+    fit_decay_exp,
+    fit_oscillation_decay_exp,
+    fit_traces,
+    levenberg_marquardt,
+    oscillation_decay_exp,
+)
+
+
+def _t1_traces(rng, n=24):
+    t = np.linspace(16, 40_000, 120)
+    tau = rng.uniform(3e3, 2e4, n)
+    y = rng.uniform(0.5, 0.9, (n, 1)) * np.exp(-t / tau[:, None]) + rng.uniform(0, 0.1, (n, 1))
+    return t, y + rng.normal(0, 0.02, y.shape), tau
+
+
+def _ramsey_traces(rng, n=24):
+    t = np.linspace(0, 4000, 200)
+    f, decay, phi = rng.uniform(1e-3, 5e-3, n), rng.uniform(2e-4, 2e-3, n), rng.uniform(-np.pi, np.pi, n)
+    y = oscillation_decay_exp(t, 0.4, f[:, None], phi[:, None], 0.5, decay[:, None])
+    return t, y + rng.normal(0, 0.03, y.shape), f, decay
+
+
+@pytest.mark.parametrize("model", [DECAY_EXP, OSCILLATION_DECAY_EXP], ids=lambda m: m.name)
+def test_analytic_jacobian_matches_finite_differences(model):
+    t = np.linspace(0, 4000, 50)
+    params = np.array([[0.4, 2e-3, 0.3, 0.5, 5e-4] if model is OSCILLATION_DECAY_EXP else [0.7, 0.1, -2e-4]])
+    steps = 1e-6 * np.maximum(np.abs(params[0]), 1e-3)
+    numeric = np.stack(
+        [(model(t, params + np.eye(len(steps))[i] * h) - model(t, params - np.eye(len(steps))[i] * h))[0] / (2 * h)
+         for i, h in enumerate(steps)],
+        axis=-1,
+    )
+    np.testing.assert_allclose(model.jacobian(t, params)[0].T, numeric, rtol=1e-5, atol=1e-8)
+
+
+def test_decay_fits_reach_curve_fit_and_its_covariance():
+    t, y, tau = _t1_traces(np.random.default_rng(0))
+    fit = levenberg_marquardt(DECAY_EXP, t, y)
+    assert fit.success.all()
+    np.testing.assert_allclose(-1 / fit.params[:, 2], tau, rtol=0.15)
+    for i in range(len(y)):
+        popt, pcov = curve_fit(decay_exp, t, y[i], p0=[y[i, 0] - y[i, -1], y[i, -1], -3 / np.ptp(t)])
+        assert fit.cost[i] <= np.sum((y[i] - decay_exp(t, *popt)) ** 2) * (1 + 1e-9)
+        np.testing.assert_allclose(fit.params[i], popt, rtol=1e-3)
+        np.testing.assert_allclose(fit.covariance[i], pcov, rtol=1e-2, atol=1e-3 * np.abs(pcov).max())
+
+
+def test_oscillation_starts_need_no_guess():
+    t, y, f, decay = _ramsey_traces(np.random.default_rng(1))
+    fit = levenberg_marquardt(OSCILLATION_DECAY_EXP, t, y)
+    assert fit.success.all()
+    np.testing.assert_allclose(fit.params[:, 1], f, rtol=0.05)
+    np.testing.assert_allclose(fit.params[:, 4], decay, rtol=0.3)
+    for i in range(len(y)):  # curve_fit from the batched optimum does not move
+        popt, _ = curve_fit(oscillation_decay_exp, t, y[i], p0=fit.params[i])
+        np.testing.assert_allclose(oscillation_decay_exp(t, *popt), OSCILLATION_DECAY_EXP(t, fit.params[i]), atol=1e-6)
+
+
+def test_fit_traces_keeps_the_batch_dims_and_flags_bad_traces():
+    t, y, _, _ = _ramsey_traces(np.random.default_rng(2), n=6)
+    y[4, 10] = np.nan
+    da = xr.DataArray(
+        y.reshape(2, 3, -1),
+        dims=("qubit", "flux", "idle_time"),
+        coords={"qubit": ["q1", "q2"], "flux": [0.0, 0.1, 0.2], "idle_time": t},
+    )
+    fit = fit_traces(da, "idle_time", OSCILLATION_DECAY_EXP)
+    assert fit.params.dims == ("qubit", "flux", "fit_vals")
+    assert fit.covariance.dims == ("qubit", "flux", "fit_vals", "fit_vals_")
+    np.testing.assert_array_equal(fit.success.values.ravel(), [True, True, True, True, False, True])
+
+    flat = fit_oscillation_decay_exp(da, "idle_time")
+    assert list(flat.fit_vals.values[:6]) == ["a", "f", "phi", "offset", "decay", "a_a"]
+    assert flat.sizes["fit_vals"] == 5 + 25 and str(flat.fit_vals.values[-1]) == "decay_decay"
+    assert np.isnan(flat.sel(qubit="q2", flux=0.1)).all()
+    np.testing.assert_allclose(flat.sel(fit_vals="decay_decay").sel(qubit="q1", flux=0.2),
+                               fit.covariance.sel(qubit="q1", flux=0.2, fit_vals="decay", fit_vals_="decay"))
+
+    again = fit_traces(da, "idle_time", OSCILLATION_DECAY_EXP, p0=fit.params.fillna(0.0))
+    xr.testing.assert_allclose(again.params.where(fit.success), fit.params.where(fit.success), rtol=1e-6)
+
+
+def test_fit_decay_exp_is_the_vendored_layout():
+    t, y, _ = _t1_traces(np.random.default_rng(3), n=3)
+    da = xr.DataArray(y, dims=("qubit", "idle_time"), coords={"qubit": ["q1", "q2", "q3"], "idle_time": t})
+    flat = fit_decay_exp(da, "idle_time")
+    assert flat.dims == ("qubit", "fit_vals")
+    assert list(flat.fit_vals.values) == ["a", "offset", "decay", "a_a", "a_offset", "a_decay", "offset_a",
+                                          "offset_offset", "offset_decay", "decay_a", "decay_offset", "decay_decay"]
@@ -0,0 +1,76 @@
+"""Batched 2D chevron fit (`customized.node._chevron_fit`) on synthetic
+CZ / iSWAP chevrons."""
+
+from __future__ import annotations
+
+import numpy as np
+import xarray as xr
+from scipy.optimize import curve_fit
+
+from customized.node._chevron_fit import (
+    CHEVRON,
+    chevron_guess,
+    fit_chevron,
+    fit_chevron_cz,
+    rabi_chevron_model,
+)
+
+
+def _chevrons(rng, n_pairs=4, n_rows=60, n_cols=80, noise=0.05):
+    time = np.arange(n_cols) * 2e-9
+    J, f0 = rng.uniform(4e6, 12e6, n_pairs), rng.uniform(180e6, 220e6, n_pairs)
+    detuning = np.linspace(140e6, 260e6, n_rows) + rng.uniform(-5e6, 5e6, (n_pairs, 1))
+    a = rng.choice([-0.9, 0.9], n_pairs)
+    offset = np.where(a < 0, 0.95, 0.05)
+    clean = np.stack([
+        rabi_chevron_model(np.broadcast_arrays(detuning[p][:, None], time), J[p], f0[p], a[p], offset[p])
+        .reshape(n_rows, n_cols) for p in range(n_pairs)
+    ])
+    return detuning, time, clean + rng.normal(0, noise, clean.shape), np.stack([J, f0, a, offset], axis=-1)
+
+
+def test_analytic_jacobian_matches_finite_differences():
+    f, t = np.meshgrid(np.linspace(150e6, 250e6, 7), np.arange(9) * 4e-9)
+    x = np.stack([f.ravel(), t.ravel()])[:, None, :]
+    params = np.array([[8e6, 2e8, -0.8, 0.9]])
+    steps = 1e-6 * np.abs(params[0])
+    numeric = np.stack([(CHEVRON(x, params + np.eye(4)[i] * h) - CHEVRON(x, params - np.eye(4)[i] * h))[0] / (2 * h)
+                        for i, h in enumerate(steps)])
+    np.testing.assert_allclose(CHEVRON.jacobian(x, params)[0], numeric, rtol=1e-5, atol=1e-9)
+
+
+def test_the_map_seeds_j_and_f0():
+    detuning, time, data, truth = _chevrons(np.random.default_rng(0))
+    start = chevron_guess(detuning, time, data)
+    np.testing.assert_allclose(start[:, 0], truth[:, 0], rtol=0.1)
+    np.testing.assert_allclose(start[:, 1], truth[:, 1], atol=0.5e6)
+    np.testing.assert_array_equal(np.sign(start[:, 2]), np.sign(truth[:, 2]))
+
+
+def test_all_pairs_reach_the_curve_fit_optimum():
+    detuning, time, data, truth = _chevrons(np.random.default_rng(1))
+    fit = fit_chevron(detuning, time, data)
+    assert fit.success.all()
+    np.testing.assert_allclose(fit.params[:, :2], truth[:, :2], rtol=5e-3)
+    for p in range(len(data)):
+        ft = np.vstack([g.ravel() for g in np.broadcast_arrays(detuning[p][:, None], time)])
+        popt, _ = curve_fit(rabi_chevron_model, ft, data[p].ravel(), p0=truth[p])
+        assert fit.cost[p] <= np.sum((data[p].ravel() - rabi_chevron_model(ft, *popt)) ** 2) * (1 + 1e-9)
+
+    coarse = fit_chevron(detuning, time, data, decimate=4)
+    np.testing.assert_allclose(coarse.params, fit.params, rtol=1e-5)
+
+
+def test_fit_chevron_cz_keeps_the_vendored_layout():
+    detuning, time, data, truth = _chevrons(np.random.default_rng(2), n_pairs=3)
+    data[2, 5, 5] = np.nan
+    ds = xr.Dataset(
+        {"state_target": (("qubit_pair", "time", "amplitude"), data.transpose(0, 2, 1))},
+        coords={"qubit_pair": ["qA-qB", "qB-qC", "qC-qD"], "time": time * 1e9, "amplitude": np.arange(data.shape[1]),
+                "detuning": (("qubit_pair", "amplitude"), detuning)},
+    )
+    fit = fit_chevron_cz(ds, "qubit_pair")
+    assert fit.dims == ("qubit_pair", "fit_vals")
+    assert list(fit.fit_vals.values) == ["J", "f0", "a", "offset"]
+    np.testing.assert_allclose(fit.sel(fit_vals="J").values[:2], truth[:2, 0], rtol=5e-3)
+    assert np.isnan(fit.sel(qubit_pair="qC-qD")).all()
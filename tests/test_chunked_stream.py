@@ -0,0 +1,144 @@
+"""Chunked streaming fetch (`customized.probes._stream`) against stand-in result
+handles that grow between polls — no instrument.
+
+The stand-in job saves `buffer(chunk).save_all`-shaped blocks a few at a time;
+the sink must end up with exactly `num_shots` shots per qubit (the padded tail
+dropped), every partial dataset must be a consistent prefix, and the final one
+must equal what a single end-of-run fetch would have produced.
+"""
+
+from __future__ import annotations
+
+import gc
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from customized.probes import _stream
+
+from conftest import FakeMachine, FakeResultHandles
+
+NUM_SHOTS = 25
+CHUNK = 10
+
+
+def _machine(streams):
+    """A QOP whose job saves `streams` (``buffer(chunk).save_all`` blocks), one
+    more block per poll."""
+    return FakeMachine(results=FakeResultHandles(streams, at_end={"n": np.zeros(1)}))
+
+
+def _sweep_axes(num_qubits=2, meas=False):
+    axes = {
+        "qubit": xr.DataArray([f"q{i + 1}" for i in range(num_qubits)]),
+        "shot_idx": xr.DataArray(np.arange(1, NUM_SHOTS + 1)),
+    }
+    if meas:
+        axes["meas_idx"] = xr.DataArray(np.arange(2))
+    axes[_stream.CHUNK_SHOTS_AXIS] = CHUNK
+    return axes
+
+
+def _shots(seed, inner=()):
+    padded = _stream.padded_shots(NUM_SHOTS, CHUNK)
+    return np.random.default_rng(seed).integers(0, 2, size=(padded,) + inner).astype(np.int64)
+
+
+@pytest.fixture()
+def pool(fake_pool, monkeypatch):
+    monkeypatch.setattr(_stream, "session_pool", lambda: fake_pool)
+    monkeypatch.setattr(_stream, "progress_counter", lambda *a, **k: None)
+    return fake_pool
+
+
+def test_padding_and_default_chunking():
+    assert _stream.padded_shots(25, 10) == 30
+    assert _stream.padded_shots(30, 10) == 30
+    assert _stream.chunk_shots_for(1000) is None
+    assert _stream.chunk_shots_for(2_951_594) == _stream.DEFAULT_CHUNK_SHOTS
+    with pytest.raises(ValueError):
+        _stream.padded_shots(10, 0)
+
+
+def test_streamed_dataset_matches_a_single_fetch(pool, tmp_path):
+    truth = [_shots(1), _shots(2)]
+    streams = {f"state{i + 1}": truth[i].reshape(-1, CHUNK) for i in range(2)}
+    partials = list(_stream.iter_acquire_chunked(
+        _machine(streams), "prog", _sweep_axes(), timeout=5, sink_dir=tmp_path, poll_s=0))
+
+    sizes = [ds.sizes["shot_idx"] for ds in partials]
+    assert sizes == sorted(sizes) and sizes[-1] == NUM_SHOTS
+    assert sizes[0] < NUM_SHOTS  # the fit could start before the run ended
+    final = partials[-1]
+    assert final["state"].dims == ("qubit", "shot_idx")
+    np.testing.assert_array_equal(final["state"].values, np.stack([t[:NUM_SHOTS] for t in truth]))
+    np.testing.assert_array_equal(final["shot_idx"].values, np.arange(1, NUM_SHOTS + 1))
+    # the data lives on disk, reopenable without the run
+    on_disk = np.load(tmp_path / "state.npy", mmap_mode="r")
+    np.testing.assert_array_equal(on_disk, final["state"].values)
+
+
+class _OneQubitAtATime(FakeResultHandles):
+    """The non-multiplexed probes: a qubit's stream only grows once the one
+    before it has finished."""
+
+    def is_processing(self):
+        self.polls += 1
+        for handle in self.streams.values():
+            if handle.available < len(handle.entries):
+                handle.available += 1
+                return True
+        return False
+
+
+def test_a_finished_qubit_is_complete_before_the_next_one_starts(pool, tmp_path):
+    truth = [_shots(5), _shots(6)]
+    streams = {f"state{i + 1}": truth[i].reshape(-1, CHUNK) for i in range(2)}
+    machine = FakeMachine(results=_OneQubitAtATime(streams, at_end={"n": np.zeros(1)}))
+    seen = []
+    for ds in _stream.iter_acquire_chunked(machine, "prog", _sweep_axes(), timeout=5, sink_dir=tmp_path, poll_s=0):
+        done = ds.attrs["shots_done"]
+        seen.append(done)
+        # the views are live: check each partial while it is current
+        if done[0] == NUM_SHOTS and done[1] < NUM_SHOTS:
+            np.testing.assert_array_equal(ds["state"].values[0], truth[0][:NUM_SHOTS])
+            assert (ds["state"].values[1, done[1]:] == -1).all()
+    assert [NUM_SHOTS, 0] in seen  # the first qubit was complete before the second one started
+    assert seen[-1] == [NUM_SHOTS, NUM_SHOTS]
+
+
+def test_inner_measurement_axis_is_kept(pool, tmp_path):
+    truth = _shots(3, inner=(2,))
+    streams = {"I1": truth.reshape(-1, CHUNK, 2).astype(float),
+               "Q1": -truth.reshape(-1, CHUNK, 2).astype(float)}
+    final = _stream.acquire_chunked(
+        _machine(streams), "prog", _sweep_axes(num_qubits=1, meas=True),
+        timeout=5, sink_dir=tmp_path, poll_s=0)
+    assert final["I"].dims == ("qubit", "shot_idx", "meas_idx")
+    np.testing.assert_array_equal(final["I"].values[0], truth[:NUM_SHOTS])
+    np.testing.assert_array_equal(final["Q"].values[0], -truth[:NUM_SHOTS])
+
+
+def test_a_short_stream_is_an_error(pool, tmp_path):
+    streams = {"state1": _shots(4).reshape(-1, CHUNK)[:1]}  # program died after one chunk
+    with pytest.raises(RuntimeError, match="10 of 25 shots"):
+        _stream.acquire_chunked(_machine(streams), "prog", _sweep_axes(num_qubits=1),
+                                timeout=5, sink_dir=tmp_path, poll_s=0)
+
+
+def test_a_temporary_sink_goes_with_its_last_dataset():
+    axes = _sweep_axes(num_qubits=1)
+    sink = _stream.ChunkSink(None, axes)
+    sink.write("state", 0, 0, _shots(7).reshape(-1, CHUNK))
+    directory, ds = sink.directory, sink.dataset()
+    del sink
+    gc.collect()
+    assert (directory / "state.npy").exists()  # still viewed by the dataset
+    view = ds.isel(shot_idx=slice(0, 5))
+    del ds
+    gc.collect()
+    assert directory.exists()
+    del view
+    gc.collect()
+    assert not directory.exists()
@@ -0,0 +1,79 @@
+"""Opt-in compact dtypes (`customized.probes._compact`): which variables
+narrow, the chunked sink writing compact memmaps, and the analyses giving the
+same answers on float32 I/Q and int8 states as on the full-width data."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from customized.node._discriminator import two_state_discriminator
+from customized.node._qc_populations import joint_state_populations
+from customized.probes._compact import compact_dtypes
+from customized.probes._stream import ChunkSink
+
+
+def _per_shot(rng, n_qubits=2, n_shots=2000):
+    dims = ("qubit", "shot")
+    return xr.Dataset(
+        {
+            "I": (dims, rng.normal(0, 1e-3, (n_qubits, n_shots))),
+            "Q_target": (dims, rng.normal(0, 1e-3, (n_qubits, n_shots))),
+            "state": (dims, rng.integers(0, 2, (n_qubits, n_shots))),
+            "population": (("qubit",), rng.uniform(0, 1, n_qubits)),
+            "time_stamp": (dims, np.arange(n_qubits * n_shots, dtype=np.int64).reshape(n_qubits, n_shots)),
+        },
+        coords={"qubit": [f"q{i + 1}" for i in range(n_qubits)], "shot": np.arange(n_shots)},
+    )
+
+
+def test_only_iq_and_integer_states_narrow():
+    ds = _per_shot(np.random.default_rng(0))
+    compact = compact_dtypes(ds)
+    assert compact["I"].dtype == np.float32 and compact["Q_target"].dtype == np.float32
+    assert compact["state"].dtype == np.int8
+    assert compact["population"].dtype == np.float64  # an averaged state stays a float
+    assert compact["time_stamp"].dtype == np.int64
+    assert compact.attrs["compact_dtypes"]
+    assert compact["I"].nbytes * 2 == ds["I"].nbytes and compact["state"].nbytes * 8 == ds["state"].nbytes
+    np.testing.assert_array_equal(compact["state"], ds["state"])
+
+    again = compact_dtypes(compact)
+    assert np.shares_memory(again["I"].values, compact["I"].values)  # already compact: no copy
+
+
+def test_a_state_outside_int8_is_refused():
+    ds = xr.Dataset({"state": (("qubit",), np.array([0, 300]))})
+    with pytest.raises(ValueError, match="300"):
+        compact_dtypes(ds)
+
+
+def test_the_chunk_sink_writes_compact_memmaps(tmp_path):
+    axes = {"qubit": xr.DataArray(["q1"]), "shot_idx": xr.DataArray(np.arange(6))}
+    sink = ChunkSink(tmp_path, axes, compact=True)
+    sink.write("state", 0, 0, np.array([[0, 1, 1], [0, 0, 1]], dtype=np.int64))
+    sink.write("I", 0, 0, np.linspace(0, 1, 6).reshape(2, 3))
+    ds = sink.dataset()
+    assert ds["state"].dtype == np.int8 and ds["I"].dtype == np.float32
+    assert np.load(tmp_path / "state.npy", mmap_mode="r").dtype == np.int8
+    assert ds.attrs["compact_dtypes"]
+    np.testing.assert_array_equal(ds["state"].values[0], [0, 1, 1, 0, 0, 1])
+
+
+def test_discrimination_agrees_on_float32_iq():
+    rng = np.random.default_rng(3)
+    n = 20_000
+    g = rng.normal([[0.0], [1e-4]], 2e-4, (2, n)), rng.normal(0, 2e-4, (2, n))
+    e = rng.normal([[6e-4], [5e-4]], 2e-4, (2, n)), rng.normal(3e-4, 2e-4, (2, n))
+    full_angle, full = two_state_discriminator(g[0], g[1], e[0], e[1])
+    narrow = [x.astype(np.float32) for x in (*g, *e)]
+    compact_angle, compact = two_state_discriminator(*narrow)
+    np.testing.assert_allclose(compact_angle, full_angle, atol=1e-5)
+    np.testing.assert_allclose(compact.fidelity, full.fidelity, atol=1e-3)
+
+
+def test_joint_populations_are_identical_on_int8_states():
+    state = _per_shot(np.random.default_rng(4))["state"]
+    compact = compact_dtypes(state.to_dataset())["state"]
+    xr.testing.assert_identical(joint_state_populations(compact), joint_state_populations(state))
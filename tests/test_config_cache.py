@@ -0,0 +1,141 @@
+"""The incremental QUA-config cache (`customized.probes._config_cache`) on a tiny
+QUAM tree: three ports, three channels, two pulses each (one a reference).
+
+Every incremental result is checked against a fresh ``generate_config()`` —
+the cache is only worth having if it is indistinguishable from the full build.
+"""
+
+from __future__ import annotations
+
+import copy
+from dataclasses import field
+from typing import Dict
+
+import pytest
+
+pytest.importorskip("quam")
+
+from quam.components import SingleChannel, pulses
+from quam.components.ports import FEMPortsContainer
+from quam.core import QuamRoot, quam_dataclass
+
+from customized.probes import _config_cache
+from customized.probes._config_cache import ConfigCache, cached_config, resolve_config, snapshot_config
+from customized.probes._session import config_fingerprint
+
+
+@quam_dataclass
+class TinyRoot(QuamRoot):
+    ports: FEMPortsContainer = field(default_factory=FEMPortsContainer)
+    channels: Dict[str, SingleChannel] = field(default_factory=dict)
+
+
+@pytest.fixture()
+def machine():
+    root = TinyRoot()
+    for i in range(3):
+        port = root.ports.get_analog_output("con1", 1, i + 1, create=True)
+        channel = SingleChannel(id=f"ch{i}", opx_output=port.get_reference())
+        root.channels[f"ch{i}"] = channel
+        channel.operations["sq"] = pulses.SquarePulse(amplitude=0.1, length=100)
+        channel.operations["sq2"] = pulses.SquarePulse(amplitude="#../sq/amplitude", length=100)
+    return root
+
+
+def _matches_full_build(machine, config):
+    return config_fingerprint(config) == config_fingerprint(machine.generate_config())
+
+
+def test_first_call_is_a_full_build_and_second_a_hit(machine):
+    cache = ConfigCache()
+    config, fp = cache.get(machine)
+    assert cache.full_builds == 1 and cache.last_regenerated is None
+    assert _matches_full_build(machine, config)
+    config2, fp2 = cache.get(machine)
+    assert config2 is config and fp2 == fp
+    assert cache.hits == 1 and cache.last_regenerated == []
+
+
+def test_amplitude_change_regenerates_only_its_channel(machine):
+    cache = ConfigCache()
+    _, fp0 = cache.get(machine)
+    machine.channels["ch1"].operations["sq"].amplitude = 0.2  # sq2 follows by reference
+    config, fp = cache.get(machine)
+    assert fp != fp0
+    assert cache.last_regenerated == [("channels", "ch1")]
+    assert cache.incremental_builds == 1 and cache.full_builds == 1
+    assert _matches_full_build(machine, config)
+    machine.channels["ch1"].operations["sq"].amplitude = 0.1
+    assert cache.get(machine)[1] == fp0  # the same state, the same fingerprint
+
+
+def test_port_change_reapplies_the_channel_wired_to_it(machine):
+    cache = ConfigCache()
+    cache.get(machine)
+    machine.ports.analog_outputs["con1"][1][2].delay = 12
+    config, _ = cache.get(machine)
+    assert set(cache.last_regenerated) == {("ports", "analog_outputs", "con1", 1, 2), ("channels", "ch1")}
+    assert _matches_full_build(machine, config)
+
+
+def test_the_first_port_keeps_the_controller_entries_of_the_others(machine):
+    cache = ConfigCache()
+    cache.get(machine)
+    machine.ports.analog_outputs["con1"][1][1].delay = 12  # its fragment created con1 itself
+    config, _ = cache.get(machine)
+    assert ("ports", "analog_outputs", "con1", 1, 1) in cache.last_regenerated
+    assert sorted(config["controllers"]["con1"]["fems"][1]["analog_outputs"]) == [1, 2, 3]
+    assert _matches_full_build(machine, config)
+
+
+def test_pulse_removed_inside_a_unit(machine):
+    cache = ConfigCache()
+    cache.get(machine)
+    del machine.channels["ch2"].operations["sq2"]
+    config, _ = cache.get(machine)
+    assert cache.last_regenerated == [("channels", "ch2")]
+    assert _matches_full_build(machine, config)
+
+
+def test_new_unit_falls_back_to_a_full_build(machine):
+    cache = ConfigCache()
+    cache.get(machine)
+    port = machine.ports.get_analog_output("con1", 1, 4, create=True)
+    machine.channels["ch3"] = SingleChannel(id="ch3", opx_output=port.get_reference())
+    cache.get(machine)
+    assert cache.full_builds == 2
+    assert cache.verify(machine)
+
+
+def test_cached_config_keeps_one_cache_per_machine(machine):
+    config, fp = cached_config(machine)
+    again, fp2 = cached_config(machine)
+    assert again is config and fp2 == fp
+    assert "_lchqm_config_cache" not in machine.to_dict()
+
+
+def test_an_incremental_update_sorts_only_the_dirty_unit(machine, monkeypatch):
+    cache = ConfigCache()
+    cache.get(machine)
+    sorted_lengths = []
+    sort = _config_cache.sort_quam_components
+
+    def counting(components):
+        sorted_lengths.append(len(components))
+        return sort(components)
+
+    monkeypatch.setattr(_config_cache, "sort_quam_components", counting)
+    machine.channels["ch0"].operations["sq"].length = 120
+    config, _ = cache.get(machine)
+    assert cache.last_regenerated == [("channels", "ch0")]
+    assert sorted_lengths == [3]  # ch0 and its two pulses, not the whole tree
+    assert _matches_full_build(machine, config)
+
+
+def test_a_snapshot_keeps_the_cached_fingerprint_until_copied(machine):
+    config, fp = cached_config(machine)
+    snapshot = snapshot_config(machine)
+    assert snapshot == config and snapshot is not config
+    assert resolve_config(machine, snapshot)[1] == fp  # the pooled QM is reused
+    edited = copy.deepcopy(snapshot)
+    assert type(edited) is dict and resolve_config(machine, edited)[1] is None
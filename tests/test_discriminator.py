@@ -0,0 +1,78 @@
+"""Batched exact discriminator (`customized.node._discriminator`) against a
+brute-force scan of every gap between shots, on random and heavily tied data."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from customized.node._discriminator import histogram_peak_edges, optimal_thresholds
+
+
+def _false_detections(threshold, Ig, Ie):
+    if np.mean(Ig) < np.mean(Ie):
+        return np.sum(Ig > threshold) + np.sum(Ie < threshold)
+    return np.sum(Ig < threshold) + np.sum(Ie > threshold)
+
+
+def _brute_force_best(Ig, Ie):
+    values = np.unique(np.concatenate([Ig, Ie]))
+    cuts = np.concatenate([[values[0] - 1], 0.5 * (values[1:] + values[:-1]), [values[-1] + 1]])
+    return min(_false_detections(t, Ig, Ie) for t in cuts)
+
+
+@pytest.mark.parametrize("decimals", [None, 1])
+def test_threshold_is_optimal_and_never_on_a_shot(decimals):
+    rng = np.random.default_rng(7)
+    for _ in range(30):
+        n = int(rng.integers(1, 500))
+        g = rng.normal(0.0, 1.0, (4, n))
+        e = rng.normal(rng.uniform(-5, 5, (4, 1)), rng.uniform(0.2, 2.0, (4, 1)), (4, n + 3))
+        if decimals is not None:
+            g, e = np.round(g, decimals), np.round(e, decimals)
+        fit = optimal_thresholds(g, e)
+        for row in range(4):
+            t = fit.threshold[row]
+            assert _false_detections(t, g[row], e[row]) == _brute_force_best(g[row], e[row])
+            assert not np.any(g[row] == t) and not np.any(e[row] == t)
+
+
+def test_confusion_matrix_uses_strict_comparisons_in_either_orientation():
+    rng = np.random.default_rng(3)
+    g = rng.normal(0.0, 1.0, (2, 2000))
+    e = rng.normal([[2.0], [-2.0]], 1.0, (2, 2000))  # second qubit: e below g
+    fit = optimal_thresholds(g, e)
+    t = fit.threshold[:, None]
+    np.testing.assert_allclose(fit.gg, np.mean(g < t, axis=-1))
+    np.testing.assert_allclose(fit.ge, np.mean(g > t, axis=-1))
+    np.testing.assert_allclose(fit.eg, np.mean(e < t, axis=-1))
+    np.testing.assert_allclose(fit.ee, np.mean(e > t, axis=-1))
+    assert fit.confusion_matrix.shape == (2, 2, 2)
+    np.testing.assert_allclose(fit.fidelity, 100 * (fit.gg + fit.ee) / 2)
+
+
+def test_separated_blobs_cut_midway_between_them():
+    g = np.array([[0.0, 1.0, 2.0]])
+    e = np.array([[5.0, 6.0, 7.0]])
+    fit = optimal_thresholds(g, e)
+    assert fit.threshold[0] == pytest.approx(3.5)
+    assert (fit.gg[0], fit.ee[0]) == (1.0, 1.0)
+
+
+def test_leading_axes_are_batched():
+    rng = np.random.default_rng(5)
+    g = rng.normal(0.0, 1.0, (2, 3, 100))
+    e = rng.normal(1.5, 1.0, (2, 3, 100))
+    fit = optimal_thresholds(g, e)
+    assert fit.threshold.shape == (2, 3)
+    np.testing.assert_array_equal(fit.threshold[1, 2], optimal_thresholds(g[1, 2], e[1, 2]).threshold)
+
+
+def test_histogram_peak_edges_matches_np_histogram():
+    rng = np.random.default_rng(11)
+    x = rng.normal(0.0, 1.0, (3, 5000))
+    expected = []
+    for row in x:
+        counts, edges = np.histogram(row, bins=100)
+        expected.append(edges[1:][np.argmax(counts)])
+    np.testing.assert_array_equal(histogram_peak_edges(x), expected)
@@ -0,0 +1,95 @@
+"""Shared sum-of-exponentials distortion fit (`customized.node._distortion_fit`):
+the vectorized tail detector against the loop it replaced, component recovery
+on a clean trace, the start-fraction search, and the hand-off to the OPX
+exponential filter."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from customized.node import _distortion_fit as fit
+
+T = np.arange(1, 401, dtype=float)
+
+
+def _response(noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    return 1.0 + 0.1 * np.exp(-T / 120.0) + 0.05 * np.exp(-T / 10.0) + rng.normal(0, noise, T.size)
+
+
+def test_rolling_variance_and_flat_tail_match_the_loop():
+    y = _response(noise=1e-3)
+    window = max(5, len(y) // 20)
+    loop = np.array([np.var(y[i : i + window]) for i in range(len(y) - window)])
+    np.testing.assert_allclose(fit.rolling_variance(y, window), loop)
+    flat_start = np.where(loop < np.mean(loop) * 0.1)[0][-1]
+    assert fit.flat_tail_dc(y) == pytest.approx(np.mean(y[flat_start:]))
+    assert fit.flat_tail_dc(np.arange(3.0)) == 2.0  # too short for a window: the last point
+
+
+def test_sequential_fit_recovers_clean_components():
+    components, a_dc, residual = fit.sequential_exp_fit(T, _response(), [0.3, 0.0], a_dc=1.0)
+    (amp_slow, tau_slow), (amp_fast, tau_fast) = components
+    assert tau_slow == pytest.approx(120.0, rel=0.05) and tau_fast == pytest.approx(10.0, rel=0.1)
+    assert amp_slow * np.exp(-T[0] / tau_slow) == pytest.approx(0.1, rel=0.05)
+    assert np.sqrt(np.mean(residual**2)) < 2e-3
+
+
+def test_a_component_with_no_data_ends_the_fit():
+    components, _, _ = fit.sequential_exp_fit(T, _response(), [1.2, 0.1], a_dc=1.0)
+    assert components == []
+
+
+def test_search_is_no_worse_than_the_initial_fractions_and_stays_in_the_box():
+    y = _response(noise=2e-3, seed=4)
+    start = [0.5, 0.01]
+    _, _, initial = fit.sequential_exp_fit(T, y, start)
+    success, fractions, components, a_dc, rms = fit.optimize_start_fractions(T, y, start)
+    assert success and len(components) == 2
+    assert rms <= np.sqrt(np.mean(initial**2)) + 1e-15
+    assert fractions[0] > fractions[1]
+    for fraction, guess in zip(fractions, start):
+        assert 0.5 * guess <= fraction <= 1.5 * guess
+
+
+def test_fixed_taus_are_kept():
+    success, _, components, _, _ = fit.optimize_start_fractions(T, _response(), [0.5, 0.01], fixed_taus=[120.0, 10.0])
+    assert success and [tau for _, tau in components] == [120.0, 10.0]
+    with pytest.raises(ValueError, match="same length"):
+        fit.optimize_start_fractions(T, _response(), [0.5, 0.01], fixed_taus=[120.0])
+
+
+def test_many_qubits_in_a_process_pool_match_the_serial_fit():
+    ys = {"q1": _response(noise=1e-3, seed=1), "q2": _response(noise=1e-3, seed=2)}
+    serial = fit.optimize_start_fractions_many(T, ys, [0.5, 0.01])
+    pooled = fit.optimize_start_fractions_many(T, ys, [0.5, 0.01], max_workers=2)
+    for name in ys:
+        assert pooled[name][2] == serial[name][2] and pooled[name][4] == serial[name][4]
+
+
+def test_taps_feed_the_exponential_filter():
+    pytest.importorskip("scqo")
+    from customized.scqo._distortion import to_exponential_filter
+
+    components, a_dc = [(0.1, 120.0), (0.05, 10.0)], 2.0
+    assert to_exponential_filter(*fit.distortion_taps(components, a_dc)) == pytest.approx(
+        [[0.05, 120.0], [0.025, 10.0]])
+
+
+@pytest.mark.parametrize("node", ["cryoscope", "pi_flux"])
+def test_signatures_match_the_vendored_copies(node):
+    """Read from the vendored source: importing it needs the full node stack."""
+    import ast
+    import inspect
+    from pathlib import Path
+
+    source = Path(__file__).resolve().parents[1] / "calibration_utils" / node / "analysis.py"
+    vendored = {f.name: f.args for f in ast.parse(source.read_text(encoding="utf-8")).body
+                if isinstance(f, ast.FunctionDef)}
+    for name in ("sequential_exp_fit", "optimize_start_fractions"):
+        ours = inspect.signature(getattr(fit, name)).parameters
+        args = vendored[name].args
+        defaults = [ast.literal_eval(d) for d in vendored[name].defaults]
+        assert list(ours) == [a.arg for a in args]
+        assert [p.default for p in ours.values() if p.default is not p.empty] == defaults
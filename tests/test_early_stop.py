@@ -0,0 +1,77 @@
+"""SNR-driven early stopping of averaged sweeps: `customized.probes._lib.acquire`
+with `stop_when` against a stand-in job whose partial averages sharpen with
+every fetch, and the `sweep_snr` estimate itself."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from conftest import FakeMachine
+
+N_SHOTS = 1000
+N_POINTS = 101
+DETUNING = np.linspace(-1, 1, N_POINTS)
+
+
+def _lorentzian(depth=1.0):
+    return 1 - depth / (1 + (DETUNING / 0.1) ** 2)
+
+
+def _averages(shots, rng, n_qubits=2, sigma=2.0):
+    """Averages of `shots` shots: the noise falls as 1/sqrt(shots)."""
+    noise = sigma / np.sqrt(max(shots, 1))
+    data = _lorentzian() + noise * rng.standard_normal((n_qubits, N_POINTS))
+    return xr.Dataset(
+        {"I": (("qubit", "detuning"), data), "Q": (("qubit", "detuning"), np.zeros_like(data))},
+        coords={"qubit": [f"q{i + 1}" for i in range(n_qubits)], "detuning": DETUNING},
+    )
+
+
+class FakeFetcher(dict):
+    """One partial fetch per 50 shots, until the job is halted or done."""
+
+    t_start = 0.0
+
+    def __init__(self, job, sweep_axes):
+        super().__init__(n=0)
+        self.job = job
+        self.rng = np.random.default_rng(0)
+
+    def __iter__(self):
+        for shots in range(50, N_SHOTS + 1, 50):
+            if self.job.halted:
+                return
+            self["n"] = shots
+            yield _averages(shots, self.rng)
+
+
+@pytest.fixture()
+def lib(probe_lib, monkeypatch):
+    monkeypatch.setattr(probe_lib, "XarrayDataFetcher", FakeFetcher)
+    return probe_lib
+
+
+def test_snr_grows_with_averaging_and_ignores_qubits_not_yet_started(lib):
+    rng = np.random.default_rng(1)
+    few, many = lib.sweep_snr(_averages(10, rng)), lib.sweep_snr(_averages(1000, rng))
+    assert (many > 2 * few).all()
+    idle = _averages(1000, rng).copy()
+    idle["I"][1] = 0.0  # the second qubit's batch has not run yet
+    assert lib.sweep_snr(idle).values[1] == 0
+
+
+def test_acquire_halts_once_the_target_snr_is_reached(lib):
+    machine = FakeMachine()
+    ds = lib.acquire(machine, "prog", {}, num_shots=N_SHOTS, timeout=5, stop_when=lib.stop_at_snr(12))
+    assert machine.manager.qm.job.halted and ds.attrs["stopped_early"]
+    assert 50 <= ds.attrs["shots_done"] < N_SHOTS
+    assert (lib.sweep_snr(ds) >= 12).all()
+
+
+def test_an_unreachable_target_runs_every_shot(lib):
+    machine = FakeMachine()
+    ds = lib.acquire(machine, "prog", {}, num_shots=N_SHOTS, timeout=5, stop_when=lib.stop_at_snr(1e6))
+    assert not machine.manager.qm.job.halted
+    assert ds.attrs["shots_done"] == N_SHOTS and not ds.attrs["stopped_early"]
@@ -0,0 +1,94 @@
+"""The lazy QM experiment registry (`customized.scqo.experiments`): the
+manifest matches the shells on disk, importing the package (what the
+``scqo.experiments`` entry point does on every CLI call) imports no shell and
+stays fast, and a base-class instance resolves to its shell."""
+
+from __future__ import annotations
+
+import ast
+import json
+import subprocess
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from customized.scqo import experiments
+from customized.scqo.experiments._manifest import SHELLS
+
+REPO = Path(__file__).resolve().parents[1]
+SHELL_DIR = REPO / "customized" / "scqo" / "experiments"
+
+#: generous: the lazy import is a few ms; the eager one imported every shell.
+IMPORT_BUDGET_S = 1.0
+
+
+def _registered_in_source():
+    out = {}
+    for path in sorted(SHELL_DIR.glob("[!_]*.py")):
+        for node in ast.parse(path.read_text(encoding="utf-8")).body:
+            if isinstance(node, ast.ClassDef) and any(
+                    getattr(d, "id", None) == "register" for d in node.decorator_list):
+                out[path.stem] = node.name
+    return out
+
+
+def test_manifest_lists_every_registered_shell():
+    assert SHELLS == _registered_in_source()
+
+
+def test_importing_the_package_imports_no_shell_and_stays_within_budget():
+    code = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        "import customized.scqo.experiments\n"
+        "elapsed = time.perf_counter() - t0\n"
+        "loaded = [m for m in sys.modules if m.startswith('customized.scqo.')]\n"
+        "print(json.dumps({'elapsed': elapsed, 'loaded': loaded, 'numpy': 'numpy' in sys.modules}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO, capture_output=True, text=True, check=True)
+    report = json.loads(out.stdout.strip().splitlines()[-1])
+    assert sorted(report["loaded"]) == ["customized.scqo.experiments", "customized.scqo.experiments._manifest"]
+    assert not report["numpy"]
+    assert report["elapsed"] < IMPORT_BUDGET_S
+
+
+def test_resolve_rebinds_a_base_instance_to_its_shell(monkeypatch):
+    class Base:
+        name = "fake_experiment"
+
+    module = types.ModuleType(f"{experiments.__name__}.fake_experiment")
+
+    class QMFake(Base):
+        def probe(self):
+            return "program", {}
+
+    QMFake.__module__ = module.__name__
+    module.QMFake = QMFake
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.setitem(SHELLS, "fake_experiment", "QMFake")
+
+    exp = Base()
+    assert experiments.resolve(exp) is exp and type(exp) is QMFake
+    assert experiments.resolve(exp) is exp  # already a shell: untouched
+
+    class Other:
+        name = "not_a_qm_experiment"
+
+    assert type(experiments.resolve(Other())) is Other
+
+
+def test_an_unknown_experiment_name_says_which_are_known():
+    with pytest.raises(KeyError, match="qubit_ramsey"):
+        experiments.load("no_such_experiment")
+
+
+def test_every_shell_registers_under_its_manifest_name():
+    pytest.importorskip("scqo")
+    from scqo.experiments import get
+
+    for name in SHELLS:
+        shell = experiments.load(name)
+        assert shell.name == name
+        assert get(name) is shell
@@ -0,0 +1,127 @@
+"""Live per-block fetch of the T1-tracking probes (`customized.probes._live`)
+against stand-in result handles that grow between polls — no instrument.
+
+The stand-in job releases one more block of every `save_all` stream per
+`is_processing()` poll. Partial datasets must be NaN / -1 beyond the blocks
+that arrived, `blocks_done` must count them, and the final dataset must hold
+the whole run.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from customized.probes import _live
+from customized.probes import qubit_t1_ade as ade_probe
+from customized.probes import qubit_t1_bayesian as bayes_probe
+
+from conftest import FakeMachine, FakeResultHandles
+
+N_BLOCKS = 4
+
+
+@pytest.fixture()
+def pool(fake_pool, monkeypatch):
+    monkeypatch.setattr(_live, "session_pool", lambda: fake_pool)
+    return fake_pool
+
+
+def _stamps(n):
+    stamps = np.zeros(n, dtype=[("value", np.int64), ("timestamp", np.int64)])
+    stamps["value"] = 250 * np.arange(n)  # one block per us
+    return stamps
+
+
+def test_ade_blocks_arrive_live_and_the_final_dataset_is_complete(pool):
+    rng = np.random.default_rng(0)
+    n_avg = 3
+    gamma = rng.uniform(0.01, 0.05, N_BLOCKS)
+    states = {name: rng.integers(0, 2, size=(N_BLOCKS, n_avg)) for name in ade_probe._STATE_STREAMS}
+    live = {"estimated_gamma1": gamma, "sigma_gamma1": gamma / 10, "dt_used1": np.full(N_BLOCKS, 2500),
+            "time_stamp1": _stamps(N_BLOCKS), **{f"{name}1": s for name, s in states.items()}}
+    axes = {"qubit": xr.DataArray(["q1"]), "block_idx": xr.DataArray(np.arange(N_BLOCKS)),
+            "shot_idx": xr.DataArray(np.arange(n_avg))}
+
+    partials = list(ade_probe.iter_acquire(FakeMachine(results=FakeResultHandles(live)), "prog", axes,
+                                           num_shots=1, timeout=5, poll_s=0))
+
+    done = [ds.attrs["blocks_done"][0] for ds in partials]
+    assert done == sorted(done) and done[0] < N_BLOCKS and done[-1] == N_BLOCKS
+    first = partials[0]
+    k = done[0]
+    assert np.isnan(first["estimated_gamma"].values[0, k:]).all()
+    assert (first["state"].values[0, k:] == -1).all()
+    np.testing.assert_allclose(first["estimated_gamma"].values[0, :k], gamma[:k] * 1e6)
+
+    final = partials[-1]
+    assert final["state"].dims == ("qubit", "block_idx", "delay_idx", "shot_idx")
+    assert final["state"].dtype == np.int8
+    np.testing.assert_allclose(final["estimated_gamma"].values[0], gamma * 1e6)
+    np.testing.assert_allclose(final["dt_ns"].values[0], 1e4)
+    np.testing.assert_allclose(final["block_time_s"].values[0], 1e-6 * np.arange(N_BLOCKS))
+    for d, name in enumerate(ade_probe._STATE_STREAMS):
+        np.testing.assert_array_equal(final["state"].values[0, :, d], states[name])
+
+
+def test_bayesian_last_block_evolution_lands_in_the_final_dataset(pool):
+    rng = np.random.default_rng(1)
+    n_probes = 5
+    t_est = rng.uniform(0.02, 0.05, (2, N_BLOCKS))
+    live = {}
+    for i in range(2):
+        live.update({f"t_est{i + 1}": t_est[i], f"u_final{i + 1}": np.full(N_BLOCKS, 0.1),
+                     f"state{i + 1}": rng.integers(0, 2, (N_BLOCKS, n_probes)),
+                     f"tau_ms{i + 1}": np.full((N_BLOCKS, n_probes), 0.01),
+                     f"time_stamp{i + 1}": _stamps(N_BLOCKS)})
+    at_end = {f"{name}{i + 1}": np.linspace(0.5, 0.1, n_probes) for name in ("u_evol", "t_evol") for i in range(2)}
+    axes = {"qubit": xr.DataArray(["q1", "q2"]), "block_idx": xr.DataArray(np.arange(N_BLOCKS)),
+            "probe_idx": xr.DataArray(np.arange(n_probes))}
+
+    partials = list(bayes_probe.iter_acquire(FakeMachine(results=FakeResultHandles(live, at_end)), "prog", axes,
+                                             num_shots=1, timeout=5, poll_s=0))
+
+    assert np.isnan(partials[0]["u_evol"].values).all()
+    final = partials[-1]
+    assert final.attrs["blocks_done"] == [N_BLOCKS, N_BLOCKS]
+    np.testing.assert_allclose(final["estimated_t1_s"].values, t_est * 1e-3)
+    np.testing.assert_allclose(final["u_evol"].values[1], np.linspace(0.5, 0.1, n_probes))
+    assert "state_lin" not in final
+
+
+def test_closing_the_iterator_early_halts_the_job(pool):
+    live = {"estimated_gamma1": np.ones(N_BLOCKS), "sigma_gamma1": np.ones(N_BLOCKS),
+            "dt_used1": np.ones(N_BLOCKS), "time_stamp1": _stamps(N_BLOCKS),
+            **{f"{name}1": np.zeros((N_BLOCKS, 2)) for name in ade_probe._STATE_STREAMS}}
+    machine = FakeMachine(results=FakeResultHandles(live))
+    axes = {"qubit": xr.DataArray(["q1"]), "block_idx": xr.DataArray(np.arange(N_BLOCKS)),
+            "shot_idx": xr.DataArray(np.arange(2))}
+    live_iter = ade_probe.iter_acquire(machine, "prog", axes, num_shots=1, timeout=5, poll_s=0)
+    first = next(live_iter)
+    assert first.attrs["blocks_done"] == [1]
+    live_iter.close()
+    assert machine.manager.qm.job.halted
+
+
+def test_fetch_stacked_writes_transposed_buffers_into_one_preallocation():
+    rng = np.random.default_rng(2)
+    buffers = {f"I_tomo{i + 1}": rng.standard_normal((7, 3, 2, 4)) for i in range(3)}  # (shot, basis, sym, gate)
+    results = FakeResultHandles({}, at_end=buffers)
+    results.wait_for_all_values()
+
+    out = _live.fetch_stacked(results, list(buffers), (3, 2, 4, 7), "Tomography", axes=(1, 2, 3, 0),
+                              dtype=np.float32)
+
+    assert out.shape == (3, 3, 2, 4, 7) and out.dtype == np.float32 and out.flags.c_contiguous
+    expected = np.stack([np.transpose(b, (1, 2, 3, 0)) for b in buffers.values()]).astype(np.float32)
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_fetch_stacked_reports_every_missing_handle_and_a_wrong_shape():
+    results = FakeResultHandles({}, at_end={"I_train1": np.zeros((5, 2))})
+    results.wait_for_all_values()
+    with pytest.raises(RuntimeError, match=r"\['I_train2', 'I_train3'\]"):
+        _live.fetch_stacked(results, ["I_train1", "I_train2", "I_train3"], (2, 5), "Tomography", axes=(1, 0))
+    with pytest.raises(RuntimeError, match="expected"):
+        _live.fetch_stacked(results, ["I_train1"], (5, 2), "Tomography", axes=(1, 0))
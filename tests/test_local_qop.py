@@ -0,0 +1,120 @@
+"""The local stand-in QOP (`customized.probes._local_qop`): stream layouts read
+from real QUA programs, synthetic data of the right shape and physics, the
+configured latency, the job queue, and the whole pooled acquisition path of a
+polling fetcher running on top of it."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+pytest.importorskip("qm")
+
+from qm.qua import (  # noqa: E402
+    FUNCTIONS,
+    declare,
+    declare_stream,
+    fixed,
+    for_,
+    program,
+    save,
+    stream_processing,
+)
+
+from customized.probes import _local_qop, _stream  # noqa: E402
+from customized.probes._local_qop import LocalQOP, local_qop, stream_layout  # noqa: E402
+
+
+def _sweep_program(points=20, shots_chunk=None):
+    with program() as prog:
+        n = declare(int)
+        x = declare(fixed)
+        state = declare(bool)
+        n_st, I_st, Q_st, state_st = (declare_stream() for _ in range(4))
+        with for_(n, 0, n < 10, n + 1):
+            save(n, n_st)
+            with for_(x, 0.0, x < 1.0, x + 0.1):
+                save(x, I_st)
+                save(x, Q_st)
+                save(state, state_st)
+        with stream_processing():
+            n_st.save("n")
+            I_st.buffer(points).average().save("I1")
+            Q_st.buffer(points).average().save("Q1")
+            I_st.buffer(3, points).map(FUNCTIONS.average(0)).save("I_mean2")
+            if shots_chunk:
+                state_st.boolean_to_int().buffer(shots_chunk).save_all("state1")
+            else:
+                I_st.save_all("I_shots1")
+    return prog
+
+
+def test_layout_follows_the_stream_processing():
+    layout = stream_layout(_sweep_program(shots_chunk=8))
+    assert layout["n"] == _local_qop.StreamSpec("n", save_all=False)
+    assert layout["I1"].shape == (20,) and layout["I1"].averaged
+    assert layout["I_mean2"].shape == (20,) and layout["I_mean2"].qubit_index == 1
+    assert layout["state1"].save_all and layout["state1"].boolean and layout["state1"].shape == (8,)
+
+
+def test_averaged_sweeps_follow_the_model_and_shots_form_two_blobs():
+    qop = LocalQOP(model="rabi", iterations=10, entries={"I_shots": 4000}, noise=0.0)
+    job = qop.open_qm({}).execute(_sweep_program())
+    results = job.result_handles
+    assert not results.is_processing()
+    I = results.get("I1").fetch_all()
+    # Rabi: two full periods over the sweep, so the curve is back at g in the middle
+    assert np.argmin(np.abs(I - I[0])[1:-1]) + 1 in (9, 10) and I.max() > I[0]
+    assert results.get("n").fetch_all() == 9
+    shots = results.get("I_shots1").fetch_all()
+    assert shots.shape == (4000,)
+    g_or_e = shots > 0  # the default threshold sits between the blobs
+    assert 0.4 < g_or_e.mean() < 0.6
+
+
+def test_results_arrive_with_the_configured_latency():
+    clock = [0.0]
+    qop = LocalQOP(run_s=1.0, startup_s=0.5, entries=10, clock=lambda: clock[0],
+                   sleep=lambda s: clock.__setitem__(0, clock[0] + s), poll_s=0.1)
+    job = qop.open_qm({}).execute(_sweep_program())
+    assert clock[0] == pytest.approx(0.5)  # execute returns once the job has started
+    handle = job.result_handles.get("I_shots1")
+    assert handle.count_so_far() == 0 and job.result_handles.is_processing()
+    clock[0] = 1.0
+    assert handle.count_so_far() == 5 and len(handle.fetch(slice(0, 5))) == 5
+    assert job.result_handles.wait_for_all_values()
+    assert handle.count_so_far() == 10 and not job.result_handles.is_processing()
+
+
+def test_queued_jobs_run_back_to_back_and_a_queued_one_can_be_cancelled():
+    clock = [0.0]
+    qop = LocalQOP(run_s=1.0, clock=lambda: clock[0], sleep=lambda s: clock.__setitem__(0, clock[0] + s),
+                   poll_s=0.25)
+    qm = qop.open_qm({})
+    program_id = qm.compile(_sweep_program())
+    first, second, third = (qm.add_to_queue(program_id) for _ in range(3))
+    assert (first.start, second.start, third.start) == (0.0, 1.0, 2.0)
+    assert third.cancel() and not first.cancel()
+    assert second.wait_for_execution() is second and clock[0] == pytest.approx(1.0)
+
+
+class _Machine:
+    network = {"host": "local", "cluster_name": "standin"}
+
+    def generate_config(self):
+        return {"version": 1}
+
+
+def test_the_pooled_chunked_fetch_runs_end_to_end(tmp_path):
+    machine = _Machine()
+    axes = {"qubit": xr.DataArray(["q1"]), "shot_idx": xr.DataArray(np.arange(1, 21)),
+            _stream.CHUNK_SHOTS_AXIS: 8}
+    with local_qop(machine, run_s=0.05, entries={"state": 3}) as qop:
+        partials = list(_stream.iter_acquire_chunked(machine, _sweep_program(shots_chunk=8), axes,
+                                                     timeout=5, sink_dir=tmp_path, poll_s=0.01))
+    assert "connect" not in vars(machine)  # unplugged again
+    final = partials[-1]
+    assert final["state"].shape == (1, 20)
+    assert set(np.unique(final["state"].values)) <= {0, 1}
+    assert len(qop.jobs) == 1 and not qop.jobs[0].halted
@@ -0,0 +1,93 @@
+"""Batched g/e/f mixture discriminator (`customized.node._mixture_discriminator`)
+on synthetic shots with known labels."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from customized.node._mixture_discriminator import fit_gaussian_centers, fit_mixture
+
+CENTERS = np.array([[0.0, 0.0], [6e-4, 1e-4], [9e-4, -4e-4]])
+SIGMAS = np.array([[2e-4, 1.6e-4], [2.2e-4, 1.8e-4], [2.6e-4, 2.1e-4]])
+
+
+def _shots(n_qubits=3, n_shots=4000, leak=0.08, seed=0):
+    rng = np.random.default_rng(seed)
+    truth = np.broadcast_to(np.arange(3)[:, None], (n_qubits, 3, n_shots)).copy()
+    truth[(rng.random(truth.shape) < leak) & (truth > 0)] -= 1
+    offsets = rng.normal(0, 1e-4, (n_qubits, 1, 1, 2))
+    I = offsets[..., 0] + CENTERS[truth, 0] + rng.standard_normal(truth.shape) * SIGMAS[truth, 0]
+    Q = offsets[..., 1] + CENTERS[truth, 1] + rng.standard_normal(truth.shape) * SIGMAS[truth, 1]
+    return I, Q, truth, CENTERS[None] + offsets[:, 0]
+
+
+def test_blobs_recovered_with_their_state_labels():
+    I, Q, truth, centers = _shots()
+    fit = fit_mixture(I, Q)
+    assert fit.converged.all()
+    np.testing.assert_allclose(fit.means, centers, atol=2e-5)  # leaked shots do not drag the centers
+    np.testing.assert_allclose(np.sqrt(np.diagonal(fit.covariances, axis1=-2, axis2=-1)),
+                               np.broadcast_to(SIGMAS, fit.means.shape), rtol=0.08)
+    np.testing.assert_allclose(fit.confusion.sum(axis=-1), 1.0)
+    assert fit.confusion.shape == (3, 3, 3) and fit.assignment_fidelity.shape == (3, 3)
+    np.testing.assert_allclose(fit.fidelity, 100 * fit.assignment_fidelity.mean(axis=-1))
+
+    states = fit.classify(I, Q)
+    assert states.shape == I.shape and states.dtype == np.int8
+    assert np.mean(states == truth) > 0.88  # the overlap of the blobs caps it near 0.9
+
+
+def test_classify_takes_new_shots_of_any_shape():
+    I, Q, _, _ = _shots(seed=1)
+    fit = fit_mixture(I, Q)
+    new_I, new_Q, truth, _ = _shots(seed=1, n_shots=50, leak=0.0)
+    states = fit.classify(new_I[:, :, :10], new_Q[:, :, :10])
+    assert states.shape == (3, 3, 10)
+    np.testing.assert_array_equal(fit.classify(new_I.reshape(3, -1), new_Q.reshape(3, -1)).reshape(new_I.shape),
+                                  fit.classify(new_I, new_Q))
+
+
+def test_batch_matches_one_fit_per_qubit():
+    I, Q, _, _ = _shots(seed=2)
+    batched = fit_mixture(I, Q, tol=1e-9)
+    for q in range(I.shape[0]):
+        single = fit_mixture(I[q], Q[q], tol=1e-9)
+        np.testing.assert_allclose(batched.means[q], single.means, rtol=1e-6, atol=1e-10)
+        np.testing.assert_allclose(batched.confusion[q], single.confusion, atol=1e-3)
+
+
+def test_em_on_a_subsample_still_classifies_every_shot():
+    I, Q, truth, centers = _shots(n_qubits=2, n_shots=20_000, seed=3)
+    fit = fit_mixture(I, Q, max_fit_shots=4000)
+    full = fit_mixture(I, Q, max_fit_shots=None)
+    np.testing.assert_allclose(fit.means, full.means, atol=1e-5)
+    np.testing.assert_allclose(fit.means, centers, atol=3e-5)
+    # the confusion counts every one of the 20000 shots, not just the fitted ones
+    counts = fit.confusion * 20_000
+    np.testing.assert_allclose(counts, np.round(counts), atol=1e-6)
+    assert np.any(np.round(counts) % 5)
+    np.testing.assert_allclose(fit.confusion, full.confusion, atol=0.02)
+
+
+def test_shapes_are_checked():
+    with pytest.raises(ValueError):
+        fit_mixture(np.zeros((3, 10)), np.zeros((3, 11)))
+
+
+def test_fit_gaussian_centers_returns_the_vendored_variables():
+    I, Q, _, centers = _shots(n_qubits=2, seed=3)
+    dims = ("qubit", "n_runs")
+    ds = xr.Dataset(
+        {f"{iq}{s}": (dims, data[:, k]) for k, s in enumerate("gef") for iq, data in (("I", I), ("Q", Q))},
+        coords={"qubit": ["q1", "q2"], "n_runs": np.arange(I.shape[-1])},
+    )
+    merged, fit = fit_gaussian_centers(ds)
+    assert merged.center_matrix.dims == ("qubit", "I", "Q")
+    np.testing.assert_allclose(merged.I_f_center.values, centers[:, 2, 0], atol=2e-5)
+    np.testing.assert_allclose(merged.Q_e_center.values, centers[:, 1, 1], atol=2e-5)
+    assert merged.confusion_matrix.dims == ("qubit", "prepared_state", "state")
+    assert merged.success.values.all()
+    np.testing.assert_allclose(merged.readout_fidelity.values, fit.fidelity)
+    xr.testing.assert_identical(merged.Ig, ds.Ig)
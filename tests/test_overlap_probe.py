@@ -65,8 +65,9 @@ def _body(prog, config) -> list[str]:
 def _build(machine, live_roster, name, **params):
     from scqo.experiments import get
 
-    import customized.scqo.experiments  # noqa: F401  (registers the QM probes)
+    from customized.scqo.experiments import load_all
 
+    load_all()  # registers the QM probes
     backend = QMBackend(machine, roster=live_roster)
     cls = get(name)
     kwargs = {k: v for k, v in
@@ -135,8 +136,9 @@ def test_targets_with_different_readout_windows_are_refused(machine, live_roster
     shifted peak on exactly the qubits nobody was watching."""
     from scqo.experiments import get
 
-    import customized.scqo.experiments  # noqa: F401
+    from customized.scqo.experiments import load_all
 
+    load_all()
     backend = QMBackend(machine, roster=live_roster)
     cls = get("qubit_spectroscopy_overlap")
     others = [q for q in ("q4", "q5") if q in live_roster.entities]
@@ -9,6 +9,8 @@ import matplotlib
 
 matplotlib.use("Agg", force=True)  # headless: no display needed for the figure assertions
 
+import itertools
+
 import numpy as np
 import pytest
 import xarray as xr
@@ -16,6 +18,7 @@ import xarray as xr
 from customized.node._qc_populations import (
     joint_state_populations,
     marginal_populations,
+    mitigate_readout,
     plot_population_maps,
     plot_populations,
 )
@@ -119,6 +122,52 @@ def test_plot_raw_when_no_state_discrimination():
     assert len(figs["raw_I"].axes[0].get_lines()) == 3
 
 
+def _mask_per_state_populations(state: xr.DataArray) -> xr.DataArray:
+    """The original one-mask-per-bitstring computation the bincount replaced."""
+    n = state.sizes["qubit"]
+    weights = xr.DataArray(2 ** np.arange(n)[::-1], coords={"qubit": state["qubit"]}, dims="qubit")
+    codes = ((state >= 1).astype(np.int64) * weights).sum("qubit")
+    labels = ["".join(bits) for bits in itertools.product("01", repeat=n)]
+    return xr.concat([(codes == v).mean("shot") for v in range(2**n)], dim="joint_state").assign_coords(
+        joint_state=labels
+    )
+
+
+def test_joint_populations_match_the_mask_per_state_computation():
+    # random leveled states (2 = |f> counts as excited), shot not the second dim, a
+    # non-dim coord on a remaining dim
+    rng = np.random.default_rng(0)
+    state = xr.DataArray(
+        rng.integers(0, 3, (3, 5, 200, 4)).astype(np.int8),
+        dims=["qubit", "round", "shot", "qubit_amplitude"],
+        coords={"qubit": ["q3", "q1", "q2"], "round": np.arange(5), "qubit_amplitude": np.linspace(0, 0.1, 4)},
+    ).assign_coords(duration=("round", np.arange(5) * 16))
+    xr.testing.assert_identical(joint_state_populations(state), _mask_per_state_populations(state))
+
+
+def test_mitigation_inverts_the_tensor_product_confusion():
+    rng = np.random.default_rng(1)
+    confusion = {
+        "q1": [[0.95, 0.05], [0.10, 0.90]],
+        "q2": [[0.90, 0.10], [0.20, 0.80]],
+        "q3": [[0.97, 0.03], [0.06, 0.94]],
+    }
+    true = rng.dirichlet(np.ones(8), size=4).T  # (joint_state, round)
+    joint = np.kron(np.kron(confusion["q1"], confusion["q2"]), confusion["q3"])  # P(read j | prepared i)
+    read = xr.DataArray(joint.T @ true, dims=["joint_state", "round"])
+    mitigated = mitigate_readout(read, [confusion[q] for q in ("q1", "q2", "q3")])
+    np.testing.assert_allclose(mitigated.values, true, atol=1e-12)
+
+
+def test_joint_populations_mitigate_by_qubit_name():
+    state = _make_state()
+    confusion = {"q1": [[0.9, 0.1], [0.2, 0.8]], "q2": [[1, 0], [0, 1]], "q3": [[0.95, 0.05], [0.1, 0.9]]}
+    pops = joint_state_populations(state, confusion)
+    expected = mitigate_readout(joint_state_populations(state), [confusion[q] for q in ("q1", "q2", "q3")])
+    xr.testing.assert_allclose(pops, expected)
+    np.testing.assert_allclose(pops.sum("joint_state").values, 1.0)
+
+
 # --- 2D (round x amplitude) schema: `LCH_qc_N_swap_amp` ----------------------------------
 
 
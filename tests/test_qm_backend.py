@@ -172,10 +172,239 @@ def test_to_canonical_rejects_axis_size_mismatch():
         QMBackend._to_canonical(raw, _FakeExp({"idle_time_ns": np.arange(7)}))
 
 
+# ------------------------------------------------------ acquire_async pipeline
+# Build on the caller's thread, execute/fetch on one hardware thread, canonicalize
+# and analyze on another — no instrument: the probe module's acquire() sleeps.
+
+class _PipelineProbe:
+    def __init__(self, log):
+        self.log = log
+
+    def acquire(self, machine, prog, sweep_axes, *, num_shots, timeout, config=None):
+        import threading
+        import time
+
+        self.log.append(("run", prog, threading.current_thread().name, config))
+        time.sleep(0.02)
+        self.log.append(("done", prog))
+        return _raw("ramsey_idle_time", n_sweep=3).assign_attrs(prog=prog)
+
+
+def _pipeline_exp(name, log, fail=False):
+    def probe():
+        import threading
+
+        log.append(("build", name, threading.current_thread().name))
+        if fail:
+            raise RuntimeError(f"{name} did not build")
+        return name, {}, _PipelineProbe(log)
+
+    return SimpleNamespace(
+        params=SimpleNamespace(num_averages=10, targets=["q0"]),
+        sweep_axes={"ramsey_idle_time": np.arange(3)},
+        Contract=SimpleNamespace(variables=("I", "Q"), alt_variables=(), validate=lambda raw: None),
+        probe=probe,
+    )
+
+
+def _pipeline_backend(depth=2):
+    machine = SimpleNamespace(generate_config=lambda: {"version": 1})
+    return QMBackend(machine, roster=None, pipeline_depth=depth)
+
+
+def test_acquire_async_overlaps_builds_with_the_running_job():
+    import threading
+
+    log = []
+    backend = _pipeline_backend()
+    try:
+        futures = [backend.acquire_async(_pipeline_exp(f"e{i}", log), analyze=lambda ds: ds.attrs["prog"])
+                   for i in range(4)]
+        assert [f.result(timeout=5) for f in futures] == ["e0", "e1", "e2", "e3"]
+    finally:
+        backend.shutdown()
+    runs = [entry for entry in log if entry[0] == "run"]
+    assert [r[1] for r in runs] == ["e0", "e1", "e2", "e3"]  # submission order
+    assert all(r[2].startswith("qm-hardware") for r in runs)
+    assert all(r[3] == {"version": 1} for r in runs)  # the config snapshotted at build
+    builds = [entry for entry in log if entry[0] == "build"]
+    assert {b[2] for b in builds} == {threading.current_thread().name}
+    # e1 was built while e0 was still on the instrument
+    assert log.index(builds[1]) < log.index(("done", "e0"))
+
+
+def test_acquire_async_reports_a_failed_build_through_the_future():
+    log = []
+    backend = _pipeline_backend(depth=1)
+    try:
+        failed = backend.acquire_async(_pipeline_exp("bad", log, fail=True))
+        with pytest.raises(RuntimeError, match="did not build"):
+            failed.result(timeout=5)
+        # the slot was freed: a depth-1 pipeline still accepts work
+        assert backend.acquire_async(_pipeline_exp("ok", log)).result(timeout=5).sizes["target"] == 2
+    finally:
+        backend.shutdown()
+
+
+def test_acquire_async_frees_the_slot_when_the_run_is_interrupted(monkeypatch):
+    log = []
+    backend = _pipeline_backend(depth=1)
+
+    def interrupted(self, machine, prog, sweep_axes, **kwargs):
+        raise KeyboardInterrupt
+
+    try:
+        with monkeypatch.context() as patch:
+            patch.setattr(_PipelineProbe, "acquire", interrupted)
+            with pytest.raises(KeyboardInterrupt):
+                backend.acquire_async(_pipeline_exp("stopped", log)).result(timeout=5)
+        # the future was resolved and its slot freed: a depth-1 pipeline still accepts work
+        assert backend.acquire_async(_pipeline_exp("ok", log)).result(timeout=5).sizes["target"] == 2
+    finally:
+        backend.shutdown()
+
+
+def test_acquire_async_fails_the_future_when_shut_down_before_the_analysis(monkeypatch):
+    import threading
+
+    release = threading.Event()
+    acquire = _PipelineProbe.acquire
+
+    def gated(self, *args, **kwargs):
+        release.wait(timeout=5)
+        return acquire(self, *args, **kwargs)
+
+    monkeypatch.setattr(_PipelineProbe, "acquire", gated)
+    backend = _pipeline_backend()
+    future = backend.acquire_async(_pipeline_exp("late", []))
+    backend.shutdown(wait=False)
+    release.set()
+    with pytest.raises(RuntimeError, match="shutdown"):
+        future.result(timeout=5)
+
+
+@pytest.mark.parametrize("module", ["qubit_parity_switch_continuous", "qubit_parity_switch_discrete"])
+def test_acquire_async_hands_the_config_snapshot_to_a_probe_modules_own_fetch(module, monkeypatch):
+    import importlib
+
+    pytest.importorskip("qualibration_libs")
+    probe_module = importlib.import_module(f"customized.probes.{module}")
+    seen = []
+
+    def fake_acquire(machine, prog, sweep_axes, *, num_shots, timeout, log=None, config=None, compact=False):
+        seen.append(config)
+        return _raw("ramsey_idle_time", n_sweep=3)
+
+    monkeypatch.setattr(probe_module, "_acquire", fake_acquire)
+    exp = _pipeline_exp("parity", [])
+    exp.probe = lambda: ("parity", {}, probe_module)  # the (program, sweep_axes, probe_module) shape
+    backend = _pipeline_backend()
+    try:
+        assert backend.acquire_async(exp).result(timeout=5).sizes["target"] == 2
+    finally:
+        backend.shutdown()
+    assert seen == [{"version": 1}]
+
+
+def test_acquire_batch_queues_the_shared_fetch_path_and_keeps_the_order(monkeypatch):
+    import customized.probes._lib as lib
+
+    log, batches = [], []
+
+    def fake_batch(machine, programs, *, timeout, queue_depth):
+        batches.append([prog for prog, _ in programs])
+        for index, (prog, _) in enumerate(programs):
+            yield _raw("ramsey_idle_time", n_sweep=3).assign_attrs(prog=prog, batch_index=index)
+
+    monkeypatch.setattr(lib, "acquire_batch", fake_batch)
+    shared = [_pipeline_exp(name, log) for name in ("a", "b")]
+    for exp, name in zip(shared, ("a", "b")):
+        exp.probe = lambda name=name: (name, {})  # the (program, sweep_axes) shape
+    own_fetch = _pipeline_exp("c", log)
+    datasets = _pipeline_backend().acquire_batch([shared[0], own_fetch, shared[1]])
+    assert batches == [["a", "b"]]  # one queue for both shared-path programs
+    assert [ds.attrs["prog"] for ds in datasets] == ["a", "c", "b"]
+    assert all("target" in ds.dims for ds in datasets)
+
+
+def test_acquire_records_a_stage_trace_in_the_dataset_and_trace_dir(tmp_path):
+    import json
+
+    machine = SimpleNamespace(generate_config=lambda: {"version": 1})
+    backend = QMBackend(machine, roster=None, trace_dir=str(tmp_path))
+    ds = backend.acquire(_pipeline_exp("e0", []))
+    record = json.loads(ds.attrs["acquisition_trace"])
+    assert record == backend.acquisition_trace()
+    assert [s["name"] for s in record["spans"]] == ["probe", "to_canonical"]
+    (written,) = tmp_path.glob("*.trace.json")
+    assert {e["name"] for e in json.loads(written.read_text())["traceEvents"]} >= {"probe", "to_canonical"}
+
+
+def test_acquire_async_continues_one_trace_across_the_pipeline_threads():
+    import json
+
+    backend = _pipeline_backend()
+    try:
+        ds = backend.acquire_async(_pipeline_exp("e0", [])).result(timeout=5)
+    finally:
+        backend.shutdown()
+    spans = json.loads(ds.attrs["acquisition_trace"])["spans"]
+    assert [s["name"] for s in spans] == ["probe", "generate_config", "to_canonical"]
+    assert spans[-1]["thread"].startswith("qm-analysis")
+
+
+def test_an_experiments_stop_rule_reaches_the_shared_fetch(monkeypatch):
+    import customized.probes._lib as lib
+
+    seen = []
+
+    def fake_acquire(machine, prog, sweep_axes, *, num_shots, timeout, stop_when=None):
+        seen.append(stop_when)
+        return _raw("ramsey_idle_time", n_sweep=3)
+
+    monkeypatch.setattr(lib, "acquire", fake_acquire)
+    rule = lambda ds, shots: True  # noqa: E731
+    exp = _pipeline_exp("a", [])
+    exp.probe = lambda: ("a", {})
+    exp.stop_when = rule
+    _pipeline_backend().acquire(exp)
+    assert seen == [rule]
+
+
+def test_compact_dtypes_reach_the_fetch_and_survive_canonicalization(monkeypatch):
+    import customized.probes._lib as lib
+
+    seen = []
+
+    def fake_acquire(machine, prog, sweep_axes, *, num_shots, timeout, compact=False):
+        seen.append(compact)
+        return _raw("ramsey_idle_time", n_sweep=3)  # float64: narrowed after the fetch
+
+    monkeypatch.setattr(lib, "acquire", fake_acquire)
+    exp = _pipeline_exp("a", [])
+    exp.probe = lambda: ("a", {})
+    backend = _pipeline_backend()
+    backend._compact_dtypes = True
+    ds = backend.acquire(exp)
+    assert seen == [True]
+    assert ds["I"].dtype == np.float32 and ds.attrs["compact_dtypes"]
+
+    exp.compact_dtypes = False  # the shell's own policy wins
+    assert backend.acquire(exp)["I"].dtype == np.float64 and seen == [True, False]
+
+
+def test_pipeline_depth_must_be_positive():
+    with pytest.raises(ValueError):
+        _pipeline_backend(depth=0)
+
+
 def test_catalog_registers_qm_experiments():
-    import customized.scqo  # noqa: F401  (side effect: register)
     from scqo import catalog
 
+    from customized.scqo.experiments import load_all
+
+    load_all()
+
     names = {e["name"] for e in catalog()}
     assert {"qubit_ramsey", "qubit_power_rabi", "resonator_spectroscopy"} <= names
     # the pair family: registered here, so `scqo run` on a QM setup gets a
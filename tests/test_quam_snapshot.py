@@ -0,0 +1,138 @@
+"""The ``Quam.load()`` snapshot cache (`customized.quam_snapshot`) on a small
+pure-quam root: a repeat load is served from the snapshot with references and
+parents intact, and any change to the state or the class code, or a damaged
+snapshot, falls back to the full JSON load."""
+
+from __future__ import annotations
+
+import os
+from dataclasses import field
+from typing import Dict, List
+
+import pytest
+from quam.core import QuamComponent, QuamRoot, quam_dataclass
+from quam.core.quam_classes import QuamBase
+
+from customized import quam_snapshot
+
+
+@quam_dataclass
+class Qubit(QuamComponent):
+    id: str
+    frequency: float = 5e9
+    operations: Dict[str, float] = field(default_factory=dict)
+    readout_frequency: str = "#./frequency"
+
+
+@quam_dataclass
+class Root(QuamRoot):
+    qubits: Dict[str, Qubit] = field(default_factory=dict)
+    active_qubit_names: List[str] = field(default_factory=list)
+
+
+def _load(path):
+    return quam_snapshot.load_quam(Root, path)
+
+
+@pytest.fixture()
+def state(tmp_path, monkeypatch):
+    monkeypatch.setenv("LCHQM_QUAM_SNAPSHOT", str(tmp_path / "snapshots"))
+    root = Root()
+    for i in range(20):
+        root.qubits[f"q{i}"] = Qubit(id=f"q{i}", operations={"x180": 0.1 * i})
+    root.active_qubit_names = ["q0", "q1"]
+    root.save(tmp_path / "state")
+    return tmp_path / "state"
+
+
+def test_a_repeat_load_is_served_from_the_snapshot(state):
+    cold = _load(state)
+    assert quam_snapshot.last_load["source"] == "json"
+    warm = _load(state)
+    assert quam_snapshot.last_load["source"] == "snapshot"
+    assert quam_snapshot.last_load["seconds"] > 0
+
+    assert type(warm) is Root and warm is not cold
+    assert warm.to_dict() == cold.to_dict()
+    q3 = warm.qubits["q3"]
+    assert q3.parent is warm.qubits and warm.qubits.parent is warm
+    q3.frequency = 6e9
+    assert q3.readout_frequency == 6e9  # references still resolve live
+    assert QuamBase._last_instantiated_root is warm
+
+
+def test_an_edited_state_is_loaded_from_json(state):
+    root = _load(state)
+    root.qubits["q0"].frequency = 4.5e9
+    root.save(state)
+    assert _load(state).qubits["q0"].frequency == 4.5e9
+    assert quam_snapshot.last_load["source"] == "json"
+
+
+def test_changed_class_code_invalidates_the_snapshot(state, tmp_path, monkeypatch):
+    module = tmp_path / "components.py"
+    module.write_text("# v1\n")
+    stat = os.stat(module)
+    monkeypatch.setattr(quam_snapshot, "_code_stamps", lambda root: {str(module): (stat.st_size, stat.st_mtime_ns)})
+    _load(state)
+    _load(state)
+    assert quam_snapshot.last_load["source"] == "snapshot"
+
+    module.write_text("# v2, a new field default\n")
+    _load(state)
+    assert quam_snapshot.last_load["source"] == "json"
+    assert quam_snapshot.last_load["reason"] == "QUAM class code changed"
+
+
+def test_a_damaged_snapshot_falls_back_and_is_replaced(state, tmp_path):
+    _load(state)
+    (snapshot,) = (tmp_path / "snapshots").glob("*.pkl")
+    snapshot.write_bytes(snapshot.read_bytes()[:100])
+    assert _load(state).qubits["q1"].operations["x180"] == pytest.approx(0.1)
+    assert quam_snapshot.last_load["reason"].startswith("snapshot unreadable")
+    _load(state)
+    assert quam_snapshot.last_load["source"] == "snapshot"
+
+
+def test_snapshots_can_be_turned_off(state, tmp_path, monkeypatch):
+    monkeypatch.setenv("LCHQM_QUAM_SNAPSHOT", "0")
+    _load(state)
+    _load(state)
+    assert quam_snapshot.last_load["source"] == "json"
+    assert not (tmp_path / "snapshots").exists()
+
+
+def test_the_default_folder_is_the_users_own_cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("LCHQM_QUAM_SNAPSHOT", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(os, "name", "posix")
+    assert quam_snapshot.snapshot_dir() == tmp_path / "cache" / "lchqm" / "quam_snapshots"
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX ownership")
+def test_a_folder_others_can_write_is_never_read_or_written(state, tmp_path):
+    folder = tmp_path / "snapshots"
+    _load(state)
+    assert folder.stat().st_mode & 0o777 == 0o700
+    folder.chmod(0o777)
+    _load(state)
+    assert quam_snapshot.last_load["source"] == "json"
+    assert "writable by other users" in quam_snapshot.last_load["reason"]
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX ownership")
+def test_a_snapshot_planted_by_another_user_is_not_unpickled(state, tmp_path, monkeypatch):
+    _load(state)
+    (snapshot,) = (tmp_path / "snapshots").glob("*.pkl")
+    uid = os.getuid()
+    real_fstat = os.fstat
+
+    def foreign_fstat(fd):  # the planted file: same bytes, someone else's
+        st = real_fstat(fd)
+        return os.stat_result((st.st_mode, st.st_ino, st.st_dev, st.st_nlink, uid + 1) + tuple(st)[5:])
+
+    monkeypatch.setattr(os, "fstat", foreign_fstat)
+    _load(state)
+    assert quam_snapshot.last_load["source"] == "json"
+    assert quam_snapshot.last_load["reason"] == "snapshot written by another user"
+    assert snapshot.exists()
@@ -0,0 +1,63 @@
+"""Batched 3D readout-fidelity map (`customized.node._readout_optimization_3d`)
+against the per-point `qualang_tools` discriminator and the per-qubit argmax
+loop it replaces."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from customized.node import _readout_optimization_3d as ro3d
+
+
+def _grid(seed=0, runs=400):
+    rng = np.random.default_rng(seed)
+    coords = {
+        "qubit": ["q2", "q1"],
+        "freq": np.linspace(-1e6, 1e6, 4),
+        "amp": np.linspace(0.5, 1.5, 3),
+        "duration": [400, 800],
+        "run": np.arange(runs),
+    }
+    shape = tuple(len(v) for v in coords.values())
+    separation = rng.uniform(0.5, 3.0, shape[:-1])[..., None]
+    data = {
+        "I_g": rng.normal(0.0, 1.0, shape),
+        "Q_g": rng.normal(0.0, 1.0, shape),
+        "I_e": rng.normal(separation, 1.0, shape),
+        "Q_e": rng.normal(0.5 * separation, 1.0, shape),
+    }
+    return xr.Dataset({k: (list(coords), v) for k, v in data.items()}, coords=coords)
+
+
+def test_fidelity_map_never_worse_than_the_per_point_discriminator():
+    analysis = pytest.importorskip("qualang_tools.analysis")
+    ds = _grid()
+    fidelity = ro3d.calculate_readout_fidelity(ds, chunk_points=5, max_workers=2)
+    assert fidelity.dims == ("qubit", "freq", "amp", "duration")
+    for point in np.ndindex(fidelity.shape):
+        quadratures = (ds[name].values[point] for name in ("I_g", "Q_g", "I_e", "Q_e"))
+        reference = analysis.two_state_discriminator(*quadratures, b_print=False, b_plot=False)[2]
+        assert reference - 1e-9 <= fidelity.values[point] <= reference + 2.0
+
+
+def test_chunking_does_not_change_the_result_and_nan_points_stay_nan():
+    ds = _grid(seed=1)
+    ds["I_e"][0, 1, 2, 1, 7] = np.nan
+    whole = ro3d.calculate_readout_fidelity(ds)
+    chunked = ro3d.calculate_readout_fidelity(ds, chunk_points=3)
+    np.testing.assert_array_equal(whole.values, chunked.values)
+    assert np.isnan(whole.values[0, 1, 2, 1]) and np.isfinite(whole.values).sum() == whole.size - 1
+
+
+def test_maximum_fidelity_per_qubit_is_the_per_qubit_argmax():
+    ds = _grid(seed=2)
+    ds = ds.assign(fidelity=ro3d.calculate_readout_fidelity(ds))
+    best = ro3d.get_maximum_fidelity_per_qubit(ds).optimal_readout_point
+    for qubit in ds.qubit.values:
+        da_q = ds.fidelity.sel(qubit=qubit)
+        index = np.unravel_index(np.argmax(da_q.values), da_q.shape)
+        assert float(best.sel(qubit=qubit)) == da_q.values[index]
+        for dim, i in zip(da_q.dims, index):
+            assert best.sel(qubit=qubit)[dim].item() == da_q[dim].values[i]
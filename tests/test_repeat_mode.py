@@ -0,0 +1,106 @@
+"""Compile-once / execute-many: `customized.probes._lib.acquire_repeated` against a
+stand-in QM (one compile, queued runs, early close cancels the rest) and the
+node/graph helpers in `customized.node._repeat`."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+pytest.importorskip("qualibrate")
+
+from customized.node import _repeat
+
+from conftest import FakeMachine, FakeProgram  # noqa: E402
+
+
+class FakeFetcher(dict):
+    t_start = 0.0
+
+    def __init__(self, job, sweep_axes):
+        super().__init__()
+        self.job = job
+
+    def __iter__(self):
+        yield xr.Dataset({"I": ("x", np.full(3, float(self.job.index)))})
+
+
+@pytest.fixture()
+def lib(probe_lib, monkeypatch):
+    monkeypatch.setattr(probe_lib, "XarrayDataFetcher", FakeFetcher)
+    return probe_lib
+
+
+def test_compiles_once_and_yields_every_run_in_order(lib):
+    machine = FakeMachine()
+    runs = list(lib.acquire_repeated(machine, "prog", {}, repeats=5, timeout=5))
+    qm = machine.manager.qm
+    assert qm.compiled == ["prog"]
+    assert [ds.attrs["repeat_index"] for ds in runs] == list(range(5))
+    assert [float(ds["I"][0]) for ds in runs] == [0, 1, 2, 3, 4]
+    assert qm.started == ["prog-id"] * 5
+
+
+def test_queue_stays_ahead_and_early_close_cancels_the_rest(lib):
+    machine = FakeMachine()
+    runs = lib.acquire_repeated(machine, "prog", {}, repeats=10, timeout=5, queue_depth=3)
+    next(runs)
+    qm = machine.manager.qm
+    assert len(qm.queued) == 3  # the one fetched plus two queued behind it
+    runs.close()
+    assert [job.cancelled for job in qm.queued] == [False, True, True]
+    assert qm.closed  # the second run may already be going
+
+
+def test_runs_closed_after_the_last_one_leave_the_qm_to_the_next(lib):
+    machine = FakeMachine()
+    runs = lib.acquire_repeated(machine, FakeProgram("prog"), {}, repeats=2, timeout=5)
+    for _ in range(2):
+        next(runs)
+    runs.close()  # what a caller taking exactly `repeats` items does
+    qm = machine.manager.qm
+    assert not qm.closed
+    list(lib.acquire_repeated(machine, FakeProgram("prog"), {}, repeats=2, timeout=5))
+    assert len(machine.manager.opened) == 1
+    assert qm.compiled == ["prog"]  # the second campaign hit the compiled-program cache
+    assert lib.session_pool().compile_hits == 1
+
+
+def test_store_repeats_keys_each_run_in_order():
+    results = {"ds_raw_extra": "not a dataset"}
+    runs = (xr.Dataset(attrs={"repeat_index": i}) for i in (0, 1, 10))
+    assert _repeat.store_repeats(results, runs) == 3
+    keys = [key for key, _ in _repeat.repeated_datasets(results)]
+    assert keys == ["ds_raw_000", "ds_raw_001", "ds_raw_010"]
+
+
+def test_repeated_datasets_order_past_999_runs_by_number():
+    results = {}
+    _repeat.store_repeats(results, (xr.Dataset(attrs={"repeat_index": i}) for i in (1000, 999, 0)))
+    runs = _repeat.repeated_datasets(results)
+    assert [ds.attrs["repeat_index"] for _, ds in runs] == [0, 999, 1000]
+
+
+class FakeNode:
+    def __init__(self, name="LCH_Ramsey", **params):
+        self.name, self.params = name, params
+
+    def copy(self, name, **params):
+        return FakeNode(name, **params)
+
+
+class FakeLibrary:
+    nodes = {"LCH_Ramsey": FakeNode()}
+
+
+def test_repeat_chain_compile_once_is_one_node():
+    nodes, connectivity = _repeat.repeat_chain(FakeLibrary(), "LCH_Ramsey", repeats=200, num_shots=7)
+    assert list(nodes) == ["LCH_Ramsey_x200"] and connectivity == []
+    assert nodes["LCH_Ramsey_x200"].params == {"repeats": 200, "num_shots": 7}
+
+
+def test_repeat_chain_without_compile_once_is_the_old_chain():
+    nodes, connectivity = _repeat.repeat_chain(FakeLibrary(), "LCH_Ramsey", repeats=3, compile_once=False)
+    assert list(nodes) == ["LCH_Ramsey_0", "LCH_Ramsey_1", "LCH_Ramsey_2"]
+    assert connectivity == [("LCH_Ramsey_0", "LCH_Ramsey_1"), ("LCH_Ramsey_1", "LCH_Ramsey_2")]
@@ -51,9 +51,10 @@ def _shell(name, **params):
     """A registered shell with no backend: ``check_reset_method`` reads only
     ``.params`` and the class until it reaches the device, so skipping __init__
     keeps the pure-policy tests off the vendor stack entirely."""
-    import customized.scqo.experiments  # noqa: F401  (registers the QM shells)
+    from customized.scqo.experiments import load_all
     from scqo.experiments import get
 
+    load_all()  # registers the QM shells
     cls = get(name)
     exp = cls.__new__(cls)
     exp.params = cls.Parameters(targets=["q1"], **params)
@@ -61,9 +62,10 @@ def _shell(name, **params):
 
 
 def _registered_names():
-    import customized.scqo.experiments  # noqa: F401
+    from customized.scqo.experiments import load_all
     from scqo.experiments import catalog
 
+    load_all()
     return sorted(e["name"] for e in catalog())
 
 
@@ -0,0 +1,101 @@
+"""Chunked, compressed raw-result storage (`customized.result_storage`) and
+the lazy `read_data.load_xarray_h5`."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from customized.read_data import load_xarray_h5
+from customized.result_storage import (
+    MIN_CHUNKED_BYTES,
+    chunk_shape,
+    raw_storage_encoding,
+    save_xarray_h5,
+    storage_encoding,
+    with_storage_encoding,
+)
+
+
+def _per_shot(n_qubits=3, n_shots=40_000, n_meas=2, seed=0):
+    rng = np.random.default_rng(seed)
+    dims = ("qubit", "shot_idx", "meas_idx")
+    shape = (n_qubits, n_shots, n_meas)
+    return xr.Dataset(
+        {
+            "I": (dims, np.round(rng.normal(0, 1e-3, shape) * 2**18) / 2**18),
+            "state": (dims, rng.integers(0, 2, shape, dtype=np.int8)),
+            "readout_frequency": (("qubit",), np.linspace(7e9, 7.2e9, n_qubits)),
+        },
+        coords={"qubit": [f"q{i + 1}" for i in range(n_qubits)], "shot_idx": np.arange(n_shots),
+                "meas_idx": np.arange(n_meas)},
+    )
+
+
+def test_chunk_shape_keeps_one_target_and_fills_from_the_innermost_axis():
+    dims = ("qubit", "shot_idx", "meas_idx")
+    assert chunk_shape(dims, (8, 10**6, 2), 8, chunk_bytes=8 * 1000) == (1, 500, 2)
+    assert chunk_shape(dims, (8, 100, 2), 8, chunk_bytes=2**20) == (1, 100, 2)
+    assert chunk_shape(("shot", "x"), (10**6, 10), 4, chunk_bytes=4 * 10) == (1, 10)
+    assert chunk_shape(("qubit_pair", "shot"), (4, 10), 1) == (1, 10)
+
+
+def test_only_large_numeric_variables_are_encoded():
+    ds = _per_shot()
+    ds["label"] = ("qubit", ["a", "b", "c"])
+    encoding = storage_encoding(ds)
+    assert set(encoding) == {"I"}  # state is 240 kB < MIN_CHUNKED_BYTES
+    assert ds["state"].nbytes < MIN_CHUNKED_BYTES
+    assert encoding["I"]["zlib"] and encoding["I"]["complevel"] == 1 and encoding["I"]["chunksizes"][0] == 1
+    assert storage_encoding(ds, compression="lzf")["I"]["compression"] == "lzf"
+    with pytest.raises(ValueError, match="gzip"):
+        storage_encoding(ds, compression="gzip")
+
+
+def test_with_storage_encoding_leaves_the_input_alone():
+    ds = _per_shot()
+    out = with_storage_encoding(ds)
+    assert "chunksizes" in out["I"].encoding and "chunksizes" not in ds["I"].encoding
+    assert np.shares_memory(out["I"].values, ds["I"].values)
+
+
+def test_fetched_raw_data_is_compressed_only_on_request(monkeypatch):
+    ds = _per_shot()
+    monkeypatch.delenv("LCHQM_RAW_STORAGE", raising=False)
+    assert raw_storage_encoding(ds) is ds
+    monkeypatch.setenv("LCHQM_RAW_STORAGE", "lzf")
+    assert raw_storage_encoding(ds)["I"].encoding["compression"] == "lzf"
+    monkeypatch.setenv("LCHQM_RAW_STORAGE", "1")
+    assert raw_storage_encoding(ds)["I"].encoding["zlib"]
+    monkeypatch.setenv("LCHQM_RAW_STORAGE", "gzip")
+    with pytest.warns(UserWarning, match="uncompressed"):
+        assert raw_storage_encoding(ds) is ds
+
+
+@pytest.mark.parametrize("compression", ["zlib", "lzf"])
+def test_round_trip_is_chunked_compressed_and_lazy(tmp_path, compression):
+    pytest.importorskip("h5netcdf")
+    h5py = pytest.importorskip("h5py")
+    ds = _per_shot()
+    path = save_xarray_h5(ds, str(tmp_path / "ds_raw.h5"), compression=compression)
+    assert not (tmp_path / "ds_raw.h5.partial").exists()
+
+    with h5py.File(path, "r") as f:
+        assert f["I"].chunks[0] == 1 and f["I"].compression == ("gzip" if compression == "zlib" else "lzf")
+        assert f["readout_frequency"].chunks is None
+
+    with load_xarray_h5(path, load_into_memory=False, chunks=None) as lazy:
+        assert not lazy["I"].variable._in_memory
+        np.testing.assert_array_equal(lazy["I"].sel(qubit="q2").values, ds["I"].sel(qubit="q2").values)
+    xr.testing.assert_identical(load_xarray_h5(path), ds)
+
+
+def test_the_default_lazy_load_is_dask_backed_on_the_file_chunks(tmp_path):
+    pytest.importorskip("h5netcdf")
+    pytest.importorskip("dask")
+    ds = _per_shot()
+    path = save_xarray_h5(ds, str(tmp_path / "ds_raw.h5"))
+    with load_xarray_h5(path, load_into_memory=False) as lazy:
+        assert lazy["I"].chunks is not None and lazy["I"].chunks[0] == (1, 1, 1)
+        np.testing.assert_allclose(lazy["I"].mean("shot_idx").values, ds["I"].mean("shot_idx").values)
@@ -0,0 +1,124 @@
+"""The SQLite run catalog (`customized.run_index`): indexing qualibrate run
+folders, the incremental scan, and the queries."""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from customized.run_index import Run, RunIndex, record_node
+
+
+def _save_run(root, run_id, name, when: datetime, outcomes=None, fit_results=None, qubits=None):
+    """A run folder laid out like qualibrate's ``node.save()``."""
+    folder = root / when.strftime("%Y-%m-%d") / f"#{run_id}_{name}_{when:%H%M%S}"
+    folder.mkdir(parents=True)
+    node = {
+        "id": run_id,
+        "created_at": when.astimezone().isoformat(),
+        "metadata": {"name": name, "status": "finished", "data_path": folder.relative_to(root).as_posix()},
+        "data": {
+            "parameters": {"model": {"qubits": qubits or list(outcomes or {})}},
+            "outcomes": outcomes or {},
+        },
+    }
+    (folder / "node.json").write_text(json.dumps(node))
+    (folder / "data.json").write_text(json.dumps({"fit_results": fit_results or {}, "ds_raw": "./ds_raw.h5"}))
+    (folder / "ds_raw.h5").write_bytes(b"")
+    return folder
+
+
+@pytest.fixture
+def lab(tmp_path):
+    now = datetime.now().replace(microsecond=0)
+    _save_run(tmp_path, 1, "LCH_T1_spectrum", now - timedelta(days=10),
+              {"q3": "successful"}, {"q3": {"T1": 20e-6}})
+    _save_run(tmp_path, 2, "LCH_T1_spectrum", now - timedelta(days=2),
+              {"q3": "successful", "q4": "failed"},
+              {"q3": {"T1": 25e-6, "fit": {"ok": True}}, "q4": {"T1": float("nan")}})
+    _save_run(tmp_path, 3, "LCH_T1_spectrum", now - timedelta(days=1), {"q3": "failed"}, {"q3": {"T1": 1.0}})
+    _save_run(tmp_path, 4, "LCH_Ramsey", now - timedelta(hours=1), {"q3": "successful"})
+    return tmp_path
+
+
+def test_a_scan_indexes_every_run_and_its_fit_results(lab):
+    with RunIndex(lab) as index:
+        assert index.refresh() == 4 and len(index) == 4
+        run = index.get(2)
+    assert isinstance(run, Run) and run.name == "LCH_T1_spectrum" and run.status == "finished"
+    assert run.outcomes == {"q3": "successful", "q4": "failed"}
+    assert run.fits == {"q3": {"T1": 25e-6, "fit.ok": 1.0}}  # NaN dropped, nested keys dotted
+    assert run.path == lab / run.created_at.strftime("%Y-%m-%d") / f"#2_LCH_T1_spectrum_{run.created_at:%H%M%S}"
+    assert run.file("ds_raw.h5").is_file()
+    with pytest.raises(FileNotFoundError, match="ds_fit.h5"):
+        run.file("ds_fit.h5")
+
+
+def test_latest_successful_t1_of_a_qubit_in_the_last_week(lab):
+    with RunIndex(lab) as index:
+        index.refresh()
+        assert index.latest("*T1*", target="q3", outcome="successful", since=timedelta(days=7)).id == 2
+        assert index.latest("*T1*", target="q3").id == 3
+        assert index.latest("LCH_T1", target="q3") is None  # no wildcard: an exact name
+        assert [r.id for r in index.runs(outcome="failed", newest_first=False)] == [2, 3]
+        assert [r.id for r in index.runs(until=timedelta(days=1, hours=12))] == [2, 1]
+        assert [(v, i) for _, v, i in index.fit_history("LCH_T1_spectrum", "q3", "T1", outcome="successful")] == [
+            (20e-6, 1), (25e-6, 2)]
+
+
+def test_refresh_only_picks_up_new_runs_and_follows_deletions(lab):
+    with RunIndex(lab) as index:
+        index.refresh()
+        assert index.refresh() == 0
+        new = _save_run(lab, 5, "LCH_Ramsey", datetime.now().replace(microsecond=0), {"q1": "successful"})
+        date = new.parent
+        os.utime(date, (date.stat().st_atime, date.stat().st_mtime + 1))  # coarse filesystem clocks
+        assert index.refresh() == 1 and index.latest("LCH_Ramsey").id == 5
+
+        (new / "node.json").unlink()
+        (new / "data.json").unlink()
+        (new / "ds_raw.h5").unlink()
+        new.rmdir()
+        os.utime(date, (date.stat().st_atime, date.stat().st_mtime + 2))
+        index.refresh()
+        assert index.get(5) is None and len(index) == 4
+
+
+def test_a_run_still_being_saved_is_looked_at_again(lab):
+    when = datetime.now().replace(microsecond=0)
+    pending = lab / when.strftime("%Y-%m-%d") / f"#6_LCH_Ramsey_{when:%H%M%S}"
+    pending.mkdir(parents=True)
+    with RunIndex(lab) as index:
+        index.refresh()
+        assert index.get(6) is None
+        pending.rmdir()
+        _save_run(lab, 6, "LCH_Ramsey", when, {"q2": "successful"})
+        index.refresh()  # the date folder was left unmarked: rescanned without an mtime change
+        assert index.get(6).outcomes == {"q2": "successful"}
+
+
+def test_record_node_indexes_the_saved_folder_and_never_raises(lab, caplog):
+    folder = _save_run(lab, 7, "LCH_power_rabi", datetime.now().replace(microsecond=0), {"q1": "successful"})
+    node = SimpleNamespace(storage_manager=SimpleNamespace(root_data_folder=lab,
+                                                           data_handler=SimpleNamespace(path=folder)))
+    assert record_node(node).id == 7
+    with RunIndex(lab) as index:
+        assert index.get(7).path == folder
+        assert index.get(1) is None  # recorded alone, no scan
+
+    assert record_node(SimpleNamespace(storage_manager=None)) is None
+    assert "not added to the run index" in caplog.text
+
+
+def test_rebuild_and_a_stale_schema_start_over(lab):
+    with RunIndex(lab) as index:
+        index.refresh()
+        index._db.execute("PRAGMA user_version = 0")
+        index._db.commit()
+    with RunIndex(lab) as index:
+        assert len(index) == 0
+        assert index.rebuild() == 4
@@ -0,0 +1,201 @@
+"""The QOP session pool (`customized.probes._session`) against a local stand-in
+manager — no instrument, no qm import.
+
+The stand-in QOP of ``conftest.py`` implements the manager surface the pool
+touches (``open_qm`` / ``list_open_qms`` and ``qm.close``), counts every call,
+and can be told to report "busy" a few times, so reuse, re-open on a config
+change, idle expiry and the failure path are all observable.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from customized.probes._session import (
+    AcquireTimings,
+    SessionPool,
+    config_fingerprint,
+)
+
+from conftest import FakeMachine, FakeManager, FakeProgram
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+CONFIG_A = {"version": 1, "elements": {"q1.xy": {"intermediate_frequency": 50e6}}}
+CONFIG_B = {"version": 1, "elements": {"q1.xy": {"intermediate_frequency": 51e6}}}
+
+
+@pytest.fixture()
+def clock():
+    return Clock()
+
+
+@pytest.fixture()
+def pool(clock):
+    pool = SessionPool(idle_timeout_s=60, clock=clock, reap_in_background=False)
+    yield pool
+    pool.close_all()
+
+
+def _lease(pool, machine, config=CONFIG_A, **kwargs):
+    with pool.session(machine, config, timeout=5, **kwargs) as (qm, timings):
+        return qm, timings
+
+
+def test_fingerprint_ignores_key_order():
+    a = {"x": 1, "y": {"b": 2, "a": (1, 2)}}
+    b = {"y": {"a": [1, 2], "b": 2}, "x": 1}
+    assert config_fingerprint(a) == config_fingerprint(b)
+    assert config_fingerprint(CONFIG_A) != config_fingerprint(CONFIG_B)
+
+
+def test_unchanged_config_reuses_manager_and_qm(pool):
+    machine = FakeMachine()
+    qm1, t1 = _lease(pool, machine)
+    qm2, t2 = _lease(pool, machine)
+    assert qm1 is qm2
+    assert machine.connects == 1
+    assert len(machine.manager.opened) == 1
+    assert not (t1.reused_manager or t1.reused_qm)
+    assert t2.reused_manager and t2.reused_qm
+    assert t2.connect_s == 0.0 and t2.open_s == 0.0
+    assert pool.last_timings is t2
+
+
+def test_changed_config_closes_before_reopening(pool):
+    machine = FakeMachine()
+    qm1, _ = _lease(pool, machine, CONFIG_A)
+    qm2, timings = _lease(pool, machine, CONFIG_B)
+    assert qm1.closed and not qm2.closed
+    assert qm2.config is CONFIG_B
+    assert timings.reused_manager and not timings.reused_qm
+    assert machine.connects == 1
+
+
+def test_pools_are_keyed_per_qop(pool):
+    m1, m2 = FakeMachine(host="a"), FakeMachine(host="b")
+    _lease(pool, m1)
+    _lease(pool, m2)
+    assert m1.connects == m2.connects == 1
+    assert set(pool.open_sessions()) == {("a", "lab"), ("b", "lab")}
+
+
+def test_idle_qm_is_closed_after_the_timeout(pool, clock):
+    machine = FakeMachine()
+    qm1, _ = _lease(pool, machine)
+    clock.now = 59.0
+    assert pool.close_idle() == 0 and not qm1.closed
+    clock.now = 60.0
+    assert pool.close_idle() == 1 and qm1.closed
+    qm2, timings = _lease(pool, machine)
+    assert qm2 is not qm1
+    assert timings.reused_manager and not timings.reused_qm
+
+
+def test_externally_closed_qm_is_reopened(pool):
+    machine = FakeMachine()
+    qm1, _ = _lease(pool, machine)
+    machine.manager.open_ids.clear()  # e.g. 00_close_other_qms ran meanwhile
+    qm2, timings = _lease(pool, machine)
+    assert qm2 is not qm1 and not timings.reused_qm
+
+
+def test_a_failed_body_never_hands_its_qm_on(pool):
+    machine = FakeMachine()
+    with pytest.raises(ZeroDivisionError):
+        with pool.session(machine, CONFIG_A, timeout=5) as (qm, _):
+            failed = qm
+            1 / 0
+    assert failed.closed
+    qm2, _ = _lease(pool, machine)
+    assert qm2 is not failed
+
+
+def test_busy_qop_is_polled_until_free(pool, monkeypatch):
+    import customized.probes._session as session_mod
+
+    monkeypatch.setattr(session_mod, "_BUSY_POLL_S", 0.0)
+    machine = FakeMachine(manager=FakeManager(busy_times=2))
+    qm, _ = _lease(pool, machine)
+    assert qm.id in machine.manager.open_ids
+
+
+def test_a_lease_from_another_thread_waits_for_the_first(pool):
+    machine = FakeMachine()
+    order = []
+    leased = threading.Event()
+
+    def second():
+        leased.wait()
+        with pool.session(machine, CONFIG_A, timeout=5) as (qm, timings):
+            order.append(("second", timings.reused_qm))
+
+    worker = threading.Thread(target=second)
+    with pool.session(machine, CONFIG_A, timeout=5):
+        worker.start()
+        leased.set()
+        worker.join(0.05)
+        assert worker.is_alive()  # queued behind the first lease
+        order.append(("first", False))
+    worker.join(5)
+    assert order == [("first", False), ("second", True)]
+
+
+def test_a_nested_lease_on_the_same_thread_is_refused(pool):
+    machine = FakeMachine()
+    with pool.session(machine, CONFIG_A, timeout=5):
+        with pytest.raises(RuntimeError, match="already leased"):
+            _lease(pool, machine)
+
+
+def test_open_errors_other_than_busy_raise(pool):
+    class Broken(FakeManager):
+        def open_qm(self, config, close_other_machines=False):
+            raise ValueError("invalid config")
+
+    with pytest.raises(ValueError, match="invalid config"):
+        _lease(pool, FakeMachine(manager=Broken()))
+
+
+def test_identical_programs_compile_once_per_open_qm(pool):
+    machine = FakeMachine()
+    with pool.session(machine, CONFIG_A, timeout=1) as (qm, timings):
+        first = pool.compile(qm, FakeProgram("rabi"), timings)
+        assert pool.compile(qm, FakeProgram("rabi"), timings) == first  # a rebuilt, identical program
+        other = pool.compile(qm, FakeProgram("ramsey"), timings)
+    assert other != first
+    assert (timings.compile_hits, timings.compile_misses) == (1, 2)
+    with pool.session(machine, CONFIG_A, timeout=1) as (qm, timings):
+        assert pool.compile(qm, FakeProgram("rabi"), timings) == first  # survives between leases
+    assert len(qm.compiled) == 2
+    assert pool.compile_stats() == {"hits": 2, "misses": 2, "cached": 2}
+
+
+def test_compiled_programs_are_dropped_with_their_qm(pool):
+    machine = FakeMachine()
+    with pool.session(machine, CONFIG_A, timeout=1) as (qm_a, timings):
+        pool.compile(qm_a, FakeProgram("rabi"), timings)
+    with pool.session(machine, CONFIG_B, timeout=1) as (qm_b, timings):
+        pool.compile(qm_b, FakeProgram("rabi"), timings)  # new config: a new QM compiles it again
+    assert qm_b is not qm_a and len(qm_b.compiled) == 1
+    assert pool.compile_stats() == {"hits": 0, "misses": 2, "cached": 1}
+
+
+def test_timings_accumulate_per_stage():
+    timings = AcquireTimings()
+    with timings.stage("execute"):
+        pass
+    with timings.stage("fetch"):
+        pass
+    assert timings.total_s == pytest.approx(timings.execute_s + timings.fetch_s)
+    assert set(timings.as_dict()) >= {"connect_s", "open_s", "execute_s", "fetch_s"}
+    assert "execute" in timings.summary()
@@ -0,0 +1,83 @@
+"""Single-shot raw-dataset normalization (`customized.node._single_shot`)
+against the `xr.apply_ufunc(extract_value, vectorize=True)` preamble it
+replaces."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import xarray as xr
+from qualang_tools.units import unit
+
+from customized.node._single_shot import iq_to_volts, normalize_single_shot, unwrap_values
+
+
+def _extract_value_path(ds):
+    def extract_value(element):
+        if isinstance(element, tuple):
+            return element[0]
+        return element
+
+    return xr.apply_ufunc(extract_value, ds, vectorize=True, dask="parallelized", output_dtypes=[float])
+
+
+def _raw(rng, n_qubits=2, n_runs=50):
+    dims = ("qubit", "n_runs")
+    values = rng.normal(0, 1e-3, (4, n_qubits, n_runs))
+    tuples = np.empty((n_qubits, n_runs), dtype=object)
+    for index in np.ndindex(tuples.shape):
+        tuples[index] = (values[1][index], 7)
+    mixed = tuples.copy()
+    mixed[0, ::3] = [float(v) for v in values[2][0, ::3]]
+    structured = np.zeros((n_qubits, n_runs), dtype=[("value", float), ("timestamp", np.int64)])
+    structured["value"] = values[3]
+    return xr.Dataset(
+        {"Ig": (dims, values[0]), "Qg": (dims, tuples), "Ie": (dims, mixed), "Qe": (dims, structured),
+         "state": (dims, rng.integers(0, 2, (n_qubits, n_runs)))},
+        coords={"qubit": [f"q{i + 1}" for i in range(n_qubits)], "n_runs": np.arange(n_runs)},
+    )
+
+
+def test_every_layout_unwraps_to_the_old_values():
+    ds = _raw(np.random.default_rng(0))
+    new = unwrap_values(ds)
+    for name in ("Ig", "Qg", "Ie", "state"):
+        old = _extract_value_path(ds[[name]])[name]
+        np.testing.assert_array_equal(new[name].values, old.values.astype(float))
+        assert new[name].dtype == np.float64
+    np.testing.assert_array_equal(new["Qe"].values, ds["Qe"].values["value"])
+    assert np.shares_memory(new["Ig"].values, ds["Ig"].values)  # already float: not copied
+    xr.testing.assert_identical(new.coords.to_dataset(), ds.coords.to_dataset())
+
+
+def test_float32_and_empty_variables():
+    ds = xr.Dataset({"I": ("n", np.arange(4, dtype=np.float32)), "Q": ("m", np.empty(0, dtype=object))})
+    new = unwrap_values(ds)
+    assert new["I"].dtype == np.float32 and new["Q"].dtype == np.float64 and new.sizes["m"] == 0
+
+
+def test_a_dask_backed_dataset_stays_lazy():
+    pytest.importorskip("dask")
+    ds = _raw(np.random.default_rng(1)).drop_vars("Qe").chunk({"n_runs": 20})
+    new = unwrap_values(ds)
+    assert new["Qg"].chunks is not None
+    xr.testing.assert_equal(new.compute(), unwrap_values(ds.compute()))
+
+
+def test_volts_follow_demod2volts_per_qubit():
+    ds = unwrap_values(_raw(np.random.default_rng(2)))
+    qubits = [SimpleNamespace(name=f"q{i + 1}",
+                              resonator=SimpleNamespace(operations={"readout": SimpleNamespace(length=n)}))
+              for i, n in enumerate((1000, 2500))]
+    u = unit(coerce_to_integer=True)
+    for single_demod in (False, True):
+        volts = iq_to_volts(ds, qubits, ["Ig", "Qg"], single_demod=single_demod)
+        for q in qubits:
+            expected = u.demod2volts(ds["Ig"].sel(qubit=q.name).values, q.resonator.operations["readout"].length,
+                                     single_demod=single_demod)
+            np.testing.assert_allclose(volts["Ig"].sel(qubit=q.name).values, expected, rtol=1e-12)
+        np.testing.assert_array_equal(volts["Ie"].values, ds["Ie"].values)  # not in IQ_list
+    both = normalize_single_shot(_raw(np.random.default_rng(2)), qubits, ["Ig", "Qg", "Ie", "Qe"])
+    xr.testing.assert_allclose(both, iq_to_volts(ds, qubits, ["Ig", "Qg", "Ie", "Qe"]))
@@ -0,0 +1,74 @@
+"""Per-stage acquisition tracing (`customized.probes._trace`): spans, byte
+accounting, the Chrome trace export, and the session-pool stages feeding it."""
+
+from __future__ import annotations
+
+import json
+import threading
+
+from customized.probes import _trace
+from customized.probes._session import AcquireTimings
+
+
+def test_spans_are_no_ops_without_a_current_trace():
+    with _trace.span("fetch") as entry:
+        _trace.record_bytes(100)
+    assert entry is None
+    assert _trace.current_trace() is None
+
+
+def test_nested_spans_time_and_count_bytes_into_the_innermost():
+    with _trace.tracing(label="ramsey") as trace:
+        with _trace.span("execute"):
+            with _trace.span("fetch"):
+                _trace.record_bytes(800)
+                _trace.record_bytes(200)
+            _trace.record_bytes(5)
+    assert _trace.current_trace() is None
+    by_name = {s.name: s for s in trace.spans}
+    assert by_name["fetch"].bytes == 1000
+    assert by_name["execute"].bytes == 5
+    assert by_name["execute"].wall_s >= by_name["fetch"].wall_s >= 0
+    assert by_name["fetch"].start_s >= by_name["execute"].start_s
+    record = trace.as_dict()
+    assert record["label"] == "ramsey"
+    assert [s["name"] for s in record["spans"]] == ["execute", "fetch"]
+    assert set(record["by_stage"]) == {"execute", "fetch"}
+
+
+def test_a_trace_continues_on_another_thread():
+    with _trace.tracing() as trace:
+        with _trace.span("probe"):
+            pass
+
+    def worker():
+        with _trace.tracing(trace), _trace.span("fetch"):
+            pass
+
+    thread = threading.Thread(target=worker, name="qm-hardware_0")
+    thread.start()
+    thread.join()
+    assert [(s.name, s.thread) for s in trace.spans][-1] == ("fetch", "qm-hardware_0")
+
+
+def test_chrome_trace_export(tmp_path):
+    with _trace.tracing(label="t1") as trace:
+        with _trace.span("execute"):
+            pass
+    path = trace.write_chrome_trace(tmp_path / "run" / "t1.trace.json")
+    events = json.loads(path.read_text())["traceEvents"]
+    (complete,) = [e for e in events if e["ph"] == "X"]
+    assert complete["name"] == "execute" and complete["dur"] >= 0
+    assert {"cpu_s", "bytes", "peak_rss_mb"} <= set(complete["args"])
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in events)
+
+
+def test_session_stages_are_recorded_as_spans():
+    timings = AcquireTimings()
+    with _trace.tracing() as trace:
+        with timings.stage("execute"):
+            pass
+        with timings.stage("fetch"):
+            pass
+    assert [s.name for s in trace.spans] == ["execute", "fetch"]
+    assert timings.execute_s >= 0 and timings.fetch_s >= 0